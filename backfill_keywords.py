@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+保存済みの面談記録のキーワードを現在のキーワード辞書で抽出し直すスクリプト
+
+keywords.json に語を追加した後などに実行する。
+辞書のバージョンが古い記録だけを少しずつ更新するため、途中で止めても再実行できる。
+
+使い方:
+    python backfill_keywords.py [--batch-size 500] [--all]
+"""
+import argparse
+
+from src.database.history import HistoryManager
+from src.database.keywords import get_keyword_dictionary
+from src.database.connection import close_all_pools
+
+
+def main():
+    parser = argparse.ArgumentParser(description='面談記録のキーワード再抽出')
+    parser.add_argument('--batch-size', type=int, default=500, help='1回に更新する件数')
+    parser.add_argument('--all', action='store_true', help='辞書のバージョンに関係なくすべて更新')
+    args = parser.parse_args()
+
+    dictionary = get_keyword_dictionary()
+    print(f"📖 キーワード辞書: {len(dictionary)}語（バージョン {dictionary.version}）")
+
+    manager = HistoryManager()
+    try:
+        updated = manager.reextract_keywords(batch_size=args.batch_size, force=args.all)
+    finally:
+        close_all_pools()
+
+    if updated:
+        print(f"\n✅ {updated}件の面談記録を更新しました")
+    else:
+        print("更新が必要な面談記録はありませんでした")
+
+
+if __name__ == '__main__':
+    main()
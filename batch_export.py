@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+保存済みの面談記録からアセスメントシートを一括で作成するスクリプト
+
+年度末などに多数のケースのシートを作り直すときに使う。
+xlsxの作成・暗号化はCPUコア数に応じて並列に実行し、
+失敗した記録があっても最後まで続けて、結果を出力先のmanifest_*.jsonに記録する。
+パスワードは記録の区のエリアごとに config.py の AREA_PASSWORDS から決める
+（区が未入力などで決められない記録は、--password / --no-password を指定しない限り出力しない）。
+
+使い方:
+    python batch_export.py [--output-dir 出力先] [--ids 1 2 3] [--since 2025-04-01] [--until 2026-03-31]
+                           [--issue 生活リズム 対人緊張の高さ] [--school-level 中学生]
+                           [--workers 4] [--password パスワード | --no-password]
+"""
+import argparse
+
+from src.database.issues import SCHOOL_LEVELS
+from src.excel.batch_export import BatchExporter
+from src.database.connection import close_all_pools
+
+
+def main():
+    parser = argparse.ArgumentParser(description='アセスメントシートの一括出力')
+    parser.add_argument('--output-dir', help='出力先フォルダ（省略時は出力先の下に日時のフォルダを作成）')
+    parser.add_argument('--template', help='テンプレートのパス')
+    parser.add_argument('--ids', type=int, nargs='+', help='面談記録ID')
+    parser.add_argument('--since', help='面談実施日の開始（YYYY-MM-DD）')
+    parser.add_argument('--until', help='面談実施日の終了（YYYY-MM-DD）')
+    parser.add_argument('--issue', nargs='+', help='課題名（すべてに該当する記録のみ）')
+    parser.add_argument('--school-level', choices=list(SCHOOL_LEVELS), help='学校段階')
+    parser.add_argument('--workers', type=int, help='並列数（省略時はCPUコア数）')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--password', help='すべてのシートに使うパスワード（省略時は区のエリアごとにconfig.pyのAREA_PASSWORDS）')
+    group.add_argument('--no-password', action='store_true', help='パスワード保護なしで出力')
+    args = parser.parse_args()
+
+    exporter = BatchExporter(
+        template_path=args.template,
+        output_dir=args.output_dir,
+        password='' if args.no_password else args.password,
+        max_workers=args.workers,
+    )
+
+    def progress(done, total, result):
+        mark = '✓' if result['success'] else '❌'
+        detail = result['path'] if result['success'] else result['error']
+        print(f"[{done}/{total}] {mark} ID {result['id']}: {detail}")
+
+    print(f"📋 テンプレート: {exporter.template_path}")
+    print(f"📁 出力先: {exporter.output_dir}")
+    try:
+        manifest = exporter.run(
+            ids=args.ids, since=args.since, until=args.until, progress=progress,
+            issues=args.issue, school_level=args.school_level,
+        )
+    finally:
+        close_all_pools()
+
+    print()
+    print(f"✅ {manifest['succeeded']}件を作成しました（{manifest['elapsed_sec']}秒、{manifest['workers']}プロセス）")
+    if manifest['failed']:
+        print(f"⚠️ {manifest['failed']}件でエラーが発生しました")
+    print(f"📝 マニフェスト: {manifest['manifest_path']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+一括登録ベンチマーク（1件ずつ / まとめて）
+- 面談記録: save_interview（1件ごとにcommit・チェックポイント） / save_interviews
+- 支援員: add_staff / add_staff_many
+- 未割り当てケース: add_unassigned_case / upsert_unassigned_cases（半数は既存ケースの更新）
+
+使い方:
+    python benchmarks/bench_bulk_insert.py [件数] [--batch-size 500] [--dir 計測用フォルダ]
+
+Dropbox上の実際の書き込みコストを測る場合は --dir にDropbox内のフォルダを指定する。
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.connection import close_all_pools
+from src.database.history import HistoryManager
+from src.database.staff import StaffManager
+from bench_journal_mode import make_record
+
+
+def make_staff(i):
+    """ベンチマーク用の支援員"""
+    return {
+        'name': f'ベンチ支援員{i:05d}',
+        'age': 25 + i % 30,
+        'gender': '男性' if i % 2 else '女性',
+        'region': '大阪府大阪市',
+        'hobbies_skills': 'ゲーム、読書',
+        'work_days': '月火水木金',
+        'work_hours': '10:00-17:00',
+    }
+
+
+def make_case(i, distinct):
+    """ベンチマーク用の未割り当てケース（ケース番号はdistinct件で一巡し、以降は更新になる）"""
+    return {
+        'case_number': f'B{i % distinct:05d}',
+        'district': '大阪市北区',
+        'child_name': f'児童{i}',
+        'child_age': 6 + i % 12,
+        'child_gender': '男性' if i % 2 else '女性',
+        'preferred_day': '水',
+        'preferred_time': '15:00-16:00',
+        'frequency': '週1回',
+    }
+
+
+def fresh_db(base_dir, name):
+    db_path = Path(base_dir) / f'bench_{name}.db'
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        path = Path(str(db_path) + suffix)
+        if path.exists():
+            path.unlink()
+    return db_path
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(base_dir, count, batch_size):
+    """各APIの1件ずつとまとめての所要時間（秒）"""
+    results = []
+
+    records = [make_record(i) for i in range(count)]
+    single = HistoryManager(fresh_db(base_dir, 'history_single'))
+    bulk = HistoryManager(fresh_db(base_dir, 'history_bulk'))
+    results.append((
+        '面談記録',
+        timed(lambda: [single.save_interview(*record) for record in records]),
+        timed(lambda: bulk.save_interviews(records, batch_size=batch_size)),
+    ))
+
+    staff_list = [make_staff(i) for i in range(count)]
+    single = StaffManager(fresh_db(base_dir, 'staff_single'))
+    bulk = StaffManager(fresh_db(base_dir, 'staff_bulk'))
+    results.append((
+        '支援員',
+        timed(lambda: [single.add_staff(staff) for staff in staff_list]),
+        timed(lambda: bulk.add_staff_many(staff_list, batch_size=batch_size)),
+    ))
+
+    cases = [make_case(i, max(1, count // 2)) for i in range(count)]
+    results.append((
+        '未割り当てケース',
+        timed(lambda: [single.add_unassigned_case(case) for case in cases]),
+        timed(lambda: bulk.upsert_unassigned_cases(cases, batch_size=batch_size)),
+    ))
+
+    close_all_pools()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='一括登録ベンチマーク')
+    parser.add_argument('count', nargs='?', type=int, default=2000, help='登録件数')
+    parser.add_argument('--batch-size', type=int, default=500, help='1トランザクションの件数')
+    parser.add_argument('--dir', help='計測用フォルダ（省略時は一時フォルダ）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(args.dir) if args.dir else Path(tmp_dir)
+        base_dir.mkdir(parents=True, exist_ok=True)
+
+        # 保存ごとのログ出力を抑止
+        import builtins
+        original_print = builtins.print
+        builtins.print = lambda *a, **k: None
+        try:
+            results = run(base_dir, args.count, args.batch_size)
+        finally:
+            builtins.print = original_print
+
+    print('=' * 70)
+    print(f'一括登録（{args.count}件 / バッチ {args.batch_size}件）')
+    print('=' * 70)
+    print(f"{'対象':<14}{'1件ずつ 件/秒':>16}{'まとめて 件/秒':>16}{'倍率':>10}")
+    for name, single, bulk in results:
+        print(f"{name:<14}{args.count / single:>16,.0f}{args.count / bulk:>16,.0f}{single / bulk:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
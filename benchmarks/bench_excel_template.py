@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+アセスメントシート生成ベンチマーク（テンプレートキャッシュ）
+- cold: テンプレートの読み込み・索引化を含む1枚目の生成時間
+- warm: キャッシュ済みテンプレートからの1枚あたりの生成時間
+- 比較: 毎回load_workbookでテンプレートを開く従来の方式（openpyxlがある場合）
+
+使い方:
+    python benchmarks/bench_excel_template.py [生成枚数] [--template テンプレートのパス]
+
+いずれもメモリ上でxlsxを作成するまでを計測し、ファイル書き込み・暗号化は含まない。
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.excel.excel_generator_with_password import (
+    SHEET_NAME, build_cell_values, render_assessment_workbook, set_cell_value_preserve_format
+)
+from src.excel.template_cache import clear_template_cache
+
+
+def make_data(i):
+    """ベンチマーク用の面談データ"""
+    return {
+        'supportNumber': f'2025{i:04d}',
+        'supporter': '田中支援員',
+        'interviewDate': '5月15日',
+        'guardianName': '山田花子',
+        'childName': f'山田太郎{i}',
+        'gender': '男性' if i % 2 else '女性',
+        'schoolName': '登美丘中学校',
+        'grade': 1 + i % 12,
+        'singleParent': '該当しない',
+        'confirmDate': '2025年5月15日',
+        'issues': {
+            '不登校': {'checked': True, 'detail': '週0回'},
+            '生活リズム': {'checked': bool(i % 2), 'detail': '昼夜逆転'},
+            '対人緊張の高さ': {'checked': True, 'detail': '初対面で緊張'},
+        },
+        'futurePath': {'type': '進学', 'detail': '通信制高校を希望'},
+        'shortTermPlan': {
+            'issue': '生活リズムの改善',
+            'currentStatus': '昼夜逆転、起床11時頃',
+            'needsChild': '朝起きられるようになりたい',
+            'needsGuardian': '規則正しい生活を送ってほしい',
+            'goal': '9時までに起床できるようになる',
+            'method': '段階的に起床時間を早める',
+        },
+        'longTermPlan': {
+            'issue': '進学準備',
+            'currentStatus': '学習習慣なし',
+            'needsChild': '高校に進学したい',
+            'needsGuardian': '高校卒業まで支援してほしい',
+            'goal': '通信制高校に合格する',
+            'method': '基礎学力の補習',
+        },
+    }
+
+
+def render_legacy(template_path, data):
+    """従来の方式（毎回テンプレートをload_workbookで開く）"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(template_path)
+    ws = wb[SHEET_NAME]
+    for cell_ref, value in build_cell_values(data).items():
+        set_cell_value_preserve_format(ws, cell_ref, value)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(render, template_path, count):
+    times = []
+    for i in range(count):
+        start = time.perf_counter()
+        render(template_path, make_data(i))
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description='アセスメントシート生成ベンチマーク')
+    parser.add_argument('count', nargs='?', type=int, default=50, help='生成枚数')
+    parser.add_argument('--template', default='templates/アセスメントシート原本.xlsx', help='テンプレートのパス')
+    args = parser.parse_args()
+
+    clear_template_cache()
+    cold = measure(render_assessment_workbook, args.template, 1)[0]
+    warm = measure(render_assessment_workbook, args.template, args.count)
+
+    print('=' * 70)
+    print(f'アセスメントシート生成（{args.count}枚）')
+    print('=' * 70)
+    print(f"{'方式':<20}{'平均ms':>12}{'p95ms':>12}")
+    print(f"{'キャッシュ cold':<18}{cold:>12.2f}{'-':>12}")
+    print(f"{'キャッシュ warm':<18}{statistics.mean(warm):>12.2f}{sorted(warm)[int(len(warm) * 0.95) - 1]:>12.2f}")
+
+    try:
+        legacy = measure(render_legacy, args.template, args.count)
+    except ImportError:
+        print('（openpyxlがないため従来方式の計測は省略）')
+        return
+    print(f"{'従来 load_workbook':<18}{statistics.mean(legacy):>12.2f}{sorted(legacy)[int(len(legacy) * 0.95) - 1]:>12.2f}")
+    print(f'高速化: {statistics.mean(legacy) / statistics.mean(warm):.1f}倍')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+ジャーナルモード比較ベンチマーク（delete / wal）
+- 面談記録の保存（1件ごとにcommit、WALは保存後にチェックポイント）
+- 類似ケース検索・件数取得のレイテンシ
+
+使い方:
+    python benchmarks/bench_journal_mode.py [保存件数] [--dir 計測用フォルダ]
+
+Dropbox上の実際の書き込みコストを測る場合は --dir にDropbox内のフォルダを指定する。
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.connection import get_pool
+from src.database.history import HistoryManager
+
+
+def make_record(i):
+    """ベンチマーク用の面談データ"""
+    memos = [
+        '昼夜逆転が続いている。ゲームを長時間している。',
+        '友達関係で不安が強く、対人緊張がある。',
+        '学習の遅れがあり、進学について悩んでいる。',
+        '通院中でADHDの診断あり。',
+    ]
+    interview_data = {
+        '児童イニシャル': f'T{i % 100:02d}',
+        '学年': 1 + i % 12,
+        '性別': '男性' if i % 2 else '女性',
+        '学校名': 'ベンチ中学校',
+        'メモ': memos[i % len(memos)],
+        '面談実施日': datetime(2025, 1 + i % 12, 1 + i % 28),
+    }
+    assessment_data = {
+        'issues': {
+            '不登校': {'該当': True, '詳細': '週0回'},
+            '生活リズム': {'該当': bool(i % 3), '詳細': ''},
+        },
+    }
+    return interview_data, assessment_data
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def run(mode, base_dir, count, queries):
+    """1つのジャーナルモードで計測"""
+    db_path = Path(base_dir) / f'bench_{mode}.db'
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        path = Path(str(db_path) + suffix)
+        if path.exists():
+            path.unlink()
+
+    pool = get_pool(db_path, journal_mode=mode)
+    manager = HistoryManager(db_path)
+
+    insert_times = []
+    for i in range(count):
+        interview_data, assessment_data = make_record(i)
+        start = time.perf_counter()
+        manager.save_interview(interview_data, assessment_data)
+        insert_times.append((time.perf_counter() - start) * 1000)
+
+    query_times = []
+    for i in range(queries):
+        interview_data, _ = make_record(i)
+        start = time.perf_counter()
+        manager.search_similar_cases(interview_data)
+        manager.get_history_count()
+        query_times.append((time.perf_counter() - start) * 1000)
+
+    pool.close_all()
+    leftovers = [s for s in ('-wal', '-shm') if Path(str(db_path) + s).exists()]
+
+    return {
+        'mode': mode,
+        'insert_mean': statistics.mean(insert_times),
+        'insert_p95': percentile(insert_times, 0.95),
+        'query_mean': statistics.mean(query_times),
+        'query_p95': percentile(query_times, 0.95),
+        'leftovers': leftovers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ジャーナルモード比較ベンチマーク')
+    parser.add_argument('count', nargs='?', type=int, default=200, help='保存件数')
+    parser.add_argument('--queries', type=int, default=200, help='検索回数')
+    parser.add_argument('--dir', help='計測用フォルダ（省略時は一時フォルダ）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base_dir = Path(args.dir) if args.dir else Path(tmp_dir)
+        base_dir.mkdir(parents=True, exist_ok=True)
+
+        # 保存ごとのログ出力を抑止
+        import builtins
+        original_print = builtins.print
+        builtins.print = lambda *a, **k: None
+        try:
+            results = [run(mode, base_dir, args.count, args.queries) for mode in ('delete', 'wal')]
+        finally:
+            builtins.print = original_print
+
+    print('=' * 70)
+    print(f'ジャーナルモード比較（保存 {args.count}件 / 検索 {args.queries}回）')
+    print('=' * 70)
+    print(f"{'モード':<8}{'保存 平均ms':>14}{'保存 p95ms':>14}{'検索 平均ms':>14}{'検索 p95ms':>14}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['insert_mean']:>14.3f}{r['insert_p95']:>14.3f}"
+              f"{r['query_mean']:>14.3f}{r['query_p95']:>14.3f}")
+    for r in results:
+        if r['leftovers']:
+            print(f"⚠️ {r['mode']}: 終了後に残ったファイル {r['leftovers']}")
+    print('終了後の -wal/-shm 残存チェック: ' + ('OK' if not any(r['leftovers'] for r in results) else 'NG'))
+
+
+if __name__ == '__main__':
+    main()
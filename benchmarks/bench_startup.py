@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+起動時間ベンチマーク（ウィンドウを作る前まで）
+- 新しいプロセスで main.py をimportし、import完了までの時間とプロセス全体の時間を測る
+- 最初のウィンドウが表示されるまでの時間は python main.py --trace-startup で測る（画面が必要）
+  画面のない環境でも、ウィンドウを作る前の処理の変化はこのベンチマークで比べられる
+
+使い方:
+    python benchmarks/bench_startup.py [回数] [--tree 計測するフォルダ] [--dir 計測用フォルダ]
+
+変更前と比べる場合は git worktree add で変更前のコミットを別のフォルダに取り出し、--tree に指定する。
+DBは --dir（省略時は一時フォルダ）に作成し、Dropboxは使わない。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+
+# 子プロセスで実行する処理（main.pyのimport完了までの時間を返す）
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, '.')
+import main
+print(json.dumps({'import': time.perf_counter() - start}))
+'''
+
+
+def measure(tree, db_dir):
+    """1回起動してimportの時間とプロセス全体の時間（秒）"""
+    env = dict(
+        os.environ,
+        ASSESSMENT_TOOL_DATABASE_PATH=str(Path(db_dir) / 'records.db'),
+        ASSESSMENT_TOOL_USE_DROPBOX='false',
+        XDG_CACHE_HOME=str(Path(db_dir) / 'cache'),
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=tree, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings['import'], wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description='起動時間ベンチマーク（ウィンドウを作る前まで）')
+    parser.add_argument('runs', nargs='?', type=int, default=21, help='起動する回数（中央値を表示）')
+    parser.add_argument('--tree', default=str(REPO_DIR), help='計測するフォルダ（main.pyのあるフォルダ）')
+    parser.add_argument('--dir', help='DBを作成するフォルダ（省略時は一時フォルダ）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_dir = args.dir or tmp
+        # 1回目は.pycの作成を含むため除く
+        measure(args.tree, db_dir)
+        results = [measure(args.tree, db_dir) for _ in range(args.runs)]
+
+    imports = [r[0] * 1000 for r in results]
+    walls = [r[1] * 1000 for r in results]
+    print(f"📊 {args.tree}（{args.runs}回の中央値）")
+    print(f"  main.pyのimport: {statistics.median(imports):.1f} ms"
+          f"（最小 {min(imports):.1f} / 最大 {max(imports):.1f}）")
+    print(f"  プロセス全体:   {statistics.median(walls):.1f} ms"
+          f"（最小 {min(walls):.1f} / 最大 {max(walls):.1f}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import json
 import os
 import sys
 from pathlib import Path
@@ -15,8 +16,8 @@ CLAUDE_API_KEY = "sk-ant-REDACTED
 # Dropbox設定
 # ============================================
 
-# Dropbox連携を有効化するか
-USE_DROPBOX = True  # Trueで自動的にDropboxに保存、Falseで通常のoutputフォルダに保存
+# Dropbox連携を有効化するか（既定値。環境変数・設定ファイルで上書きできる）
+DEFAULT_USE_DROPBOX = True  # Trueで自動的にDropboxに保存、Falseで通常のoutputフォルダに保存
 
 # Dropboxフォルダのパスを自動検出
 DROPBOX_PATH = Path.home() / 'Dropbox'
@@ -29,20 +30,6 @@ DROPBOX_ALTERNATIVES = [
     Path('C:/Dropbox') if os.name == 'nt' else None,
 ]
 
-def get_dropbox_path():
-    """Dropboxフォルダのパスを取得"""
-    for path in DROPBOX_ALTERNATIVES:
-        if path and path.exists():
-            return path
-    return None
-
-# Dropboxが利用可能かチェック
-def check_dropbox_available():
-    """Dropboxが利用可能か確認"""
-    if not USE_DROPBOX:
-        return False
-    return get_dropbox_path() is not None
-
 # ============================================
 # パス設定（実行ファイル対応）
 # ============================================
@@ -60,29 +47,185 @@ else:
 # ディレクトリ設定
 TEMPLATE_DIR = BASE_DIR / 'templates'
 
-# 出力ディレクトリの設定（Dropbox優先）
-if USE_DROPBOX and check_dropbox_available():
-    dropbox_path = get_dropbox_path()
-    OUTPUT_DIR = dropbox_path / '不登校支援ツール' / 'output'
-    print(f"✅ Dropbox連携が有効です: {OUTPUT_DIR}")
-else:
-    OUTPUT_DIR = USER_DIR / 'output'
-    if USE_DROPBOX:
-        print("⚠️ Dropboxフォルダが見つかりません。ローカルに保存します。")
-
-# データベースパスの設定（Dropbox優先）
-if USE_DROPBOX and check_dropbox_available():
-    dropbox_path = get_dropbox_path()
-    DATABASE_PATH = dropbox_path / '不登校支援ツール' / 'data' / 'records.db'
-    print(f"✅ データベースをDropboxに保存します: {DATABASE_PATH}")
-else:
-    DATABASE_PATH = USER_DIR / 'data' / 'records.db'
-    if USE_DROPBOX:
-        print("⚠️ Dropboxフォルダが見つかりません。データベースはローカルに保存します。")
+# データベースのジャーナルモード（既定値）
+# 'wal'   : WAL + synchronous=NORMAL（面談記録の保存後・終了時にTRUNCATE、書き込みが止まった時にPASSIVEで
+#             チェックポイントし、終了時はDELETEに戻す）
+# 'delete': 従来のロールバックジャーナル（書き込みのたびに本体ファイルを更新）
+DEFAULT_DATABASE_JOURNAL_MODE = 'wal'
+
+# ============================================
+# 遅延評価される設定
+# ============================================
+# Dropboxの検出・フォルダの作成は、importした時点ではなく最初に参照した時に1回だけ行う
+# （config.OUTPUT_DIR などはモジュールの __getattr__ から Settings の値を返す）。
+#
+# 次の設定は環境変数（ASSESSMENT_TOOL_<名前>）または設定ファイル（JSON）で上書きできる。
+#   USE_DROPBOX, DROPBOX_PATH, OUTPUT_DIR, DATABASE_PATH, UPDATE_SOURCE_PATH, DATABASE_JOURNAL_MODE
+# 設定ファイルは環境変数 ASSESSMENT_TOOL_SETTINGS のパス、なければ USER_DIR/settings.json。
+# 優先順位: 環境変数 > 設定ファイル > このファイルの既定値
 
-# ディレクトリ作成
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
+ENV_PREFIX = 'ASSESSMENT_TOOL_'
+SETTINGS_FILENAME = 'settings.json'
+
+
+class Settings:
+    """最初に参照された時に解決し、結果を保持する設定"""
+
+    def __init__(self, environ=None, settings_path=None):
+        self._environ = os.environ if environ is None else environ
+        self._settings_path = settings_path
+        self._values = {}
+
+    def _cached(self, name, resolve):
+        if name not in self._values:
+            self._values[name] = resolve()
+        return self._values[name]
+
+    def _file_values(self):
+        """設定ファイルの内容（なければ空）"""
+        def load():
+            path = self._settings_path or self._environ.get(f'{ENV_PREFIX}SETTINGS') or USER_DIR / SETTINGS_FILENAME
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    values = json.load(f)
+            except FileNotFoundError:
+                return {}
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 設定ファイルを読み込めませんでした: {path} ({e})")
+                return {}
+            return values if isinstance(values, dict) else {}
+        return self._cached('_file', load)
+
+    def _override(self, name):
+        """環境変数・設定ファイルの値（指定がなければNone）"""
+        value = self._environ.get(f'{ENV_PREFIX}{name}')
+        if value is not None and value != '':
+            return value
+        return self._file_values().get(name)
+
+    @property
+    def use_dropbox(self):
+        def resolve():
+            value = self._override('USE_DROPBOX')
+            if value is None:
+                return DEFAULT_USE_DROPBOX
+            if isinstance(value, str):
+                return value.strip().lower() in ('1', 'true', 'yes', 'on')
+            return bool(value)
+        return self._cached('use_dropbox', resolve)
+
+    @property
+    def dropbox_path(self):
+        """Dropboxフォルダのパス（Dropbox連携が無効・見つからない場合はNone）"""
+        def resolve():
+            if not self.use_dropbox:
+                return None
+            value = self._override('DROPBOX_PATH')
+            candidates = [Path(value).expanduser()] if value else DROPBOX_ALTERNATIVES
+            for path in candidates:
+                if path and path.exists():
+                    return path
+            return None
+        return self._cached('dropbox_path', resolve)
+
+    @property
+    def app_dropbox_dir(self):
+        """Dropbox上のアプリのフォルダ（Dropboxがない場合はNone）"""
+        return self.dropbox_path / '不登校支援ツール' if self.dropbox_path else None
+
+    @property
+    def output_dir(self):
+        """出力ディレクトリ（Dropbox優先。初回参照時に作成）"""
+        def resolve():
+            value = self._override('OUTPUT_DIR')
+            if value:
+                path = Path(value).expanduser()
+            elif self.app_dropbox_dir:
+                path = self.app_dropbox_dir / 'output'
+                print(f"✅ Dropbox連携が有効です: {path}")
+            else:
+                path = USER_DIR / 'output'
+                if self.use_dropbox:
+                    print("⚠️ Dropboxフォルダが見つかりません。ローカルに保存します。")
+            path.mkdir(parents=True, exist_ok=True)
+            return path
+        return self._cached('output_dir', resolve)
+
+    @property
+    def database_path(self):
+        """データベースのパス（Dropbox優先。初回参照時にフォルダを作成）"""
+        def resolve():
+            value = self._override('DATABASE_PATH')
+            if value:
+                path = Path(value).expanduser()
+            elif self.app_dropbox_dir:
+                path = self.app_dropbox_dir / 'data' / 'records.db'
+                print(f"✅ データベースをDropboxに保存します: {path}")
+            else:
+                path = USER_DIR / 'data' / 'records.db'
+                if self.use_dropbox:
+                    print("⚠️ Dropboxフォルダが見つかりません。データベースはローカルに保存します。")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            return path
+        return self._cached('database_path', resolve)
+
+    @property
+    def database_journal_mode(self):
+        return self._cached(
+            'database_journal_mode',
+            lambda: str(self._override('DATABASE_JOURNAL_MODE') or DEFAULT_DATABASE_JOURNAL_MODE).lower()
+        )
+
+    @property
+    def update_source_path(self):
+        """Dropbox上に最新版のexeを置く場合のパス（Dropboxがない場合はNone）"""
+        def resolve():
+            value = self._override('UPDATE_SOURCE_PATH')
+            if value:
+                return Path(value).expanduser()
+            if not self.app_dropbox_dir:
+                if self.use_dropbox:
+                    print("⚠️ Dropboxが見つかりません。自動アップデートは無効です。")
+                return None
+            path = self.app_dropbox_dir / '最新版' / '不登校支援ツール.exe'
+            # フォルダが存在しない場合は作成
+            path.parent.mkdir(parents=True, exist_ok=True)
+            print(f"✅ 自動アップデートが有効です: {path}")
+            return path
+        return self._cached('update_source_path', resolve)
+
+    def reset(self):
+        """解決済みの値を破棄（次に参照した時に解決し直す）"""
+        self._values.clear()
+
+
+settings = Settings()
+
+# config.<名前> で参照できる遅延評価の設定
+_LAZY_SETTINGS = {
+    'USE_DROPBOX': 'use_dropbox',
+    'OUTPUT_DIR': 'output_dir',
+    'DATABASE_PATH': 'database_path',
+    'DATABASE_JOURNAL_MODE': 'database_journal_mode',
+    'UPDATE_SOURCE_PATH': 'update_source_path',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_SETTINGS:
+        return getattr(settings, _LAZY_SETTINGS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_dropbox_path():
+    """Dropboxフォルダのパスを取得"""
+    return settings.dropbox_path
+
+
+# Dropboxが利用可能かチェック
+def check_dropbox_available():
+    """Dropboxが利用可能か確認"""
+    return settings.dropbox_path is not None
 
 # API設定
 API_MAX_RETRIES = 3
@@ -116,30 +259,27 @@ APP_NAME = "不登校支援 - 初回アセスメント支援ツール"
 # 自動アップデート設定
 UPDATE_CHECK_ENABLED = True
 
-# Dropbox上に最新版のexeを置く場合のパス（自動検出）
-if USE_DROPBOX and check_dropbox_available():
-    dropbox_path = get_dropbox_path()
-    UPDATE_SOURCE_PATH = dropbox_path / '不登校支援ツール' / '最新版' / '不登校支援ツール.exe'
-    # フォルダが存在しない場合は作成
-    UPDATE_SOURCE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    print(f"✅ 自動アップデートが有効です: {UPDATE_SOURCE_PATH}")
-else:
-    UPDATE_SOURCE_PATH = None
-    if USE_DROPBOX:
-        print("⚠️ Dropboxが見つかりません。自動アップデートは無効です。")
+# スケジュールの繰り返し（隔週・月１回など）を日付に展開する期間（週）
+SCHEDULE_HORIZON_WEEKS = 8
 
 # デバッグモード
 DEBUG = False
 
-if DEBUG:
+
+def print_settings():
+    """設定情報を表示"""
     print("=" * 60)
     print("🔧 設定情報")
     print("=" * 60)
     print(f"BASE_DIR: {BASE_DIR}")
     print(f"USER_DIR: {USER_DIR}")
-    print(f"OUTPUT_DIR: {OUTPUT_DIR}")
-    print(f"DATABASE_PATH: {DATABASE_PATH}")
+    print(f"OUTPUT_DIR: {settings.output_dir}")
+    print(f"DATABASE_PATH: {settings.database_path}")
     print(f"TEMPLATE_DIR: {TEMPLATE_DIR}")
-    print(f"Dropbox連携: {'有効' if USE_DROPBOX else '無効'}")
-    print(f"Dropboxパス: {get_dropbox_path() if check_dropbox_available() else 'なし'}")
+    print(f"Dropbox連携: {'有効' if settings.use_dropbox else '無効'}")
+    print(f"Dropboxパス: {settings.dropbox_path or 'なし'}")
     print("=" * 60)
+
+
+if DEBUG:
+    print_settings()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+行政への報告用に面談記録・担当ケースなどをCSV・Excelで出力するスクリプト
+
+DBから少しずつ読み出して1行ずつ書き出すため、件数が多くてもメモリ使用量は一定。
+区・エリアは区マスタ・エリアマスタの表示順で並べる。
+
+報告の種類:
+    interviews        面談記録（期間・区・エリア・課題・学校段階で絞り込み）
+    caseloads         担当ケース（期間=初回日・区・エリア・支援員で絞り込み）
+    schedules         週間スケジュール（区・エリア・支援員で絞り込み）
+    district_summary  区別の担当件数（区・エリア・支援員で絞り込み）
+
+使い方:
+    python export_reports.py 種類 出力先.csv|出力先.xlsx [--since 2025-04-01] [--until 2026-03-31]
+                             [--district 城東区 ...] [--area 東エリア ...] [--staff 支援員名またはID ...]
+                             [--issue 生活リズム 対人緊張の高さ] [--school-level 中学生]
+"""
+import argparse
+import sys
+import time
+
+from src.database.connection import close_all_pools, get_pool, default_db_path
+from src.database.issues import SCHOOL_LEVELS
+from src.database.migrations import ensure_schema
+from src.database.reports import REPORTS, iter_report, parse_period
+from src.excel.report_writer import FORMATS, write_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='報告用データの出力')
+    parser.add_argument('report', choices=list(REPORTS), help='報告の種類')
+    parser.add_argument('output', help='出力先のパス（拡張子 .csv / .xlsx で形式を判定）')
+    parser.add_argument('--format', choices=FORMATS, help='出力形式（省略時は拡張子で判定）')
+    parser.add_argument('--db', help='DBファイルのパス（省略時はconfig.pyの設定）')
+    parser.add_argument('--since', help='期間の開始（YYYY-MM-DD、この日を含む）')
+    parser.add_argument('--until', help='期間の終了（YYYY-MM-DD、この日を含む）')
+    parser.add_argument('--district', nargs='+', help='区名')
+    parser.add_argument('--area', nargs='+', help='エリア名')
+    parser.add_argument('--staff', nargs='+', help='支援員名または支援員ID')
+    parser.add_argument('--issue', nargs='+', help='課題名（すべてに該当する面談記録のみ）')
+    parser.add_argument('--school-level', choices=list(SCHOOL_LEVELS), help='学校段階（面談記録のみ）')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        since, until = parse_period(args.since, args.until)
+        pool = get_pool(args.db or default_db_path())
+        ensure_schema(pool)
+        headers, rows = iter_report(
+            pool, args.report,
+            since=since, until=until, districts=args.district, areas=args.area, staff=args.staff,
+            issues=args.issue, school_level=args.school_level,
+        )
+        count = write_report(args.output, headers, rows, format=args.format, sheet_name=REPORTS[args.report])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        close_all_pools()
+
+    print(f"✅ {REPORTS[args.report]}を{count}件出力しました（{time.perf_counter() - start:.1f}秒）: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+面談記録を画面を使わずに一括登録するスクリプト
+
+紙の受付票を転記したJSONL・CSV（数千件など）を読み込み、
+入力フォームと同じ判定で課題を作成して面談記録に保存する。
+記録はファイルを1行ずつ読み、--batch-size件ごとに1つのトランザクションで保存する。
+不正な行は行番号とエラーを表示して読み飛ばし、最後まで続ける。
+--render を付けると、保存した記録のアセスメントシートも一括で作成する（batch_export.py と同じ処理）。
+
+記録の項目名は入力フォームの項目名（src/database/intake.py を参照）。
+    必須: 児童氏名, 学校名
+    例: {"児童氏名": "山田太郎", "児童イニシャル": "Y.T", "学校名": "○○中学校", "学年": 8,
+         "面談実施日": "2025/04/01", "不登校": "はい", "登校状況": "週1-2回", "生活リズム": "朝起きられない、昼夜逆転"}
+
+使い方:
+    python ingest_interviews.py 記録.jsonl [--format jsonl|csv] [--batch-size 500] [--dry-run]
+                                [--render] [--output-dir 出力先] [--template テンプレート] [--workers 4]
+                                [--password パスワード | --no-password]
+    cat 記録.jsonl | python ingest_interviews.py -
+"""
+import argparse
+import sys
+import time
+
+from src.database.connection import close_all_pools
+from src.database.intake import read_records, record_to_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='面談記録の一括登録')
+    parser.add_argument('input', help="JSONL・CSVファイル（'-' の場合は標準入力）")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help='入力形式（省略時は拡張子で判定）')
+    parser.add_argument('--encoding', default='utf-8-sig', help='CSVの文字コード（Excelの場合は cp932 など）')
+    parser.add_argument('--db', help='DBファイルのパス（省略時はconfig.pyの設定）')
+    parser.add_argument('--batch-size', type=int, default=500, help='1トランザクションで保存する件数')
+    parser.add_argument('--dry-run', action='store_true', help='変換と入力チェックのみ行い、保存しない')
+    parser.add_argument('--render', action='store_true', help='保存した記録のアセスメントシートを作成')
+    parser.add_argument('--output-dir', help='シートの出力先フォルダ（--render）')
+    parser.add_argument('--template', help='テンプレートのパス（--render）')
+    parser.add_argument('--workers', type=int, help='シート作成の並列数（省略時はCPUコア数）')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--password', help='すべてのシートに使うパスワード（省略時は区のエリアごとにconfig.pyのAREA_PASSWORDS）')
+    group.add_argument('--no-password', action='store_true', help='パスワード保護なしで出力')
+    args = parser.parse_args()
+
+    errors = []
+
+    def converted():
+        """正しい行だけを (interview_data, assessment_data) にして順に返す"""
+        for line_number, record in read_records(args.input, format=args.format, encoding=args.encoding):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                yield record_to_data(record)
+            except ValueError as e:
+                errors.append((line_number, str(e)))
+                print(f"❌ {line_number}行目: {e}")
+
+    start = time.perf_counter()
+    try:
+        if args.dry_run:
+            count = sum(1 for _ in converted())
+            print(f"🔍 {count}件を確認しました（保存していません）")
+            saved_ids = []
+        else:
+            from src.database.history import HistoryManager
+
+            history_manager = HistoryManager(args.db)
+            saved_ids = history_manager.save_interviews(
+                converted(),
+                batch_size=args.batch_size,
+                progress=lambda saved: print(f"💾 {saved}件保存"),
+            )
+        elapsed = time.perf_counter() - start
+
+        if args.render and saved_ids:
+            render(args, saved_ids)
+    finally:
+        close_all_pools()
+
+    print()
+    if not args.dry_run:
+        print(f"✅ {len(saved_ids)}件を登録しました（{elapsed:.1f}秒）")
+    if errors:
+        print(f"⚠️ {len(errors)}件の行を読み飛ばしました")
+        sys.exit(1)
+
+
+def render(args, ids):
+    """保存した記録のアセスメントシートを一括作成"""
+    from src.excel.batch_export import BatchExporter
+
+    exporter = BatchExporter(
+        db_path=args.db,
+        template_path=args.template,
+        output_dir=args.output_dir,
+        password='' if args.no_password else args.password,
+        max_workers=args.workers,
+    )
+
+    def progress(done, total, result):
+        if not result['success']:
+            print(f"[{done}/{total}] ❌ ID {result['id']}: {result['error']}")
+
+    print(f"📋 テンプレート: {exporter.template_path}")
+    print(f"📁 出力先: {exporter.output_dir}")
+    manifest = exporter.run(ids=ids, progress=progress)
+    print(f"📄 {manifest['succeeded']}件のシートを作成しました（{manifest['elapsed_sec']}秒、{manifest['workers']}プロセス）")
+    if manifest['failed']:
+        print(f"⚠️ {manifest['failed']}件でエラーが発生しました")
+    print(f"📝 マニフェスト: {manifest['manifest_path']}")
+
+
+if __name__ == '__main__':
+    main()
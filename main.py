@@ -1,38 +1,91 @@
+import time
+# 起動時間の計測の起点
+STARTUP_TIME = time.perf_counter()
+
 import tkinter as tk
 from tkinter import messagebox
 import sys
 from pathlib import Path
 import threading
-import time
 import os
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.ui.staff_manager import StaffManagerDialog
-from src.database.models import Database
-from src.database.history import HistoryManager
+# モード選択画面に必要なものだけをimport（支援員管理・DBの初期化などは初回使用時）
+from src.database.connection import close_all_pools
+from src.database.storage import HostLock
+from src.utils.startup_trace import get_trace, run_traced, TRACE_FLAG
+
+trace = get_trace(origin=STARTUP_TIME)
+trace.mark('import完了')
 
 class MainApplication(tk.Tk):
     def __init__(self):
-        super().__init__()
+        with trace.step('Tk初期化'):
+            super().__init__()
         
         self.title("不登校支援 - 初回アセスメント支援ツール")
         self.geometry("1000x800")
         
         # Dropbox同期状態を確認
-        self.check_dropbox_sync()
+        self.host_lock = None
+        with trace.step('Dropbox同期チェック'):
+            self.check_dropbox_sync()
         
         # バージョンチェック（起動時のみ、非同期）
         if getattr(sys, 'frozen', False):  # 実行ファイルの場合のみ
             threading.Thread(target=self.check_for_updates, daemon=True).start()
         
-        self.db = Database()
-        self.history_manager = HistoryManager()
+        # DB（テーブル作成など）は初回使用時に初期化
+        self._db = None
+        self._history_manager = None
+        self._db_runner = None
+        
+        with trace.step('画面作成'):
+            self.create_widgets()
         
-        self.create_widgets()
+        self._first_window_shown = False
+        if trace.enabled:
+            self.bind('<Map>', self._on_first_map, add='+')
+    
+    def _on_first_map(self, event):
+        """起動トレースモード: 最初のウィンドウが表示されたら記録して終了"""
+        if event.widget is not self or self._first_window_shown:
+            return
+        self._first_window_shown = True
+        self.update_idletasks()
+        trace.mark('最初のウィンドウ表示')
+        trace.save()
+        self.after(0, self.quit)
+    
+    @property
+    def db(self):
+        """データベース（初回使用時に作成。テーブル作成を含むため書き込みスレッドで使う）"""
+        if self._db is None:
+            from src.database.models import Database
+            self._db = Database()
+        return self._db
+    
+    @property
+    def history_manager(self):
+        """面談履歴（初回使用時に作成。テーブル作成・マイグレーションを含むため書き込みスレッドで使う）"""
+        if self._history_manager is None:
+            from src.database.history import HistoryManager
+            # 従来どおりDatabaseのテーブルも作成しておく
+            _ = self.db
+            self._history_manager = HistoryManager()
+        return self._history_manager
+    
+    @property
+    def db_runner(self):
+        """DB処理のワーカー（初回使用時に作成）"""
+        if self._db_runner is None:
+            from src.ui.db_runner import DbRunner
+            self._db_runner = DbRunner(self)
+        return self._db_runner
     
     def check_dropbox_sync(self):
-        """Dropboxの同期状態を確認"""
+        """Dropboxの同期状態を確認（他のPCがデータベースを使用中か）"""
         try:
             import config
             if not config.USE_DROPBOX:
@@ -43,40 +96,22 @@ class MainApplication(tk.Tk):
             # Dropboxフォルダ内かチェック
             dropbox_path = config.get_dropbox_path()
             if dropbox_path and str(db_path).startswith(str(dropbox_path)):
-                # データベースファイルが存在する場合、同期状態を確認
-                if db_path.exists():
-                    # ファイルの最終更新時刻を取得
-                    local_mtime = db_path.stat().st_mtime
-                    current_time = time.time()
-                    
-                    # 5分以内に更新されていれば同期中と判断
-                    if current_time - local_mtime < 300:
-                        # データベースがロックされていないか確認
-                        if self.is_database_locked(db_path):
-                            messagebox.showwarning(
-                                "データベースロック",
-                                "データベースが他のPCで使用中の可能性があります。\n"
-                                "しばらく待ってから再度お試しください。"
-                            )
-                else:
-                    # データベースが存在しない場合は新規作成
-                    db_path.parent.mkdir(parents=True, exist_ok=True)
+                db_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                self.host_lock = HostLock(db_path)
+                holder = self.host_lock.other_holder()
+                if holder:
+                    since = f"（{holder['since']}から）" if holder.get('since') else ''
+                    messagebox.showwarning(
+                        "データベース使用中",
+                        f"データベースが他のPC「{holder['host']}」で使用中です{since}。\n"
+                        "同時に編集するとデータが失われる可能性があります。\n"
+                        "他のPCでアプリを終了してから再度お試しください。"
+                    )
+                self.host_lock.acquire()
         except Exception as e:
             print(f"Dropbox同期チェックエラー: {e}")
     
-    def is_database_locked(self, db_path):
-        """データベースがロックされているか確認"""
-        try:
-            import sqlite3
-            # 読み取り専用で接続を試みる
-            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=1.0)
-            conn.close()
-            return False
-        except sqlite3.OperationalError:
-            return True
-        except Exception:
-            return False
-    
     def check_for_updates(self):
         """更新をチェック（非同期）"""
         try:
@@ -217,6 +252,7 @@ if exist "{current_exe}" (
         manage_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="管理", menu=manage_menu)
         manage_menu.add_command(label="支援員管理", command=self.open_staff_manager)
+        manage_menu.add_command(label="統計", command=self.open_statistics)
         
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="ヘルプ", menu=help_menu)
@@ -294,11 +330,21 @@ if exist "{current_exe}" (
     
     def on_smart_complete(self, interview_data, assessment_data):
         """スマートモード完了処理"""
-        # データ保存
-        self.history_manager.save_interview(interview_data, assessment_data)
+        def save():
+            # データ保存（面談履歴の作成・マイグレーションもこのスレッドで行う）
+            self.history_manager.save_interview(interview_data, assessment_data)
+            if self.host_lock:
+                self.host_lock.touch()
+            
+            # 新規ケースを未割り当てケースとして登録
+            self.save_to_unassigned_cases(interview_data)
+        
+        def on_error(e):
+            print(f"面談記録の保存エラー: {e}")
+            messagebox.showerror("エラー", f"面談記録の保存中にエラーが発生しました: {e}")
         
-        # 新規ケースを未割り当てケースとして登録
-        self.save_to_unassigned_cases(interview_data)
+        # 保存は書き込みスレッドで実行（DBのロック待ちでプレビューの表示を止めない）
+        self.db_runner.write(save, on_error=on_error)
         
         # プレビュー表示
         analysis_result = {
@@ -388,6 +434,16 @@ if exist "{current_exe}" (
             messagebox.showerror("エラー", f"支援員管理機能の読み込みに失敗しました：\n{str(e)}")
         except Exception as e:
             messagebox.showerror("エラー", f"支援員管理の起動中にエラーが発生しました：\n{str(e)}")
+
+    def open_statistics(self):
+        """統計ウィンドウを開く"""
+        try:
+            from src.ui.statistics_panel import StatisticsWindow
+            StatisticsWindow(self)
+        except ImportError as e:
+            messagebox.showerror("エラー", f"統計機能の読み込みに失敗しました：\n{str(e)}")
+        except Exception as e:
+            messagebox.showerror("エラー", f"統計の起動中にエラーが発生しました：\n{str(e)}")
     
 
     def show_help(self):
@@ -446,6 +502,17 @@ Version {version}
 
 
 if __name__ == "__main__":
+    # 起動トレースモード: -X importtime 付きで起動し直して計測結果を表示
+    if TRACE_FLAG in sys.argv[1:] and not getattr(sys, 'frozen', False):
+        sys.exit(run_traced(__file__, [arg for arg in sys.argv[1:] if arg != TRACE_FLAG]))
+    
     app = MainApplication()
     app.mainloop()
+    # 書き込み待ちの保存を済ませてからDBワーカーを終了
+    from src.database.executor import shutdown_executor
+    shutdown_executor()
+    # 共有コネクションを閉じる（WALはチェックポイントしてDELETEに戻す）
+    close_all_pools()
+    if app.host_lock:
+        app.host_lock.release()
 
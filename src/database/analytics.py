@@ -0,0 +1,214 @@
+"""
+集計テーブル（ロールアップ）による統計
+- 支援員数（性別・年代・地域）、支援員ごとの担当ケース数、面談記録の課題の件数・月別の受付件数を
+  集計済みのテーブルに保持する（テーブルとトリガーはマイグレーション v9）
+- 元のテーブルの追加・更新・削除のたびにトリガーで該当するグループの件数だけを増減する
+  （統計の表示はグループの数だけ読む。行数に比例した集計をしない）
+- 面談記録の集計は 月 × 学年 × 区 の単位で持ち、学年別・区別・月別はこれを合計する
+"""
+import re
+from pathlib import Path
+
+from src.database.connection import get_pool, default_db_path
+from src.database.migrations import ensure_schema
+from src.database.issues import ISSUE_ORDER
+
+# 集計の単位（トリガーと作り直しで共通。{r} は new / old / テーブルの別名）
+# 月: 面談実施日（なければ登録日）の 'YYYY-MM'
+MONTH_SQL = "COALESCE(substr(COALESCE({r}.interview_date, {r}.created_at), 1, 7), '')"
+# 学年: 不明は0
+GRADE_SQL = "COALESCE({r}.grade, 0)"
+# 区: 不明は''
+DISTRICT_SQL = "COALESCE({r}.district, '')"
+# 年代（get_staff_statistics の区分と同じ）
+AGE_GROUP_SQL = """CASE
+    WHEN {r}.age < 30 THEN '20代'
+    WHEN {r}.age < 40 THEN '30代'
+    WHEN {r}.age < 50 THEN '40代'
+    ELSE '50代以上'
+END"""
+ACTIVE_SQL = "(COALESCE({r}.is_active, 0) != 0)"
+# 面談記録の課題（issues_json）を行に展開する表と「該当」の条件（key が課題名）
+# JSONとして不正な行は課題なしとする
+ISSUE_SOURCE_SQL = """json_each(
+    CASE WHEN json_valid({r}.issues_json) AND json_type({r}.issues_json) = 'object' THEN {r}.issues_json ELSE '{{}}' END
+)"""
+ISSUE_CHECKED_SQL = "type = 'object' AND COALESCE(json_extract(value, '$.\"該当\"'), json_extract(value, '$.checked'), 0)"
+
+# 支援員数の集計の項目
+STAFF_DIMENSIONS = {
+    'total': "''",
+    'gender': "COALESCE({r}.gender, '')",
+    'age_group': AGE_GROUP_SQL,
+    'region': "COALESCE({r}.region, '')",
+}
+
+# 集計の切り口（表示名 → stat_interviews / stat_issues の列）
+GROUPINGS = {
+    '学年': 'grade',
+    '区': 'district',
+    '月': 'month',
+}
+
+_MONTH_PATTERN = re.compile(r'(\d{4})\D+(\d{1,2})')
+
+
+def parse_month(text):
+    """「2025-04」「2025/4」「2025年4月」を 'YYYY-MM' に変換（空・解析できない場合はNone）"""
+    match = _MONTH_PATTERN.search(str(text or ''))
+    if not match:
+        return None
+    year, month = (int(part) for part in match.groups())
+    return f"{year:04d}-{month:02d}" if 1 <= month <= 12 else None
+
+
+def rebuild_rollups(cursor):
+    """集計テーブルをすべて作り直す（マイグレーション・不整合の修復用。トランザクションは呼び出し側）"""
+    cursor.execute('DELETE FROM stat_staff')
+    for dimension, key_sql in STAFF_DIMENSIONS.items():
+        key = key_sql.format(r='s')
+        cursor.execute(f'''
+            INSERT INTO stat_staff (dimension, key, count)
+            SELECT ?, {key}, COUNT(*) FROM staff s
+            WHERE {ACTIVE_SQL.format(r='s')}
+            GROUP BY {key}
+        ''', (dimension,))
+
+    cursor.execute('DELETE FROM stat_caseload')
+    cursor.execute(f'''
+        INSERT INTO stat_caseload (staff_id, cases, active_cases)
+        SELECT sc.staff_id, COUNT(*), COALESCE(SUM({ACTIVE_SQL.format(r='c')}), 0)
+        FROM staff_cases sc
+        LEFT JOIN cases c ON c.id = sc.case_id
+        GROUP BY sc.staff_id
+    ''')
+
+    month, grade, district = (sql.format(r='h') for sql in (MONTH_SQL, GRADE_SQL, DISTRICT_SQL))
+    cursor.execute('DELETE FROM stat_interviews')
+    cursor.execute(f'''
+        INSERT INTO stat_interviews (month, grade, district, count)
+        SELECT {month}, {grade}, {district}, COUNT(*) FROM interview_history h
+        GROUP BY 1, 2, 3
+    ''')
+    cursor.execute('DELETE FROM stat_issues')
+    cursor.execute(f'''
+        INSERT INTO stat_issues (issue, month, grade, district, count)
+        SELECT key, {month}, {grade}, {district}, COUNT(*)
+        FROM interview_history h, {ISSUE_SOURCE_SQL.format(r='h')}
+        WHERE {ISSUE_CHECKED_SQL}
+        GROUP BY 1, 2, 3, 4
+    ''')
+
+
+def read_staff_summary(conn):
+    """
+    稼働中の支援員数を集計テーブルから読む
+
+    Returns:
+        dict: total_count, gender_stats, age_stats, region_stats（各項目は件数の多い順）
+    """
+    cursor = conn.execute('''
+        SELECT dimension, key, count FROM stat_staff
+        WHERE count > 0
+        ORDER BY dimension, count DESC, key
+    ''')
+    stats = {dimension: {} for dimension in STAFF_DIMENSIONS}
+    for dimension, key, count in cursor.fetchall():
+        stats.setdefault(dimension, {})[key] = count
+    return {
+        'total_count': stats['total'].get('', 0),
+        'gender_stats': stats['gender'],
+        'age_stats': dict(sorted(stats['age_group'].items())),
+        'region_stats': stats['region'],
+    }
+
+
+class StatisticsManager:
+    """集計テーブルから統計を読む"""
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            # config.pyのDATABASE_PATH（使う時に解決）
+            db_path = default_db_path()
+        self.db_path = Path(db_path)
+        self.pool = get_pool(self.db_path)
+        ensure_schema(self.pool)
+
+    def staff_summary(self):
+        """稼働中の支援員数（StaffManager.get_staff_statistics と同じ形）"""
+        return read_staff_summary(self.pool.connect())
+
+    def caseloads(self):
+        """
+        稼働中の支援員ごとの担当ケース数（稼働中のケースの多い順）
+
+        Returns:
+            list: staff_id, name, active_cases, cases の辞書のリスト
+        """
+        cursor = self.pool.connect().execute('''
+            SELECT s.id AS staff_id, s.name, COALESCE(l.active_cases, 0) AS active_cases, COALESCE(l.cases, 0) AS cases
+            FROM staff s
+            LEFT JOIN stat_caseload l ON l.staff_id = s.id
+            WHERE s.is_active = 1
+            ORDER BY active_cases DESC, s.name
+        ''')
+        return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _period(since_month, until_month):
+        conditions = []
+        params = []
+        if since_month:
+            conditions.append('month >= ?')
+            params.append(since_month)
+        if until_month:
+            conditions.append('month <= ?')
+            params.append(until_month)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ''), params
+
+    def issue_table(self, grouping='学年', since_month=None, until_month=None):
+        """
+        切り口ごとの面談件数と課題の件数
+
+        Args:
+            grouping: GROUPINGS のキー（学年・区・月）
+            since_month, until_month: 期間（'YYYY-MM'、両端を含む）
+
+        Returns:
+            tuple: (課題名のリスト, 行のリスト)。行は (グループ, 面談件数, {課題: 件数})
+        """
+        column = GROUPINGS[grouping]
+        where, params = self._period(since_month, until_month)
+        conn = self.pool.connect()
+        totals = dict(conn.execute(f'''
+            SELECT {column}, SUM(count) FROM stat_interviews {where} GROUP BY {column}
+        ''', params).fetchall())
+        counts = {}
+        for group, issue, count in conn.execute(f'''
+            SELECT {column}, issue, SUM(count) FROM stat_issues {where} GROUP BY {column}, issue
+        ''', params).fetchall():
+            counts.setdefault(group, {})[issue] = count
+
+        issues = ISSUE_ORDER + sorted({issue for row in counts.values() for issue in row} - set(ISSUE_ORDER))
+        rows = [(group, totals[group], counts.get(group, {})) for group in sorted(totals) if totals[group]]
+        return issues, rows
+
+    def monthly_intake(self, since_month=None, until_month=None):
+        """
+        月別の面談件数
+
+        Returns:
+            list: (月, 件数) のリスト（月順）
+        """
+        where, params = self._period(since_month, until_month)
+        cursor = self.pool.connect().execute(f'''
+            SELECT month, SUM(count) FROM stat_interviews {where}
+            GROUP BY month HAVING SUM(count) > 0 ORDER BY month
+        ''', params)
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def rebuild(self):
+        """集計テーブルを作り直す（件数が合わない場合の修復用）"""
+        with self.pool.transaction() as conn:
+            rebuild_rollups(conn.cursor())
+        print("✅ 集計テーブルを作り直しました")
@@ -0,0 +1,287 @@
+"""
+未割り当てケースと支援員の一括割り当て（NumPy）
+- 全未割り当てケース × 稼働中の全支援員のコスト行列を、項目ごとに1回の行列演算で作る
+  （曜日・時間帯の空き、区・エリアの距離、性別、趣味・特技と備考の一致、現在の担当ケース数）
+- ハンガリアン法でコストの合計が最小になる組み合わせを求める
+  （SciPyがあれば linear_sum_assignment、なければ列方向をNumPyでまとめて更新する実装）
+- 支援員情報のケース欄は1件のため、1回の割り当てでは1人の支援員に1ケースまで
+- 勤務時間内に空きがない組は割り当てない（割り当て先のないケースは案に含めない）
+"""
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+from src.database import occupancy
+from src.database.timeslots import WEEKDAYS, parse_days, parse_time_range
+
+# コストの重み
+TIME_WEIGHT = 3.0
+DISTANCE_WEIGHT = 2.0
+GENDER_WEIGHT = 1.0
+HOBBY_WEIGHT = 1.0
+LOAD_WEIGHT = 1.0
+
+# 割り当てられない組のコスト（解が必ず求まるよう有限の大きな値にする）
+INFEASIBLE = 1e6
+
+# 区・エリアの関係（区・エリアのコードから判定）
+RELATION_SAME_DISTRICT = 0
+RELATION_SAME_AREA = 1
+RELATION_OTHER_AREA = 2
+RELATION_UNKNOWN = 3
+
+# 関係ごとの距離（同じ区 / 同じエリア / 違うエリア / 不明）
+SAME_DISTRICT = 0.0
+SAME_AREA = 0.5
+OTHER_AREA = 1.0
+UNKNOWN_DISTANCE = 0.5
+RELATION_DISTANCES = (SAME_DISTRICT, SAME_AREA, OTHER_AREA, UNKNOWN_DISTANCE)
+
+# 割り当て理由に表示する関係（不明の場合は表示しない）
+RELATION_LABELS = {
+    RELATION_SAME_DISTRICT: "同じ区",
+    RELATION_SAME_AREA: "同じエリア",
+    RELATION_OTHER_AREA: "別エリア",
+}
+
+# 趣味・特技の一致はこの数で満点
+HOBBY_MATCH_CAP = 2
+
+GENDER_CODES = {'男性': 1, '男': 1, '女性': 2, '女': 2}
+
+# 希望曜日の記載がないケースは平日のいずれか
+DEFAULT_CASE_DAYS = tuple(WEEKDAYS[:5])
+
+_HOBBY_SPLIT = re.compile(r'[、,，・/／\s]+')
+
+
+def is_available():
+    """NumPyが利用可能か"""
+    return np is not None
+
+
+def hobby_terms(text):
+    """趣味・特技の文字列を語に分割（1文字の語は一致の判定に使わない）"""
+    return [term for term in _HOBBY_SPLIT.split(text or '') if len(term) >= 2]
+
+
+def _popcount(values):
+    """uint64配列の各要素の1のビット数"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.int64)
+    bytes_view = np.ascontiguousarray(values).view(np.uint8).reshape(values.shape + (8,))
+    return np.unpackbits(bytes_view, axis=-1).sum(axis=-1, dtype=np.int64)
+
+
+def _find_district(text, district_names):
+    """文字列に含まれる区名（長い名前を優先）"""
+    for name in district_names:
+        if name and name in (text or ''):
+            return name
+    return None
+
+
+def build_cost_matrix(cases, staff_list, weekly_busy, district_areas, caseloads):
+    """
+    ケース × 支援員のコスト行列
+
+    Args:
+        cases: 未割り当てケースの辞書のリスト
+        staff_list: 支援員の辞書のリスト
+        weekly_busy: 支援員ID → {曜日: 予定のビット}（期間内のその曜日の予定をまとめたもの）
+        district_areas: 区名 → エリア名
+        caseloads: 支援員ID → 担当ケース数
+
+    Returns:
+        tuple: (コスト行列, 時間帯の空きの割合の行列, 趣味・特技の一致数の行列, 区・エリアの関係の行列)
+    """
+    n_cases, n_staff = len(cases), len(staff_list)
+    district_names = sorted(district_areas, key=len, reverse=True)
+    area_codes = {area: i for i, area in enumerate(sorted(set(district_areas.values())))}
+    district_codes = {name: i for i, name in enumerate(district_names)}
+
+    # 曜日・時間帯: 支援員の曜日ごとの空き（勤務時間 − 予定）と、ケースの希望時間帯のビット
+    free = np.zeros((len(WEEKDAYS), n_staff), dtype=np.uint64)
+    for s, staff in enumerate(staff_list):
+        work = occupancy.work_masks(staff.get('work_days') or '', staff.get('work_hours') or '')
+        busy = weekly_busy.get(staff['id'], {})
+        for d, day in enumerate(WEEKDAYS):
+            if day in work:
+                free[d, s] = work[day] & ~busy.get(day, 0) & occupancy.FULL_DAY
+
+    case_masks = np.zeros(n_cases, dtype=np.uint64)
+    case_days = np.zeros((n_cases, len(WEEKDAYS)), dtype=bool)
+    for c, case in enumerate(cases):
+        time_ranges = parse_time_range(case.get('preferred_time') or '')[:1]
+        case_masks[c] = occupancy.ranges_mask(time_ranges) if time_ranges else occupancy.FULL_DAY
+        days = parse_days(case.get('preferred_day') or '') or DEFAULT_CASE_DAYS
+        case_days[c] = [day in days for day in WEEKDAYS]
+
+    # 希望曜日のうち最も空いている曜日の、希望時間帯に対する空きの割合
+    wanted = _popcount(case_masks).astype(np.float64)
+    time_fit = np.zeros((n_cases, n_staff))
+    for d in range(len(WEEKDAYS)):
+        overlap = _popcount(case_masks[:, None] & free[d][None, :]) / np.maximum(wanted, 1)[:, None]
+        time_fit = np.maximum(time_fit, np.where(case_days[:, d:d + 1], overlap, 0.0))
+
+    # 区・エリアの距離
+    def codes(names):
+        district = np.array([district_codes.get(name, -1) for name in names])
+        area = np.array([area_codes.get(district_areas.get(name), -1) for name in names])
+        return district, area
+
+    case_district, case_area = codes([_find_district(case.get('district'), district_names) for case in cases])
+    staff_district, staff_area = codes([
+        _find_district(staff.get('case_district'), district_names) or _find_district(staff.get('region'), district_names)
+        for staff in staff_list
+    ])
+    known = (case_area[:, None] >= 0) & (staff_area[None, :] >= 0)
+    relation = np.where(
+        known,
+        np.where((case_district[:, None] == staff_district[None, :]) & (case_district[:, None] >= 0),
+                 RELATION_SAME_DISTRICT,
+                 np.where(case_area[:, None] == staff_area[None, :], RELATION_SAME_AREA, RELATION_OTHER_AREA)),
+        RELATION_UNKNOWN
+    )
+    distance = np.array(RELATION_DISTANCES)[relation]
+
+    # 性別（児童と支援員の性別が違う場合に加点）
+    case_gender = np.array([GENDER_CODES.get(case.get('child_gender'), 0) for case in cases])
+    staff_gender = np.array([GENDER_CODES.get(staff.get('gender'), 0) for staff in staff_list])
+    gender_mismatch = ((case_gender[:, None] > 0) & (staff_gender[None, :] > 0)
+                       & (case_gender[:, None] != staff_gender[None, :]))
+
+    # 趣味・特技: 支援員の語がケースの備考に含まれる数（ケース×語 と 語×支援員 の行列の積）
+    vocabulary = sorted({term for staff in staff_list for term in hobby_terms(staff.get('hobbies_skills'))})
+    term_index = {term: i for i, term in enumerate(vocabulary)}
+    staff_terms = np.zeros((len(vocabulary), n_staff), dtype=np.float32)
+    for s, staff in enumerate(staff_list):
+        for term in hobby_terms(staff.get('hobbies_skills')):
+            staff_terms[term_index[term], s] = 1.0
+    case_terms = np.zeros((n_cases, len(vocabulary)), dtype=np.float32)
+    for c, case in enumerate(cases):
+        notes = case.get('notes') or ''
+        if notes:
+            case_terms[c] = [term in notes for term in vocabulary]
+    hobby_matches = case_terms @ staff_terms if vocabulary else np.zeros((n_cases, n_staff), dtype=np.float32)
+
+    # 担当ケース数（最も多い支援員を1とする）
+    loads = np.array([caseloads.get(staff['id'], 0) for staff in staff_list], dtype=np.float64)
+    load = loads / max(loads.max(initial=0), 1)
+
+    cost = (TIME_WEIGHT * (1 - time_fit)
+            + DISTANCE_WEIGHT * distance
+            + GENDER_WEIGHT * gender_mismatch
+            - HOBBY_WEIGHT * np.minimum(hobby_matches, HOBBY_MATCH_CAP) / HOBBY_MATCH_CAP
+            + LOAD_WEIGHT * load[None, :])
+    cost = np.where(time_fit > 0, cost, INFEASIBLE)
+    return cost, time_fit, hobby_matches, relation
+
+
+def solve_assignment(cost):
+    """
+    コストの合計が最小になる行と列の組（各行・各列は1回まで）
+
+    Returns:
+        list: (行, 列) のリスト（行数と列数の少ない方の数だけ）
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return []
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(cost)
+        return list(zip(rows.tolist(), cols.tolist()))
+    if cost.shape[0] > cost.shape[1]:
+        return [(row, col) for col, row in _hungarian(cost.T)]
+    return _hungarian(cost)
+
+
+def _hungarian(cost):
+    """
+    ハンガリアン法（最短増加路・ポテンシャル法。行数 <= 列数）
+
+    1行ずつ割り当てを増やし、各ステップの列の走査はNumPyでまとめて行う（O(行数² × 列数)）。
+    """
+    n, m = cost.shape
+    # 1始まり（0は番兵）
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.int64)  # 列 → 行
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            slack = cost[i0 - 1] - u[i0] - v[1:]
+            unused = ~used[1:]
+            better = unused & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = j0
+            candidates = np.where(unused, min_slack[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            u[match[used]] += delta
+            v[used] -= delta
+            min_slack[1:][unused] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        # 増加路に沿って割り当てを入れ替える
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    return sorted((int(match[j]) - 1, j - 1) for j in range(1, m + 1) if match[j])
+
+
+def plan_assignments(cases, staff_list, weekly_busy, district_areas, caseloads):
+    """
+    割り当て案
+
+    Returns:
+        list: 辞書のリスト（unassigned_case_id, case_number, staff_id, staff_name, cost, reasons など）
+    """
+    if np is None:
+        raise ImportError("一括割り当てにはnumpyが必要です")
+    if not cases or not staff_list:
+        return []
+    cost, time_fit, hobby_matches, relation = build_cost_matrix(
+        cases, staff_list, weekly_busy, district_areas, caseloads
+    )
+    plan = []
+    for c, s in solve_assignment(cost):
+        if cost[c, s] >= INFEASIBLE:
+            continue
+        case, staff = cases[c], staff_list[s]
+        reasons = [f"空き {time_fit[c, s]:.0%}"]
+        label = RELATION_LABELS.get(int(relation[c, s]))
+        if label:
+            reasons.append(label)
+        if hobby_matches[c, s]:
+            reasons.append(f"趣味・特技一致 {int(hobby_matches[c, s])}")
+        reasons.append(f"担当 {caseloads.get(staff['id'], 0)}件")
+        plan.append({
+            'unassigned_case_id': case['id'],
+            'case_number': case.get('case_number'),
+            'district': case.get('district'),
+            'preferred_day': case.get('preferred_day'),
+            'preferred_time': case.get('preferred_time'),
+            'staff_id': staff['id'],
+            'staff_name': staff.get('name'),
+            'cost': float(cost[c, s]),
+            'reasons': ' / '.join(reasons),
+        })
+    plan.sort(key=lambda item: item['cost'])
+    return plan
@@ -0,0 +1,80 @@
+"""
+DBの変更の検出
+- PRAGMA data_version で他のコネクション（他のスレッド・他のプロセス）のコミットを検出
+  （変更がなければ整数を1つ読むだけなので、1秒に何回確認してもよい）
+- 変更があった時だけ table_versions（トリガーで増やすテーブルごとの版数）を読み、版数の変わったテーブルを返す
+- Dropboxの同期でDBファイルが置き換えられた場合は開き直し、すべてのテーブルを変更ありとする
+- ロック中は待たずに次回の確認に回す（画面のスレッドから呼んでも止まらない）
+"""
+import sqlite3
+from pathlib import Path
+
+from src.database.connection import default_db_path
+from src.database.migrations import VERSIONED_TABLES
+
+
+class ChangeTracker:
+    """前回の確認から変更されたテーブルを調べる"""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or default_db_path())
+        # 確認専用のコネクション（自分の書き込みもdata_versionで検出できるよう書き込みには使わない）
+        self._conn = None
+        self._file_id = None
+        self._data_version = None
+        self._versions = None
+
+    def _current_file_id(self):
+        """DBファイルの識別子（置き換えられると変わる）"""
+        try:
+            stat = self.db_path.stat()
+        except OSError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+
+    def _open(self):
+        self.close()
+        # timeout=0: ロック中は待たずにエラーにする
+        self._conn = sqlite3.connect(str(self.db_path), timeout=0, check_same_thread=False)
+        self._data_version = None
+
+    def check(self):
+        """
+        前回の確認から変更されたテーブル
+
+        Returns:
+            set: 版数の変わったテーブル名（初回・変更なし・ロック中は空）
+        """
+        replaced = False
+        try:
+            file_id = self._current_file_id()
+            if self._conn is None or file_id != self._file_id:
+                replaced = self._conn is not None
+                self._open()
+                self._file_id = file_id
+
+            data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            if data_version == self._data_version:
+                return set()
+            versions = dict(self._conn.execute('SELECT table_name, version FROM table_versions').fetchall())
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                print(f"⚠️ 変更の確認に失敗しました: {e}")
+            return set()
+
+        previous = self._versions
+        self._data_version = data_version
+        self._versions = versions
+        if replaced:
+            return set(VERSIONED_TABLES)
+        if previous is None:
+            return set()
+        return {table for table, version in versions.items() if previous.get(table) != version}
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
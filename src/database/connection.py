@@ -0,0 +1,310 @@
+"""
+SQLiteコネクション管理
+- DBファイルごとに1つのプールを共有（Database / HistoryManager / StaffManager）
+- スレッドごとにコネクションを再利用（開くのは初回のみ）
+- timeout・row_factory・PRAGMAを一元管理
+- トランザクションはコンテキストマネージャで扱う
+- ジャーナルモード（delete / wal）はconfig.DATABASE_JOURNAL_MODEで選択
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# ロック待ちのタイムアウト（秒）
+DEFAULT_TIMEOUT = 10.0
+
+# WALモードで最後のcommitからこの秒数だけ書き込みがなければ、PASSIVEチェックポイントを行う
+IDLE_CHECKPOINT_SECONDS = 5.0
+
+# すべてのコネクションに適用するPRAGMA
+CONNECTION_PRAGMAS = [
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -8000',
+]
+
+# ジャーナルモードごとのPRAGMA
+JOURNAL_MODE_PRAGMAS = {
+    # 従来のロールバックジャーナル
+    'delete': [
+        'PRAGMA journal_mode = DELETE',
+    ],
+    # WAL: 書き込みは-walへの追記のみ。保存後・終了時はTRUNCATE、書き込みが止まった時はPASSIVEでチェックポイント
+    'wal': [
+        'PRAGMA journal_mode = WAL',
+        'PRAGMA synchronous = NORMAL',
+    ],
+}
+
+# config.pyが読み込めない場合の既定値
+FALLBACK_DB_PATH = Path('data/records.db')
+FALLBACK_JOURNAL_MODE = 'delete'
+
+
+def default_db_path():
+    """
+    既定のDBパス（config.DATABASE_PATH）
+
+    configの値はDropboxの検出などを伴うため、import時ではなく使う時に参照する。
+    """
+    try:
+        import config
+        return config.DATABASE_PATH
+    except (ImportError, AttributeError):
+        # config.pyが読み込めない場合はデフォルトパスを使用
+        return FALLBACK_DB_PATH
+
+
+def default_journal_mode():
+    """既定のジャーナルモード（config.DATABASE_JOURNAL_MODE）"""
+    try:
+        import config
+        return getattr(config, 'DATABASE_JOURNAL_MODE', FALLBACK_JOURNAL_MODE)
+    except ImportError:
+        return FALLBACK_JOURNAL_MODE
+
+
+class ConnectionPool:
+    """1つのDBファイルに対するスレッド単位のコネクションプール"""
+
+    def __init__(self, db_path, timeout=DEFAULT_TIMEOUT, journal_mode=None,
+                 idle_checkpoint_seconds=IDLE_CHECKPOINT_SECONDS):
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self.idle_checkpoint_seconds = idle_checkpoint_seconds
+        self.journal_mode = (journal_mode or default_journal_mode()).lower()
+        if self.journal_mode not in JOURNAL_MODE_PRAGMAS:
+            raise ValueError(f"不明なジャーナルモードです: {self.journal_mode}")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        # スレッドID → コネクション（他のスレッドから実行中のSQLを中断するため）
+        self._threads = {}
+        # 書き込みが止まった時のチェックポイント用タイマー（最後のcommitの時刻から判定）
+        self._idle_timer = None
+        self._last_commit = 0.0
+
+    def _open(self):
+        """新しいコネクションを開いて共通設定を適用"""
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS + JOURNAL_MODE_PRAGMAS[self.journal_mode]:
+            conn.execute(pragma)
+        return conn
+
+    def connect(self):
+        """現在のスレッドのコネクションを取得（なければ作成）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._lock:
+                self._connections.append(conn)
+                self._threads[threading.get_ident()] = conn
+        return conn
+
+    def interrupt(self, thread_id):
+        """
+        指定したスレッドのコネクションで実行中のSQLを中断（他のスレッドから呼ぶ）
+
+        中断されたSQLは sqlite3.OperationalError（interrupted）になる。
+        ロック待ちの間は中断されず、timeoutまで待ってから終わる。
+        """
+        with self._lock:
+            conn = self._threads.get(thread_id)
+        if conn is not None:
+            conn.interrupt()
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+        トランザクションを開始してコネクションを返す
+
+        正常終了でcommit、例外発生時はrollback。
+        入れ子で呼ばれた場合は最も外側のトランザクションにまとめる。
+        WALモードではcommitのたびにはチェックポイントせず、書き込みが
+        idle_checkpoint_seconds秒止まった時にPASSIVEチェックポイントを行う。
+        immediate=True の場合は BEGIN IMMEDIATE で開始時に書き込みロックを取る
+        （読んだ値をもとに書き込む処理を、他のプロセスと同時に実行しないため）。
+
+        使い方:
+            with pool.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(...)
+        """
+        conn = self.connect()
+        if self._local.depth > 0:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        if not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        self._local.depth = 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.depth = 0
+        self._schedule_idle_checkpoint()
+
+    def checkpoint(self):
+        """
+        WALの内容を本体へ書き戻し、-walファイルを空にする（TRUNCATE）
+
+        面談記録の保存後・マイグレーション後など、区切りのよい時点で明示的に呼ぶ。
+        他のコネクションが読み込み中の場合はtimeoutまで待つため、頻繁には呼ばない。
+        失敗した場合は、次のチェックポイントまたは終了時に書き戻される。
+
+        Returns:
+            bool: チェックポイントが完了した場合True（deleteモードでは常にTrue）
+        """
+        if self.journal_mode != 'wal':
+            return True
+        conn = self.connect()
+        if conn.in_transaction:
+            return False
+        try:
+            busy, _, _ = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ チェックポイントに失敗しました: {e}")
+            return False
+        return busy == 0
+
+    def _schedule_idle_checkpoint(self):
+        """commit後に呼ぶ。書き込みが止まってからPASSIVEチェックポイントを行うタイマーを用意"""
+        if self.journal_mode != 'wal' or not self.idle_checkpoint_seconds:
+            return
+        with self._lock:
+            self._last_commit = time.monotonic()
+            if self._idle_timer is None:
+                self._start_idle_timer(self.idle_checkpoint_seconds)
+
+    def _start_idle_timer(self, delay):
+        """タイマーを開始（self._lockを取った状態で呼ぶ）"""
+        timer = threading.Timer(delay, self._idle_checkpoint)
+        timer.daemon = True
+        self._idle_timer = timer
+        timer.start()
+
+    def _idle_checkpoint(self):
+        """
+        書き込みが止まった時のチェックポイント（タイマーのスレッドで実行）
+
+        PASSIVEはロック待ちをせず、読み込み中のコネクションがあっても
+        書き戻せる分だけ書き戻して終わる（-walファイルは次の書き込みで再利用される）。
+        """
+        with self._lock:
+            if self._idle_timer is None:
+                return
+            remaining = self._last_commit + self.idle_checkpoint_seconds - time.monotonic()
+            if remaining > 0:
+                # 待っている間にcommitがあった場合は、最後のcommitから数え直す
+                self._start_idle_timer(remaining)
+                return
+            self._idle_timer = None
+        try:
+            conn = sqlite3.connect(str(self.db_path), timeout=0)
+            try:
+                conn.execute('PRAGMA wal_checkpoint(PASSIVE)')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ チェックポイントに失敗しました: {e}")
+
+    def _cancel_idle_checkpoint(self):
+        """待機中のチェックポイントのタイマーを止める"""
+        with self._lock:
+            timer = self._idle_timer
+            self._idle_timer = None
+        if timer is not None:
+            timer.cancel()
+
+    def close(self):
+        """現在のスレッドのコネクションを閉じる"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+            self._threads.pop(threading.get_ident(), None)
+        conn.close()
+
+    def close_all(self):
+        """
+        このプールが開いたすべてのコネクションを閉じる（アプリ終了時）
+
+        WALモードでは最後のコネクションでチェックポイントを行い、
+        ジャーナルモードをDELETEに戻してから閉じる。
+        終了後に-wal/-shmファイルが残らず、本体ファイル単独で完結する。
+        """
+        self._cancel_idle_checkpoint()
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+            self._threads = {}
+        last = connections.pop() if connections else None
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        if last is not None:
+            if self.journal_mode == 'wal':
+                try:
+                    if last.in_transaction:
+                        last.rollback()
+                    last.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                    last.execute('PRAGMA journal_mode = DELETE')
+                except sqlite3.Error as e:
+                    print(f"⚠️ 終了時のチェックポイントに失敗しました: {e}")
+            try:
+                last.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, journal_mode=None):
+    """
+    DBパスに対応する共有プールを取得
+
+    journal_modeは初回作成時のみ有効（省略時はconfigの設定）
+    """
+    key = str(Path(db_path).resolve())
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, journal_mode=journal_mode)
+            _pools[key] = pool
+        return pool
+
+
+def interrupt_thread(thread_id):
+    """指定したスレッドのコネクションで実行中のSQLを中断（すべてのプール）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.interrupt(thread_id)
+
+
+def close_all_pools():
+    """すべてのプールのコネクションを閉じる"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
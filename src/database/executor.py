@@ -0,0 +1,121 @@
+"""
+DB処理用のワーカースレッド
+- 書き込みは1本の書き込みスレッドで投入順に実行（ロック待ち・リトライで画面を止めない）
+- 読み込みは複数の読み込みスレッドで並行に実行
+- コネクションはConnectionPoolのスレッドごとのもの（スレッド間で共有しない）
+- 結果はFutureで受け取る。画面への反映は src.ui.db_runner.DbRunner を使う
+- キャンセル: 開始前なら実行しない。実行中の読み込みはSQLを中断（実行中の書き込みは最後まで実行）
+"""
+import sqlite3
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from src.database.connection import interrupt_thread
+
+# 読み込みスレッドの数
+DEFAULT_READERS = 2
+
+
+class DbTask:
+    """投入したDB処理（future に結果が入る）"""
+
+    def __init__(self, description='', write=False):
+        self.description = description
+        self.write = write
+        self.future = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        # 実行中のスレッドID（実行中のみ）
+        self._thread_id = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    def cancel(self):
+        """
+        処理をキャンセル
+
+        開始前の処理は実行しない。実行中の読み込みはSQLを中断する。
+        実行中の書き込みは途中で止めず、最後まで実行する。
+
+        Returns:
+            bool: キャンセルできた場合True（実行中の書き込み・完了済みの場合False）
+        """
+        if self.future is not None and self.future.cancel():
+            self._cancel_event.set()
+            return True
+        if self.write or self.done():
+            return False
+        self._cancel_event.set()
+        with self._lock:
+            if self._thread_id is not None:
+                interrupt_thread(self._thread_id)
+        return True
+
+    def _run(self, fn):
+        if self.cancelled:
+            raise CancelledError()
+        with self._lock:
+            self._thread_id = threading.get_ident()
+        try:
+            return fn()
+        except sqlite3.OperationalError as e:
+            if self.cancelled:
+                raise CancelledError() from e
+            raise
+        finally:
+            with self._lock:
+                self._thread_id = None
+
+
+class DbExecutor:
+    """書き込み1本・読み込み複数のワーカースレッド"""
+
+    def __init__(self, readers=DEFAULT_READERS):
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+
+    def submit_read(self, fn, description=''):
+        """読み込み処理を投入（引数なしの関数。戻り値がfutureの結果になる）"""
+        return self._submit(self._readers, fn, description, write=False)
+
+    def submit_write(self, fn, description=''):
+        """書き込み処理を投入（投入順に1件ずつ実行）"""
+        return self._submit(self._writer, fn, description, write=True)
+
+    @staticmethod
+    def _submit(workers, fn, description, write):
+        task = DbTask(description, write)
+        task.future = workers.submit(task._run, fn)
+        return task
+
+    def shutdown(self, wait=True):
+        """終了（未開始の読み込みは破棄し、書き込みは投入済みのものをすべて実行してから終える）"""
+        self._readers.shutdown(wait=wait, cancel_futures=True)
+        self._writer.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """アプリ全体で共有するDBワーカー（初回に作成）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DbExecutor()
+        return _executor
+
+
+def shutdown_executor(wait=True):
+    """DBワーカーを終了（close_all_poolsの前に呼ぶ）"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
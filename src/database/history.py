@@ -1,71 +1,128 @@
-import sqlite3
 import json
 from pathlib import Path
 from datetime import datetime
 import sys
 
-# config.pyからDATABASE_PATHを取得
-try:
-    import config
-    DEFAULT_DB_PATH = config.DATABASE_PATH
-except (ImportError, AttributeError):
-    # config.pyが読み込めない場合はデフォルトパスを使用
-    DEFAULT_DB_PATH = Path('data/records.db')
+from src.database.connection import get_pool, default_db_path
+from src.database.migrations import ensure_schema, has_table, FTS_TABLE
+from src.database import similarity
+from src.database.issues import issue_filter_sql
+from src.database.keywords import get_keyword_dictionary
+
+
+# bm25の列ごとの重み（memo, keywords, issues）
+FTS_BM25_WEIGHTS = (1.0, 2.0, 0.5)
+
+INSERT_INTERVIEW_SQL = '''
+    INSERT INTO interview_history 
+    (child_initials, grade, gender, school_name, memo, issues_json, 
+     short_term_plan_json, long_term_plan_json, future_path_json, 
+     medical_info_json, keywords, keywords_version, interview_date, district)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
 
 class HistoryManager:
     def __init__(self, db_path=None):
         if db_path is None:
-            db_path = DEFAULT_DB_PATH
+            # config.pyのDATABASE_PATH（使う時に解決）
+            db_path = default_db_path()
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True, parents=True)
-        self.init_history()
+        self.pool = get_pool(self.db_path)
+        self._similarity_index = None
+        # テーブルの作成・列の追加はマイグレーションで行う（DBごとにプロセスで1回だけ確認）
+        ensure_schema(self.pool)
+        # FTS5が使えないSQLiteでは全文検索テーブルがなく、LIKE検索にフォールバック
+        self.fts_enabled = has_table(self.pool, FTS_TABLE)
     
-    def init_history(self):
-        """面談履歴テーブルを作成"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+    def save_interview(self, interview_data, assessment_data):
+        """面談記録を保存"""
+        # キーワード抽出
+        dictionary = get_keyword_dictionary()
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS interview_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                child_initials TEXT NOT NULL,
-                grade INTEGER,
-                gender TEXT,
-                school_name TEXT,
-                memo TEXT,
-                issues_json TEXT,
-                short_term_plan_json TEXT,
-                long_term_plan_json TEXT,
-                future_path_json TEXT,
-                medical_info_json TEXT,
-                keywords TEXT,
-                interview_date DATE,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+            row, keywords = self._interview_row(interview_data, assessment_data, dictionary)
+            cursor.execute(INSERT_INTERVIEW_SQL, row)
+            interview_id = cursor.lastrowid
         
-        # 全文検索用インデックス
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_keywords ON interview_history(keywords)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_grade ON interview_history(grade)')
+        # 類似検索の行列に差分追加（読み込み済みの場合のみ。未読み込みなら次回読み込み時に反映）
+        self._add_to_similarity_index(interview_id, interview_data, assessment_data, keywords)
         
-        conn.commit()
-        conn.close()
+        # WALの内容を本体に書き戻す（Dropboxに同期されるのは本体ファイルのみ）
+        self.pool.checkpoint()
+        print(f"✅ 面談記録を保存しました（ID: {interview_id}）")
+        return interview_id
     
-    def save_interview(self, interview_data, assessment_data):
-        """面談記録を保存"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+    def save_interviews(self, records, batch_size=500, progress=None):
+        """
+        面談記録をまとめて保存（一括取り込み用）
         
-        # キーワード抽出
-        keywords = self._extract_keywords(interview_data, assessment_data)
+        batch_size件ごとに1つのトランザクションで executemany し、チェックポイントは最後に1回だけ行う。
+        保存済みのバッチは、後のバッチで失敗しても残る。
         
-        cursor.execute('''
-            INSERT INTO interview_history 
-            (child_initials, grade, gender, school_name, memo, issues_json, 
-             short_term_plan_json, long_term_plan_json, future_path_json, 
-             medical_info_json, keywords, interview_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        Args:
+            records: (interview_data, assessment_data) の反復可能オブジェクト（ジェネレータ可）
+            batch_size: 1トランザクションの件数
+            progress: 保存済みの件数を受け取る関数（バッチごとに呼ぶ）
+        
+        Returns:
+            list: 保存した面談記録のID（recordsの順）
+        """
+        dictionary = get_keyword_dictionary()
+        batch_size = max(1, batch_size)
+        saved_ids = []
+        batch = []
+        
+        def flush():
+            rows = []
+            keywords_list = []
+            for interview_data, assessment_data in batch:
+                row, keywords = self._interview_row(interview_data, assessment_data, dictionary)
+                rows.append(row)
+                keywords_list.append(keywords)
+            # BEGIN IMMEDIATEで最大IDを読む前に書き込みロックを取る（他の接続がこの間に挿入できない）
+            with self.pool.transaction(immediate=True) as conn:
+                cursor = conn.cursor()
+                # executemanyではlastrowidが取れないため、挿入前の最大IDより大きいIDを挿入順に読む
+                # （ロックを取ってからコミットまで他の接続は挿入できないので、この範囲のIDはすべてこのバッチの行）
+                last_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM interview_history').fetchone()[0]
+                cursor.executemany(INSERT_INTERVIEW_SQL, rows)
+                ids = [row[0] for row in cursor.execute(
+                    'SELECT id FROM interview_history WHERE id > ? ORDER BY id', (last_id,)
+                )]
+            # コミット後に類似検索の行列へ反映（ロールバックした行を含めない。キャッシュの保存は最後に1回）
+            if self._similarity_index is not None:
+                self._similarity_index.add_cases([
+                    (interview_id, interview_data.get('学年'), interview_data.get('性別'),
+                     assessment_data.get('issues', {}), keywords)
+                    for interview_id, (interview_data, assessment_data), keywords in zip(ids, batch, keywords_list)
+                ], save=False)
+            saved_ids.extend(ids)
+            batch.clear()
+            if progress:
+                progress(len(saved_ids))
+        
+        try:
+            for record in records:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            if saved_ids:
+                self.pool.checkpoint()
+                if self._similarity_index is not None:
+                    self._similarity_index.save()
+        
+        print(f"✅ 面談記録を{len(saved_ids)}件保存しました")
+        return saved_ids
+    
+    def _interview_row(self, interview_data, assessment_data, dictionary):
+        """INSERT_INTERVIEW_SQL のパラメータとキーワード"""
+        keywords = self._extract_keywords(interview_data, assessment_data, dictionary)
+        row = (
             interview_data.get('児童イニシャル', ''),
             interview_data.get('学年'),
             interview_data.get('性別'),
@@ -77,14 +134,24 @@ class HistoryManager:
             json.dumps(assessment_data.get('future_path', {}), ensure_ascii=False),
             json.dumps(interview_data.get('通院状況', {}), ensure_ascii=False),
             keywords,
-            interview_data.get('面談実施日').strftime('%Y-%m-%d') if interview_data.get('面談実施日') else None
-        ))
-        
-        conn.commit()
-        conn.close()
-        print(f"✅ 面談記録を保存しました（ID: {cursor.lastrowid}）")
+            dictionary.version,
+            interview_data.get('面談実施日').strftime('%Y-%m-%d') if interview_data.get('面談実施日') else None,
+            interview_data.get('区名') or None
+        )
+        return row, keywords
+    
+    def _add_to_similarity_index(self, interview_id, interview_data, assessment_data, keywords):
+        """類似検索の行列に差分追加（読み込み済みの場合のみ。未読み込みなら次回読み込み時に反映）"""
+        if self._similarity_index is not None:
+            self._similarity_index.add_case(
+                interview_id,
+                interview_data.get('学年'),
+                interview_data.get('性別'),
+                assessment_data.get('issues', {}),
+                keywords
+            )
     
-    def _extract_keywords(self, interview_data, assessment_data):
+    def _extract_keywords(self, interview_data, assessment_data, dictionary=None):
         """検索用キーワードを抽出"""
         keywords = []
         
@@ -108,25 +175,41 @@ class HistoryManager:
             if issue_data.get('該当'):
                 keywords.append(issue_name)
         
-        # メモから重要キーワード抽出
-        memo = interview_data.get('メモ', '')
-        important_words = [
-            '不登校', '引きこもり', '昼夜逆転', 'ゲーム', 
-            '友達', '対人', '緊張', '不安', 'コミュニケーション',
-            '学習', '勉強', '遅れ', '進学', '就職',
-            '通院', '診断', '発達', 'ADHD', 'ASD'
-        ]
-        for word in important_words:
-            if word in memo:
-                keywords.append(word)
-        
-        return ' '.join(set(keywords))  # 重複削除
+        # メモから重要キーワード抽出（辞書の全語を1回の走査で検出）
+        if dictionary is None:
+            dictionary = get_keyword_dictionary()
+        keywords.extend(dictionary.find(interview_data.get('メモ') or ''))
+        
+        return ' '.join(dict.fromkeys(keywords))  # 重複削除
+    
+    @property
+    def similarity_index(self):
+        """類似検索エンジン（numpyがない場合はNone）"""
+        if self._similarity_index is None and similarity.is_available():
+            self._similarity_index = similarity.CaseSimilarityIndex(self.pool)
+        return self._similarity_index
     
-    def search_similar_cases(self, current_data, limit=5):
-        """類似ケースを検索"""
-        conn = sqlite3.connect(str(self.db_path))
+    def search_similar_cases(self, current_data, limit=5, issues=None):
+        """
+        類似ケースを検索
+        
+        numpyがある場合は類似検索エンジン（課題・キーワード・学年・性別の重み付きJaccard）で並べる。
+        FTS5のbm25の順位付けは、numpyがない場合の代わりの検索（FTS5も使えなければLIKE検索）。
+        bm25は一致した全行の統計を読むため、よく出る語では10万件で約0.1秒かかり、
+        類似検索エンジン（約5ミリ秒）の並べ直しには使わない。
+        
+        Args:
+            current_data: 現在の面談データ（学年・性別・メモ）
+            limit: 取得件数
+            issues: 現在のケースの課題の辞書（指定すると課題の一致も考慮）
+        """
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
+        index = self.similarity_index
+        if index is not None:
+            return self._search_vector(cursor, index, current_data, limit, issues)
+        
         # 検索条件を構築
         conditions = []
         params = []
@@ -144,40 +227,14 @@ class HistoryManager:
             params.append(gender)
         
         # キーワードマッチング
-        memo = current_data.get('メモ', '')
-        search_keywords = []
-        important_words = [
-            '不登校', '引きこもり', '昼夜逆転', 'ゲーム', 
-            '友達', '対人', '緊張', '不安',
-            '学習', '勉強', '進学'
-        ]
-        for word in important_words:
-            if word in memo:
-                search_keywords.append(word)
-        
-        # SQL構築
-        where_clause = ' AND '.join(conditions) if conditions else '1=1'
-        
-        # キーワードでスコアリング
-        score_conditions = []
-        for keyword in search_keywords:
-            score_conditions.append(f"CASE WHEN keywords LIKE '%{keyword}%' THEN 1 ELSE 0 END")
-        
-        score_sql = '+'.join(score_conditions) if score_conditions else '0'
+        search_keywords = get_keyword_dictionary().find(current_data.get('メモ') or '')
         
-        query = f'''
-            SELECT id, child_initials, grade, gender, memo, issues_json, 
-                   short_term_plan_json, interview_date, keywords,
-                   ({score_sql}) as relevance_score
-            FROM interview_history
-            WHERE {where_clause}
-            ORDER BY relevance_score DESC, created_at DESC
-            LIMIT ?
-        '''
+        where_clause = ' AND '.join(conditions) if conditions else '1=1'
         
-        params.append(limit)
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        if search_keywords and self.fts_enabled:
+            results = self._search_fts(cursor, search_keywords, where_clause, params, limit)
+        else:
+            results = self._search_like(cursor, search_keywords, where_clause, params, limit)
         
         # 整形
         similar_cases = []
@@ -195,22 +252,118 @@ class HistoryManager:
                 'score': row[9]
             })
         
-        conn.close()
         return similar_cases
     
+    def _search_vector(self, cursor, index, current_data, limit, issues):
+        """類似検索エンジンで上位k件を求め、該当する面談記録を取得"""
+        grade = current_data.get('学年')
+        gender = current_data.get('性別')
+        ranked = index.search(
+            issues=issues,
+            memo=current_data.get('メモ', ''),
+            grade=grade,
+            gender=gender,
+            limit=limit,
+            grade_window=1 if grade else None,
+            same_gender=bool(gender)
+        )
+        if not ranked:
+            return []
+        
+        ids = [case_id for case_id, _ in ranked]
+        cursor.execute(f'''
+            SELECT id, child_initials, grade, gender, memo, issues_json,
+                   short_term_plan_json, interview_date, keywords
+            FROM interview_history
+            WHERE id IN ({', '.join('?' * len(ids))})
+        ''', ids)
+        rows = {row[0]: row for row in cursor.fetchall()}
+        
+        similar_cases = []
+        for case_id, score in ranked:
+            row = rows.get(case_id)
+            if row is None:
+                continue
+            similar_cases.append({
+                'id': row[0],
+                'initials': row[1],
+                'grade': row[2],
+                'gender': row[3],
+                'memo': row[4],
+                'issues': json.loads(row[5]) if row[5] else {},
+                'short_term_plan': json.loads(row[6]) if row[6] else {},
+                'interview_date': row[7],
+                'keywords': row[8],
+                'score': score
+            })
+        return similar_cases
+    
+    def _search_fts(self, cursor, search_keywords, where_clause, params, limit):
+        """FTS5で検索し、bm25の関連度順に並べる（numpyがない場合。不足分は新しい順で補完）"""
+        terms = []
+        for keyword in search_keywords:
+            phrase = keyword.replace('"', '""')
+            terms.append(f'keywords : "【{phrase}】"')
+            if len(keyword) >= 3:
+                terms.append(f'memo : "{phrase}"')
+        match_query = ' OR '.join(terms)
+        weights = ', '.join(str(w) for w in FTS_BM25_WEIGHTS)
+        
+        cursor.execute(f'''
+            SELECT h.id, h.child_initials, h.grade, h.gender, h.memo, h.issues_json,
+                   h.short_term_plan_json, h.interview_date, h.keywords,
+                   -bm25({FTS_TABLE}, {weights}) as relevance_score
+            FROM {FTS_TABLE}
+            JOIN interview_history h ON h.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH ? AND {where_clause}
+            ORDER BY bm25({FTS_TABLE}, {weights}), h.created_at DESC
+            LIMIT ?
+        ''', [match_query] + params + [limit])
+        results = cursor.fetchall()
+        
+        # 一致件数が足りない場合は条件に合う新しいケースで補完
+        if len(results) < limit:
+            found_ids = [row[0] for row in results]
+            exclude = f"AND id NOT IN ({', '.join('?' * len(found_ids))})" if found_ids else ''
+            cursor.execute(f'''
+                SELECT id, child_initials, grade, gender, memo, issues_json,
+                       short_term_plan_json, interview_date, keywords, 0 as relevance_score
+                FROM interview_history
+                WHERE {where_clause} {exclude}
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', params + found_ids + [limit - len(results)])
+            results += cursor.fetchall()
+        
+        return results
+    
+    def _search_like(self, cursor, search_keywords, where_clause, params, limit):
+        """FTS5が使えない場合のLIKE検索（キーワード一致数でスコアリング）"""
+        score_conditions = ["CASE WHEN keywords LIKE ? THEN 1 ELSE 0 END" for _ in search_keywords]
+        score_sql = '+'.join(score_conditions) if score_conditions else '0'
+        score_params = [f'%{keyword}%' for keyword in search_keywords]
+        
+        cursor.execute(f'''
+            SELECT id, child_initials, grade, gender, memo, issues_json, 
+                   short_term_plan_json, interview_date, keywords,
+                   ({score_sql}) as relevance_score
+            FROM interview_history
+            WHERE {where_clause}
+            ORDER BY relevance_score DESC, created_at DESC
+            LIMIT ?
+        ''', score_params + params + [limit])
+        return cursor.fetchall()
+    
     def get_history_count(self):
         """保存された面談記録数を取得"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        cursor = self.pool.connect().cursor()
         cursor.execute('SELECT COUNT(*) FROM interview_history')
         count = cursor.fetchone()[0]
-        conn.close()
         return count
     
     def get_all_cases(self):
         """すべての面談記録を取得"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        cursor = self.pool.connect().cursor()
         
         cursor.execute('''
             SELECT id, child_initials, grade, gender, school_name, 
@@ -219,8 +372,170 @@ class HistoryManager:
             ORDER BY created_at DESC
         ''')
         
-        results = cursor.fetchall()
-        conn.close()
+        results = [tuple(row) for row in cursor.fetchall()]
         return results
 
+    def find_interviews(self, issues=None, school_level=None, match_all=True):
+        """
+        課題・学校段階で面談記録を検索（例: 中学生で「生活リズム」と「対人緊張の高さ」に該当）
+
+        interview_issues のインデックスで絞り込むため、issues_json を行ごとに解析しない。
 
+        Args:
+            issues: 課題名のリスト（「該当」の課題のみ対象）
+            school_level: '小学生' / '中学生' / '高校生'
+            match_all: Trueはすべての課題に該当、Falseはいずれかに該当
+
+        Returns:
+            list: get_all_cases と同じ形のタプルのリスト（新しい順）
+        """
+        conditions, params = issue_filter_sql(issues, school_level, match_all)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        cursor = self.pool.connect().cursor()
+        cursor.execute(f'''
+            SELECT h.id, h.child_initials, h.grade, h.gender, h.school_name,
+                   h.memo, h.interview_date, h.created_at
+            FROM interview_history h
+            {where_clause}
+            ORDER BY h.created_at DESC
+        ''', params)
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def get_interviews_for_export(self, ids=None, since=None, until=None, issues=None, school_level=None):
+        """
+        アセスメントシート出力用に面談記録を取得
+
+        保存時の interview_data / assessment_data と同じ形に戻して返す
+        （氏名は保存していないため児童氏名にはイニシャルを入れる。
+        面談実施日がない記録は登録日を使う）。
+
+        Args:
+            ids: 面談記録IDのリスト（Noneの場合はすべて）
+            since: 面談実施日の開始（'YYYY-MM-DD'、この日を含む）
+            until: 面談実施日の終了（'YYYY-MM-DD'、この日を含む）
+            issues: 課題名のリスト（すべてに該当する記録のみ）
+            school_level: '小学生' / '中学生' / '高校生'
+
+        Returns:
+            list: (面談記録ID, interview_data, assessment_data) のリスト（ID順）
+        """
+        conditions = []
+        params = []
+        if ids is not None:
+            if not ids:
+                return []
+            conditions.append("id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps([int(i) for i in ids]))
+        if since:
+            conditions.append("COALESCE(interview_date, date(created_at)) >= ?")
+            params.append(since)
+        if until:
+            conditions.append("COALESCE(interview_date, date(created_at)) <= ?")
+            params.append(until)
+        issue_conditions, issue_params = issue_filter_sql(issues, school_level, alias='interview_history')
+        conditions.extend(issue_conditions)
+        params.extend(issue_params)
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        cursor = self.pool.connect().cursor()
+        cursor.execute(f'''
+            SELECT id, child_initials, grade, gender, school_name, memo,
+                   issues_json, short_term_plan_json, long_term_plan_json,
+                   future_path_json, medical_info_json, district,
+                   COALESCE(interview_date, date(created_at)) AS interview_date
+            FROM interview_history
+            {where_clause}
+            ORDER BY id
+        ''', params)
+
+        def load(text):
+            return json.loads(text) if text else {}
+
+        results = []
+        for row in cursor.fetchall():
+            interview_date = None
+            if row['interview_date']:
+                try:
+                    interview_date = datetime.strptime(row['interview_date'], '%Y-%m-%d')
+                except ValueError:
+                    interview_date = row['interview_date']
+            interview_data = {
+                '児童イニシャル': row['child_initials'],
+                '児童氏名': row['child_initials'],
+                '学年': row['grade'],
+                '性別': row['gender'] or '',
+                '学校名': row['school_name'] or '',
+                'メモ': row['memo'] or '',
+                '区名': row['district'] or '',
+                '通院状況': load(row['medical_info_json']),
+                '面談実施日': interview_date,
+            }
+            assessment_data = {
+                'issues': load(row['issues_json']),
+                'short_term_plan': load(row['short_term_plan_json']),
+                'long_term_plan': load(row['long_term_plan_json']),
+                'future_path': load(row['future_path_json']),
+            }
+            results.append((row['id'], interview_data, assessment_data))
+        return results
+
+    def reextract_keywords(self, batch_size=500, force=False):
+        """
+        保存済みの面談記録のキーワードを現在の辞書で抽出し直す
+        
+        辞書のバージョンが異なる記録だけを対象に、id順に batch_size 件ずつ更新する。
+        全文検索インデックスはトリガーで同期され、最後に類似検索の行列を作り直す。
+        
+        Args:
+            batch_size: 1回のトランザクションで更新する件数
+            force: Trueの場合、バージョンに関係なくすべての記録を更新
+        
+        Returns:
+            int: 更新した件数
+        """
+        dictionary = get_keyword_dictionary()
+        condition = '' if force else 'AND (keywords_version IS NULL OR keywords_version != ?)'
+        condition_params = [] if force else [dictionary.version]
+        
+        updated = 0
+        last_id = 0
+        while True:
+            cursor = self.pool.connect().cursor()
+            cursor.execute(f'''
+                SELECT id, grade, gender, memo, issues_json
+                FROM interview_history
+                WHERE id > ? {condition}
+                ORDER BY id
+                LIMIT ?
+            ''', [last_id] + condition_params + [batch_size])
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            updates = []
+            for row in rows:
+                try:
+                    issues = json.loads(row[4]) if row[4] else {}
+                except ValueError:
+                    issues = {}
+                interview_data = {'学年': row[1], '性別': row[2], 'メモ': row[3]}
+                keywords = self._extract_keywords(interview_data, {'issues': issues}, dictionary)
+                updates.append((keywords, dictionary.version, row[0]))
+            
+            with self.pool.transaction() as conn:
+                conn.executemany(
+                    'UPDATE interview_history SET keywords = ?, keywords_version = ? WHERE id = ?',
+                    updates
+                )
+            
+            updated += len(updates)
+            last_id = rows[-1][0]
+            print(f"🔄 キーワードを再抽出しました（{updated}件）")
+        
+        if updated:
+            self.pool.checkpoint()
+        # 類似検索の行列は新しい辞書で作り直す（辞書のバージョン違いのキャッシュは使われない）
+        if updated:
+            self._similarity_index = None
+            self.similarity_index
+        return updated
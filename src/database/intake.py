@@ -0,0 +1,305 @@
+"""
+面談記録の取り込み（画面を使わない一括登録用）
+- JSONL・CSVの面談記録（紙の受付票の転記など）を1件ずつ読み込む（ファイル全体を読み込まない）
+- 記録を入力フォームと同じ形の interview_data / assessment_data に変換する
+- 課題の判定（build_assessment_data）は入力フォーム（SmartInputForm.generate_assessment_data）と共通
+
+記録の項目名は入力フォームの項目名（日本語）。CSVの複数選択の項目は「、」などで区切る。
+"""
+import csv
+import json
+import re
+import sys
+from datetime import datetime
+
+# 入力フォームの選択肢
+ATTENDANCE_OPTIONS = ["週0回（完全不登校）", "週1-2回", "週3-4回", "ほぼ毎日"]
+OUTING_OPTIONS = ["外出する", "コンビニ程度", "ほぼ外出しない"]
+RHYTHM_ITEMS = ["朝起きられない", "昼夜逆転", "睡眠不足", "特に問題なし"]
+HABIT_ITEMS = ["食事の乱れ", "運動不足", "ゲーム依存傾向", "特に問題なし"]
+STUDY_ITEMS = ["学習の遅れ", "低学力", "学習習慣なし", "学習環境なし", "特に問題なし"]
+SOCIAL_ITEMS = ["対人緊張が高い", "友達との関わりに不安", "コミュニケーション苦手", "特に問題なし"]
+FAMILY_ITEMS = ["経済的困難", "家族関係の課題", "他の世帯員の問題", "虐待", "その他", "特に問題なし"]
+
+# 短期・長期目標の項目（記録では「短期_課題」「長期_目標」などの名前）
+PLAN_FIELDS = ["課題", "現状", "ニーズ_本人", "ニーズ_保護者", "目標", "方法"]
+
+# 必須項目（入力フォームの入力チェックと同じ）
+REQUIRED_FIELDS = ['児童氏名', '学校名']
+
+DATE_FORMATS = ('%Y/%m/%d', '%Y-%m-%d', '%Y年%m月%d日')
+
+_TRUE_WORDS = {'1', 'true', 'yes', 'y', 'はい', 'あり', '有', '該当', '○', '〇', '✓', '✔'}
+_LIST_SPLIT = re.compile(r'[、,，/／・;\n]+')
+
+
+def parse_bool(value):
+    """「はい」「○」「1」などを真偽値に変換"""
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    return str(value).strip().lower() in _TRUE_WORDS
+
+
+def parse_list(value):
+    """複数選択の項目をリストに変換（JSONの配列・「、」区切りの文字列）"""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in _LIST_SPLIT.split(str(value)) if item.strip()]
+
+
+def parse_interview_date(value):
+    """面談実施日を変換（空の場合はNone）"""
+    if isinstance(value, datetime):
+        return value
+    text = str(value or '').strip()
+    if not text:
+        return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"面談実施日を解析できません: {text}")
+
+
+def _joined_detail(items, detail):
+    """チェックした項目と詳細の表示（入力フォームと同じ形式）"""
+    if not items:
+        return "特に問題なし"
+    return "、".join(items) + (f"({detail})" if detail else "")
+
+
+def build_assessment_data(inputs):
+    """
+    入力内容から課題の判定と目標を作成（入力フォームと一括取り込みで共通）
+
+    Args:
+        inputs: 入力内容の辞書
+            不登校（bool）, 登校状況, 不登校詳細, 外出状況,
+            生活リズム / 生活習慣 / 学習 / 対人関係 / 家庭環境（チェックした項目のリスト）と各「〜詳細」,
+            発達特性（bool）, 発達特性詳細, 短期_課題 … 長期_方法
+
+    Returns:
+        dict: assessment_data
+    """
+    def text(name):
+        return str(inputs.get(name) or '')
+
+    issues = {}
+
+    # 不登校
+    issues["不登校"] = {
+        "該当": bool(inputs.get('不登校')),
+        "詳細": f"{text('登校状況')}。{text('不登校詳細')}"
+    }
+
+    # 引きこもり
+    outing = text('外出状況')
+    issues["引きこもり"] = {
+        "該当": outing == "ほぼ外出しない",
+        "詳細": outing
+    }
+
+    # 生活リズム
+    rhythm_items = list(inputs.get('生活リズム') or [])
+    issues["生活リズム"] = {
+        "該当": len(rhythm_items) > 0 and "特に問題なし" not in rhythm_items,
+        "詳細": _joined_detail(rhythm_items, text('生活リズム詳細').strip())
+    }
+
+    # 生活習慣
+    habit_items = list(inputs.get('生活習慣') or [])
+    issues["生活習慣"] = {
+        "該当": len(habit_items) > 0 and "特に問題なし" not in habit_items,
+        "詳細": _joined_detail(habit_items, text('生活習慣詳細').strip())
+    }
+
+    # 学習
+    study_items = list(inputs.get('学習') or [])
+    study_detail = _joined_detail(study_items, text('学習詳細').strip())
+    issues["学習の遅れ・低学力"] = {
+        "該当": any(item in study_items for item in ["学習の遅れ", "低学力"]),
+        "詳細": study_detail
+    }
+    issues["学習習慣・環境"] = {
+        "該当": any(item in study_items for item in ["学習習慣なし", "学習環境なし"]),
+        "詳細": study_detail
+    }
+
+    # 発達特性
+    dev_check = bool(inputs.get('発達特性'))
+    issues["発達特性or発達課題"] = {
+        "該当": dev_check,
+        "詳細": text('発達特性詳細') if dev_check else "該当なし"
+    }
+
+    # 対人関係
+    social_items = list(inputs.get('対人関係') or [])
+    social_detail = _joined_detail(social_items, text('対人関係詳細').strip())
+    issues["対人緊張の高さ"] = {
+        "該当": "対人緊張が高い" in social_items or "友達との関わりに不安" in social_items,
+        "詳細": social_detail
+    }
+    issues["コミュニケーションに苦手意識"] = {
+        "該当": "コミュニケーション苦手" in social_items,
+        "詳細": social_detail
+    }
+
+    # 家庭環境
+    family_items = list(inputs.get('家庭環境') or [])
+    family_detail_text = text('家庭環境詳細').strip()
+    issues["家庭環境"] = {
+        "該当": len(family_items) > 0 and "特に問題なし" not in family_items,
+        "詳細": _joined_detail(family_items, family_detail_text)
+    }
+    issues["虐待"] = {
+        "該当": "虐待" in family_items,
+        "詳細": f"虐待({family_detail_text})" if "虐待" in family_items and family_detail_text else "該当なし"
+    }
+    issues["他の世帯員の問題"] = {
+        "該当": "他の世帯員の問題" in family_items,
+        "詳細": f"他の世帯員の問題({family_detail_text})" if "他の世帯員の問題" in family_items and family_detail_text else "該当なし"
+    }
+    issues["その他"] = {
+        "該当": "その他" in family_items,
+        "詳細": f"その他({family_detail_text})" if "その他" in family_items and family_detail_text else ""
+    }
+
+    # 短期・長期目標の構造化
+    short_term_plan = {field: text(f"短期_{field}").strip() for field in PLAN_FIELDS}
+    long_term_plan = {field: text(f"長期_{field}").strip() for field in PLAN_FIELDS}
+
+    # 希望する進路（現在は未実装のため空のデータを返す）
+    future_path = {
+        "type": "",
+        "detail": ""
+    }
+
+    return {
+        "issues": issues,
+        "short_term_plan": short_term_plan,
+        "long_term_plan": long_term_plan,
+        "future_path": future_path,
+        "missing_info": []
+    }
+
+
+def build_interview_data(record):
+    """取り込んだ記録から interview_data を作成（入力フォームの get_interview_data と同じ形）"""
+    def text(name):
+        return str(record.get(name) or '').strip()
+
+    grade_text = text('学年')
+    try:
+        grade = int(float(grade_text)) if grade_text else None
+    except ValueError:
+        raise ValueError(f"学年を解析できません: {grade_text}")
+
+    data = {
+        '児童氏名': text('児童氏名'),
+        '児童イニシャル': text('児童イニシャル'),
+        '保護者氏名': text('保護者氏名'),
+        '性別': text('性別'),
+        '学校名': text('学校名'),
+        '学年': grade,
+        '家族構成': text('家族構成'),
+        '趣味・好きなこと': text('趣味・好きなこと'),
+        'ひとり親世帯': parse_bool(record.get('ひとり親世帯')),
+        '区名': text('区名'),
+        'ケース番号': text('ケース番号'),
+        '担当支援員': text('担当支援員'),
+        '面談実施日': parse_interview_date(record.get('面談実施日')),
+        'メモ': text('メモ'),
+        '面談時間': text('面談時間') or '未記録',
+        '面談場所': text('面談場所') or '未記録',
+        '通院状況': {},
+        '支援への希望': {
+            '希望の曜日': '・'.join(parse_list(record.get('希望の曜日'))),
+            '希望の時間帯': text('希望の時間帯'),
+            '希望の場所': text('希望の場所'),
+            '希望の支援員': text('希望の支援員'),
+            '解決したいこと': text('解決したいこと')
+        }
+    }
+
+    if parse_bool(record.get('通院あり')):
+        data['通院状況'] = {
+            '通院あり': True,
+            '病院名': text('病院名'),
+            '診断名': text('診断名'),
+            '頻度': text('通院頻度'),
+            '投薬': text('投薬'),
+            '手帳': text('手帳')
+        }
+    else:
+        data['通院状況'] = {'通院あり': False}
+
+    return data
+
+
+def record_to_data(record):
+    """
+    取り込んだ1件の記録を interview_data / assessment_data に変換
+
+    Raises:
+        ValueError: 必須項目がない・日付や学年を解析できない場合
+    """
+    missing = [field for field in REQUIRED_FIELDS if not str(record.get(field) or '').strip()]
+    if missing:
+        raise ValueError(f"必須項目がありません: {'、'.join(missing)}")
+
+    inputs = dict(record)
+    for name in ('生活リズム', '生活習慣', '学習', '対人関係', '家庭環境'):
+        inputs[name] = parse_list(record.get(name))
+    for name in ('不登校', '発達特性'):
+        inputs[name] = parse_bool(record.get(name))
+    return build_interview_data(record), build_assessment_data(inputs)
+
+
+def read_records(path, format=None, encoding='utf-8-sig'):
+    """
+    JSONL・CSVの記録を1件ずつ読み込む
+
+    Args:
+        path: ファイルのパス（'-' の場合は標準入力）
+        format: 'jsonl' または 'csv'（省略時は拡張子で判定。標準入力はjsonl）
+        encoding: 文字コード（ExcelのCSVに付くBOMは読み飛ばす）
+
+    Yields:
+        tuple: (行番号, 記録の辞書)。JSONの解析に失敗した行は (行番号, ValueError)
+    """
+    if format is None:
+        format = 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+    if path == '-':
+        stream = sys.stdin
+        close = False
+    else:
+        stream = open(path, encoding=encoding, newline='')
+        close = True
+    try:
+        if format == 'csv':
+            # 1行目は見出し。データはファイルの2行目から
+            for line_number, row in enumerate(csv.DictReader(stream), start=2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_number, ValueError(f"JSONを解析できません: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, ValueError("JSONのオブジェクトではありません")
+                    continue
+                yield line_number, record
+    finally:
+        if close:
+            stream.close()
@@ -0,0 +1,74 @@
+"""
+アセスメントの課題チェックリスト定義
+- save_interviewで保存されるissuesの項目（13項目固定）
+- 並び順はExcel出力（format_issues_text）のissue_orderと同じ
+- 課題・学校段階での面談記録の絞り込み（interview_issues テーブル。マイグレーション v10）
+"""
+
+ISSUE_ORDER = [
+    "不登校",
+    "引きこもり",
+    "生活リズム",
+    "生活習慣",
+    "学習の遅れ・低学力",
+    "学習習慣・環境",
+    "発達特性or発達課題",
+    "対人緊張の高さ",
+    "コミュニケーションに苦手意識",
+    "家庭環境",
+    "虐待",
+    "他の世帯員の問題",
+    "その他",
+]
+
+
+def is_checked(issue_data):
+    """課題データが「該当」か（保存形式の'該当'とExcel形式の'checked'の両方に対応）"""
+    if not isinstance(issue_data, dict):
+        return bool(issue_data)
+    return bool(issue_data.get('該当', issue_data.get('checked', False)))
+
+
+# 学校段階 → 学年の範囲（学年は1～12の通し番号）
+SCHOOL_LEVELS = {
+    "小学生": (1, 6),
+    "中学生": (7, 9),
+    "高校生": (10, 12),
+}
+
+
+def issue_filter_sql(issues=None, school_level=None, match_all=True, alias='h'):
+    """
+    課題・学校段階で面談記録を絞り込む条件（interview_history の別名 alias を使うクエリ用）
+
+    課題は interview_issues の (issue_code, checked, interview_id) のインデックスだけで該当する面談記録IDを求める
+    （issues_json を行ごとに解析しない）。
+
+    Args:
+        issues: 課題名のリスト
+        school_level: SCHOOL_LEVELS のキー
+        match_all: Trueはすべての課題に該当、Falseはいずれかに該当
+
+    Returns:
+        tuple: (条件のリスト, パラメータのリスト)
+
+    Raises:
+        ValueError: 学校段階が不明な場合
+    """
+    conditions = []
+    params = []
+    issues = list(dict.fromkeys(issues or []))
+    if issues:
+        having = f"GROUP BY interview_id HAVING COUNT(*) = {len(issues)}" if match_all and len(issues) > 1 else ''
+        conditions.append(f"""{alias}.id IN (
+            SELECT interview_id FROM interview_issues
+            WHERE issue_code IN ({', '.join('?' * len(issues))}) AND checked = 1
+            {having}
+        )""")
+        params.extend(issues)
+    if school_level:
+        if school_level not in SCHOOL_LEVELS:
+            raise ValueError(f"不明な学校段階です: {school_level}（{'、'.join(SCHOOL_LEVELS)}）")
+        conditions.append(f"{alias}.grade BETWEEN ? AND ?")
+        params.extend(SCHOOL_LEVELS[school_level])
+    return conditions, params
@@ -0,0 +1,125 @@
+"""
+メモのキーワード辞書と一括スキャナ
+- 重要語の辞書を1か所で管理（キーワード抽出・類似検索で共有）
+- 辞書は利用者が keywords.json で追加でき、内容からバージョンを算出
+- 辞書全体を1つの正規表現にまとめ、メモを1回走査するだけで
+  すべての語の出現位置・回数を求める
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from src.database.connection import default_db_path
+
+# 追加辞書のファイル名（DBと同じフォルダに置く）
+DICTIONARY_FILENAME = 'keywords.json'
+
+# 組み込み辞書のバージョン（BUILTIN_KEYWORDSを変えたら上げる）
+BUILTIN_VERSION = 1
+
+# 組み込みの重要語
+BUILTIN_KEYWORDS = [
+    '不登校', '引きこもり', '昼夜逆転', 'ゲーム',
+    '友達', '対人', '緊張', '不安', 'コミュニケーション',
+    '学習', '勉強', '遅れ', '進学', '就職',
+    '通院', '診断', '発達', 'ADHD', 'ASD'
+]
+
+
+class KeywordDictionary:
+    """重要語の辞書と、それをまとめた正規表現スキャナ"""
+
+    def __init__(self, words):
+        # 重複を除き、登録順を保つ
+        self.words = list(dict.fromkeys(w.strip() for w in words if w and w.strip()))
+        digest = hashlib.sha1('\n'.join(self.words).encode('utf-8')).hexdigest()[:8]
+        self.version = f'{BUILTIN_VERSION}-{digest}'
+
+        # 長い語を優先する1つの正規表現（先読みで全位置を調べる）
+        alternation = '|'.join(re.escape(w) for w in sorted(self.words, key=len, reverse=True))
+        self._pattern = re.compile(f'(?=({alternation}))') if self.words else None
+
+        # 語の中に含まれる他の語（例: 「対人緊張」に含まれる「対人」「緊張」）
+        self._contained = {
+            word: [(other, word.find(other)) for other in self.words
+                   if other != word and other in word]
+            for word in self.words
+        }
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self._contained
+
+    def scan(self, text):
+        """
+        テキストを1回走査して、辞書の語の出現位置を求める
+
+        Returns:
+            dict: 語 -> 出現位置（文字オフセット）のリスト
+        """
+        hits = {}
+        if not text or self._pattern is None:
+            return hits
+        for match in self._pattern.finditer(text):
+            word = match.group(1)
+            start = match.start(1)
+            hits.setdefault(word, []).append(start)
+            for other, offset in self._contained[word]:
+                position = start + offset
+                positions = hits.setdefault(other, [])
+                if position not in positions:
+                    positions.append(position)
+        for positions in hits.values():
+            positions.sort()
+        return hits
+
+    def count(self, text):
+        """語ごとの出現回数"""
+        return {word: len(positions) for word, positions in self.scan(text).items()}
+
+    def find(self, text):
+        """出現した語を辞書の登録順で返す"""
+        hits = self.scan(text)
+        return [word for word in self.words if word in hits]
+
+
+_cache = {}
+
+
+def load_user_words(path):
+    """利用者の追加辞書（keywords.json）を読み込む"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        print(f"⚠️ キーワード辞書を読み込めませんでした: {path}: {e}")
+        return []
+    words = data.get('words', []) if isinstance(data, dict) else data
+    return [w for w in words if isinstance(w, str)]
+
+
+def get_keyword_dictionary(path=None):
+    """
+    組み込み辞書＋追加辞書を取得（ファイルが更新されるまでキャッシュ）
+
+    追加辞書の形式:
+        {"words": ["いじめ", "転校"]}
+    """
+    path = Path(path) if path else Path(default_db_path()).parent / DICTIONARY_FILENAME
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        mtime = None
+
+    cached = _cache.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    dictionary = KeywordDictionary(BUILTIN_KEYWORDS + load_user_words(path))
+    _cache[str(path)] = (mtime, dictionary)
+    return dictionary
@@ -0,0 +1,804 @@
+"""
+スキーマのマイグレーション
+- テーブル・インデックス・トリガーの作成と列の追加はすべてここで管理
+- DBのスキーマのバージョンは PRAGMA user_version に記録し、
+  記録されたバージョンより新しいマイグレーションだけを順に実行
+- 各マイグレーションはバージョンの更新と同じトランザクションで実行（途中で失敗しても元に戻る）
+- 1つのDBにつき1プロセスで1回だけ確認し、以降は Database / HistoryManager / StaffManager を
+  作成してもDDLは実行しない
+
+このバージョンの仕組みより前に作成されたDB（user_version = 0）でもそのまま移行できるよう、
+マイグレーションは既存のテーブル・列があっても問題ない形で書く。
+スキーマを変える場合は MIGRATIONS の末尾に追加する（既存のマイグレーションは書き換えない）。
+"""
+import sqlite3
+import threading
+from pathlib import Path
+
+# 全文検索（FTS5）テーブル名
+FTS_TABLE = 'interview_history_fts'
+
+# 版数（table_versions）を記録するテーブル（画面の一覧の更新判定に使う）
+VERSIONED_TABLES = [
+    'staff', 'unassigned_cases', 'cases', 'staff_cases', 'districts', 'areas', 'schedules', 'interview_history',
+]
+
+# キーワード列はtrigramで2文字の語も検索できるよう【】で囲んで索引化する
+FTS_KEYWORDS_SQL = "'【' || replace(trim(coalesce({col}, '')), ' ', '】【') || '】'"
+
+# 初期データの支援員（実際の支援員データ。シフト表から詳細抽出）
+SAMPLE_STAFF = [
+    # 巽 - 不定期勤務、柔軟対応
+    ('巽', 35, '男性', '大阪府大阪市', '柔軟対応、コミュニケーション', '元営業職', 'ST001', '不定期', '14:00-16:00', '大阪市住之江区', 'C001', '火', '14:00-16:00', '週1回', '自宅'),
+
+    # 岡本 - 火曜日午前、水木金午後
+    ('岡本', 28, '女性', '大阪府大阪市', '学校支援、区役所支援', '元教師', 'ST002', '火水木金', '11:00-18:00', '大阪市西区', 'C002', '水', '11:00-18:00', '週1回', '区役所'),
+
+    # 松内 - 全日勤務、サテライト対応
+    ('松内', 32, '男性', '大阪府大阪市', 'サテライト支援、自宅支援、区役所支援', '元公務員', 'ST003', '月火水木金', '9:00-17:30', '大阪市中央区', 'C003', '木', '9:00-17:30', '週1回', 'サテライト'),
+
+    # 井上爽 - 木曜日のみ、区役所・自宅支援
+    ('井上爽', 29, '女性', '大阪府大阪市', '区役所支援、自宅支援', '元事務職', 'ST004', '木', '10:30-17:30', '大阪市東区', 'C004', '木', '10:30-17:30', '週1回', '自宅'),
+
+    # 山本真美 - 月水、区役所・自宅支援
+    ('山本真美', 31, '女性', '大阪府大阪市', '区役所支援、自宅支援', '元看護師', 'ST005', '月水', '11:00-18:00', '大阪市北区', 'C005', '月', '11:00-18:00', '週1回', '区役所'),
+
+    # 末永和久 - 月水、多様な支援形態
+    ('末永和久', 38, '男性', '大阪府大阪市', '自宅支援、施設支援、区役所支援', '元社会福祉士', 'ST006', '月水', '10:00-17:30', '大阪市南区', 'C006', '水', '10:00-17:30', '週1回', '施設'),
+
+    # 藤原佐久夜 - 火木金、登校・区役所・自宅支援
+    ('藤原佐久夜', 26, '女性', '大阪府大阪市', '登校支援、区役所支援、自宅支援', '元教育関係', 'ST007', '火木金', '11:00-17:30', '大阪市西成区', 'C007', '金', '11:00-17:30', '週1回', '学校'),
+
+    # 井上智美 - 月火木、隔週・月1回支援
+    ('井上智美', 33, '女性', '大阪府大阪市', '隔週支援、月1回支援', '元カウンセラー', 'ST008', '月火木', '10:00-17:30', '大阪市阿倍野区', 'C008', '火', '10:00-17:30', '隔週', '自宅'),
+
+    # 田中美由紀 - 全日勤務、自宅・学校支援
+    ('田中美由紀', 30, '女性', '大阪府大阪市', '自宅支援、学校支援', '元保育士', 'ST009', '月火水木金', '9:00-16:30', '大阪市天王寺区', 'C009', '月', '9:00-16:30', '週1回', '自宅'),
+
+    # 平岩 - 木金、午後勤務
+    ('平岩', 36, '男性', '大阪府大阪市', '自宅支援、区役所支援', '元営業職', 'ST010', '木金', '14:00-17:30', '大阪市福島区', 'C010', '金', '14:00-17:30', '週1回', '自宅'),
+
+    # 上田 - 全日勤務、夕方中心
+    ('上田', 34, '男性', '大阪府大阪市', '学校支援、区役所支援', '元教員', 'ST011', '月火水木金', '15:30-18:30', '大阪市此花区', 'C011', '水', '15:30-18:30', '週1回', '学校'),
+
+    # 中村 - 水曜日のみ、学校支援
+    ('中村', 27, '女性', '大阪府大阪市', '学校支援', '元教育関係', 'ST012', '水', '11:30-18:00', '大阪市港区', 'C012', '水', '11:30-18:00', '週1回', '学校'),
+
+    # 喜如嘉 - 全日勤務、午後〜夕方
+    ('喜如嘉', 40, '女性', '大阪府大阪市', '区役所支援、自宅支援、施設支援', '元社会福祉士', 'ST013', '月火水木金', '13:00-19:00', '大阪市大正区', 'C013', '木', '13:00-19:00', '週1回', '施設'),
+]
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _add_missing_columns(cursor, table, columns):
+    """既存のテーブルにない列だけを追加"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    existing_columns = {row[1] for row in cursor.fetchall()}
+    for column_name, column_type in columns:
+        if column_name not in existing_columns:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column_name} {column_type}')
+
+
+def _migrate_base_schema(cursor):
+    """基本のテーブル（面談・面談記録・支援員・ケース・スケジュール）と初期データ"""
+    # 面談（Database）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS children (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            child_name_encrypted TEXT NOT NULL,
+            initials TEXT NOT NULL,
+            gender TEXT,
+            school_name TEXT,
+            grade INTEGER,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interviews (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            child_id INTEGER NOT NULL,
+            interview_date DATE NOT NULL,
+            interviewer TEXT,
+            guardian_name TEXT,
+            memo_encrypted TEXT,
+            medical_info TEXT,
+            ai_analysis_result TEXT,
+            assessment_file_path TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (child_id) REFERENCES children(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quick_phrases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phrase TEXT NOT NULL,
+            category TEXT,
+            usage_count INTEGER DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_child_name ON children(child_name_encrypted)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_interview_date ON interviews(interview_date)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_child_initials ON children(initials)')
+
+    # 面談記録（HistoryManager）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            child_initials TEXT NOT NULL,
+            grade INTEGER,
+            gender TEXT,
+            school_name TEXT,
+            memo TEXT,
+            issues_json TEXT,
+            short_term_plan_json TEXT,
+            long_term_plan_json TEXT,
+            future_path_json TEXT,
+            medical_info_json TEXT,
+            keywords TEXT,
+            interview_date DATE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_keywords ON interview_history(keywords)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_grade ON interview_history(grade)')
+
+    # 支援員（StaffManager）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS staff (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            gender TEXT NOT NULL,
+            region TEXT NOT NULL,
+            hobbies_skills TEXT,
+            previous_job TEXT,
+            dropbox_number TEXT,
+            work_days TEXT,
+            work_hours TEXT,
+            case_district TEXT,
+            case_number TEXT,
+            case_day TEXT,
+            case_time TEXT,
+            case_frequency TEXT,
+            case_location TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    _add_missing_columns(cursor, 'staff', [
+        ('case_district', 'TEXT'),
+        ('case_number', 'TEXT'),
+        ('case_day', 'TEXT'),
+        ('case_time', 'TEXT'),
+        ('case_frequency', 'TEXT'),
+        ('case_location', 'TEXT'),
+        ('notes', 'TEXT'),
+    ])
+
+    # 未割り当てケース管理テーブル
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS unassigned_cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_number TEXT NOT NULL UNIQUE,
+            district TEXT,
+            child_name TEXT,
+            child_age INTEGER,
+            child_gender TEXT,
+            preferred_day TEXT,
+            preferred_time TEXT,
+            frequency TEXT,
+            location TEXT,
+            notes TEXT,
+            status TEXT DEFAULT '未割り当て',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # エリアマスタテーブル
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS areas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            display_order INTEGER
+        )
+    ''')
+
+    # 区マスタテーブル
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS districts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            area_id INTEGER NOT NULL,
+            display_order INTEGER,
+            FOREIGN KEY (area_id) REFERENCES areas(id)
+        )
+    ''')
+
+    # ケーステーブル（多対多対応）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_number TEXT NOT NULL,
+            district_id INTEGER NOT NULL,
+            phone_number TEXT,
+            child_name TEXT,
+            child_last_name TEXT,
+            child_first_name TEXT,
+            schedule_day TEXT,
+            schedule_time TEXT,
+            location TEXT,
+            first_meeting_date DATE,
+            frequency TEXT,
+            notes TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (district_id) REFERENCES districts(id)
+        )
+    ''')
+    _add_missing_columns(cursor, 'cases', [
+        ('child_last_name', 'TEXT'),
+        ('child_first_name', 'TEXT'),
+    ])
+
+    # 支援員とケースの関連テーブル
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS staff_cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            case_id INTEGER NOT NULL,
+            assigned_date DATE DEFAULT CURRENT_DATE,
+            is_primary BOOLEAN DEFAULT 1,
+            FOREIGN KEY (staff_id) REFERENCES staff(id),
+            FOREIGN KEY (case_id) REFERENCES cases(id),
+            UNIQUE(staff_id, case_id)
+        )
+    ''')
+
+    # 週間スケジュールテーブル
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schedules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            case_id INTEGER,
+            day_of_week TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            location TEXT,
+            schedule_type TEXT,
+            color_code TEXT,
+            notes TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            FOREIGN KEY (staff_id) REFERENCES staff(id),
+            FOREIGN KEY (case_id) REFERENCES cases(id)
+        )
+    ''')
+
+    # 初期データ投入（空のテーブルのみ）
+    cursor.execute('SELECT COUNT(*) FROM staff')
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            'INSERT INTO staff (name, age, gender, region, hobbies_skills, previous_job, dropbox_number, work_days, work_hours, case_district, case_number, case_day, case_time, case_frequency, case_location) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            SAMPLE_STAFF
+        )
+
+    cursor.execute('SELECT COUNT(*) FROM areas')
+    if cursor.fetchone()[0] == 0:
+        # エリアデータ
+        cursor.executemany(
+            'INSERT INTO areas (name, display_order) VALUES (?, ?)',
+            [('東エリア', 1), ('南エリア', 2)]
+        )
+
+        # 区データ
+        districts_data = [
+            # 東エリア (id=1)
+            ('城東区', 1, 1),
+            ('鶴見区', 1, 2),
+            ('天王寺区', 1, 3),
+            ('中央区', 1, 4),
+            ('浪速区', 1, 5),
+            ('生野区', 1, 6),
+            ('東成区', 1, 7),
+            # 南エリア (id=2)
+            ('阿倍野区', 2, 8),
+            ('平野区', 2, 9),
+            ('住吉区', 2, 10),
+            ('東住吉区', 2, 11),
+            ('西成区', 2, 12),
+        ]
+        cursor.executemany(
+            'INSERT INTO districts (name, area_id, display_order) VALUES (?, ?, ?)',
+            districts_data
+        )
+
+
+def _migrate_history_keywords(cursor):
+    """面談記録: キーワードを抽出した辞書のバージョン列と登録日時のインデックス"""
+    _add_missing_columns(cursor, 'interview_history', [('keywords_version', 'TEXT')])
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_created_at ON interview_history(created_at)')
+
+
+def _migrate_history_fts(cursor):
+    """
+    類似ケース検索用のFTS5全文検索テーブル
+
+    memo・keywords・課題JSONをtrigramトークナイザで索引化し、
+    トリガーでinterview_historyと同期する。
+    FTS5/trigramが使えないSQLiteの場合は作成せず、検索はLIKEにフォールバックする。
+    """
+    exists = _table_exists(cursor, FTS_TABLE)
+    cursor.execute('SAVEPOINT fts')
+    try:
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+            USING fts5(memo, keywords, issues, tokenize = 'trigram')
+        ''')
+
+        new_keywords = FTS_KEYWORDS_SQL.format(col='new.keywords')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS interview_history_fts_insert
+            AFTER INSERT ON interview_history BEGIN
+                INSERT INTO {FTS_TABLE} (rowid, memo, keywords, issues)
+                VALUES (new.id, new.memo, {new_keywords}, new.issues_json);
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS interview_history_fts_delete
+            AFTER DELETE ON interview_history BEGIN
+                DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS interview_history_fts_update
+            AFTER UPDATE OF memo, keywords, issues_json ON interview_history BEGIN
+                DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+                INSERT INTO {FTS_TABLE} (rowid, memo, keywords, issues)
+                VALUES (new.id, new.memo, {new_keywords}, new.issues_json);
+            END
+        ''')
+
+        # 初回作成時は既存の面談記録を索引化
+        if not exists:
+            cursor.execute(f'''
+                INSERT INTO {FTS_TABLE} (rowid, memo, keywords, issues)
+                SELECT id, memo, {FTS_KEYWORDS_SQL.format(col='keywords')}, issues_json
+                FROM interview_history
+            ''')
+    except sqlite3.OperationalError as e:
+        cursor.execute('ROLLBACK TO fts')
+        print(f"⚠️ 全文検索インデックスを作成できませんでした（LIKE検索を使用します）: {e}")
+    finally:
+        cursor.execute('RELEASE fts')
+
+
+def _migrate_staff_intervals(cursor):
+    """
+    勤務時間・ケースの時間帯の索引（staff_intervals）
+
+    staff（work_days/work_hours, case_day/case_time）と schedules の文字列を
+    曜日ごとの分単位の区間に変換して保持する。
+    元のテーブルが変更されるとトリガーで支援員IDが staff_intervals_dirty に記録され、
+    StaffManagerの書き込みのcommit前にその支援員の区間だけを作り直す。
+    """
+    exists = _table_exists(cursor, 'staff_intervals')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS staff_intervals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            day TEXT NOT NULL,
+            start_min INTEGER NOT NULL,
+            end_min INTEGER NOT NULL,
+            source TEXT,
+            FOREIGN KEY (staff_id) REFERENCES staff(id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_staff_intervals_lookup
+        ON staff_intervals(kind, day, start_min, end_min)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_staff_intervals_staff ON staff_intervals(staff_id)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS staff_intervals_dirty (
+            staff_id INTEGER PRIMARY KEY
+        )
+    ''')
+
+    # 元のテーブルの変更を記録するトリガー
+    staff_columns = 'work_days, work_hours, case_day, case_time, is_active'
+    triggers = {
+        'staff_intervals_staff_insert': 'AFTER INSERT ON staff BEGIN {new} END',
+        'staff_intervals_staff_update': f'AFTER UPDATE OF {staff_columns} ON staff BEGIN {{new}} END',
+        'staff_intervals_staff_delete': 'AFTER DELETE ON staff BEGIN {old} END',
+        'staff_intervals_schedule_insert': 'AFTER INSERT ON schedules BEGIN {new} END',
+        'staff_intervals_schedule_update': 'AFTER UPDATE ON schedules BEGIN {old} {new} END',
+        'staff_intervals_schedule_delete': 'AFTER DELETE ON schedules BEGIN {old} END',
+    }
+    for name, body in triggers.items():
+        staff_id = 'id' if '_staff_' in name else 'staff_id'
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} ' + body.format(
+            new=f'INSERT OR IGNORE INTO staff_intervals_dirty (staff_id) VALUES (new.{staff_id});',
+            old=f'INSERT OR IGNORE INTO staff_intervals_dirty (staff_id) VALUES (old.{staff_id});',
+        ))
+
+    # 初回作成時は全支援員を作り直し対象にする
+    if not exists:
+        cursor.execute('INSERT OR IGNORE INTO staff_intervals_dirty (staff_id) SELECT id FROM staff')
+
+
+def _migrate_schedule_minutes(cursor):
+    """
+    週間スケジュール: 開始・終了時間を分に変換した列と表示用のインデックス
+
+    既存のエントリの分の列は StaffManager.sync_all_cases_to_schedule で埋める。
+    """
+    # 描画・重複判定は整数で比較する
+    _add_missing_columns(cursor, 'schedules', [('start_min', 'INTEGER'), ('end_min', 'INTEGER')])
+
+    # 週間スケジュールの表示・ケースごとの作り直し用インデックス
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_schedules_active_day ON schedules(is_active, day_of_week, start_min)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_schedules_case ON schedules(case_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_staff_cases_case ON staff_cases(case_id)')
+
+
+def _migrate_staff_list_index(cursor):
+    """支援員一覧: 名前順のキーセットページング用インデックス"""
+    # (is_active, name) の後に主キーが続くため、名前＋IDの順にそのまま読める
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_staff_active_name ON staff(is_active, name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_staff_name ON staff(name)')
+
+
+def _migrate_table_versions(cursor):
+    """
+    テーブルごとの版数: 追加・更新・削除のたびにトリガーで1つ増やす
+
+    画面は PRAGMA data_version で他のコネクションのコミットを検出し、
+    版数が変わったテーブルを表示している一覧だけを更新する（src/database/changes.py）。
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        cursor.execute('INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS table_versions_{table}_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+
+
+def _migrate_staff_occupancy(cursor):
+    """
+    支援員・日付ごとの予定のビットマップ（staff_occupancy）
+
+    週間スケジュールをケースの頻度で日付に展開し、1日の予定を1スロット1ビットの整数で保持する
+    （src/database/occupancy.py）。展開済みの期間は staff_occupancy_horizon に記録する。
+    元のテーブルが変更されるとトリガーで支援員IDが staff_occupancy_dirty に記録され、
+    StaffManagerの書き込みのcommit前にその支援員のビットだけを作り直す。
+    """
+    exists = _table_exists(cursor, 'staff_occupancy')
+
+    # 月間表示は日付の範囲で全支援員分を読むため (day, staff_id) を主キーにする
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS staff_occupancy (
+            day TEXT NOT NULL,
+            staff_id INTEGER NOT NULL,
+            bits INTEGER NOT NULL,
+            PRIMARY KEY (day, staff_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_staff_occupancy_staff ON staff_occupancy(staff_id)')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS staff_occupancy_dirty (
+            staff_id INTEGER PRIMARY KEY
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS staff_occupancy_horizon (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            start_day TEXT NOT NULL,
+            end_day TEXT NOT NULL
+        )
+    ''')
+
+    # 元のテーブルの変更を記録するトリガー
+    mark = 'INSERT OR IGNORE INTO staff_occupancy_dirty (staff_id) VALUES ({});'
+    mark_case = 'INSERT OR IGNORE INTO staff_occupancy_dirty (staff_id) SELECT staff_id FROM schedules WHERE case_id = new.id;'
+    staff_columns = 'case_day, case_time, case_frequency, is_active'
+    triggers = {
+        'staff_occupancy_staff_insert': f"AFTER INSERT ON staff BEGIN {mark.format('new.id')} END",
+        'staff_occupancy_staff_update': f"AFTER UPDATE OF {staff_columns} ON staff BEGIN {mark.format('new.id')} END",
+        'staff_occupancy_staff_delete': f"AFTER DELETE ON staff BEGIN {mark.format('old.id')} END",
+        'staff_occupancy_schedule_insert': f"AFTER INSERT ON schedules BEGIN {mark.format('new.staff_id')} END",
+        'staff_occupancy_schedule_update': f"AFTER UPDATE ON schedules BEGIN {mark.format('old.staff_id')} {mark.format('new.staff_id')} END",
+        'staff_occupancy_schedule_delete': f"AFTER DELETE ON schedules BEGIN {mark.format('old.staff_id')} END",
+        'staff_occupancy_case_update': f"AFTER UPDATE OF frequency, first_meeting_date, is_active ON cases BEGIN {mark_case} END",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+    # 初回作成時は全支援員を作り直し対象にする
+    if not exists:
+        cursor.execute('INSERT OR IGNORE INTO staff_occupancy_dirty (staff_id) SELECT id FROM staff')
+
+
+def _migrate_statistics_rollups(cursor):
+    """
+    統計の集計テーブル（src/database/analytics.py）
+
+    stat_staff: 稼働中の支援員数（total / gender / age_group / region ごと）
+    stat_caseload: 支援員ごとの担当ケース数（staff_cases の行数と、そのうち稼働中のケースの数）
+    stat_interviews / stat_issues: 面談記録の件数・「該当」の課題の件数（月 × 学年 × 区）
+    元のテーブルの追加・更新・削除でトリガーが該当するグループの件数を増減する。
+    面談記録に区の列を追加する（保存時の区名。既存の記録は空）。
+    """
+    from src.database.analytics import (
+        ACTIVE_SQL, DISTRICT_SQL, GRADE_SQL, ISSUE_CHECKED_SQL, ISSUE_SOURCE_SQL, MONTH_SQL, STAFF_DIMENSIONS,
+        rebuild_rollups,
+    )
+
+    _add_missing_columns(cursor, 'interview_history', [('district', 'TEXT')])
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stat_staff (
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, key)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stat_caseload (
+            staff_id INTEGER PRIMARY KEY,
+            cases INTEGER NOT NULL DEFAULT 0,
+            active_cases INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stat_interviews (
+            month TEXT NOT NULL,
+            grade INTEGER NOT NULL,
+            district TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, grade, district)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stat_issues (
+            issue TEXT NOT NULL,
+            month TEXT NOT NULL,
+            grade INTEGER NOT NULL,
+            district TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (issue, month, grade, district)
+        ) WITHOUT ROWID
+    ''')
+
+    # 件数の増減（sign: '+' / '-'、r: new / old）
+    def staff_delta(r, sign):
+        return ' '.join(
+            f"INSERT INTO stat_staff (dimension, key, count) VALUES ('{dimension}', {key.format(r=r)}, "
+            f"{sign}{ACTIVE_SQL.format(r=r)}) ON CONFLICT (dimension, key) DO UPDATE SET count = count + excluded.count;"
+            for dimension, key in STAFF_DIMENSIONS.items()
+        )
+
+    def caseload_delta(r, sign):
+        active = f"COALESCE((SELECT {ACTIVE_SQL.format(r='c')} FROM cases c WHERE c.id = {r}.case_id), 0)"
+        return (
+            f"INSERT INTO stat_caseload (staff_id, cases, active_cases) VALUES ({r}.staff_id, {sign}1, {sign}{active}) "
+            "ON CONFLICT (staff_id) DO UPDATE SET cases = cases + excluded.cases, "
+            "active_cases = active_cases + excluded.active_cases;"
+        )
+
+    # ケースの稼働状態の変化（削除は稼働終了と同じ扱い。staff_cases の行が残っていれば件数は残る）
+    case_active_delta = (
+        "INSERT INTO stat_caseload (staff_id, active_cases) "
+        "SELECT staff_id, {delta} FROM staff_cases WHERE case_id = {r}.id AND {delta} != 0 "
+        "ON CONFLICT (staff_id) DO UPDATE SET active_cases = active_cases + excluded.active_cases;"
+    )
+    case_update = case_active_delta.format(
+        r='new', delta=f"({ACTIVE_SQL.format(r='new')} - {ACTIVE_SQL.format(r='old')})"
+    )
+    case_delete = case_active_delta.format(r='old', delta=f"(-{ACTIVE_SQL.format(r='old')})")
+
+    def interview_delta(r, sign):
+        keys = ', '.join(sql.format(r=r) for sql in (MONTH_SQL, GRADE_SQL, DISTRICT_SQL))
+        return (
+            f"INSERT INTO stat_interviews (month, grade, district, count) VALUES ({keys}, {sign}1) "
+            "ON CONFLICT (month, grade, district) DO UPDATE SET count = count + excluded.count; "
+            f"INSERT INTO stat_issues (issue, month, grade, district, count) "
+            f"SELECT key, {keys}, {sign}1 FROM {ISSUE_SOURCE_SQL.format(r=r)} WHERE {ISSUE_CHECKED_SQL} "
+            "ON CONFLICT (issue, month, grade, district) DO UPDATE SET count = count + excluded.count;"
+        )
+
+    staff_columns = 'gender, age, region, is_active'
+    interview_columns = 'issues_json, grade, interview_date, created_at, district'
+    triggers = {
+        'stat_staff_insert': f"AFTER INSERT ON staff BEGIN {staff_delta('new', '+')} END",
+        'stat_staff_update': f"AFTER UPDATE OF {staff_columns} ON staff BEGIN {staff_delta('old', '-')} {staff_delta('new', '+')} END",
+        'stat_staff_delete': f"AFTER DELETE ON staff BEGIN {staff_delta('old', '-')} END",
+        'stat_caseload_insert': f"AFTER INSERT ON staff_cases BEGIN {caseload_delta('new', '+')} END",
+        'stat_caseload_update': f"AFTER UPDATE OF staff_id, case_id ON staff_cases BEGIN {caseload_delta('old', '-')} {caseload_delta('new', '+')} END",
+        'stat_caseload_delete': f"AFTER DELETE ON staff_cases BEGIN {caseload_delta('old', '-')} END",
+        'stat_caseload_case_update': f"AFTER UPDATE OF is_active ON cases BEGIN {case_update} END",
+        'stat_caseload_case_delete': f"AFTER DELETE ON cases BEGIN {case_delete} END",
+        'stat_interviews_insert': f"AFTER INSERT ON interview_history BEGIN {interview_delta('new', '+')} END",
+        'stat_interviews_update': f"AFTER UPDATE OF {interview_columns} ON interview_history BEGIN {interview_delta('old', '-')} {interview_delta('new', '+')} END",
+        'stat_interviews_delete': f"AFTER DELETE ON interview_history BEGIN {interview_delta('old', '-')} END",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+    # 既存のデータを集計
+    rebuild_rollups(cursor)
+
+
+def _migrate_interview_issue_tables(cursor):
+    """
+    面談記録の課題・目標のテーブル（issues_json・*_plan_json を行に展開したもの）
+
+    interview_issues: 課題ごとの行（issue_code は課題名、checked は「該当」、detail は「詳細」）
+    interview_plans: 目標の項目ごとの行（term は short / long、field は PLAN_FIELDS の項目）
+    JSONの列を正とし、トリガーで同期する（古いバージョンのアプリが保存した記録も展開される）。
+    """
+    from src.database.analytics import ISSUE_CHECKED_SQL, ISSUE_SOURCE_SQL
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_issues (
+            interview_id INTEGER NOT NULL,
+            issue_code TEXT NOT NULL,
+            checked INTEGER NOT NULL DEFAULT 0,
+            detail TEXT,
+            PRIMARY KEY (interview_id, issue_code)
+        ) WITHOUT ROWID
+    ''')
+    # 課題での絞り込み用（該当する面談記録IDまでインデックスだけで求める）
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_interview_issues_code ON interview_issues(issue_code, checked, interview_id)'
+    )
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS interview_plans (
+            interview_id INTEGER NOT NULL,
+            term TEXT NOT NULL,
+            field TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (interview_id, term, field)
+        ) WITHOUT ROWID
+    ''')
+
+    # JSONを行に展開（r: new / テーブルの別名、source: 既存の行から展開する場合のテーブル）
+    # JSONとして不正な値・オブジェクトでない値は展開しない
+    def insert_issues(r, source=''):
+        return (
+            "INSERT OR REPLACE INTO interview_issues (interview_id, issue_code, checked, detail) "
+            f"SELECT {r}.id, key, ({ISSUE_CHECKED_SQL}), "
+            "CASE WHEN type = 'object' THEN json_extract(value, '$.\"詳細\"') END "
+            f"FROM {source}{ISSUE_SOURCE_SQL.format(r=r)};"
+        )
+
+    def insert_plans(r, source=''):
+        statements = []
+        for term, column in (('short', 'short_term_plan_json'), ('long', 'long_term_plan_json')):
+            plan = f"{r}.{column}"
+            statements.append(
+                "INSERT OR REPLACE INTO interview_plans (interview_id, term, field, value) "
+                f"SELECT {r}.id, '{term}', key, value FROM {source}json_each("
+                f"CASE WHEN json_valid({plan}) AND json_type({plan}) = 'object' THEN {plan} ELSE '{{}}' END);"
+            )
+        return statements
+
+    delete_issues = "DELETE FROM interview_issues WHERE interview_id = old.id;"
+    delete_plans = "DELETE FROM interview_plans WHERE interview_id = old.id;"
+    triggers = {
+        'interview_issues_insert': f"AFTER INSERT ON interview_history BEGIN {insert_issues('new')} {' '.join(insert_plans('new'))} END",
+        'interview_issues_update': f"AFTER UPDATE OF id, issues_json ON interview_history BEGIN {delete_issues} {insert_issues('new')} END",
+        'interview_plans_update': (
+            "AFTER UPDATE OF id, short_term_plan_json, long_term_plan_json ON interview_history "
+            f"BEGIN {delete_plans} {' '.join(insert_plans('new'))} END"
+        ),
+        'interview_issues_delete': f"AFTER DELETE ON interview_history BEGIN {delete_issues} {delete_plans} END",
+    }
+    for name, body in triggers.items():
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+
+    # 既存の面談記録を展開
+    cursor.execute(insert_issues('h', source='interview_history h, '))
+    for statement in insert_plans('h', source='interview_history h, '):
+        cursor.execute(statement)
+
+
+# (バージョン, 説明, 関数) ― バージョンは1から連番。末尾に追加する
+MIGRATIONS = [
+    (1, '基本のテーブルと初期データ', _migrate_base_schema),
+    (2, '面談記録のキーワード辞書バージョン', _migrate_history_keywords),
+    (3, '面談記録の全文検索インデックス', _migrate_history_fts),
+    (4, '支援員の空き時間索引', _migrate_staff_intervals),
+    (5, '週間スケジュールの分の列', _migrate_schedule_minutes),
+    (6, '支援員一覧のインデックス', _migrate_staff_list_index),
+    (7, 'テーブルごとの版数', _migrate_table_versions),
+    (8, '支援員の予定のビットマップ', _migrate_staff_occupancy),
+    (9, '統計の集計テーブル', _migrate_statistics_rollups),
+    (10, '面談記録の課題・目標のテーブル', _migrate_interview_issue_tables),
+]
+
+# 最新のスキーマのバージョン
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# マイグレーションを確認済みのDB（プロセスごとに1回）
+_checked = set()
+_checked_lock = threading.Lock()
+
+
+def get_schema_version(conn):
+    """DBに記録されたスキーマのバージョン"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(pool, target=SCHEMA_VERSION):
+    """
+    未適用のマイグレーションを順に実行
+
+    各マイグレーションは user_version の更新と同じトランザクション（BEGIN IMMEDIATE）で実行し、
+    書き込みロックを取った後にバージョンを読み直すため、他のプロセスが同時に実行しても二重に適用しない。
+
+    Returns:
+        list: 適用したバージョンのリスト
+    """
+    applied = []
+    for version, description, migration in MIGRATIONS:
+        if version > target:
+            break
+        if version <= get_schema_version(pool.connect()):
+            continue
+        # 書き込みロックを取ってからバージョンを読み直す（先に取った他のプロセスが適用済みなら何もしない）
+        with pool.transaction(immediate=True) as conn:
+            if version <= get_schema_version(conn):
+                continue
+            migration(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+        applied.append(version)
+        print(f"🛠️ スキーマを更新しました（v{version}: {description}）")
+    return applied
+
+
+def ensure_schema(pool):
+    """
+    DBのスキーマを最新にする（1つのDBにつきプロセスで1回だけ確認）
+
+    2回目以降は何もしないため、マネージャーの作成ごとに呼んでよい。
+    """
+    key = str(Path(pool.db_path).resolve())
+    if key in _checked:
+        return
+    with _checked_lock:
+        if key in _checked:
+            return
+        version = get_schema_version(pool.connect())
+        if version > SCHEMA_VERSION:
+            # 新しいバージョンのアプリで更新されたDB（このバージョンの知らない変更は行わない）
+            print(f"⚠️ DBのスキーマ（v{version}）がこのアプリ（v{SCHEMA_VERSION}）より新しいバージョンです")
+        elif version < SCHEMA_VERSION:
+            if migrate(pool):
+                pool.checkpoint()
+        _checked.add(key)
+
+
+def has_table(pool, name):
+    """テーブル（仮想テーブルを含む）が存在するか"""
+    return _table_exists(pool.connect().cursor(), name)
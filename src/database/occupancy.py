@@ -0,0 +1,244 @@
+"""
+スケジュールの繰り返しの展開と、支援員ごとの予定のビットマップ
+- 週間スケジュール（曜日＋時間）をケースの頻度（毎週・隔週・月１回…）で具体的な日付に展開する
+- 1日の予定を「1スロット1ビット」の整数で表す（7:00～22:00を15分単位 = 60ビット。SQLiteの整数に収まる）
+- 重複の判定・空き時間の検索はビット演算で行う（区間の比較や日付ごとの再計算をしない）
+"""
+import re
+from datetime import date, timedelta
+
+from src.database.timeslots import WEEKDAYS, parse_days, parse_time_range
+
+# ビットマップの範囲（0時からの分）と1ビットの長さ
+DAY_START = 7 * 60
+DAY_END = 22 * 60
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = (DAY_END - DAY_START) // SLOT_MINUTES
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+# 展開する期間（週）の既定値（config.SCHEDULE_HORIZON_WEEKS で変更可）
+DEFAULT_HORIZON_WEEKS = 8
+
+# 繰り返しの種類
+WEEKLY = 'weekly'
+BIWEEKLY = 'biweekly'
+MONTHLY = 'monthly'
+
+# 初回日のないケースの隔週の基準（この週を1回目とする月曜日）
+BIWEEKLY_EPOCH = date(2024, 1, 1)
+
+_DATE_PATTERN = re.compile(r'(\d{4})\D+(\d{1,2})\D+(\d{1,2})')
+
+
+def horizon_weeks():
+    """展開する期間（週）"""
+    try:
+        import config
+        return int(getattr(config, 'SCHEDULE_HORIZON_WEEKS', DEFAULT_HORIZON_WEEKS))
+    except (ImportError, ValueError):
+        return DEFAULT_HORIZON_WEEKS
+
+
+def week_start(day):
+    """その週の月曜日"""
+    return day - timedelta(days=day.weekday())
+
+
+def parse_date(text):
+    """「2025-04-01」「2025/4/1」「2025年4月1日」を日付に変換（解析できない場合はNone）"""
+    if isinstance(text, date):
+        return text
+    match = _DATE_PATTERN.search(str(text or ''))
+    if not match:
+        return None
+    try:
+        return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+
+
+def recurrence_rule(frequency):
+    """
+    頻度の文字列を繰り返しの種類に変換
+
+    週間スケジュールの色分け（src/ui/schedule_canvas.frequency_color）と同じ判定。
+    不定期・オンライン・未設定は枠を確保しておくため毎週とし、休止中はNone（予定なし）。
+    """
+    text = str(frequency or '').strip()
+    if "休止中" in text:
+        return None
+    if "毎週" in text:
+        return WEEKLY
+    if "隔週" in text:
+        return BIWEEKLY
+    if "月１回" in text or "月1回" in text:
+        return MONTHLY
+    if "オンライン" in text or "不定期" in text:
+        return WEEKLY
+    # その他（旧形式の互換性のため）
+    if "週" in text and ("1" in text or "２" in text or "2" in text):
+        return WEEKLY
+    if "隔" in text:
+        return BIWEEKLY
+    if "月" in text:
+        return MONTHLY
+    return WEEKLY
+
+
+def expand_dates(day_of_week, rule, start, end, anchor=None):
+    """
+    曜日と繰り返しから期間内の日付を列挙
+
+    Args:
+        day_of_week: 曜日（'月'など）
+        rule: recurrence_rule() の結果
+        start, end: 期間（endを含まない）
+        anchor: 初回日（隔週の週・月１回の第何週の基準。Noneの場合は BIWEEKLY_EPOCH の週・第1週）
+
+    Yields:
+        date: 予定のある日
+    """
+    if rule is None or day_of_week not in WEEKDAYS:
+        return
+    weekday = WEEKDAYS.index(day_of_week)
+    first = start + timedelta(days=(weekday - start.weekday()) % 7)
+    if anchor is not None and first < anchor:
+        # 初回日より前には予定を入れない
+        first = anchor + timedelta(days=(weekday - anchor.weekday()) % 7)
+
+    if rule == WEEKLY:
+        step = 7
+    elif rule == BIWEEKLY:
+        base = week_start(anchor) if anchor is not None else BIWEEKLY_EPOCH
+        if ((first - base).days // 7) % 2:
+            first += timedelta(days=7)
+        step = 14
+    else:
+        # 月１回: 初回日と同じ「第n○曜日」（その月にない場合は最後の○曜日）
+        nth = (anchor.day - 1) // 7 if anchor is not None else 0
+        day = first
+        while day < end:
+            month_days = _month_weekdays(day, weekday)
+            target = month_days[min(nth, len(month_days) - 1)]
+            if start <= target < end and (anchor is None or target >= anchor):
+                yield target
+            day = _next_month(day)
+        return
+
+    day = first
+    while day < end:
+        yield day
+        day += timedelta(days=step)
+
+
+def _month_weekdays(day, weekday):
+    """dayの月の、指定曜日の日付"""
+    first = day.replace(day=1)
+    current = first + timedelta(days=(weekday - first.weekday()) % 7)
+    days = []
+    while current.month == first.month:
+        days.append(current)
+        current += timedelta(days=7)
+    return days
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def slot_mask(start_min, end_min):
+    """時間帯（分）が重なるスロットのビット（範囲外は切り捨て）"""
+    first = max(start_min, DAY_START) - DAY_START
+    last = min(end_min, DAY_END) - DAY_START
+    if last <= first:
+        return 0
+    first_slot = first // SLOT_MINUTES
+    last_slot = -(-last // SLOT_MINUTES)
+    return ((1 << (last_slot - first_slot)) - 1) << first_slot
+
+
+def ranges_mask(time_ranges):
+    """複数の時間帯のビット"""
+    mask = 0
+    for start, end in time_ranges:
+        mask |= slot_mask(start, end)
+    return mask
+
+
+def work_masks(work_days, work_hours):
+    """
+    勤務時間のビット（曜日 → ビット）
+
+    時間の記載がない場合は終日、曜日の記載がない場合は全曜日とする。
+    """
+    mask = ranges_mask(parse_time_range(work_hours)) if work_hours else FULL_DAY
+    days = parse_days(work_days) if work_days else WEEKDAYS
+    return {day: mask for day in days}
+
+
+def mask_ranges(bits):
+    """ビットを時間帯（開始分, 終了分）のリストに変換"""
+    ranges = []
+    slot = 0
+    while bits >> slot:
+        if not (bits >> slot) & 1:
+            slot += 1
+            continue
+        first = slot
+        while (bits >> slot) & 1:
+            slot += 1
+        ranges.append((DAY_START + first * SLOT_MINUTES, DAY_START + slot * SLOT_MINUTES))
+    return ranges
+
+
+def busy_minutes(bits):
+    """予定の入っている分数"""
+    return bin(bits).count('1') * SLOT_MINUTES
+
+
+def conflicts(bits, start_min, end_min):
+    """時間帯がすでに入っている予定と重なるか"""
+    return bool(bits & slot_mask(start_min, end_min))
+
+
+def free_ranges(bits, available=FULL_DAY, min_minutes=SLOT_MINUTES):
+    """
+    空いている時間帯
+
+    Args:
+        bits: その日の予定のビット
+        available: 勤務時間のビット（work_masks()の値）
+        min_minutes: これより短い空きは含めない
+    """
+    return [(start, end) for start, end in mask_ranges(available & ~bits & FULL_DAY)
+            if end - start >= min_minutes]
+
+
+def build_occupancy(rows, start, end):
+    """
+    予定を展開して支援員・日付ごとのビットを作成
+
+    Args:
+        rows: staff_id, day_of_week, start_min, end_min, frequency, first_meeting_date を持つ行
+        start, end: 期間（endを含まない）
+
+    Returns:
+        dict: (支援員ID, 日付) → ビット
+    """
+    occupancy = {}
+    for row in rows:
+        mask = slot_mask(row['start_min'], row['end_min'])
+        if not mask:
+            continue
+        rule = recurrence_rule(row['frequency'])
+        anchor = parse_date(row['first_meeting_date'])
+        for day_of_week in parse_days(row['day_of_week']):
+            for day in expand_dates(day_of_week, rule, start, end, anchor):
+                key = (row['staff_id'], day)
+                occupancy[key] = occupancy.get(key, 0) | mask
+    return occupancy
+
+
+def date_range(start, end):
+    """期間の日付（endを含まない）"""
+    return [start + timedelta(days=i) for i in range((end - start).days)]
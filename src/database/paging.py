@@ -0,0 +1,80 @@
+"""
+キーセットページング
+- 一覧の表示に必要な分だけをDBから読み込む（OFFSETを使わず、前のページの最後の行から続きを取得）
+- 並び順は指定した列＋主キー（同じ値の行があっても順序が一意になる）
+- 並び順の列はNULLにならないようにしておく（COALESCEなど。NULLは行値の比較で除外されるため）
+"""
+
+
+class KeysetPager:
+    """SELECT文の結果をキーセットページングで読み込む"""
+
+    def __init__(self, pool, sql, params=(), order_by=('name',), key='id', descending=False):
+        """
+        Args:
+            pool: ConnectionPool
+            sql: 一覧のSELECT文（order_byの列とkeyの列を含むこと。ORDER BYは付けない）
+            params: sqlのパラメータ
+            order_by: 並び順の列名
+            key: 主キーの列名
+            descending: Trueの場合は降順
+        """
+        self.pool = pool
+        self.sql = sql
+        self.params = tuple(params)
+        self.key = key
+        self.columns = tuple(order_by) + (key,)
+        self.descending = descending
+
+        direction = 'DESC' if descending else 'ASC'
+        self._order_sql = ', '.join(f'{column} {direction}' for column in self.columns)
+        self._key_sql = ', '.join(self.columns)
+        # (列1, 列2, ..., 主キー) > (?, ?, ..., ?) の行値比較で続きを取得
+        operator = '<' if descending else '>'
+        placeholders = ', '.join('?' for _ in self.columns)
+        self._after_sql = f'({self._key_sql}) {operator} ({placeholders})'
+
+    def count(self):
+        """全件数"""
+        cursor = self.pool.connect().execute(f'SELECT COUNT(*) FROM ({self.sql})', self.params)
+        return cursor.fetchone()[0]
+
+    def anchors(self, page_size):
+        """
+        各ページの最後の行のキー（最後のページを除く）
+
+        任意のページへ直接移動するために使う。n番目のページは anchors[n - 1] の続きから始まる。
+        """
+        cursor = self.pool.connect().execute(f'''
+            SELECT {self._key_sql} FROM (
+                SELECT {self._key_sql}, ROW_NUMBER() OVER (ORDER BY {self._order_sql}) AS row_number
+                FROM ({self.sql})
+            )
+            WHERE row_number % ? = 0
+            ORDER BY row_number
+        ''', self.params + (page_size,))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def fetch_after(self, after=None, limit=100):
+        """
+        afterのキーの次の行から最大limit件を取得
+
+        Args:
+            after: 前のページの最後の行のキー（anchors()の要素。Noneの場合は先頭から）
+            limit: 最大件数
+
+        Returns:
+            list: 行の辞書のリスト
+        """
+        if after is None:
+            where, params = '', self.params
+        else:
+            where, params = f'WHERE {self._after_sql}', self.params + tuple(after)
+        cursor = self.pool.connect().execute(f'''
+            SELECT * FROM ({self.sql})
+            {where}
+            ORDER BY {self._order_sql}
+            LIMIT ?
+        ''', params + (limit,))
+        columns = [desc[0] for desc in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
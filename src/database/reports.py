@@ -0,0 +1,284 @@
+"""
+報告用データの抽出（行政への報告・集計用）
+- 面談記録・担当ケース・週間スケジュール・区ごとの担当件数を、カーソルから fetchmany で少しずつ読み出す
+  （全件をリストにしないため、件数が多くてもメモリ使用量は一定）
+- 区・エリアは districts / areas のマスタで並べる（エリア → 区の表示順）
+- 出力（CSV・xlsx）は src/excel/report_writer.py
+"""
+import json
+from datetime import date
+
+from src.database import occupancy
+from src.database.issues import issue_filter_sql
+
+# 報告の種類 → 表示名
+REPORTS = {
+    'interviews': '面談記録',
+    'caseloads': '担当ケース',
+    'schedules': '週間スケジュール',
+    'district_summary': '区別の担当件数',
+}
+
+# 支援員で絞り込めない報告
+_NO_STAFF = {'interviews'}
+
+# 1回の fetchmany で読む行数
+FETCH_SIZE = 500
+
+# エリア → 区の表示順（マスタにない区は最後）
+_DISTRICT_ORDER = 'COALESCE(a.display_order, 999999), COALESCE(d.display_order, 999999), d.name'
+
+
+def _filter_sql(districts=None, areas=None, staff=None):
+    """区・エリア・支援員の条件（d: districts, a: areas, st: staff の別名を使うクエリ用）"""
+    conditions = []
+    params = []
+    if districts:
+        conditions.append(f"d.name IN ({', '.join('?' * len(districts))})")
+        params.extend(districts)
+    if areas:
+        conditions.append(f"a.name IN ({', '.join('?' * len(areas))})")
+        params.extend(areas)
+    if staff:
+        # 数字は支援員ID、それ以外は支援員名
+        ids = [int(value) for value in staff if str(value).isdigit()]
+        names = [value for value in staff if not str(value).isdigit()]
+        parts = []
+        if ids:
+            parts.append(f"st.id IN ({', '.join('?' * len(ids))})")
+            params.extend(ids)
+        if names:
+            parts.append(f"st.name IN ({', '.join('?' * len(names))})")
+            params.extend(names)
+        conditions.append(f"({' OR '.join(parts)})")
+    return conditions, params
+
+
+def _in_period(value, since, until):
+    """自由入力の日付（初回日など）が期間内か（日付を解析できない行は期間指定時は除外）"""
+    if since is None and until is None:
+        return True
+    day = occupancy.parse_date(value)
+    if day is None:
+        return False
+    return (since is None or day >= since) and (until is None or day <= until)
+
+
+def _issue_names(issues_json):
+    """該当する課題の名前（「、」区切り）"""
+    try:
+        issues = json.loads(issues_json or '{}')
+    except ValueError:
+        return ''
+    return '、'.join(name for name, issue in issues.items() if isinstance(issue, dict) and issue.get('該当'))
+
+
+def _plan_goal(plan_json):
+    try:
+        return (json.loads(plan_json or '{}') or {}).get('目標', '')
+    except (ValueError, AttributeError):
+        return ''
+
+
+def _medical(medical_json):
+    try:
+        medical = json.loads(medical_json or '{}') or {}
+    except ValueError:
+        return ''
+    if not medical.get('通院あり'):
+        return 'なし'
+    return '、'.join(value for value in (medical.get('病院名'), medical.get('診断名')) if value) or 'あり'
+
+
+def _interviews(since, until, districts, areas, issues, school_level):
+    headers = ['ID', '面談実施日', 'エリア', '区', 'イニシャル', '学年', '性別', '学校名', '該当する課題',
+               '短期目標', '長期目標', '通院', 'キーワード', 'メモ', '登録日時']
+    # 区は面談時に入力した区名（マスタにない区名もそのまま出力・絞り込みする）
+    conditions, params = _filter_sql(None, areas)
+    if districts:
+        conditions.append(f"h.district IN ({', '.join('?' * len(districts))})")
+        params.extend(districts)
+    issue_conditions, issue_params = issue_filter_sql(issues, school_level)
+    conditions.extend(issue_conditions)
+    params.extend(issue_params)
+    if since:
+        conditions.append("COALESCE(h.interview_date, date(h.created_at)) >= ?")
+        params.append(since.isoformat())
+    if until:
+        conditions.append("COALESCE(h.interview_date, date(h.created_at)) <= ?")
+        params.append(until.isoformat())
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = f'''
+        SELECT h.id, h.interview_date, a.name AS area_name, h.district, h.child_initials, h.grade, h.gender,
+               h.school_name, h.issues_json, h.short_term_plan_json, h.long_term_plan_json,
+               h.medical_info_json, h.keywords, h.memo, h.created_at
+        FROM interview_history h
+        LEFT JOIN districts d ON d.name = h.district
+        LEFT JOIN areas a ON d.area_id = a.id
+        {where}
+        ORDER BY COALESCE(h.interview_date, date(h.created_at)), h.id
+    '''
+
+    def transform(row):
+        return (
+            row['id'], row['interview_date'], row['area_name'], row['district'],
+            row['child_initials'], row['grade'], row['gender'],
+            row['school_name'], _issue_names(row['issues_json']), _plan_goal(row['short_term_plan_json']),
+            _plan_goal(row['long_term_plan_json']), _medical(row['medical_info_json']), row['keywords'],
+            row['memo'], row['created_at'],
+        )
+    return headers, sql, params, transform, None
+
+
+def _caseloads(since, until, districts, areas, staff):
+    headers = ['エリア', '区', 'ケース番号', '支援員', '児童氏名', '曜日', '時間', '頻度', '場所', '初回日', '状態']
+    conditions, params = _filter_sql(districts, areas, staff)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = f'''
+        SELECT a.name AS area_name, d.name AS district_name, c.case_number, st.name AS staff_name,
+               COALESCE(c.child_name, TRIM(COALESCE(c.child_last_name, '') || ' ' || COALESCE(c.child_first_name, ''))) AS child_name,
+               c.schedule_day, c.schedule_time, c.frequency, c.location, c.first_meeting_date, c.is_active
+        FROM cases c
+        LEFT JOIN districts d ON c.district_id = d.id
+        LEFT JOIN areas a ON d.area_id = a.id
+        LEFT JOIN staff_cases sc ON sc.case_id = c.id
+        LEFT JOIN staff st ON sc.staff_id = st.id
+        {where}
+        ORDER BY {_DISTRICT_ORDER}, st.name, c.case_number, c.id
+    '''
+
+    def transform(row):
+        return (
+            row['area_name'], row['district_name'], row['case_number'], row['staff_name'], row['child_name'],
+            row['schedule_day'], row['schedule_time'], row['frequency'], row['location'],
+            row['first_meeting_date'], '稼働中' if row['is_active'] else '終了',
+        )
+
+    def keep(row):
+        return _in_period(row['first_meeting_date'], since, until)
+    return headers, sql, params, transform, keep if (since or until) else None
+
+
+def _schedules(districts, areas, staff):
+    headers = ['支援員', '曜日', '開始', '終了', 'エリア', '区', 'ケース番号', '頻度', '場所', '種別']
+    conditions, params = _filter_sql(districts, areas, staff)
+    conditions.insert(0, 's.is_active = 1')
+    sql = f'''
+        SELECT st.name AS staff_name, s.day_of_week, s.start_time, s.end_time,
+               a.name AS area_name, d.name AS district_name, c.case_number, c.frequency,
+               s.location, s.schedule_type
+        FROM schedules s
+        JOIN staff st ON s.staff_id = st.id
+        LEFT JOIN cases c ON s.case_id = c.id
+        LEFT JOIN districts d ON c.district_id = d.id
+        LEFT JOIN areas a ON d.area_id = a.id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY st.name, st.id, instr('月火水木金土日', s.day_of_week), s.start_min, s.id
+    '''
+    return headers, sql, params, tuple, None
+
+
+def _district_summary(districts, areas, staff):
+    headers = ['エリア', '区', '稼働中のケース', '終了したケース', '担当支援員数']
+    conditions, params = _filter_sql(districts, areas, staff)
+    # 支援員で絞り込む場合は、その支援員の担当ケースのみを数える
+    staff_join = 'JOIN' if staff else 'LEFT JOIN'
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = f'''
+        SELECT a.name AS area_name, d.name AS district_name,
+               COUNT(DISTINCT CASE WHEN c.is_active = 1 THEN c.id END) AS active_cases,
+               COUNT(DISTINCT CASE WHEN c.is_active = 0 THEN c.id END) AS closed_cases,
+               COUNT(DISTINCT st.id) AS staff_count
+        FROM districts d
+        LEFT JOIN areas a ON d.area_id = a.id
+        LEFT JOIN cases c ON c.district_id = d.id
+        LEFT JOIN staff_cases sc ON sc.case_id = c.id
+        {staff_join} staff st ON sc.staff_id = st.id
+        {where}
+        GROUP BY d.id
+        ORDER BY {_DISTRICT_ORDER}
+    '''
+    return headers, sql, params, tuple, None
+
+
+def build_report(report, since=None, until=None, districts=None, areas=None, staff=None, issues=None,
+                 school_level=None):
+    """
+    報告のクエリ
+
+    Args:
+        report: REPORTS のキー
+        since, until: 期間（date。面談記録は面談実施日、担当ケースは初回日。両端を含む）
+        districts: 区名のリスト
+        areas: エリア名のリスト
+        staff: 支援員名・支援員IDのリスト
+        issues: 課題名のリスト（面談記録のみ。すべてに該当する記録）
+        school_level: '小学生' / '中学生' / '高校生'（面談記録のみ）
+
+    Returns:
+        tuple: (見出しのリスト, SQL, パラメータ, 行の変換関数, 行の絞り込み関数またはNone)
+
+    Raises:
+        ValueError: 報告の種類が不明・その報告で使えない条件を指定した場合
+    """
+    if report not in REPORTS:
+        raise ValueError(f"不明な報告です: {report}（{', '.join(REPORTS)}）")
+    if report in _NO_STAFF and staff:
+        raise ValueError(f"{REPORTS[report]}は支援員で絞り込めません（面談記録に担当の情報がないため）")
+    if report in ('schedules', 'district_summary') and (since or until):
+        raise ValueError(f"{REPORTS[report]}は期間で絞り込めません")
+    if report != 'interviews' and (issues or school_level):
+        raise ValueError(f"{REPORTS[report]}は課題・学校段階で絞り込めません")
+
+    if report == 'interviews':
+        return _interviews(since, until, districts, areas, issues, school_level)
+    if report == 'caseloads':
+        return _caseloads(since, until, districts, areas, staff)
+    if report == 'schedules':
+        return _schedules(districts, areas, staff)
+    return _district_summary(districts, areas, staff)
+
+
+def iter_report(pool, report, fetch_size=FETCH_SIZE, **filters):
+    """
+    報告の行を少しずつ読み出す
+
+    Args:
+        pool: ConnectionPool
+        report: REPORTS のキー
+        fetch_size: 1回の fetchmany で読む行数
+        **filters: build_report() の条件
+
+    Returns:
+        tuple: (見出しのリスト, 行のタプルのジェネレータ)
+    """
+    headers, sql, params, transform, keep = build_report(report, **filters)
+
+    def rows():
+        cursor = pool.connect().cursor()
+        try:
+            cursor.execute(sql, params)
+            while True:
+                batch = cursor.fetchmany(fetch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    if keep is None or keep(row):
+                        yield transform(row)
+        finally:
+            cursor.close()
+    return headers, rows()
+
+
+def parse_period(since=None, until=None):
+    """'YYYY-MM-DD' などの期間を date に変換（解析できない場合は ValueError）"""
+    result = []
+    for value in (since, until):
+        if value in (None, ''):
+            result.append(None)
+            continue
+        day = occupancy.parse_date(value)
+        if not isinstance(day, date):
+            raise ValueError(f"日付を解析できません: {value}")
+        result.append(day)
+    return tuple(result)
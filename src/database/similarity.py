@@ -0,0 +1,347 @@
+"""
+類似ケース検索エンジン（NumPy）
+- 過去の全ケースを「課題13項目＋キーワード」のビット行列として保持
+- 学年・性別は別配列で保持し、重みとして加点
+- 重み付きJaccard係数で全ケースを1回の行列演算でスコアリングし、上位k件を返す
+- 行列はユーザーのキャッシュフォルダにDBごと（解決済みのパス）に保存し、保存のたびに差分追加する
+- キャッシュはDBのパス・面談記録のID・interview_history の版数（table_versions）で検証する
+"""
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from src.database.issues import ISSUE_ORDER, is_checked
+from src.database.keywords import get_keyword_dictionary
+
+# キャッシュフォルダのアプリ名（ユーザーのキャッシュフォルダの下に作る）
+CACHE_APP_NAME = '不登校支援ツール'
+
+# キャッシュ形式のバージョン（特徴量の定義を変えたら上げる）
+# キーワード特徴量はキーワード辞書の語を使い、辞書のバージョンもキャッシュに記録する
+CACHE_VERSION = 3
+
+
+def default_cache_dir():
+    """
+    類似検索キャッシュの保存先（config.SIMILARITY_CACHE_DIR、なければユーザーのキャッシュフォルダ）
+
+    Windowsは %LOCALAPPDATA%、それ以外は $XDG_CACHE_HOME（なければ ~/.cache）の下。
+    ソースフォルダやDropboxのフォルダには書き込まない。
+    """
+    try:
+        import config
+        configured = getattr(config, 'SIMILARITY_CACHE_DIR', None)
+    except ImportError:
+        configured = None
+    if configured:
+        return Path(configured)
+    if sys.platform == 'win32' and os.environ.get('LOCALAPPDATA'):
+        base = Path(os.environ['LOCALAPPDATA'])
+    else:
+        base = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+    return base / CACHE_APP_NAME / 'similarity'
+
+
+def cache_path_for(db_path):
+    """DBごとのキャッシュファイル（同じ名前の別のDBと共有しないよう、解決済みのパスのハッシュを付ける）"""
+    resolved = str(Path(db_path).resolve())
+    digest = hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:16]
+    return default_cache_dir() / f'{Path(db_path).stem}_{digest}_similarity.npz'
+
+# 特徴量ごとの重み（課題の一致はキーワードの一致より重視）
+ISSUE_WEIGHT = 2.0
+KEYWORD_WEIGHT = 1.0
+
+# 学年・性別の加点
+GENDER_BONUS = 0.1
+GRADE_BONUS = 0.15
+GRADE_BONUS_RANGE = 3
+
+GENDER_CODES = {'男性': 1, '女性': 2}
+
+
+def is_available():
+    """NumPyが利用可能か"""
+    return np is not None
+
+
+def encode_features(dictionary, issues=None, keywords=None, memo=None):
+    """
+    課題・キーワードを特徴量ベクトル（0/1）に変換
+
+    Args:
+        dictionary: キーワード辞書（KeywordDictionary）
+        issues: 課題の辞書（issues_jsonの内容）
+        keywords: 空白区切りのキーワード文字列
+        memo: メモ本文（キーワードを抽出する場合）
+    """
+    vector = np.zeros(len(ISSUE_ORDER) + len(dictionary), dtype=np.float32)
+    issues = issues or {}
+    for i, issue_name in enumerate(ISSUE_ORDER):
+        if is_checked(issues.get(issue_name)):
+            vector[i] = 1.0
+
+    words = set((keywords or '').split())
+    if memo:
+        words.update(dictionary.scan(memo))
+    offset = len(ISSUE_ORDER)
+    for i, word in enumerate(dictionary.words):
+        if word in words:
+            vector[offset + i] = 1.0
+    return vector
+
+
+def encode_grade(grade):
+    try:
+        return int(grade)
+    except (TypeError, ValueError):
+        return 0
+
+
+def encode_gender(gender):
+    return GENDER_CODES.get(gender, 0)
+
+
+class CaseSimilarityIndex:
+    """interview_historyの特徴量行列と上位k件検索"""
+
+    def __init__(self, pool, cache_path=None):
+        if np is None:
+            raise ImportError("類似ケース検索エンジンにはnumpyが必要です")
+        self.pool = pool
+        if cache_path is None:
+            cache_path = cache_path_for(pool.db_path)
+        self.cache_path = Path(cache_path)
+        self.db_key = str(Path(pool.db_path).resolve())
+
+        self.dictionary = get_keyword_dictionary()
+        self.feature_count = len(ISSUE_ORDER) + len(self.dictionary)
+        self.weights = np.array(
+            [ISSUE_WEIGHT] * len(ISSUE_ORDER) + [KEYWORD_WEIGHT] * len(self.dictionary),
+            dtype=np.float32
+        )
+        self._reset()
+        self.load()
+
+    def _reset(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.features = np.zeros((0, self.feature_count), dtype=np.float32)
+        self.grades = np.zeros(0, dtype=np.int16)
+        self.genders = np.zeros(0, dtype=np.int8)
+        self.row_weights = np.zeros(0, dtype=np.float32)
+        # 行列に反映済みの interview_history の版数（追加・更新・削除の1行ごとに1増える）
+        self.data_version = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ------------------------------------------------------------
+    # 構築・キャッシュ
+    # ------------------------------------------------------------
+
+    def _fetch_rows(self, after_id=0):
+        """after_idより後の面談記録を特徴量に変換"""
+        cursor = self.pool.connect().cursor()
+        cursor.execute('''
+            SELECT id, grade, gender, issues_json, keywords
+            FROM interview_history
+            WHERE id > ?
+            ORDER BY id
+        ''', (after_id,))
+
+        ids, features, grades, genders = [], [], [], []
+        for row in cursor:
+            try:
+                issues = json.loads(row[3]) if row[3] else {}
+            except ValueError:
+                issues = {}
+            ids.append(row[0])
+            features.append(encode_features(self.dictionary, issues, row[4]))
+            grades.append(encode_grade(row[1]))
+            genders.append(encode_gender(row[2]))
+        return ids, features, grades, genders
+
+    def _append(self, ids, features, grades, genders):
+        if not ids:
+            return
+        features = np.vstack(features).astype(np.float32)
+        self.ids = np.concatenate([self.ids, np.array(ids, dtype=np.int64)])
+        self.features = np.vstack([self.features, features])
+        self.grades = np.concatenate([self.grades, np.array(grades, dtype=np.int16)])
+        self.genders = np.concatenate([self.genders, np.array(genders, dtype=np.int8)])
+        self.row_weights = np.concatenate([self.row_weights, features @ self.weights])
+
+    def _read_data_version(self, cursor):
+        """interview_history の版数（table_versions。マイグレーション v7）"""
+        row = cursor.execute(
+            "SELECT version FROM table_versions WHERE table_name = 'interview_history'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def rebuild(self):
+        """データベースから行列を作り直す"""
+        self._reset()
+        # 版数と行を同じスナップショットで読む
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+            self.data_version = self._read_data_version(cursor)
+            self._append(*self._fetch_rows())
+        self.save()
+
+    def load(self):
+        """
+        キャッシュを読み込み、データベースとの差分を反映
+
+        キャッシュのDBのパス・面談記録のIDがDBと一致する場合のみ使う。
+        他のPCで追加されたケースはidの差分として追加し、その後の版数が
+        「キャッシュの版数＋追加した件数」と一致しない場合（更新・削除があった場合）は作り直す。
+        """
+        loaded = False
+        if self.cache_path.exists():
+            try:
+                with np.load(self.cache_path) as data:
+                    if (int(data['version']) == CACHE_VERSION
+                            and str(data['db_path']) == self.db_key
+                            and str(data['dictionary_version']) == self.dictionary.version
+                            and data['features'].shape[1] == self.feature_count):
+                        self.ids = data['ids']
+                        self.features = data['features'].astype(np.float32)
+                        self.grades = data['grades']
+                        self.genders = data['genders']
+                        self.row_weights = self.features @ self.weights
+                        self.data_version = int(data['data_version'])
+                        loaded = True
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ 類似検索キャッシュを読み込めませんでした: {e}")
+
+        if not loaded:
+            self.rebuild()
+            return
+
+        last_id = int(self.ids[-1]) if len(self.ids) else 0
+        before = len(self.ids)
+        with self.pool.transaction() as conn:
+            cursor = conn.cursor()
+            current_version = self._read_data_version(cursor)
+            db_ids = np.fromiter(
+                (row[0] for row in cursor.execute('SELECT id FROM interview_history WHERE id <= ? ORDER BY id', (last_id,))),
+                dtype=np.int64
+            )
+            valid = np.array_equal(db_ids, self.ids)
+            if valid and current_version != self.data_version:
+                self._append(*self._fetch_rows(last_id))
+        if not valid or current_version != self.data_version + (len(self.ids) - before):
+            self.rebuild()
+            return
+        self.data_version = current_version
+        if len(self.ids) != before:
+            self.save()
+
+    def save(self):
+        """行列をキャッシュファイルに保存（一時ファイル経由で置き換え）"""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp.npz')
+            np.savez(
+                tmp_path,
+                version=np.int32(CACHE_VERSION),
+                db_path=np.str_(self.db_key),
+                data_version=np.int64(self.data_version),
+                dictionary_version=np.str_(self.dictionary.version),
+                ids=self.ids,
+                features=self.features.astype(np.uint8),
+                grades=self.grades,
+                genders=self.genders,
+            )
+            tmp_path.replace(self.cache_path)
+        except OSError as e:
+            print(f"⚠️ 類似検索キャッシュを保存できませんでした: {e}")
+
+    def add_case(self, case_id, grade, gender, issues, keywords):
+        """保存された1件を行列に追加（save_interviewから呼ぶ）"""
+        self.add_cases([(case_id, grade, gender, issues, keywords)])
+
+    def add_cases(self, cases, save=True):
+        """
+        保存された面談記録をまとめて行列に追加（行列の連結は1回だけ）
+
+        Args:
+            cases: (ケースID, 学年, 性別, 課題の辞書, キーワード) のリスト（ID順）
+            save: Falseの場合はキャッシュに保存しない（一括保存の最後に save() を呼ぶ）
+        """
+        last_id = int(self.ids[-1]) if len(self.ids) else 0
+        cases = [case for case in cases if case[0] > last_id]
+        if not cases:
+            return
+        self._append(
+            [case[0] for case in cases],
+            [encode_features(self.dictionary, case[3], case[4]) for case in cases],
+            [encode_grade(case[1]) for case in cases],
+            [encode_gender(case[2]) for case in cases],
+        )
+        # 追加した行の分だけ版数が増えている（他のPCの変更が挟まった場合は次回の読み込みで作り直す）
+        self.data_version += len(cases)
+        if save:
+            self.save()
+
+    # ------------------------------------------------------------
+    # 検索
+    # ------------------------------------------------------------
+
+    def search(self, issues=None, memo=None, grade=None, gender=None, limit=5,
+               grade_window=None, same_gender=False):
+        """
+        類似ケースの上位k件を取得
+
+        Args:
+            issues: 現在のケースの課題の辞書
+            memo: 現在のケースのメモ（キーワードを抽出）
+            grade: 学年
+            gender: 性別
+            limit: 取得件数
+            grade_window: 指定した場合、学年差がこの範囲のケースのみ対象
+            same_gender: Trueの場合、同じ性別のケースのみ対象
+
+        Returns:
+            list: (ケースID, スコア) のリスト（スコアの高い順）
+        """
+        if not len(self.ids):
+            return []
+
+        query = encode_features(self.dictionary, issues, memo=memo)
+        weighted_query = query * self.weights
+
+        # 重み付きJaccard: 共通部分 / 和集合
+        intersection = self.features @ weighted_query
+        union = self.row_weights + weighted_query.sum() - intersection
+        scores = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+        grade_value = encode_grade(grade)
+        gender_value = encode_gender(gender)
+        mask = None
+        if grade_value:
+            diff = np.abs(self.grades.astype(np.int32) - grade_value)
+            scores += GRADE_BONUS * np.clip(1.0 - diff / GRADE_BONUS_RANGE, 0.0, 1.0) * (self.grades > 0)
+            if grade_window is not None:
+                mask = diff <= grade_window
+        if gender_value:
+            same = self.genders == gender_value
+            scores += GENDER_BONUS * same
+            if same_gender:
+                mask = same if mask is None else (mask & same)
+
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        # 同点は新しいケース（idが大きい）を優先
+        top = top[np.lexsort((-self.ids[top], -scores[top]))]
+        return [(int(self.ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
@@ -1,188 +1,128 @@
 import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import sys
 
-# config.pyからDATABASE_PATHを取得
-try:
-    import config
-    DEFAULT_DB_PATH = config.DATABASE_PATH
-except (ImportError, AttributeError):
-    # config.pyが読み込めない場合はデフォルトパスを使用
-    DEFAULT_DB_PATH = Path('data/records.db')
+from src.database.connection import get_pool, default_db_path
+from src.database.migrations import ensure_schema
+from src.database.paging import KeysetPager
+from src.database import occupancy
+from src.database.timeslots import (
+    WEEKDAYS, parse_days, parse_time, parse_time_range, format_time, DEFAULT_SLOT_MINUTES, MINUTES_PER_DAY
+)
+
+
+# スケジュールを作成する曜日（ケースの曜日文字列に含まれるものを展開）
+SCHEDULE_DAYS = ['月', '火', '水', '木', '金']
+SCHEDULE_DAYS_SQL = ' UNION ALL '.join(f"SELECT '{day}' AS day" for day in SCHEDULE_DAYS)
+
+# 支援員の登録で受け付ける列
+STAFF_COLUMNS = (
+    'name', 'age', 'gender', 'region', 'hobbies_skills', 'previous_job', 'dropbox_number', 'work_days', 'work_hours',
+    'case_district', 'case_number', 'case_day', 'case_time', 'case_frequency', 'case_location', 'notes'
+)
+INSERT_STAFF_SQL = f"INSERT INTO staff ({', '.join(STAFF_COLUMNS)}) VALUES ({', '.join('?' * len(STAFF_COLUMNS))})"
+
+# 未割り当てケースの列（case_numberが同じケースは上書きし、未割り当てに戻す）
+UNASSIGNED_CASE_COLUMNS = (
+    'case_number', 'district', 'child_name', 'child_age', 'child_gender',
+    'preferred_day', 'preferred_time', 'frequency', 'location', 'notes'
+)
+UPSERT_UNASSIGNED_CASE_SQL = f'''
+    INSERT INTO unassigned_cases ({', '.join(UNASSIGNED_CASE_COLUMNS)}, status)
+    VALUES ({', '.join('?' * len(UNASSIGNED_CASE_COLUMNS))}, '未割り当て')
+    ON CONFLICT(case_number) DO UPDATE SET
+        {', '.join(f"{column} = excluded.{column}" for column in UNASSIGNED_CASE_COLUMNS[1:])},
+        status = '未割り当て'
+'''
+
+# 一括登録で1トランザクションにまとめる件数
+BULK_BATCH_SIZE = 500
+
+# 起動時のスケジュール同期を済ませたDB（プロセスごとに1回）
+_schedule_synced = set()
 
 class StaffManager:
     def __init__(self, db_path=None):
         if db_path is None:
-            db_path = DEFAULT_DB_PATH
+            # config.pyのDATABASE_PATH（使う時に解決）
+            db_path = default_db_path()
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True, parents=True)
-        self.init_staff_table()
-        self.init_enhanced_tables()
+        self.pool = get_pool(self.db_path)
+        # テーブルの作成・列の追加はマイグレーションで行う（DBごとにプロセスで1回だけ確認）
+        ensure_schema(self.pool)
+        if str(self.db_path.resolve()) not in _schedule_synced:
+            self.sync_all_cases_to_schedule()
+            _schedule_synced.add(str(self.db_path.resolve()))
     
-    def init_staff_table(self):
-        """支援員テーブルを作成"""
-        conn = sqlite3.connect(str(self.db_path), timeout=10.0)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS staff (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                age INTEGER NOT NULL,
-                gender TEXT NOT NULL,
-                region TEXT NOT NULL,
-                hobbies_skills TEXT,
-                previous_job TEXT,
-                dropbox_number TEXT,
-                work_days TEXT,
-                work_hours TEXT,
-                case_district TEXT,
-                case_number TEXT,
-                case_day TEXT,
-                case_time TEXT,
-                case_frequency TEXT,
-                case_location TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 既存のテーブルに新しいカラムを追加（マイグレーション）
-        migration_columns = [
-            ('case_district', 'TEXT'),
-            ('case_number', 'TEXT'),
-            ('case_day', 'TEXT'),
-            ('case_time', 'TEXT'),
-            ('case_frequency', 'TEXT'),
-            ('case_location', 'TEXT'),
-            ('notes', 'TEXT'),
-        ]
-
-        cursor.execute('PRAGMA table_info(staff)')
-        existing_columns = {row[1] for row in cursor.fetchall()}
-
-        for column_name, column_type in migration_columns:
-            if column_name not in existing_columns:
-                try:
-                    cursor.execute(f'ALTER TABLE staff ADD COLUMN {column_name} {column_type}')
-                except sqlite3.OperationalError:
-                    # 競合やロック等で失敗した場合はログを出力して継続
-                    print(f"⚠️ カラム追加に失敗しました: {column_name}")
-        
-        # サンプルデータを挿入（初回のみ）
-        cursor.execute('SELECT COUNT(*) FROM staff')
-        if cursor.fetchone()[0] == 0:
-            sample_staff = self._get_sample_staff()
-            cursor.executemany(
-                'INSERT INTO staff (name, age, gender, region, hobbies_skills, previous_job, dropbox_number, work_days, work_hours, case_district, case_number, case_day, case_time, case_frequency, case_location) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-                sample_staff
-            )
-        
-        conn.commit()
-        conn.close()
-    
-    def _get_sample_staff(self):
-        """実際の支援員データ（シフト表から詳細抽出）"""
-        return [
-            # 巽 - 不定期勤務、柔軟対応
-            ('巽', 35, '男性', '大阪府大阪市', '柔軟対応、コミュニケーション', '元営業職', 'ST001', '不定期', '14:00-16:00', '大阪市住之江区', 'C001', '火', '14:00-16:00', '週1回', '自宅'),
-            
-            # 岡本 - 火曜日午前、水木金午後
-            ('岡本', 28, '女性', '大阪府大阪市', '学校支援、区役所支援', '元教師', 'ST002', '火水木金', '11:00-18:00', '大阪市西区', 'C002', '水', '11:00-18:00', '週1回', '区役所'),
-            
-            # 松内 - 全日勤務、サテライト対応
-            ('松内', 32, '男性', '大阪府大阪市', 'サテライト支援、自宅支援、区役所支援', '元公務員', 'ST003', '月火水木金', '9:00-17:30', '大阪市中央区', 'C003', '木', '9:00-17:30', '週1回', 'サテライト'),
-            
-            # 井上爽 - 木曜日のみ、区役所・自宅支援
-            ('井上爽', 29, '女性', '大阪府大阪市', '区役所支援、自宅支援', '元事務職', 'ST004', '木', '10:30-17:30', '大阪市東区', 'C004', '木', '10:30-17:30', '週1回', '自宅'),
-            
-            # 山本真美 - 月水、区役所・自宅支援
-            ('山本真美', 31, '女性', '大阪府大阪市', '区役所支援、自宅支援', '元看護師', 'ST005', '月水', '11:00-18:00', '大阪市北区', 'C005', '月', '11:00-18:00', '週1回', '区役所'),
-            
-            # 末永和久 - 月水、多様な支援形態
-            ('末永和久', 38, '男性', '大阪府大阪市', '自宅支援、施設支援、区役所支援', '元社会福祉士', 'ST006', '月水', '10:00-17:30', '大阪市南区', 'C006', '水', '10:00-17:30', '週1回', '施設'),
-            
-            # 藤原佐久夜 - 火木金、登校・区役所・自宅支援
-            ('藤原佐久夜', 26, '女性', '大阪府大阪市', '登校支援、区役所支援、自宅支援', '元教育関係', 'ST007', '火木金', '11:00-17:30', '大阪市西成区', 'C007', '金', '11:00-17:30', '週1回', '学校'),
-            
-            # 井上智美 - 月火木、隔週・月1回支援
-            ('井上智美', 33, '女性', '大阪府大阪市', '隔週支援、月1回支援', '元カウンセラー', 'ST008', '月火木', '10:00-17:30', '大阪市阿倍野区', 'C008', '火', '10:00-17:30', '隔週', '自宅'),
-            
-            # 田中美由紀 - 全日勤務、自宅・学校支援
-            ('田中美由紀', 30, '女性', '大阪府大阪市', '自宅支援、学校支援', '元保育士', 'ST009', '月火水木金', '9:00-16:30', '大阪市天王寺区', 'C009', '月', '9:00-16:30', '週1回', '自宅'),
-            
-            # 平岩 - 木金、午後勤務
-            ('平岩', 36, '男性', '大阪府大阪市', '自宅支援、区役所支援', '元営業職', 'ST010', '木金', '14:00-17:30', '大阪市福島区', 'C010', '金', '14:00-17:30', '週1回', '自宅'),
-            
-            # 上田 - 全日勤務、夕方中心
-            ('上田', 34, '男性', '大阪府大阪市', '学校支援、区役所支援', '元教員', 'ST011', '月火水木金', '15:30-18:30', '大阪市此花区', 'C011', '水', '15:30-18:30', '週1回', '学校'),
-            
-            # 中村 - 水曜日のみ、学校支援
-            ('中村', 27, '女性', '大阪府大阪市', '学校支援', '元教育関係', 'ST012', '水', '11:30-18:00', '大阪市港区', 'C012', '水', '11:30-18:00', '週1回', '学校'),
-            
-            # 喜如嘉 - 全日勤務、午後〜夕方
-            ('喜如嘉', 40, '女性', '大阪府大阪市', '区役所支援、自宅支援、施設支援', '元社会福祉士', 'ST013', '月火水木金', '13:00-19:00', '大阪市大正区', 'C013', '木', '13:00-19:00', '週1回', '施設'),
-        ]
+    @contextmanager
+    def _write(self):
+        """
+        書き込みのトランザクション（StaffManagerの書き込みはすべてこれを使う）
+        
+        commitの前に、トリガーで変更が記録された支援員の空き時間の索引（staff_intervals）と
+        予定のビットマップ（staff_occupancy）を同じトランザクションで作り直す。
+        検索（search_matching_staff）・予定の表示（get_occupancy）は読み込みだけで済む。
+        """
+        with self.pool.transaction() as conn:
+            yield conn
+            cursor = conn.cursor()
+            self._refresh_availability_index(cursor)
+            self._refresh_occupancy(cursor)
     
     def add_staff(self, staff_data=None, **kwargs):
         """新しい支援員を追加"""
-        # 辞書形式のデータまたは個別引数に対応
-        if staff_data and isinstance(staff_data, dict):
-            # 辞書形式の場合
-            name = staff_data.get('name')
-            age = staff_data.get('age')
-            gender = staff_data.get('gender')
-            region = staff_data.get('region')
-            hobbies_skills = staff_data.get('hobbies_skills')
-            previous_job = staff_data.get('previous_job')
-            dropbox_number = staff_data.get('dropbox_number')
-            work_days = staff_data.get('work_days')
-            work_hours = staff_data.get('work_hours')
-            case_district = staff_data.get('case_district')
-            case_number = staff_data.get('case_number')
-            case_day = staff_data.get('case_day')
-            case_time = staff_data.get('case_time')
-            case_frequency = staff_data.get('case_frequency')
-            case_location = staff_data.get('case_location')
-            notes = staff_data.get('notes')
-        else:
-            # 個別引数の場合（後方互換性のため）
-            name = kwargs.get('name')
-            age = kwargs.get('age')
-            gender = kwargs.get('gender')
-            region = kwargs.get('region')
-            hobbies_skills = kwargs.get('hobbies_skills')
-            previous_job = kwargs.get('previous_job')
-            dropbox_number = kwargs.get('dropbox_number')
-            work_days = kwargs.get('work_days')
-            work_hours = kwargs.get('work_hours')
-            case_district = kwargs.get('case_district')
-            case_number = kwargs.get('case_number')
-            case_day = kwargs.get('case_day')
-            case_time = kwargs.get('case_time')
-            case_frequency = kwargs.get('case_frequency')
-            case_location = kwargs.get('case_location')
-            notes = kwargs.get('notes')
-        
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        # 辞書形式のデータまたは個別引数に対応（個別引数は後方互換性のため）
+        if not (staff_data and isinstance(staff_data, dict)):
+            staff_data = kwargs
         
-        cursor.execute('''
-            INSERT INTO staff (name, age, gender, region, hobbies_skills, previous_job, dropbox_number, work_days, work_hours, case_district, case_number, case_day, case_time, case_frequency, case_location, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (name, age, gender, region, hobbies_skills, previous_job, dropbox_number, work_days, work_hours, case_district, case_number, case_day, case_time, case_frequency, case_location, notes))
-        
-        staff_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute(INSERT_STAFF_SQL, tuple(staff_data.get(column) for column in STAFF_COLUMNS))
+            staff_id = cursor.lastrowid
         
         return staff_id
     
+    def add_staff_many(self, staff_list, batch_size=BULK_BATCH_SIZE):
+        """
+        支援員をまとめて追加（一括取り込み用）
+        
+        batch_size件ごとに1つのトランザクションで executemany する。
+        
+        Args:
+            staff_list: 支援員の辞書の反復可能オブジェクト（add_staff と同じキー）
+        
+        Returns:
+            int: 追加した件数
+        """
+        rows = (tuple(staff.get(column) for column in STAFF_COLUMNS) for staff in staff_list)
+        return self._executemany_batched(INSERT_STAFF_SQL, rows, batch_size)
+    
+    def _executemany_batched(self, sql, rows, batch_size):
+        """rowsをbatch_size件ごとに1つのトランザクションで executemany（保存済みのバッチは失敗しても残る）"""
+        batch_size = max(1, batch_size)
+        total = 0
+        batch = []
+        
+        def flush():
+            with self._write() as conn:
+                conn.executemany(sql, batch)
+            batch.clear()
+        
+        for row in rows:
+            batch.append(row)
+            total += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return total
+    
     def get_all_staff(self, active_only=True):
         """全支援員を取得"""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
         if active_only:
@@ -197,12 +137,30 @@ class StaffManager:
             staff_dict = dict(zip(columns, row))
             staff_list.append(staff_dict)
         
-        conn.close()
         return staff_list
     
+    def get_staff_regions(self, active_only=True):
+        """支援員の地域の一覧（重複なし・昇順）"""
+        cursor = self.pool.connect().cursor()
+        active_sql = 'AND is_active = 1' if active_only else ''
+        cursor.execute(f'''
+            SELECT DISTINCT region FROM staff
+            WHERE region IS NOT NULL AND region != '' {active_sql}
+            ORDER BY region
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+    
+    def staff_pager(self, active_only=True):
+        """支援員一覧を名前順に少しずつ読み込むページャー（一覧の表示用）"""
+        if active_only:
+            sql = 'SELECT * FROM staff WHERE is_active = 1'
+        else:
+            sql = 'SELECT * FROM staff'
+        return KeysetPager(self.pool, sql, order_by=('name',))
+    
     def get_staff_by_id(self, staff_id):
         """IDで支援員を取得"""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM staff WHERE id = ?', (staff_id,))
@@ -211,333 +169,361 @@ class StaffManager:
         if row:
             columns = [description[0] for description in cursor.description]
             staff_dict = dict(zip(columns, row))
-            conn.close()
             return staff_dict
         
-        conn.close()
         return None
     
     def update_staff(self, staff_id, staff_data=None, **kwargs):
         """支援員情報を更新"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        # 更新可能なフィールド
-        updatable_fields = ['name', 'age', 'gender', 'region', 'hobbies_skills', 'previous_job', 'dropbox_number', 'work_days', 'work_hours', 'case_district', 'case_number', 'case_day', 'case_time', 'case_frequency', 'case_location', 'notes', 'is_active']
-        
-        update_parts = []
-        values = []
-        
-        # 辞書形式のデータまたは個別引数に対応
-        if staff_data and isinstance(staff_data, dict):
-            update_data = staff_data
-        else:
-            update_data = kwargs
-        
-        for key, value in update_data.items():
-            if key in updatable_fields:
-                update_parts.append(f"{key} = ?")
-                values.append(value)
-        
-        if update_parts:
-            update_parts.append("updated_at = CURRENT_TIMESTAMP")
-            values.append(staff_id)
+        with self._write() as conn:
+            cursor = conn.cursor()
             
-            query = f"UPDATE staff SET {', '.join(update_parts)} WHERE id = ?"
-            cursor.execute(query, values)
-        
-        conn.commit()
-        conn.close()
+            # 更新可能なフィールド
+            updatable_fields = ['name', 'age', 'gender', 'region', 'hobbies_skills', 'previous_job', 'dropbox_number', 'work_days', 'work_hours', 'case_district', 'case_number', 'case_day', 'case_time', 'case_frequency', 'case_location', 'notes', 'is_active']
+            
+            update_parts = []
+            values = []
+            
+            # 辞書形式のデータまたは個別引数に対応
+            if staff_data and isinstance(staff_data, dict):
+                update_data = staff_data
+            else:
+                update_data = kwargs
+            
+            for key, value in update_data.items():
+                if key in updatable_fields:
+                    update_parts.append(f"{key} = ?")
+                    values.append(value)
+            
+            if update_parts:
+                update_parts.append("updated_at = CURRENT_TIMESTAMP")
+                values.append(staff_id)
+                
+                query = f"UPDATE staff SET {', '.join(update_parts)} WHERE id = ?"
+                cursor.execute(query, values)
     
     def delete_staff(self, staff_id):
         """支援員を削除（論理削除）"""
         self.update_staff(staff_id, is_active=False)
     
     def search_matching_staff(self, preferred_time=None, preferred_region=None, age_range=None, gender_preference=None, interests=None, preferred_day=None, exclude_occupied_times=True):
-        """条件に合う支援員を検索（重複チェック機能付き）"""
-        conn = sqlite3.connect(str(self.db_path))
+        """
+        条件に合う支援員を検索（重複チェック機能付き）
+        
+        曜日・時間帯は勤務時間とケースの時間帯の索引（staff_intervals）で
+        区間の重なりとして判定する。曜日・時間帯を指定した場合、結果の各支援員に空き状況を付加する。
+            free_minutes: 希望曜日・時間帯のうち勤務時間内でケースが入っていない分数
+            available_days: 希望時間帯に空きがある曜日（例: '月水'）
+        
+        索引は書き込み時（_write）に作り直してあるため、検索では書き込まない。
+        """
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
-        # 基本クエリ
-        query = "SELECT * FROM staff WHERE is_active = 1"
-        conditions = []
-        params = []
+        conditions = ["s.is_active = 1"]
+        params = {}
         
         # 地域条件
         if preferred_region:
             # 地域の部分一致で検索（例：東京都 → 東京都の各市区町村）
-            conditions.append("region LIKE ?")
-            params.append(f"%{preferred_region}%")
+            conditions.append("s.region LIKE :region")
+            params['region'] = f"%{preferred_region}%"
         
         # 年齢範囲
         if age_range and len(age_range) == 2:
-            min_age, max_age = age_range
-            conditions.append("age BETWEEN ? AND ?")
-            params.extend([min_age, max_age])
+            conditions.append("s.age BETWEEN :min_age AND :max_age")
+            params['min_age'], params['max_age'] = age_range
         
         # 性別
         if gender_preference:
-            conditions.append("gender = ?")
-            params.append(gender_preference)
-        
-        # 勤務曜日（柔軟な検索）
-        if preferred_day:
-            # 複数曜日が選択された場合、いずれかがマッチすればOK
-            day_conditions = []
-            for day in preferred_day:
-                day_conditions.append("work_days LIKE ?")
-                params.append(f"%{day}%")
-            if day_conditions:
-                conditions.append(f"({' OR '.join(day_conditions)})")
-        
-        # 勤務時間（時間帯マッチング）
-        if preferred_time and '-' in preferred_time:
-            # "開始時間-終了時間"の形式で検索
-            time_conditions = []
-            time_conditions.append("work_hours LIKE ?")
-            params.append(f"%{preferred_time}%")
-            
-            # さらに柔軟な時間帯マッチング
-            try:
-                start_str, end_str = preferred_time.split('-')
-                start_hour = int(start_str.split(':')[0])
-                end_hour = int(end_str.split(':')[0])
-                
-                # 時間帯が重複する可能性のあるパターンを追加
-                for hour in range(start_hour, end_hour + 1):
-                    time_conditions.append("work_hours LIKE ?")
-                    params.append(f"%{hour:02d}:%")
-                
-                conditions.append(f"({' OR '.join(time_conditions)})")
-            except (ValueError, IndexError):
-                # 時間解析に失敗した場合は部分一致のみ
-                conditions.append("work_hours LIKE ?")
-                params.append(f"%{preferred_time}%")
+            conditions.append("s.gender = :gender")
+            params['gender'] = gender_preference
         
         # 趣味・特技（部分一致）
         if interests:
             interest_conditions = []
-            for interest in interests:
-                interest_conditions.append("hobbies_skills LIKE ?")
-                params.append(f"%{interest}%")
+            for i, interest in enumerate(interests):
+                interest_conditions.append(f"s.hobbies_skills LIKE :interest{i}")
+                params[f'interest{i}'] = f"%{interest}%"
             if interest_conditions:
                 conditions.append(f"({' OR '.join(interest_conditions)})")
         
-        # 重複チェック：既にケースを持っている支援員を除外
-        if exclude_occupied_times and preferred_day and preferred_time:
-            # 指定された曜日・時間帯に既にケースを持っている支援員を除外
-            occupied_conditions = []
-            for day in preferred_day:
-                occupied_conditions.append("(case_day = ? AND case_time LIKE ?)")
-                params.extend([day, f"%{preferred_time}%"])
-            
-            if occupied_conditions:
-                conditions.append(f"NOT ({' OR '.join(occupied_conditions)})")
-        
-        # クエリを組み立て
-        if conditions:
-            query += " AND " + " AND ".join(conditions)
-        
-        query += " ORDER BY name"
+        where_clause = ' AND '.join(conditions)
+        
+        # 希望時間帯（分）
+        window = parse_time_range(preferred_time)[:1] if preferred_time else []
+        if preferred_time and not window:
+            print(f"⚠️ 希望時間を解析できませんでした: {preferred_time}")
+        days = [day for day in (preferred_day or []) if day]
+        
+        if not days and not window:
+            # 曜日・時間帯の指定がなければ区間の判定は不要
+            cursor.execute(f'''
+                SELECT s.* FROM staff s
+                WHERE {where_clause}
+                ORDER BY s.name
+            ''', params)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        # 時間帯の指定がなければ終日
+        params['window_start'], params['window_end'] = window[0] if window else (0, MINUTES_PER_DAY)
+        # ケースとの重複で曜日を除外するのは時間帯が指定された場合のみ
+        params['check_occupied'] = 1 if (exclude_occupied_times and window) else 0
+        
+        day_filter = ''
+        if days:
+            day_filter = f"AND day IN ({', '.join(f':day{i}' for i in range(len(days)))})"
+            params.update({f'day{i}': day for i, day in enumerate(days)})
+        
+        # 勤務時間・ケースの区間のうち希望時間帯と重なる部分を曜日ごとに集計
+        overlap_sql = f'''
+            SELECT staff_id, day,
+                   SUM(MIN(end_min, :window_end) - MAX(start_min, :window_start)) AS minutes
+            FROM staff_intervals
+            WHERE kind = ? AND start_min < :window_end AND end_min > :window_start {day_filter}
+            GROUP BY staff_id, day
+        '''
+        cursor.execute(f'''
+            WITH work AS ({overlap_sql.replace('?', "'work'")}),
+                 booked AS ({overlap_sql.replace('?', "'case'")}),
+                 free AS (
+                     SELECT work.staff_id, work.day,
+                            MAX(work.minutes - COALESCE(booked.minutes, 0), 0) AS minutes
+                     FROM work
+                     LEFT JOIN booked ON booked.staff_id = work.staff_id AND booked.day = work.day
+                     WHERE NOT (:check_occupied AND COALESCE(booked.minutes, 0) > 0)
+                 )
+            SELECT s.*, SUM(free.minutes) AS free_minutes,
+                   COALESCE(GROUP_CONCAT(CASE WHEN free.minutes > 0 THEN free.day END, ''), '') AS available_days
+            FROM free
+            JOIN staff s ON s.id = free.staff_id
+            WHERE {where_clause}
+            GROUP BY s.id
+            ORDER BY s.name
+        ''', params)
         
-        cursor.execute(query, params)
         columns = [description[0] for description in cursor.description]
-        staff_list = []
-        
-        for row in cursor.fetchall():
-            staff_dict = dict(zip(columns, row))
-            staff_list.append(staff_dict)
-        
-        conn.close()
-        return staff_list
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
-    def get_staff_statistics(self):
-        """支援員統計情報を取得"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        # 総数
-        cursor.execute('SELECT COUNT(*) FROM staff WHERE is_active = 1')
-        total_count = cursor.fetchone()[0]
-        
-        # 性別別
-        cursor.execute('SELECT gender, COUNT(*) FROM staff WHERE is_active = 1 GROUP BY gender')
-        gender_stats = dict(cursor.fetchall())
-        
-        # 年齢別（10歳刻み）
-        cursor.execute('''
-            SELECT 
-                CASE 
-                    WHEN age < 30 THEN '20代'
-                    WHEN age < 40 THEN '30代'
-                    WHEN age < 50 THEN '40代'
-                    ELSE '50代以上'
-                END as age_group,
-                COUNT(*) as count
-            FROM staff 
-            WHERE is_active = 1 
-            GROUP BY age_group
-        ''')
-        age_stats = dict(cursor.fetchall())
-        
-        # 地域別
-        cursor.execute('SELECT region, COUNT(*) FROM staff WHERE is_active = 1 GROUP BY region ORDER BY count DESC')
-        region_stats = dict(cursor.fetchall())
-        
-        conn.close()
+    def _build_intervals(self, staff_row, schedule_rows):
+        """1人分の勤務時間・ケースの区間を作成"""
+        intervals = []
+        
+        # 勤務時間（時間の記載がない場合は終日）
+        work_ranges = parse_time_range(staff_row['work_hours']) or [(0, MINUTES_PER_DAY)]
+        for day in parse_days(staff_row['work_days']):
+            for start, end in work_ranges:
+                intervals.append((staff_row['id'], 'work', day, start, end, 'staff'))
+        
+        # 担当ケース（支援員情報のケース欄）
+        for day in parse_days(staff_row['case_day']) if staff_row['case_time'] else []:
+            for start, end in parse_time_range(staff_row['case_time']):
+                intervals.append((staff_row['id'], 'case', day, start, end, 'staff'))
+        
+        # 担当ケース（週間スケジュール）
+        for schedule in schedule_rows:
+            if schedule['start_min'] is not None and schedule['end_min'] is not None:
+                time_ranges = ((schedule['start_min'], schedule['end_min']),)
+            else:
+                end_time = schedule['end_time'] if schedule['end_time'] != schedule['start_time'] else ''
+                time_ranges = parse_time_range(f"{schedule['start_time']}-{end_time}" if end_time else schedule['start_time'])
+            for day in parse_days(schedule['day_of_week']):
+                for start, end in time_ranges:
+                    intervals.append((staff_row['id'], 'case', day, start, end, 'schedule'))
         
-        return {
-            'total_count': total_count,
-            'gender_stats': gender_stats,
-            'age_stats': age_stats,
-            'region_stats': region_stats
-        }
+        return intervals
+    
+    def _refresh_availability_index(self, cursor):
+        """変更のあった支援員の区間を作り直す（_write のトランザクション内で呼ぶ。変更がなければ何もしない）"""
+        dirty_ids = [row[0] for row in cursor.execute('SELECT staff_id FROM staff_intervals_dirty')]
+        if not dirty_ids:
+            return
 
-    def init_enhanced_tables(self):
-        """拡張テーブルを作成"""
-        conn = sqlite3.connect(str(self.db_path), timeout=10.0)
-        cursor = conn.cursor()
-        
-        # 未割り当てケース管理テーブル
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS unassigned_cases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                case_number TEXT NOT NULL UNIQUE,
-                district TEXT,
-                child_name TEXT,
-                child_age INTEGER,
-                child_gender TEXT,
-                preferred_day TEXT,
-                preferred_time TEXT,
-                frequency TEXT,
-                location TEXT,
-                notes TEXT,
-                status TEXT DEFAULT '未割り当て',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # エリアマスタテーブル
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS areas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                display_order INTEGER
-            )
-        ''')
-        
-        # 区マスタテーブル
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS districts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                area_id INTEGER NOT NULL,
-                display_order INTEGER,
-                FOREIGN KEY (area_id) REFERENCES areas(id)
-            )
-        ''')
-        
-        # ケーステーブル（多対多対応）
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                case_number TEXT NOT NULL,
-                district_id INTEGER NOT NULL,
-                phone_number TEXT,
-                child_name TEXT,
-                child_last_name TEXT,
-                child_first_name TEXT,
-                schedule_day TEXT,
-                schedule_time TEXT,
-                location TEXT,
-                first_meeting_date DATE,
-                frequency TEXT,
-                notes TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (district_id) REFERENCES districts(id)
-            )
-        ''')
-        
-        # 既存のテーブルに新しいカラムを追加（マイグレーション）
-        try:
-            cursor.execute('ALTER TABLE cases ADD COLUMN child_last_name TEXT')
-            cursor.execute('ALTER TABLE cases ADD COLUMN child_first_name TEXT')
-        except sqlite3.OperationalError:
-            # カラムが既に存在する場合は無視
-            pass
-        
-        # 支援員とケースの関連テーブル
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS staff_cases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                staff_id INTEGER NOT NULL,
-                case_id INTEGER NOT NULL,
-                assigned_date DATE DEFAULT CURRENT_DATE,
-                is_primary BOOLEAN DEFAULT 1,
-                FOREIGN KEY (staff_id) REFERENCES staff(id),
-                FOREIGN KEY (case_id) REFERENCES cases(id),
-                UNIQUE(staff_id, case_id)
-            )
-        ''')
-        
-        # 週間スケジュールテーブル
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS schedules (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                staff_id INTEGER NOT NULL,
-                case_id INTEGER,
-                day_of_week TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                location TEXT,
-                schedule_type TEXT,
-                color_code TEXT,
-                notes TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                FOREIGN KEY (staff_id) REFERENCES staff(id),
-                FOREIGN KEY (case_id) REFERENCES cases(id)
+        intervals = []
+        for i in range(0, len(dirty_ids), 500):
+            chunk = dirty_ids[i:i + 500]
+            placeholders = ', '.join('?' * len(chunk))
+
+            cursor.execute(f'''
+                SELECT staff_id, day_of_week, start_time, end_time, start_min, end_min
+                FROM schedules
+                WHERE is_active = 1 AND staff_id IN ({placeholders})
+            ''', chunk)
+            schedules_by_staff = {}
+            for row in cursor.fetchall():
+                schedules_by_staff.setdefault(row['staff_id'], []).append(row)
+
+            cursor.execute(f'''
+                SELECT id, work_days, work_hours, case_day, case_time
+                FROM staff
+                WHERE is_active = 1 AND id IN ({placeholders})
+            ''', chunk)
+            for staff_row in cursor.fetchall():
+                intervals.extend(self._build_intervals(staff_row, schedules_by_staff.get(staff_row['id'], [])))
+
+            cursor.execute(f'DELETE FROM staff_intervals WHERE staff_id IN ({placeholders})', chunk)
+            cursor.execute(f'DELETE FROM staff_intervals_dirty WHERE staff_id IN ({placeholders})', chunk)
+
+        cursor.executemany('''
+            INSERT INTO staff_intervals (staff_id, kind, day, start_min, end_min, source)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', intervals)
+    
+    def _occupancy_rows(self, cursor, staff_ids, exclude_case_id=None):
+        """ビットマップを作る予定（週間スケジュール＋支援員情報のケース欄）"""
+        rows = []
+        placeholders = ', '.join('?' * len(staff_ids))
+        cursor.execute(f'''
+            SELECT s.staff_id, s.day_of_week, s.start_min, s.end_min, c.frequency, c.first_meeting_date
+            FROM schedules s
+            JOIN staff ON staff.id = s.staff_id AND staff.is_active = 1
+            LEFT JOIN cases c ON c.id = s.case_id
+            WHERE s.is_active = 1 AND COALESCE(c.is_active, 1) = 1
+              AND s.start_min IS NOT NULL AND s.end_min IS NOT NULL
+              AND s.staff_id IN ({placeholders})
+              AND (? IS NULL OR s.case_id IS NOT ?)
+        ''', list(staff_ids) + [exclude_case_id, exclude_case_id])
+        rows.extend(cursor.fetchall())
+        
+        cursor.execute(f'''
+            SELECT id, case_day, case_time, case_frequency FROM staff
+            WHERE is_active = 1 AND case_time IS NOT NULL AND case_time != '' AND id IN ({placeholders})
+        ''', list(staff_ids))
+        for staff_row in cursor.fetchall():
+            for start, end in parse_time_range(staff_row['case_time']):
+                rows.append({
+                    'staff_id': staff_row['id'], 'day_of_week': staff_row['case_day'],
+                    'start_min': start, 'end_min': end,
+                    'frequency': staff_row['case_frequency'], 'first_meeting_date': None,
+                })
+        return rows
+    
+    def _refresh_occupancy(self, cursor):
+        """
+        予定のビットマップを作り直す（_write のトランザクション内で呼ぶ）
+
+        今週から config.SCHEDULE_HORIZON_WEEKS 週の分を保持し、変更のあった支援員の分だけ作り直す。
+        週が変わって期間がずれた場合は全員を作り直す。
+        """
+        start = occupancy.week_start(datetime.now().date())
+        end = start + timedelta(weeks=occupancy.horizon_weeks())
+
+        horizon = cursor.execute('SELECT start_day, end_day FROM staff_occupancy_horizon WHERE id = 1').fetchone()
+        rebuild_all = not horizon or (horizon['start_day'], horizon['end_day']) != (start.isoformat(), end.isoformat())
+        if rebuild_all:
+            staff_ids = [row[0] for row in cursor.execute('SELECT id FROM staff')]
+            cursor.execute('DELETE FROM staff_occupancy')
+            cursor.execute('DELETE FROM staff_occupancy_dirty')
+            cursor.execute(
+                'INSERT OR REPLACE INTO staff_occupancy_horizon (id, start_day, end_day) VALUES (1, ?, ?)',
+                (start.isoformat(), end.isoformat())
             )
-        ''')
-        
-        # 初期データ投入
-        cursor.execute('SELECT COUNT(*) FROM areas')
-        if cursor.fetchone()[0] == 0:
-            # エリアデータ
+        else:
+            staff_ids = [row[0] for row in cursor.execute('SELECT staff_id FROM staff_occupancy_dirty')]
+            if not staff_ids:
+                return
+
+        for i in range(0, len(staff_ids), 500):
+            chunk = staff_ids[i:i + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            bitmaps = occupancy.build_occupancy(self._occupancy_rows(cursor, chunk), start, end)
+            if not rebuild_all:
+                cursor.execute(f'DELETE FROM staff_occupancy WHERE staff_id IN ({placeholders})', chunk)
+                cursor.execute(f'DELETE FROM staff_occupancy_dirty WHERE staff_id IN ({placeholders})', chunk)
             cursor.executemany(
-                'INSERT INTO areas (name, display_order) VALUES (?, ?)',
-                [('東エリア', 1), ('南エリア', 2)]
+                'INSERT INTO staff_occupancy (day, staff_id, bits) VALUES (?, ?, ?)',
+                [(day.isoformat(), staff_id, bits) for (staff_id, day), bits in bitmaps.items()]
             )
-            
-            # 区データ
-            districts_data = [
-                # 東エリア (id=1)
-                ('城東区', 1, 1),
-                ('鶴見区', 1, 2),
-                ('天王寺区', 1, 3),
-                ('中央区', 1, 4),
-                ('浪速区', 1, 5),
-                ('生野区', 1, 6),
-                ('東成区', 1, 7),
-                # 南エリア (id=2)
-                ('阿倍野区', 2, 8),
-                ('平野区', 2, 9),
-                ('住吉区', 2, 10),
-                ('東住吉区', 2, 11),
-                ('西成区', 2, 12),
-            ]
-            cursor.executemany(
-                'INSERT INTO districts (name, area_id, display_order) VALUES (?, ?, ?)',
-                districts_data
+
+    def get_occupancy(self, start, end, staff_ids=None):
+        """
+        期間内の予定のビットマップ（全支援員分を1回のクエリで取得）
+
+        ビットマップは書き込み時（_write）に作り直してあるため、ここでは読むだけ。
+        保存している期間の外や、まだ作り直していない支援員（他のプログラムで変更された場合など）の分は
+        その場で展開する（DBには書き込まない）。
+
+        Args:
+            start, end: 期間（endを含まない）
+            staff_ids: 支援員IDのリスト（省略時は全員）
+
+        Returns:
+            dict: 支援員ID → {日付: ビット}（予定のない日は含まない）
+        """
+        cursor = self.pool.connect().cursor()
+        wanted = set(staff_ids) if staff_ids is not None else None
+        result = {}
+
+        horizon = cursor.execute('SELECT start_day, end_day FROM staff_occupancy_horizon WHERE id = 1').fetchone()
+        if horizon and horizon['start_day'] <= start.isoformat() and end.isoformat() <= horizon['end_day']:
+            stale = {row[0] for row in cursor.execute('SELECT staff_id FROM staff_occupancy_dirty')}
+            cursor.execute(
+                'SELECT staff_id, day, bits FROM staff_occupancy WHERE day >= ? AND day < ?',
+                (start.isoformat(), end.isoformat())
             )
+            for staff_id, day, bits in cursor.fetchall():
+                if staff_id in stale or (wanted is not None and staff_id not in wanted):
+                    continue
+                result.setdefault(staff_id, {})[date.fromisoformat(day)] = bits
+            build_ids = [staff_id for staff_id in stale if wanted is None or staff_id in wanted]
+        elif wanted is not None:
+            build_ids = list(wanted)
+        else:
+            build_ids = [row[0] for row in cursor.execute('SELECT id FROM staff')]
+
+        for i in range(0, len(build_ids), 500):
+            built = occupancy.build_occupancy(self._occupancy_rows(cursor, build_ids[i:i + 500]), start, end)
+            for (staff_id, day), bits in built.items():
+                result.setdefault(staff_id, {})[day] = bits
+        return result
+
+    def find_schedule_conflicts(self, staff_id, schedule_day, schedule_time, frequency=None,
+                                first_meeting_date=None, exclude_case_id=None, start=None, end=None):
+        """
+        ケースの曜日・時間帯がすでに入っている予定と重なる日を取得
+        
+        Args:
+            staff_id: 支援員ID
+            schedule_day: 曜日（例: '月水'）
+            schedule_time: 時間帯（例: '14:00-16:00'）
+            frequency: 頻度（毎週・隔週・月１回…）
+            first_meeting_date: 初回日
+            exclude_case_id: 更新中のケースID（そのケースの予定は除く）
+            start, end: 確認する期間（省略時は今週から config.SCHEDULE_HORIZON_WEEKS 週）
+        
+        Returns:
+            list: 重なる日付のリスト
+        """
+        start = start or occupancy.week_start(datetime.now().date())
+        end = end or start + timedelta(weeks=occupancy.horizon_weeks())
+        time_ranges = parse_time_range(schedule_time or '')
+        if not staff_id or not time_ranges:
+            return []
         
-        conn.commit()
-        conn.close()
+        if exclude_case_id is None:
+            bitmaps = self.get_occupancy(start, end, [staff_id]).get(staff_id, {})
+        else:
+            # 更新中のケースを除くため、この支援員の分だけその場で展開する
+            cursor = self.pool.connect().cursor()
+            built = occupancy.build_occupancy(self._occupancy_rows(cursor, [staff_id], exclude_case_id), start, end)
+            bitmaps = {day: bits for (_, day), bits in built.items()}
+        
+        proposed = occupancy.build_occupancy([{
+            'staff_id': staff_id, 'day_of_week': schedule_day,
+            'start_min': time_ranges[0][0], 'end_min': time_ranges[0][1],
+            'frequency': frequency, 'first_meeting_date': first_meeting_date,
+        }], start, end)
+        return sorted(day for (_, day), bits in proposed.items() if bitmaps.get(day, 0) & bits)
+    
+    def get_staff_statistics(self):
+        """支援員統計情報を取得（トリガーで更新される集計テーブル stat_staff から読む）"""
+        from src.database.analytics import read_staff_summary
+        return read_staff_summary(self.pool.connect())
 
     def get_all_districts(self):
         """全区を取得（エリア別）"""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -550,7 +536,6 @@ class StaffManager:
         columns = ['id', 'name', 'area_name', 'display_order']
         districts = [dict(zip(columns, row)) for row in cursor.fetchall()]
         
-        conn.close()
         return districts
 
     def get_staff_with_cases(self, staff_id):
@@ -558,7 +543,7 @@ class StaffManager:
         if not staff_id:
             return []
             
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
         try:
@@ -584,146 +569,56 @@ class StaffManager:
         except Exception as e:
             print(f"get_staff_with_cases エラー: {e}")
             cases = []
-        finally:
-            conn.close()
         
         return cases
 
     def add_case_to_staff(self, staff_id, case_data):
         """支援員にケースを追加"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        # ケースを作成（苗字と下の名前を結合してchild_nameにも保存）
-        child_last_name = case_data.get('child_last_name', '').strip()
-        child_first_name = case_data.get('child_first_name', '').strip()
-        child_name = f"{child_last_name} {child_first_name}".strip() if (child_last_name or child_first_name) else ''
-        
-        cursor.execute('''
-            INSERT INTO cases 
-            (case_number, district_id, phone_number, child_name, child_last_name, child_first_name,
-             schedule_day, schedule_time, location, first_meeting_date, 
-             frequency, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            case_data.get('case_number'),
-            case_data.get('district_id'),
-            case_data.get('phone_number'),
-            child_name,
-            child_last_name,
-            child_first_name,
-            case_data.get('schedule_day'),
-            case_data.get('schedule_time'),
-            case_data.get('location'),
-            case_data.get('first_meeting_date'),
-            case_data.get('frequency'),
-            case_data.get('notes')
-        ))
-        
-        case_id = cursor.lastrowid
-        
-        # 支援員とケースを関連付け
-        cursor.execute('''
-            INSERT INTO staff_cases (staff_id, case_id)
-            VALUES (?, ?)
-        ''', (staff_id, case_id))
-        
-        # スケジュールエントリを作成（ケースの曜日・時間情報から）
-        schedule_day = case_data.get('schedule_day', '')
-        schedule_time = case_data.get('schedule_time', '')
-        location = case_data.get('location', '')
-        
-        if schedule_day and schedule_time:
-            # 曜日のマッピング
-            day_mapping = {
-                '月': '月',
-                '火': '火',
-                '水': '水',
-                '木': '木',
-                '金': '金'
-            }
+        with self._write() as conn:
+            cursor = conn.cursor()
             
-            # 時間の解析（「14:00」または「14:00-16:00」形式）
-            # 全角コロン（：）や波線（～）を半角に変換
-            schedule_time = schedule_time.replace('：', ':').replace('～', '-').replace('~', '-').strip()
+            # ケースを作成（苗字と下の名前を結合してchild_nameにも保存）
+            child_last_name = case_data.get('child_last_name', '').strip()
+            child_first_name = case_data.get('child_first_name', '').strip()
+            child_name = f"{child_last_name} {child_first_name}".strip() if (child_last_name or child_first_name) else ''
             
-            if '-' in schedule_time:
-                # 範囲形式（例: 「14:00-16:00」）
-                time_parts = schedule_time.split('-')
-                start_time = time_parts[0].strip()
-                end_time = time_parts[1].strip()
-            else:
-                # 単一時間形式（例: 「14:00」）- 1時間のセッションとして扱う
-                start_time = schedule_time.strip()
-                # 終了時間を計算（1時間後）
-                try:
-                    # コロンで分割して時間と分を取得
-                    if ':' in start_time:
-                        hour, minute = start_time.split(':')
-                        hour_int = int(hour)
-                        minute_int = int(minute) if minute else 0
-                    else:
-                        # コロンがない場合は時間のみ
-                        hour_int = int(start_time)
-                        minute_int = 0
-                        start_time = f"{hour_int:02d}:{minute_int:02d}"
-                    
-                    end_hour = hour_int + 1
-                    end_time = f"{end_hour:02d}:{minute_int:02d}"
-                except Exception as e:
-                    print(f"⚠️ 時間解析エラー: {e}, 時間: {start_time}, デフォルトで1時間後に設定")
-                    # エラー時は開始時間から1時間後を設定
-                    try:
-                        hour_int = int(start_time.split(':')[0]) if ':' in start_time else int(start_time)
-                        end_hour = hour_int + 1
-                        end_time = f"{end_hour:02d}:00"
-                    except:
-                        # 最後のフォールバック：デフォルトで1時間後
-                        end_time = f"{(int(start_time.replace(':', '')) // 100 + 1):02d}:00" if start_time else "15:00"
+            cursor.execute('''
+                INSERT INTO cases 
+                (case_number, district_id, phone_number, child_name, child_last_name, child_first_name,
+                 schedule_day, schedule_time, location, first_meeting_date, 
+                 frequency, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                case_data.get('case_number'),
+                case_data.get('district_id'),
+                case_data.get('phone_number'),
+                child_name,
+                child_last_name,
+                child_first_name,
+                case_data.get('schedule_day'),
+                case_data.get('schedule_time'),
+                case_data.get('location'),
+                case_data.get('first_meeting_date'),
+                case_data.get('frequency'),
+                case_data.get('notes')
+            ))
+            
+            case_id = cursor.lastrowid
             
-            # 各曜日ごとにスケジュールエントリを作成
-            for day_char in schedule_day:
-                if day_char in day_mapping:
-                    day_of_week = day_mapping[day_char]
-                    try:
-                        # schedulesテーブルの存在を確認
-                        cursor.execute('''
-                            SELECT name FROM sqlite_master 
-                            WHERE type='table' AND name='schedules'
-                        ''')
-                        if not cursor.fetchone():
-                            print("⚠️ schedulesテーブルが存在しません。init_enhanced_tablesを呼び出してください。")
-                            # テーブルが存在しない場合は作成を試みる
-                            self.init_enhanced_tables()
-                        
-                        cursor.execute('''
-                            INSERT INTO schedules 
-                            (staff_id, case_id, day_of_week, start_time, end_time, location, schedule_type, is_active)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            staff_id,
-                            case_id,
-                            day_of_week,
-                            start_time,
-                            end_time,
-                            location,
-                            'ケース',
-                            1
-                        ))
-                        print(f"✅ スケジュールエントリ作成: {day_of_week} {start_time}-{end_time}")
-                    except Exception as e:
-                        print(f"❌ スケジュールエントリ作成エラー: {e}")
-                        import traceback
-                        traceback.print_exc()
-        
-        conn.commit()
-        conn.close()
+            # 支援員とケースを関連付け
+            cursor.execute('''
+                INSERT INTO staff_cases (staff_id, case_id)
+                VALUES (?, ?)
+            ''', (staff_id, case_id))
+            
+            # スケジュールエントリを作成（ケースの曜日・時間情報から）
+            self._materialize_case_schedules(cursor, [case_id])
         
         return case_id
     
     def get_case_by_id(self, case_id):
         """ケースIDからケース情報を取得"""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
         try:
@@ -748,416 +643,233 @@ class StaffManager:
         except Exception as e:
             print(f"get_case_by_id エラー: {e}")
             case = None
-        finally:
-            conn.close()
         
         return case
     
     def update_case_to_staff(self, case_id, case_data):
         """ケース情報を更新"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
         try:
-            # ケース情報を更新（苗字と下の名前を結合してchild_nameにも保存）
-            child_last_name = case_data.get('child_last_name', '').strip()
-            child_first_name = case_data.get('child_first_name', '').strip()
-            child_name = f"{child_last_name} {child_first_name}".strip() if (child_last_name or child_first_name) else ''
-            
-            cursor.execute('''
-                UPDATE cases 
-                SET case_number = ?,
-                    district_id = ?,
-                    phone_number = ?,
-                    child_name = ?,
-                    child_last_name = ?,
-                    child_first_name = ?,
-                    schedule_day = ?,
-                    schedule_time = ?,
-                    location = ?,
-                    first_meeting_date = ?,
-                    frequency = ?,
-                    notes = ?
-                WHERE id = ?
-            ''', (
-                case_data.get('case_number'),
-                case_data.get('district_id'),
-                case_data.get('phone_number'),
-                child_name,
-                child_last_name,
-                child_first_name,
-                case_data.get('schedule_day'),
-                case_data.get('schedule_time'),
-                case_data.get('location'),
-                case_data.get('first_meeting_date'),
-                case_data.get('frequency'),
-                case_data.get('notes'),
-                case_id
-            ))
-            
-            # 既存のスケジュールエントリを削除
-            cursor.execute('''
-                DELETE FROM schedules 
-                WHERE case_id = ?
-            ''', (case_id,))
-            
-            # 新しいスケジュールエントリを作成
-            schedule_day = case_data.get('schedule_day', '')
-            schedule_time = case_data.get('schedule_time', '')
-            location = case_data.get('location', '')
-            
-            # ケースに紐づく支援員IDを取得
-            cursor.execute('''
-                SELECT staff_id FROM staff_cases 
-                WHERE case_id = ?
-                LIMIT 1
-            ''', (case_id,))
-            staff_result = cursor.fetchone()
-            staff_id = staff_result[0] if staff_result else None
-            
-            if schedule_day and schedule_time and staff_id:
-                # 曜日のマッピング
-                day_mapping = {
-                    '月': '月',
-                    '火': '火',
-                    '水': '水',
-                    '木': '木',
-                    '金': '金'
-                }
+            with self._write() as conn:
+                cursor = conn.cursor()
                 
-                # 時間の解析（全角コロンや波線を半角に変換）
-                schedule_time_normalized = schedule_time.replace('：', ':').replace('～', '-').replace('~', '-').strip()
+                # ケース情報を更新（苗字と下の名前を結合してchild_nameにも保存）
+                child_last_name = case_data.get('child_last_name', '').strip()
+                child_first_name = case_data.get('child_first_name', '').strip()
+                child_name = f"{child_last_name} {child_first_name}".strip() if (child_last_name or child_first_name) else ''
                 
-                if '-' in schedule_time_normalized:
-                    time_parts = schedule_time_normalized.split('-')
-                    start_time = time_parts[0].strip()
-                    end_time = time_parts[1].strip()
-                else:
-                    start_time = schedule_time_normalized.strip()
-                    # 終了時間を計算（1時間後）
-                    try:
-                        # コロンで分割して時間と分を取得
-                        if ':' in start_time:
-                            hour, minute = start_time.split(':')
-                            hour_int = int(hour)
-                            minute_int = int(minute) if minute else 0
-                        else:
-                            # コロンがない場合は時間のみ
-                            hour_int = int(start_time)
-                            minute_int = 0
-                            start_time = f"{hour_int:02d}:{minute_int:02d}"
-                        
-                        end_hour = hour_int + 1
-                        end_time = f"{end_hour:02d}:{minute_int:02d}"
-                    except Exception as e:
-                        print(f"⚠️ 時間解析エラー（update）: {e}, 時間: {start_time}, デフォルトで1時間後に設定")
-                        # エラー時は開始時間から1時間後を設定
-                        try:
-                            hour_int = int(start_time.split(':')[0]) if ':' in start_time else int(start_time)
-                            end_hour = hour_int + 1
-                            end_time = f"{end_hour:02d}:00"
-                        except:
-                            end_time = f"15:00"  # 最後のフォールバック
+                cursor.execute('''
+                    UPDATE cases 
+                    SET case_number = ?,
+                        district_id = ?,
+                        phone_number = ?,
+                        child_name = ?,
+                        child_last_name = ?,
+                        child_first_name = ?,
+                        schedule_day = ?,
+                        schedule_time = ?,
+                        location = ?,
+                        first_meeting_date = ?,
+                        frequency = ?,
+                        notes = ?
+                    WHERE id = ?
+                ''', (
+                    case_data.get('case_number'),
+                    case_data.get('district_id'),
+                    case_data.get('phone_number'),
+                    child_name,
+                    child_last_name,
+                    child_first_name,
+                    case_data.get('schedule_day'),
+                    case_data.get('schedule_time'),
+                    case_data.get('location'),
+                    case_data.get('first_meeting_date'),
+                    case_data.get('frequency'),
+                    case_data.get('notes'),
+                    case_id
+                ))
                 
-                # 各曜日ごとにスケジュールエントリを作成
-                for day_char in schedule_day:
-                    if day_char in day_mapping:
-                        day_of_week = day_mapping[day_char]
-                        try:
-                            cursor.execute('''
-                                INSERT INTO schedules 
-                                (staff_id, case_id, day_of_week, start_time, end_time, location, schedule_type, is_active)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                staff_id,
-                                case_id,
-                                day_of_week,
-                                start_time,
-                                end_time,
-                                location,
-                                'ケース',
-                                1
-                            ))
-                            print(f"✅ スケジュールエントリ更新: {day_of_week} {start_time}-{end_time}")
-                        except Exception as e:
-                            print(f"❌ スケジュールエントリ更新エラー: {e}")
+                # スケジュールエントリを作り直す
+                cursor.execute('''
+                    DELETE FROM schedules 
+                    WHERE case_id = ?
+                ''', (case_id,))
+                self._materialize_case_schedules(cursor, [case_id])
             
-            conn.commit()
             print(f"✅ ケース情報を更新しました（ID: {case_id}）")
         except Exception as e:
             print(f"update_case_to_staff エラー: {e}")
             import traceback
             traceback.print_exc()
-            conn.rollback()
-        finally:
-            conn.close()
+            raise
         
         return case_id
 
+    def _materialize_case_schedules(self, cursor, case_ids):
+        """
+        ケースの曜日・時間からスケジュールエントリを作成（書き込み時に呼ぶ）
+        
+        時間の文字列はケースごとに1回だけ解析し、曜日への展開と
+        担当支援員の取得は INSERT … SELECT でまとめて行う。
+        
+        Returns:
+            int: 作成したスケジュールエントリ数
+        """
+        if not case_ids:
+            return 0
+        
+        rows = []
+        for i in range(0, len(case_ids), 500):
+            chunk = case_ids[i:i + 500]
+            cursor.execute(f'''
+                SELECT id, schedule_time FROM cases
+                WHERE id IN ({', '.join('?' * len(chunk))})
+                  AND is_active = 1
+                  AND schedule_day IS NOT NULL AND schedule_day != ''
+                  AND schedule_time IS NOT NULL AND schedule_time != ''
+            ''', chunk)
+            rows.extend(cursor.fetchall())
+        
+        params = []
+        for case_id, schedule_time in rows:
+            # 「14:00-16:00」は範囲、「14:00」は1時間の枠
+            time_ranges = parse_time_range(schedule_time)
+            if not time_ranges:
+                print(f"⚠️ 時間解析エラー: ケースID {case_id}, 時間: {schedule_time}")
+                continue
+            start, end = time_ranges[0]
+            params.append((format_time(start), format_time(end), start, end, case_id))
+        
+        if not params:
+            return 0
+        
+        cursor.executemany(f'''
+            INSERT INTO schedules
+            (staff_id, case_id, day_of_week, start_time, end_time, start_min, end_min, location, schedule_type, is_active)
+            SELECT sc.staff_id, c.id, w.day, ?, ?, ?, ?, c.location, 'ケース', 1
+            FROM cases c
+            JOIN staff_cases sc ON sc.id = (SELECT MIN(id) FROM staff_cases WHERE case_id = c.id)
+            JOIN ({SCHEDULE_DAYS_SQL}) w ON instr(c.schedule_day, w.day) > 0
+            WHERE c.id = ?
+        ''', params)
+        # executemanyのrowcountは各行の件数の合計（total_changesと違い、トリガーで書き込んだ行を含まない）
+        created_count = max(cursor.rowcount, 0)
+        if created_count:
+            print(f"✅ スケジュールエントリ作成: {created_count}件")
+        return created_count
+    
     def sync_all_cases_to_schedule(self):
-        """既存のケースからスケジュールエントリを生成（スケジュールエントリがない場合）"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
+        """
+        スケジュールエントリがないケースの分を作成し、時間を分に変換していないエントリを修正
         
+        スケジュールはケースの追加・更新時に作成されるため、起動時に1回だけ
+        以前のバージョンで保存されたデータとの差分を埋める。
+        """
         try:
-            # 全てのケースとその支援員を取得
-            cursor.execute('''
-                SELECT 
-                    c.id as case_id,
-                    c.schedule_day,
-                    c.schedule_time,
-                    c.location,
-                    sc.staff_id
-                FROM cases c
-                JOIN staff_cases sc ON c.id = sc.case_id
-                WHERE c.is_active = 1
-                  AND c.schedule_day IS NOT NULL 
-                  AND c.schedule_day != ''
-                  AND c.schedule_time IS NOT NULL 
-                  AND c.schedule_time != ''
-            ''')
-            
-            cases = cursor.fetchall()
-            created_count = 0
-            
-            # 曜日のマッピング
-            day_mapping = {
-                '月': '月',
-                '火': '火',
-                '水': '水',
-                '木': '木',
-                '金': '金'
-            }
-            
-            for case_id, schedule_day, schedule_time, location, staff_id in cases:
-                # 既にスケジュールエントリが存在するかチェック
+            with self._write() as conn:
+                cursor = conn.cursor()
+        
+                # スケジュールエントリがないケースを1回のクエリで取得
                 cursor.execute('''
-                    SELECT COUNT(*) FROM schedules 
-                    WHERE case_id = ? AND is_active = 1
-                ''', (case_id,))
-                
-                if cursor.fetchone()[0] > 0:
-                    # 既にスケジュールエントリが存在する場合はスキップ
-                    continue
-                
-                # 時間の解析（全角コロンや波線を半角に変換）
-                schedule_time_normalized = schedule_time.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                
-                if '-' in schedule_time_normalized:
-                    time_parts = schedule_time_normalized.split('-')
-                    start_time = time_parts[0].strip()
-                    end_time = time_parts[1].strip()
-                else:
-                    start_time = schedule_time_normalized.strip()
-                    # 終了時間を計算（1時間後）
-                    try:
-                        # コロンで分割して時間と分を取得
-                        if ':' in start_time:
-                            hour, minute = start_time.split(':')
-                            hour_int = int(hour)
-                            minute_int = int(minute) if minute else 0
-                        else:
-                            # コロンがない場合は時間のみ
-                            hour_int = int(start_time)
-                            minute_int = 0
-                            start_time = f"{hour_int:02d}:{minute_int:02d}"
-                        
-                        end_hour = hour_int + 1
-                        end_time = f"{end_hour:02d}:{minute_int:02d}"
-                    except Exception as e:
-                        print(f"⚠️ 時間解析エラー（update）: {e}, 時間: {start_time}, デフォルトで1時間後に設定")
-                        # エラー時は開始時間から1時間後を設定
-                        try:
-                            hour_int = int(start_time.split(':')[0]) if ':' in start_time else int(start_time)
-                            end_hour = hour_int + 1
-                            end_time = f"{end_hour:02d}:00"
-                        except:
-                            end_time = f"15:00"  # 最後のフォールバック
-                
-                # 各曜日ごとにスケジュールエントリを作成
-                for day_char in schedule_day:
-                    if day_char in day_mapping:
-                        day_of_week = day_mapping[day_char]
-                        try:
-                            cursor.execute('''
-                                INSERT INTO schedules 
-                                (staff_id, case_id, day_of_week, start_time, end_time, location, schedule_type, is_active)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                staff_id,
-                                case_id,
-                                day_of_week,
-                                start_time,
-                                end_time,
-                                location,
-                                'ケース',
-                                1
-                            ))
-                            created_count += 1
-                        except Exception as e:
-                            print(f"❌ スケジュールエントリ作成エラー（ケースID: {case_id}）: {e}")
-            
-            conn.commit()
+                    SELECT c.id
+                    FROM cases c
+                    WHERE c.is_active = 1
+                      AND c.schedule_day IS NOT NULL
+                      AND c.schedule_day != ''
+                      AND c.schedule_time IS NOT NULL
+                      AND c.schedule_time != ''
+                      AND EXISTS (SELECT 1 FROM staff_cases sc WHERE sc.case_id = c.id)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM schedules s WHERE s.case_id = c.id AND s.is_active = 1
+                      )
+                ''')
+                missing_ids = [row[0] for row in cursor.fetchall()]
+                created_count = self._materialize_case_schedules(cursor, missing_ids)
+        
+                # 分の列が未設定のエントリを解析（開始と終了が同じ場合は1時間の枠に修正）
+                cursor.execute('''
+                    SELECT id, start_time, end_time FROM schedules
+                    WHERE start_min IS NULL OR end_min IS NULL
+                ''')
+                fixes = []
+                for schedule_id, start_time, end_time in cursor.fetchall():
+                    start = parse_time(start_time)
+                    if start is None:
+                        continue
+                    end = parse_time(end_time)
+                    if end is None or end <= start:
+                        end = start + DEFAULT_SLOT_MINUTES
+                    fixes.append((format_time(start), format_time(end), start, end, schedule_id))
+                cursor.executemany(
+                    'UPDATE schedules SET start_time = ?, end_time = ?, start_min = ?, end_min = ? WHERE id = ?',
+                    fixes
+                )
+        
             if created_count > 0:
                 print(f"✅ 既存ケースから{created_count}個のスケジュールエントリを作成しました")
+            if fixes:
+                print(f"✅ {len(fixes)}個のスケジュールエントリの時間を変換しました")
         except Exception as e:
             print(f"sync_all_cases_to_schedule エラー: {e}")
             import traceback
             traceback.print_exc()
-        finally:
-            conn.close()
     
     def get_weekly_schedule(self):
-        """週間スケジュールを取得（既存ケースからスケジュールエントリを自動生成）"""
-        # 既存ケースからスケジュールエントリを生成（初回のみ）
-        self.sync_all_cases_to_schedule()
-        
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
+        """週間スケジュールを取得（読み取りのみ。エントリはケースの保存時に作成済み。エリアでの絞り込み用に区のエリアも返す）"""
         try:
+            cursor = self.pool.connect().cursor()
             cursor.execute('''
-                SELECT 
-                    s.id, s.day_of_week, s.start_time, s.end_time,
+                SELECT
+                    s.id, s.day_of_week, s.start_time, s.end_time, s.start_min, s.end_min,
                     s.location, s.schedule_type, s.color_code,
                     staff.name as staff_name, c.case_number,
-                    d.name as district_name, c.child_name, c.child_first_name,
-                    c.frequency
+                    d.name as district_name, d.area_id, a.name as area_name,
+                    c.child_name, c.child_first_name, c.frequency
                 FROM schedules s
                 JOIN staff ON s.staff_id = staff.id
                 LEFT JOIN cases c ON s.case_id = c.id
                 LEFT JOIN districts d ON c.district_id = d.id
+                LEFT JOIN areas a ON d.area_id = a.id
                 WHERE s.is_active = 1
-                ORDER BY s.day_of_week, s.start_time
+                ORDER BY s.day_of_week, s.start_min
             ''')
-            
+        
             columns = [desc[0] for desc in cursor.description]
             schedules = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            
-            # 開始時間と終了時間が同じスケジュールを修正（1時間の枠に設定）
-            updated_count = 0
-            for schedule in schedules:
-                start_time = schedule.get('start_time', '').replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                end_time = schedule.get('end_time', '').replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                
-                # 開始時間と終了時間が同じ場合は1時間後に修正
-                if start_time == end_time or not end_time:
-                    try:
-                        # 開始時間を解析（'-'が含まれている場合は削除）
-                        start_time_clean = start_time.replace('-', '').strip()
-                        if ':' in start_time_clean:
-                            parts = start_time_clean.split(':')
-                            hour = parts[0].strip()
-                            minute = parts[1].strip() if len(parts) > 1 else '0'
-                            hour_int = int(hour) if hour else 0
-                            minute_int = int(minute) if minute else 0
-                        else:
-                            hour_int = int(start_time_clean) if start_time_clean else 0
-                            minute_int = 0
-                            start_time = f"{hour_int:02d}:{minute_int:02d}"
-                        
-                        # 1時間後の終了時間を計算
-                        end_hour = hour_int + 1
-                        new_end_time = f"{end_hour:02d}:{minute_int:02d}"
-                        
-                        # データベースを更新
-                        schedule_id = schedule.get('id')
-                        cursor.execute('''
-                            UPDATE schedules 
-                            SET end_time = ?
-                            WHERE id = ?
-                        ''', (new_end_time, schedule_id))
-                        
-                        # メモリ内のデータも更新
-                        schedule['end_time'] = new_end_time
-                        updated_count += 1
-                        
-                    except Exception as e:
-                        print(f"⚠️ スケジュール修正エラー（ID: {schedule.get('id')}）: {e}")
-            
-            if updated_count > 0:
-                conn.commit()
-                print(f"✅ {updated_count}個のスケジュールエントリを1時間の枠に修正しました")
-            
         except Exception as e:
             print(f"get_weekly_schedule エラー: {e}")
             # テーブルが存在しない場合は空のリストを返す
             schedules = []
-        finally:
-            conn.close()
         
         return schedules
     
     # 未割り当てケース管理メソッド
     def add_unassigned_case(self, case_data):
         """未割り当てケースを追加（既に存在する場合は更新）"""
-        conn = sqlite3.connect(str(self.db_path), timeout=10.0)
-        cursor = conn.cursor()
-        
-        try:
-            # 既に同じケース番号が存在するかチェック
+        with self._write() as conn:
+            cursor = conn.cursor()
+            cursor.execute(UPSERT_UNASSIGNED_CASE_SQL, tuple(case_data.get(column) for column in UNASSIGNED_CASE_COLUMNS))
+            # 更新の場合はlastrowidが変わらないため、ケース番号で読み直す
             cursor.execute('SELECT id FROM unassigned_cases WHERE case_number = ?', (case_data.get('case_number'),))
-            existing = cursor.fetchone()
-            
-            if existing:
-                # 既存のケースを更新
-                cursor.execute('''
-                    UPDATE unassigned_cases 
-                    SET district = ?,
-                        child_name = ?,
-                        child_age = ?,
-                        child_gender = ?,
-                        preferred_day = ?,
-                        preferred_time = ?,
-                        frequency = ?,
-                        location = ?,
-                        notes = ?,
-                        status = '未割り当て'
-                    WHERE case_number = ?
-                ''', (
-                    case_data.get('district'),
-                    case_data.get('child_name'),
-                    case_data.get('child_age'),
-                    case_data.get('child_gender'),
-                    case_data.get('preferred_day'),
-                    case_data.get('preferred_time'),
-                    case_data.get('frequency'),
-                    case_data.get('location'),
-                    case_data.get('notes'),
-                    case_data.get('case_number')
-                ))
-                case_id = existing[0]
-            else:
-                # 新規ケースを追加
-                cursor.execute('''
-                    INSERT INTO unassigned_cases 
-                    (case_number, district, child_name, child_age, child_gender, 
-                     preferred_day, preferred_time, frequency, location, notes, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    case_data.get('case_number'),
-                    case_data.get('district'),
-                    case_data.get('child_name'),
-                    case_data.get('child_age'),
-                    case_data.get('child_gender'),
-                    case_data.get('preferred_day'),
-                    case_data.get('preferred_time'),
-                    case_data.get('frequency'),
-                    case_data.get('location'),
-                    case_data.get('notes'),
-                    '未割り当て'
-                ))
-                case_id = cursor.lastrowid
-            
-            conn.commit()
-        finally:
-            conn.close()
+            case_id = cursor.fetchone()[0]
         
         return case_id
     
+    def upsert_unassigned_cases(self, cases, batch_size=BULK_BATCH_SIZE):
+        """
+        未割り当てケースをまとめて追加・更新（一括取り込み用）
+        
+        batch_size件ごとに1つのトランザクションで executemany する。
+        ケース番号が既にあるケースは上書きして未割り当てに戻す（add_unassigned_case と同じ）。
+        
+        Returns:
+            int: 処理した件数
+        """
+        rows = (tuple(case.get(column) for column in UNASSIGNED_CASE_COLUMNS) for case in cases)
+        return self._executemany_batched(UPSERT_UNASSIGNED_CASE_SQL, rows, batch_size)
+    
     def get_unassigned_cases(self):
         """未割り当てケース一覧を取得"""
-        conn = sqlite3.connect(str(self.db_path), timeout=10.0)
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
         try:
@@ -1171,50 +883,242 @@ class StaffManager:
         except Exception as e:
             print(f"get_unassigned_cases エラー: {e}")
             cases = []
-        finally:
-            conn.close()
         
         return cases
     
-    def assign_case_to_staff(self, case_id, staff_id):
-        """ケースを支援員に割り当て"""
-        conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        try:
-            # ケース情報を取得
-            cursor.execute('SELECT * FROM unassigned_cases WHERE id = ?', (case_id,))
-            case = cursor.fetchone()
-            
-            if not case:
-                raise ValueError("ケースが見つかりません")
-            
-            # 支援員にケースを追加
-            cursor.execute('''
-                INSERT INTO staff (name, age, gender, region, work_days, work_hours, 
-                                case_district, case_number, case_day, case_time, case_frequency, case_location)
-                SELECT name, age, gender, region, preferred_day, preferred_time,
-                       district, case_number, preferred_day, preferred_time, frequency, location
-                FROM unassigned_cases
-                WHERE id = ?
-            ''')
-            
-            # ケースを割り当て済みに変更
-            cursor.execute('''
-                UPDATE unassigned_cases 
-                SET status = '割り当て済み' 
-                WHERE id = ?
-            ''', (case_id,))
-            
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+    def get_unassigned_case_by_number(self, case_number):
+        """ケース番号で未割り当てのケースを取得"""
+        cursor = self.pool.connect().cursor()
+        cursor.execute('SELECT * FROM unassigned_cases WHERE case_number = ? AND status = ?', (case_number, '未割り当て'))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        columns = [desc[0] for desc in cursor.description]
+        return dict(zip(columns, row))
     
+    def unassigned_case_pager(self):
+        """未割り当てケースを新しい順に少しずつ読み込むページャー（一覧の表示用）"""
+        sql = '''
+            SELECT *, COALESCE(created_at, '') AS sort_created_at
+            FROM unassigned_cases
+            WHERE status = '未割り当て'
+        '''
+        return KeysetPager(self.pool, sql, order_by=('sort_created_at',), descending=True)
+
+    def get_unassigned_case(self, unassigned_case_id):
+        """IDで未割り当てケースを取得"""
+        cursor = self.pool.connect().cursor()
+        cursor.execute('SELECT * FROM unassigned_cases WHERE id = ?', (unassigned_case_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        columns = [desc[0] for desc in cursor.description]
+        return dict(zip(columns, row))
+
+    def update_unassigned_case(self, unassigned_case_id, case_data):
+        """
+        未割り当てケースの情報を更新
+
+        Returns:
+            dict: 更新後のケース情報（見つからない場合は None）
+        """
+        with self._write() as conn:
+            conn.execute('''
+                UPDATE unassigned_cases
+                SET district = ?,
+                    child_name = ?,
+                    preferred_day = ?,
+                    preferred_time = ?,
+                    frequency = ?,
+                    location = ?,
+                    notes = ?
+                WHERE id = ?
+            ''', (
+                case_data.get('district'),
+                case_data.get('child_name'),
+                case_data.get('preferred_day'),
+                case_data.get('preferred_time'),
+                case_data.get('frequency'),
+                case_data.get('location'),
+                case_data.get('notes'),
+                unassigned_case_id
+            ))
+
+        return self.get_unassigned_case(unassigned_case_id)
+
+    def delete_unassigned_case(self, unassigned_case_id):
+        """未割り当てケースを削除"""
+        with self._write() as conn:
+            conn.execute('DELETE FROM unassigned_cases WHERE id = ?', (unassigned_case_id,))
+
+    def return_staff_case_to_unassigned(self, staff_id):
+        """
+        支援員のケース情報を未割り当てケースに戻す
+
+        Returns:
+            str: 戻したケース番号（支援員にケース情報がない場合は None）
+        """
+        with self._write() as conn:
+            return self._return_staff_case(conn.cursor(), staff_id)
+
+    def _return_staff_case(self, cursor, staff_id):
+        """支援員のケース欄のケースを未割り当てに戻してケース欄を空にする（トランザクション内で呼ぶ）"""
+        # 支援員情報を取得
+        cursor.execute('SELECT * FROM staff WHERE id = ?', (staff_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        staff_columns = [desc[0] for desc in cursor.description]
+        staff_data = dict(zip(staff_columns, row))
+
+        # ケース情報を取得
+        case_number = staff_data.get('case_number', '') or None
+
+        # ケース情報が空の場合はスキップ
+        if not case_number or case_number == 'None' or case_number.strip() == '':
+            return None
+
+        # 未割り当てケースとして登録（既に存在する場合は児童名・備考などを残して未割り当てに戻す）
+        cursor.execute('''
+            INSERT INTO unassigned_cases
+            (case_number, district, preferred_day, preferred_time, frequency, location, status)
+            VALUES (?, ?, ?, ?, ?, ?, '未割り当て')
+            ON CONFLICT(case_number) DO UPDATE SET
+                district = excluded.district,
+                preferred_day = excluded.preferred_day,
+                preferred_time = excluded.preferred_time,
+                frequency = excluded.frequency,
+                location = excluded.location,
+                status = '未割り当て'
+        ''', (
+            case_number,
+            staff_data.get('case_district', '') or None,
+            staff_data.get('case_day', '') or None,
+            staff_data.get('case_time', '') or None,
+            staff_data.get('case_frequency', '') or None,
+            staff_data.get('case_location', '') or None
+        ))
+
+        # 支援員のケース情報をクリア
+        cursor.execute('''
+            UPDATE staff
+            SET case_district = '',
+                case_number = '',
+                case_day = '',
+                case_time = '',
+                case_frequency = '',
+                case_location = ''
+            WHERE id = ?
+        ''', (staff_id,))
+
+        return case_number
+
     def assign_unassigned_case_to_staff(self, unassigned_case_id, staff_id):
         """未割り当てケースを支援員に割り当て"""
+        self.apply_assignment_plan([{'unassigned_case_id': unassigned_case_id, 'staff_id': staff_id}])
+    
+    def _assign_unassigned_case(self, cursor, unassigned_case_id, staff_id):
+        """
+        未割り当てケースを支援員のケース欄に設定して割り当て済みにする（トランザクション内で呼ぶ）
+
+        支援員のケース欄に別のケースが入っている場合は、そのケースを未割り当てに戻してから設定する。
+        """
+        cursor.execute('SELECT * FROM unassigned_cases WHERE id = ?', (unassigned_case_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError("ケースが見つかりません")
+        columns = [desc[0] for desc in cursor.description]
+        case = dict(zip(columns, row))
+        if case.get('status') != '未割り当て':
+            raise ValueError(f"ケース {case.get('case_number')} はすでに割り当て済みです")
+        
+        # ケース欄にあるケースを未割り当てに戻す（上書きで消えないように）
+        self._return_staff_case(cursor, staff_id)
+        
+        # 支援員のケース情報を更新
+        cursor.execute('''
+            UPDATE staff 
+            SET case_district = ?,
+                case_number = ?,
+                case_day = ?,
+                case_time = ?,
+                case_frequency = ?,
+                case_location = ?
+            WHERE id = ?
+        ''', (
+            case.get('district'),
+            case.get('case_number'),
+            case.get('preferred_day'),
+            case.get('preferred_time'),
+            case.get('frequency', '未設定'),
+            case.get('location'),
+            staff_id
+        ))
+        
+        # ケースを割り当て済みに変更
+        cursor.execute('''
+            UPDATE unassigned_cases 
+            SET status = '割り当て済み' 
+            WHERE id = ?
+        ''', (unassigned_case_id,))
+    
+    def propose_assignment_plan(self):
+        """
+        全未割り当てケースの一括割り当て案（src/database/assignment.py）
+        
+        空き時間は今週から config.SCHEDULE_HORIZON_WEEKS 週の予定（隔週・月１回も展開済み）で判定する。
+        割り当て先はケース欄が空いている支援員に限る（担当中のケースを上書きしない）。
+        
+        Returns:
+            list: 割り当て案の辞書のリスト（apply_assignment_plan にそのまま渡せる）
+        """
+        from src.database import assignment
+        if not assignment.is_available():
+            raise ImportError("一括割り当てにはnumpyが必要です")
+        
+        cases = self.get_unassigned_cases()
+        # 支援員情報のケース欄は1件のため、ケース欄が空いている支援員だけを割り当て先にする
+        staff_list = [
+            staff for staff in self.get_all_staff()
+            if not (staff.get('case_number') or '').strip() or staff.get('case_number') == 'None'
+        ]
+        if not cases or not staff_list:
+            return []
+        
+        start = occupancy.week_start(datetime.now().date())
+        end = start + timedelta(weeks=occupancy.horizon_weeks())
+        # 曜日ごとに期間内の予定をまとめる（1回でも重なれば空いていないとみなす）
+        weekly_busy = {}
+        for staff_id, days in self.get_occupancy(start, end).items():
+            busy = weekly_busy.setdefault(staff_id, {})
+            for day, bits in days.items():
+                weekday = WEEKDAYS[day.weekday()]
+                busy[weekday] = busy.get(weekday, 0) | bits
+        
+        district_areas = {district['name']: district['area_name'] for district in self.get_all_districts()}
+        
+        # 担当ケース数（ケースの関連＋支援員情報のケース欄）
+        cursor = self.pool.connect().execute('''
+            SELECT s.id,
+                   (SELECT COUNT(*) FROM staff_cases sc WHERE sc.staff_id = s.id)
+                   + (CASE WHEN TRIM(COALESCE(s.case_number, '')) != '' THEN 1 ELSE 0 END)
+            FROM staff s
+            WHERE s.is_active = 1
+        ''')
+        caseloads = dict(cursor.fetchall())
+        
+        return assignment.plan_assignments(cases, staff_list, weekly_busy, district_areas, caseloads)
+    
+    def apply_assignment_plan(self, plan):
+        """
+        割り当て案をまとめて確定（1つのトランザクション。1件でも失敗した場合はすべて取り消す）
+        
+        Args:
+            plan: unassigned_case_id と staff_id を持つ辞書のリスト
+        
+        Returns:
+            int: 割り当てたケース数
+        """
         import time
         
         max_retries = 5
@@ -1222,47 +1126,11 @@ class StaffManager:
         
         for attempt in range(max_retries):
             try:
-                conn = sqlite3.connect(str(self.db_path), timeout=10.0)
-                cursor = conn.cursor()
-                
-                # 未割り当てケース情報を取得
-                cursor.execute('SELECT * FROM unassigned_cases WHERE id = ?', (unassigned_case_id,))
-                columns = [desc[0] for desc in cursor.description]
-                case = dict(zip(columns, cursor.fetchone()))
-                
-                if not case:
-                    raise ValueError("ケースが見つかりません")
-                
-                # 支援員のケース情報を更新
-                cursor.execute('''
-                    UPDATE staff 
-                    SET case_district = ?,
-                        case_number = ?,
-                        case_day = ?,
-                        case_time = ?,
-                        case_frequency = ?,
-                        case_location = ?
-                    WHERE id = ?
-                ''', (
-                    case.get('district'),
-                    case.get('case_number'),
-                    case.get('preferred_day'),
-                    case.get('preferred_time'),
-                    case.get('frequency', '未設定'),
-                    case.get('location'),
-                    staff_id
-                ))
-                
-                # ケースを割り当て済みに変更
-                cursor.execute('''
-                    UPDATE unassigned_cases 
-                    SET status = '割り当て済み' 
-                    WHERE id = ?
-                ''', (unassigned_case_id,))
-                
-                conn.commit()
-                conn.close()
-                break
+                with self._write() as conn:
+                    cursor = conn.cursor()
+                    for item in plan:
+                        self._assign_unassigned_case(cursor, item['unassigned_case_id'], item['staff_id'])
+                return len(plan)
                 
             except sqlite3.OperationalError as e:
                 if "database is locked" in str(e) and attempt < max_retries - 1:
@@ -1276,7 +1144,7 @@ class StaffManager:
         if not staff_id:
             return None
             
-        conn = sqlite3.connect(str(self.db_path))
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
         try:
@@ -1296,7 +1164,5 @@ class StaffManager:
         except Exception as e:
             print(f"get_staff_by_id エラー: {e}")
             staff = None
-        finally:
-            conn.close()
         
         return staff
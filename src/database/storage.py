@@ -0,0 +1,113 @@
+"""
+Dropbox上のデータベースファイルの利用状況管理
+- どのPCがデータベースを開いているかをロックファイルで共有
+- 他のPCが使用中かどうかを起動時に判定
+"""
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+
+# ロックファイルの拡張子（records.db → records.db.host）
+HOST_LOCK_SUFFIX = '.host'
+
+# この秒数以上更新されていないロックは異常終了の残骸とみなす
+HOST_LOCK_STALE_SECONDS = 12 * 60 * 60
+
+
+class HostLock:
+    """データベースを使用中のPCを記録するロックファイル"""
+
+    def __init__(self, db_path, stale_after=HOST_LOCK_STALE_SECONDS):
+        self.db_path = Path(db_path)
+        self.path = self.db_path.with_name(self.db_path.name + HOST_LOCK_SUFFIX)
+        self.stale_after = stale_after
+        self.hostname = socket.gethostname()
+        self.pid = os.getpid()
+        self.acquired = False
+
+    def read(self):
+        """ロックファイルの内容を取得（なければNone）"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_own(self, info):
+        """ロック情報がこのPC・このプロセスのものか"""
+        return info.get('host') == self.hostname and info.get('pid') == self.pid
+
+    def other_holder(self):
+        """
+        他のPCがデータベースを使用中か確認
+
+        Returns:
+            dict: 使用中のPC情報（host, since, updated_at）。使用中でなければNone
+        """
+        info = self.read()
+        if info:
+            if self.is_own(info):
+                return None
+            age = time.time() - info.get('timestamp', 0)
+            if age < self.stale_after and info.get('host') != self.hostname:
+                return info
+
+        # ロックファイルがない場合でも、自分が開く前から-walが残っていれば
+        # 他のPCがWALモードで開いている（または同期途中）とみなす
+        if not self.acquired:
+            wal_path = self.db_path.with_name(self.db_path.name + '-wal')
+            if wal_path.exists() and wal_path.stat().st_size > 0:
+                return {'host': '不明なPC', 'since': None, 'updated_at': None}
+        return None
+
+    def _write(self, since):
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        info = {
+            'host': self.hostname,
+            'pid': self.pid,
+            'since': since or now,
+            'updated_at': now,
+            'timestamp': time.time(),
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return info
+
+    def acquire(self):
+        """このPCを使用中として記録"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._write(None)
+            self.acquired = True
+        except OSError as e:
+            print(f"⚠️ ロックファイルを作成できませんでした: {e}")
+
+    def touch(self):
+        """使用中の記録を更新（保存時など）"""
+        if not self.acquired:
+            return
+        info = self.read()
+        if info and not self.is_own(info):
+            # 他のPCに上書きされている場合はそのままにする
+            return
+        try:
+            self._write(info.get('since') if info else None)
+        except OSError:
+            pass
+
+    def release(self):
+        """使用中の記録を削除（自分のロックのみ）"""
+        if not self.acquired:
+            return
+        self.acquired = False
+        info = self.read()
+        if info and self.is_own(info):
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,101 @@
+"""
+曜日・時間帯の文字列の解析
+- 「9:00-17:30」「14：00～16：00」「14:00」などを0時からの分（整数）に変換
+- 「火水木金」「不定期」などを曜日のタプルに変換
+- 同じ文字列は何度も解析しないよう、元の文字列をキーにLRUキャッシュする
+  （戻り値は共有されるため変更不可のタプルで返す）
+"""
+import re
+from functools import lru_cache
+
+# 曜日（表示順）
+WEEKDAYS = ['月', '火', '水', '木', '金', '土', '日']
+
+# 曜日の指定がない勤務形態は平日すべてとみなす
+FLEXIBLE_DAY_WORDS = ('不定期',)
+FLEXIBLE_DAYS = ('月', '火', '水', '木', '金')
+
+# 開始時刻のみの場合の枠の長さ（分）
+DEFAULT_SLOT_MINUTES = 60
+
+MINUTES_PER_DAY = 24 * 60
+
+# 解析結果のキャッシュ件数（支援員・ケースの時間帯の種類より十分大きく）
+PARSE_CACHE_SIZE = 4096
+
+_TIME_PATTERN = re.compile(r'(\d{1,2})(?::(\d{1,2}))?')
+_RANGE_SPLIT = re.compile(r'[,、/／\s]+')
+
+
+def normalize_time_text(text):
+    """全角コロン・波線などを半角に統一"""
+    return (text or '').replace('：', ':').replace('～', '-').replace('〜', '-').replace('~', '-').replace('−', '-').strip()
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_time(text):
+    """
+    「HH:MM」「HH」を0時からの分に変換
+
+    Returns:
+        int: 分（解析できない場合はNone）
+    """
+    match = _TIME_PATTERN.fullmatch(normalize_time_text(text).strip('-').strip())
+    if not match:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    if hour > 24 or minute >= 60:
+        return None
+    return hour * 60 + minute
+
+
+def format_time(minutes):
+    """分を「HH:MM」に変換"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_time_range(text, default_minutes=DEFAULT_SLOT_MINUTES):
+    """
+    時間帯の文字列を（開始, 終了）の分に変換
+
+    「14:00-16:00」は範囲、「14:00」は開始から default_minutes 分の枠とする。
+    「、」や「,」で区切られた複数の時間帯にも対応。
+
+    Returns:
+        tuple: (開始分, 終了分) のタプル（解析できない部分は含まない）
+    """
+    ranges = []
+    for part in _RANGE_SPLIT.split(normalize_time_text(text)):
+        if not part:
+            continue
+        if '-' in part:
+            start_text, _, end_text = part.partition('-')
+            start = parse_time(start_text)
+            end = parse_time(end_text)
+        else:
+            start = parse_time(part)
+            end = start + default_minutes if start is not None else None
+        if start is None or end is None or end <= start:
+            continue
+        ranges.append((start, min(end, MINUTES_PER_DAY)))
+    return tuple(ranges)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_days(text):
+    """
+    曜日の文字列を曜日のタプルに変換（例:「火水木金」→ ('火', '水', '木', '金')）
+
+    「不定期」は平日すべてとみなす。
+    """
+    text = text or ''
+    if any(word in text for word in FLEXIBLE_DAY_WORDS):
+        return FLEXIBLE_DAYS
+    return tuple(day for day in WEEKDAYS if day in text)
+
+
+def contains_time(ranges, minutes):
+    """分がいずれかの区間（開始 <= 分 < 終了）に含まれるか"""
+    return any(start <= minutes < end for start, end in ranges)
@@ -0,0 +1,273 @@
+"""
+アセスメントシートの一括出力
+- 保存済みの面談記録（interview_history）からアセスメントシートをまとめて作成
+- データの整形は親プロセスで行い、xlsxの作成・暗号化はプロセスプールで並列に実行
+  （暗号化はCPU負荷が高いため、スレッドではなくプロセスでコア数に応じて分散する）
+- 1件の失敗で止めずにエラーを記録し、最後に実行結果のマニフェスト（JSON）を出力
+- パスワードは入力フォームと同じく、記録の区のエリアごと（config.AREA_PASSWORDS）に決める
+  （決められない記録は保護なしで出力せずエラーにする）
+"""
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from src.excel.excel_generator_with_password import write_assessment_file
+from src.excel.template_cache import get_template
+
+# テンプレートのファイル名
+TEMPLATE_FILENAME = 'アセスメントシート原本.xlsx'
+
+# ファイル名に使えない文字
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+# ワーカープロセスごとの設定（_init_workerで設定）
+_worker_template_path = None
+
+
+def _init_worker(template_path):
+    """ワーカープロセスの初期化（テンプレートを読み込んでキャッシュしておく）"""
+    global _worker_template_path
+    _worker_template_path = template_path
+    from src.excel.excel_generator_with_password import SHEET_NAME
+    get_template(template_path, SHEET_NAME)
+
+
+def _export_one(job):
+    """
+    1件分のアセスメントシートを作成（ワーカープロセスで実行）
+
+    例外は親プロセスに送らず、結果の辞書に文字列として入れて返す。
+    """
+    history_id, output_path, data, password = job
+    start = time.perf_counter()
+    try:
+        protected = write_assessment_file(_worker_template_path, output_path, data, password)
+        error = None
+        if password and not protected:
+            # 暗号化できなかったファイルは残さない（保護なしの個人情報を出力しない）
+            Path(output_path).unlink(missing_ok=True)
+            protected = False
+            error = "パスワード保護に失敗したため出力しませんでした（msoffcrypto-toolを確認してください）"
+    except Exception as e:
+        protected = False
+        error = f"{type(e).__name__}: {e}"
+    return {
+        'id': history_id,
+        'path': str(output_path),
+        'success': error is None,
+        'protected': protected,
+        'error': error,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def _default_settings():
+    """configからテンプレート・出力先の既定値を取得"""
+    try:
+        import config
+        return config.TEMPLATE_DIR / TEMPLATE_FILENAME, config.OUTPUT_DIR
+    except (ImportError, AttributeError):
+        return Path('templates') / TEMPLATE_FILENAME, Path('output')
+
+
+def _password_settings():
+    """configからエリアごとのパスワード（AREA_PASSWORDS）と共通のパスワード（EXCEL_PASSWORD）を取得"""
+    try:
+        import config
+        return dict(getattr(config, 'AREA_PASSWORDS', None) or {}), getattr(config, 'EXCEL_PASSWORD', None)
+    except ImportError:
+        return {}, None
+
+
+class BatchExporter:
+    """面談記録からアセスメントシートを一括で作成"""
+
+    def __init__(self, db_path=None, template_path=None, output_dir=None, password=None, max_workers=None):
+        """
+        Args:
+            db_path: DBファイルのパス（Noneの場合はconfigの設定）
+            template_path: テンプレートのパス（Noneの場合はconfigのテンプレートフォルダ）
+            output_dir: 出力先フォルダ（Noneの場合はconfigの出力先の下に日時のフォルダを作成）
+            password: すべての記録に使うパスワード（''の場合は保護なし。
+                      Noneの場合は記録の区のエリアごとに config.AREA_PASSWORDS から決める）
+            max_workers: ワーカープロセス数（Noneの場合はCPUコア数。1の場合はこのプロセスで実行）
+        """
+        default_template, default_output = _default_settings()
+        self.db_path = db_path
+        self.template_path = Path(template_path or default_template)
+        if output_dir is None:
+            output_dir = Path(default_output) / f"一括出力_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.output_dir = Path(output_dir)
+        self.password = password
+        self.area_passwords, self.default_password = _password_settings()
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    @property
+    def password_mode(self):
+        """'fixed'（指定のパスワード）/ 'none'（保護なし）/ 'area'（エリアごと）"""
+        if self.password is None:
+            return 'area'
+        return 'fixed' if self.password else 'none'
+
+    def resolve_password(self, district, district_areas):
+        """
+        記録のパスワード（入力フォームでエリアを選んだ場合と同じ config.AREA_PASSWORDS）
+
+        Args:
+            district: 面談記録の区名
+            district_areas: 区名 → エリア名
+
+        Returns:
+            str or None: パスワード（Noneは保護なし）
+
+        Raises:
+            ValueError: パスワードを決められない場合（区が未入力・エリアが不明で、EXCEL_PASSWORDもない）
+        """
+        if self.password is not None:
+            return self.password or None
+        area = district_areas.get(district)
+        if area in self.area_passwords:
+            return self.area_passwords[area]
+        if self.default_password:
+            return self.default_password
+        raise ValueError(
+            f"区（{district or '未入力'}）のエリアのパスワードを決められないため出力しませんでした"
+            "（--password または --no-password を指定してください）"
+        )
+
+    def load_jobs(self, ids=None, since=None, until=None, issues=None, school_level=None):
+        """
+        面談記録を読み込み、出力用のデータに整形
+
+        Returns:
+            tuple: ((面談記録ID, 出力パス, 整形済みデータ, パスワード) のリスト,
+                    パスワードを決められなかった記録の結果のリスト)
+        """
+        from src.database.history import HistoryManager
+        from src.database.staff import StaffManager
+        from src.excel.assessment_writer import AssessmentWriter
+
+        records = HistoryManager(self.db_path).get_interviews_for_export(
+            ids=ids, since=since, until=until, issues=issues, school_level=school_level
+        )
+        district_areas = {}
+        if self.password is None:
+            district_areas = {d['name']: d['area_name'] for d in StaffManager(self.db_path).get_all_districts()}
+        writer = AssessmentWriter(self.template_path)
+
+        jobs = []
+        errors = []
+        for history_id, interview_data, assessment_data in records:
+            output_path = self.output_dir / self._make_filename(history_id, interview_data)
+            try:
+                password = self.resolve_password(interview_data.get('区名'), district_areas)
+            except ValueError as e:
+                errors.append({
+                    'id': history_id, 'path': str(output_path), 'success': False,
+                    'protected': False, 'error': str(e), 'elapsed_ms': None,
+                })
+                continue
+            data = writer._format_data_for_python(interview_data, assessment_data, output_path)
+            jobs.append((history_id, str(output_path), data, password))
+        return jobs, errors
+
+    @staticmethod
+    def _make_filename(history_id, interview_data):
+        """ファイル名を作成（形式：アセスメントシート_イニシャル_面談日_ID.xlsx）"""
+        initials = _UNSAFE_FILENAME_CHARS.sub('', interview_data.get('児童イニシャル') or '') or 'XX'
+        interview_date = interview_data.get('面談実施日')
+        if isinstance(interview_date, datetime):
+            date_str = interview_date.strftime('%Y%m%d')
+        else:
+            date_str = _UNSAFE_FILENAME_CHARS.sub('', str(interview_date or '')) or '日付なし'
+        return f"アセスメントシート_{initials}_{date_str}_{history_id}.xlsx"
+
+    def run(self, ids=None, since=None, until=None, progress=None, issues=None, school_level=None):
+        """
+        一括出力を実行
+
+        Args:
+            ids: 面談記録IDのリスト（Noneの場合はすべて）
+            since: 面談実施日の開始（'YYYY-MM-DD'）
+            until: 面談実施日の終了（'YYYY-MM-DD'）
+            issues: 課題名のリスト（すべてに該当する記録のみ）
+            school_level: '小学生' / '中学生' / '高校生'
+            progress: 1件終わるごとに progress(完了件数, 全件数, 結果) で呼ばれる関数
+
+        Returns:
+            dict: マニフェスト（manifest_pathに出力先のパス）
+        """
+        if not self.template_path.exists():
+            raise FileNotFoundError(f"テンプレートが見つかりません: {self.template_path}")
+
+        started_at = datetime.now()
+        start = time.perf_counter()
+        jobs, errors = self.load_jobs(ids=ids, since=since, until=until, issues=issues, school_level=school_level)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        workers = max(1, min(self.max_workers, len(jobs)))
+        results = []
+        total = len(jobs) + len(errors)
+
+        def record(result):
+            results.append(result)
+            if progress:
+                progress(len(results), total, result)
+
+        for error in errors:
+            record(error)
+
+        if workers == 1:
+            # 1件のみ・1プロセス指定の場合はプロセスを起動しない
+            _init_worker(str(self.template_path))
+            for job in jobs:
+                record(_export_one(job))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(str(self.template_path),),
+            ) as executor:
+                futures = {executor.submit(_export_one, job): job for job in jobs}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # ワーカープロセスの異常終了など
+                        history_id, output_path, _, _ = futures[future]
+                        result = {
+                            'id': history_id, 'path': output_path, 'success': False,
+                            'protected': False, 'error': f"{type(e).__name__}: {e}", 'elapsed_ms': None,
+                        }
+                    record(result)
+
+        results.sort(key=lambda r: r['id'])
+        succeeded = sum(1 for r in results if r['success'])
+        manifest = {
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_sec': round(time.perf_counter() - start, 2),
+            'template': str(self.template_path),
+            'output_dir': str(self.output_dir),
+            'workers': workers,
+            'password_mode': self.password_mode,
+            'protected': sum(1 for r in results if r['protected']),
+            'filters': {
+                'ids': list(ids) if ids is not None else None, 'since': since, 'until': until,
+                'issues': list(issues) if issues else None, 'school_level': school_level,
+            },
+            'total': total,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'files': results,
+        }
+
+        manifest_path = self.output_dir / f"manifest_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        manifest['manifest_path'] = str(manifest_path)
+        return manifest
@@ -4,15 +4,25 @@
 - テンプレートのフォーマットを完全に保持
 - データを埋め込み
 - パスワード保護機能付き
+- テンプレートは1回だけ読み込んでキャッシュし、値を書き込むセルだけを差し替える
+- 暗号化はメモリ上で行い、出力先へは一時ファイルからの置き換えで1回だけ書き込む
 """
 
-from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border
 import copy
+import io
 import os
-import shutil
+import tempfile
 from datetime import datetime
 
+try:
+    from src.excel.template_cache import get_template
+except ImportError:
+    # スクリプトとして直接実行された場合
+    from template_cache import get_template
+
+# テンプレートのシート名
+SHEET_NAME = 'ｱｾｽﾒﾝﾄｼｰﾄ'
+
 
 def set_cell_value_preserve_format(worksheet, cell_ref, value):
     """
@@ -95,6 +105,179 @@ def format_issues_text(issues):
     return '\n'.join(lines)
 
 
+def build_cell_values(data):
+    """
+    面談データからセルに書き込む値を作成
+    
+    Args:
+        data: 面談データの辞書
+        
+    Returns:
+        dict: セル参照 -> 値（値がNoneのセルはテンプレートのまま残すため含めない）
+    """
+    values = {}
+    
+    def put(cell_ref, value):
+        if value is not None:
+            values[cell_ref] = value
+    
+    # === 基本情報 ===
+    put('D3', data.get('supportNumber'))      # 支援番号
+    put('H3', data.get('supporter'))          # 担当支援員
+    put('P3', data.get('interviewDate'))      # 面談実施日
+    
+    put('D4', data.get('guardianName'))       # 保護者氏名
+    put('J4', data.get('childName'))          # 児童氏名
+    put('P4', data.get('gender'))             # 性別
+    
+    put('D5', data.get('schoolName'))         # 学校名
+    put('J5', str(data.get('grade', '')))     # 学年
+    put('O5', data.get('singleParent'))       # ひとり親世帯
+    
+    # === 課題チェックリスト ===
+    if 'issues' in data:
+        put('B11', format_issues_text(data['issues']))
+    
+    # === 希望する進路 ===
+    if 'futurePath' in data:
+        future_path = data['futurePath']
+        checkbox_進学 = '■' if future_path.get('type') == '進学' else '□'
+        checkbox_就職 = '■' if future_path.get('type') == '就職' else '□'
+        
+        future_path_text = (
+            f"確認日　{data.get('confirmDate', '')}\n"
+            f"{checkbox_進学}進学　　{checkbox_就職}就職\n"
+            f"（具体的内容）\n"
+            f"・{future_path.get('detail', '')}"
+        )
+        put('B18', future_path_text)
+    
+    # === 短期目標（Row 29-30）===
+    if data.get('shortTermPlan'):
+        plan = data['shortTermPlan']
+        put('B29', plan.get('issue'))           # 課題
+        put('C29', plan.get('currentStatus'))   # 現状
+        put('G29', plan.get('needsChild'))      # ニーズ本人
+        put('G30', plan.get('needsGuardian'))   # ニーズ保護者
+        put('J29', plan.get('goal'))            # 目標
+        put('N29', plan.get('method'))          # 具体的な方法
+    
+    # === 長期目標（Row 35-36）===
+    if data.get('longTermPlan'):
+        plan = data['longTermPlan']
+        put('B35', plan.get('issue'))           # 課題
+        put('C35', plan.get('currentStatus'))   # 現状
+        put('G35', plan.get('needsChild'))      # ニーズ本人
+        put('G36', plan.get('needsGuardian'))   # ニーズ保護者
+        put('J35', plan.get('goal'))            # 目標
+        put('N35', plan.get('method'))          # 具体的な方法
+    
+    return values
+
+
+def render_assessment_workbook(template_path, data):
+    """
+    アセスメントシートのxlsxをメモリ上で作成
+    
+    テンプレートはキャッシュから取得し、値を書き込むセルのXMLだけを差し替える。
+    テンプレートに存在しないセルがある場合のみopenpyxlで書き込む。
+    
+    Returns:
+        bytes: xlsxファイルの内容
+    """
+    template = get_template(template_path, SHEET_NAME)
+    values = build_cell_values(data)
+    if template.has_cells(values):
+        return template.render(values)
+    
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(io.BytesIO(template.data))
+    ws = wb[SHEET_NAME]
+    for cell_ref, value in values.items():
+        set_cell_value_preserve_format(ws, cell_ref, value)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def write_assessment_file(template_path, output_path, data, password=None):
+    """
+    アセスメントシートを作成してファイルに保存（ログ出力なし。一括出力のワーカーからも使う）
+    
+    Args:
+        template_path: テンプレートファイルのパス
+        output_path: 出力ファイルのパス
+        data: 面談データの辞書
+        password: パスワード（Noneの場合は保護なし）
+        
+    Returns:
+        bool: パスワード保護を適用した場合True
+    """
+    content = render_assessment_workbook(template_path, data)
+    
+    # パスワード保護（メモリ上で暗号化）
+    protected = False
+    if password:
+        encrypted = encrypt_workbook_bytes(content, password)
+        if encrypted is not None:
+            content = encrypted
+            protected = True
+    
+    # 保存は1回だけ（同期クライアントに書きかけのファイルが見えないよう一時ファイルから置き換え）
+    atomic_write_bytes(output_path, content)
+    return protected
+
+
+def atomic_write_bytes(output_path, content):
+    """
+    ファイルを一括で書き込む
+    
+    同じフォルダの一時ファイルに書き込んでからos.replaceで置き換えるため、
+    出力先には完成したファイルだけが現れる（Dropboxが途中の状態を同期しない）。
+    """
+    output_path = str(output_path)
+    directory = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.~', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, output_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def encrypt_workbook_bytes(content, password):
+    """
+    xlsxの内容をメモリ上で暗号化
+    
+    Args:
+        content: xlsxファイルの内容（bytes）
+        password: パスワード
+        
+    Returns:
+        bytes: 暗号化したファイルの内容（msoffcryptoがない場合はNone）
+    """
+    try:
+        import msoffcrypto
+    except ImportError:
+        # msoffcryptoがインストールされていない場合は、パスワード保護なしで保存
+        print('⚠️  msoffcryptoがインストールされていません。パスワード保護なしで保存します。')
+        return None
+    
+    ms_file = msoffcrypto.OfficeFile(io.BytesIO(content))
+    ms_file.load_key(password=password)
+    output = io.BytesIO()
+    ms_file.encrypt(password, output)
+    return output.getvalue()
+
+
 def generate_assessment_sheet(template_path, output_path, data, password=None):
     """
     アセスメントシートを生成
@@ -118,88 +301,17 @@ def generate_assessment_sheet(template_path, output_path, data, password=None):
         if not os.path.exists(template_path):
             raise FileNotFoundError(f'テンプレートが見つかりません: {template_path}')
         
-        print(f'📋 テンプレートを読み込み: {template_path}')
-        
-        # テンプレートを読み込み
-        wb = load_workbook(template_path)
-        
-        # シートを取得
-        ws = wb['ｱｾｽﾒﾝﾄｼｰﾄ']
-        print(f'✓ シート取得: {ws.title}')
-        print(f'  サイズ: {ws.max_row}行 × {ws.max_column}列')
-        print(f'  結合セル数: {len(ws.merged_cells.ranges)}')
-        print()
+        print(f'📋 テンプレート: {template_path}')
         
-        # === 基本情報を書き込み ===
+        # === データを書き込み・保存 ===
         print('📝 データを書き込み中...')
-        
-        set_cell_value_preserve_format(ws, 'D3', data.get('supportNumber'))      # 支援番号
-        set_cell_value_preserve_format(ws, 'H3', data.get('supporter'))          # 担当支援員
-        set_cell_value_preserve_format(ws, 'P3', data.get('interviewDate'))      # 面談実施日
-        
-        set_cell_value_preserve_format(ws, 'D4', data.get('guardianName'))       # 保護者氏名
-        set_cell_value_preserve_format(ws, 'J4', data.get('childName'))          # 児童氏名
-        set_cell_value_preserve_format(ws, 'P4', data.get('gender'))             # 性別
-        
-        set_cell_value_preserve_format(ws, 'D5', data.get('schoolName'))         # 学校名
-        set_cell_value_preserve_format(ws, 'J5', str(data.get('grade', '')))     # 学年
-        set_cell_value_preserve_format(ws, 'O5', data.get('singleParent'))       # ひとり親世帯
-        
-        # === 課題チェックリスト ===
-        if 'issues' in data:
-            issues_text = format_issues_text(data['issues'])
-            set_cell_value_preserve_format(ws, 'B11', issues_text)
-        
-        # === 希望する進路 ===
-        if 'futurePath' in data:
-            future_path = data['futurePath']
-            checkbox_進学 = '■' if future_path.get('type') == '進学' else '□'
-            checkbox_就職 = '■' if future_path.get('type') == '就職' else '□'
-            
-            future_path_text = (
-                f"確認日　{data.get('confirmDate', '')}\n"
-                f"{checkbox_進学}進学　　{checkbox_就職}就職\n"
-                f"（具体的内容）\n"
-                f"・{future_path.get('detail', '')}"
-            )
-            set_cell_value_preserve_format(ws, 'B18', future_path_text)
-        
-        # === 短期目標（Row 29-30）===
-        if 'shortTermPlan' in data:
-            plan = data['shortTermPlan']
-            set_cell_value_preserve_format(ws, 'B29', plan.get('issue'))           # 課題
-            set_cell_value_preserve_format(ws, 'C29', plan.get('currentStatus'))   # 現状
-            set_cell_value_preserve_format(ws, 'G29', plan.get('needsChild'))      # ニーズ本人
-            set_cell_value_preserve_format(ws, 'G30', plan.get('needsGuardian'))   # ニーズ保護者
-            set_cell_value_preserve_format(ws, 'J29', plan.get('goal'))            # 目標
-            set_cell_value_preserve_format(ws, 'N29', plan.get('method'))          # 具体的な方法
-        
-        # === 長期目標（Row 35-36）===
-        if 'longTermPlan' in data:
-            plan = data['longTermPlan']
-            set_cell_value_preserve_format(ws, 'B35', plan.get('issue'))           # 課題
-            set_cell_value_preserve_format(ws, 'C35', plan.get('currentStatus'))   # 現状
-            set_cell_value_preserve_format(ws, 'G35', plan.get('needsChild'))      # ニーズ本人
-            set_cell_value_preserve_format(ws, 'G36', plan.get('needsGuardian'))   # ニーズ保護者
-            set_cell_value_preserve_format(ws, 'J35', plan.get('goal'))            # 目標
-            set_cell_value_preserve_format(ws, 'N35', plan.get('method'))          # 具体的な方法
-        
-        print('✓ データ書き込み完了')
-        print()
-        
-        # 一時ファイルに保存
-        temp_path = output_path + '.tmp'
-        wb.save(temp_path)
-        print(f'✓ 一時ファイルを保存: {temp_path}')
-        
-        # パスワード保護
         if password:
             print(f'🔒 パスワード保護を適用中...')
-            add_password_protection(temp_path, output_path, password)
-            os.remove(temp_path)
+        protected = write_assessment_file(template_path, output_path, data, password)
+        print('✓ データ書き込み完了')
+        if protected:
             print(f'✓ パスワード保護完了')
-        else:
-            shutil.move(temp_path, output_path)
+        elif not password:
             print('⚠️  パスワード保護なし')
         
         print()
@@ -225,22 +337,16 @@ def add_password_protection(input_path, output_path, password):
         input_path: 入力ファイルパス
         output_path: 出力ファイルパス
         password: パスワード
-    """
-    try:
-        import msoffcrypto
-        import io
         
-        # ファイルを暗号化
-        with open(input_path, 'rb') as input_file:
-            ms_file = msoffcrypto.OfficeFile(input_file)
-            ms_file.load_key(password=password)
-            
-            with open(output_path, 'wb') as output_file:
-                ms_file.encrypt(password, output_file)
-    except ImportError:
-        # msoffcryptoがインストールされていない場合は、パスワード保護なしで保存
-        print('⚠️  msoffcryptoがインストールされていません。パスワード保護なしで保存します。')
-        shutil.copy2(input_path, output_path)
+    Returns:
+        bool: 暗号化した場合True（msoffcryptoがない場合はFalse）
+    """
+    with open(input_path, 'rb') as input_file:
+        content = input_file.read()
+    
+    encrypted = encrypt_workbook_bytes(content, password)
+    atomic_write_bytes(output_path, encrypted if encrypted is not None else content)
+    return encrypted is not None
 
 
 # テスト実行
@@ -0,0 +1,91 @@
+"""
+報告データのファイル出力（CSV・xlsx）
+- 行のイテレータを1行ずつ書き出す（xlsxは openpyxl の write_only モード。全行をメモリに持たない）
+- CSVはExcelで文字化けしないようBOM付きUTF-8で出力
+- 書き込み中の失敗で中途半端なファイルが残らないよう、一時ファイルに書いてから置き換える
+"""
+import csv
+import os
+from pathlib import Path
+
+FORMATS = ('csv', 'xlsx')
+
+# xlsxのシート名に使えない文字
+_SHEET_NAME_INVALID = str.maketrans({char: '_' for char in '[]:*?/\\'})
+
+
+def detect_format(path):
+    """拡張子から出力形式を判定（不明な場合はcsv）"""
+    suffix = Path(path).suffix.lower().lstrip('.')
+    return suffix if suffix in FORMATS else 'csv'
+
+
+def write_report(path, headers, rows, format=None, sheet_name='データ'):
+    """
+    見出しと行をファイルに書き出す
+
+    Args:
+        path: 出力先のパス
+        headers: 見出しのリスト
+        rows: 行のタプルの反復可能オブジェクト（ジェネレータ可）
+        format: 'csv' または 'xlsx'（省略時は拡張子で判定）
+        sheet_name: xlsxのシート名
+
+    Returns:
+        int: 書き出した行数（見出しを除く）
+    """
+    path = Path(path)
+    format = format or detect_format(path)
+    if format not in FORMATS:
+        raise ValueError(f"不明な出力形式です: {format}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        if format == 'xlsx':
+            count = _write_xlsx(temp_path, headers, rows, sheet_name)
+        else:
+            count = _write_csv(temp_path, headers, rows)
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+    return count
+
+
+def _write_csv(path, headers, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_xlsx(path, headers, rows, sheet_name):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name.translate(_SHEET_NAME_INVALID)[:31] or 'データ')
+    # 見出しは固定して、スクロールしても見えるようにする
+    sheet.freeze_panes = 'A2'
+
+    header_font = Font(bold=True, color='FFFFFF')
+    header_fill = PatternFill('solid', fgColor='9B59B6')
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    count = 0
+    for row in rows:
+        sheet.append(list(row))
+        count += 1
+    workbook.save(path)
+    return count
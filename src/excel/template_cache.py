@@ -0,0 +1,176 @@
+"""
+アセスメントシートのテンプレートキャッシュ
+- テンプレート（xlsx）を1回だけ読み込み、ZIP内の各ファイルをメモリに保持
+- ワークシートXML内のセル要素の位置を事前に索引化
+- 出力時は値を書き込むセルのXMLだけを差し替え、他のファイルはそのまま使う
+  （openpyxlで開き直さないため、図形などテンプレートの内容もそのまま残る）
+- テンプレートの更新日時・サイズが変わり、内容（SHA-1）も変わった場合は読み込み直す
+"""
+import hashlib
+import io
+import os
+import posixpath
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+
+_CELL_PATTERN = re.compile(r'<c r="([A-Z]+[0-9]+)"([^>]*?)(?:/>|>.*?</c>)', re.DOTALL)
+_STYLE_PATTERN = re.compile(r'\ss="(\d+)"')
+_SHEET_PATTERN = re.compile(r'<sheet\b[^>]*?\bname="([^"]*)"[^>]*?\br:id="([^"]*)"')
+_RELATIONSHIP_PATTERN = re.compile(r'<Relationship\b[^>]*?\bId="([^"]*)"[^>]*?\bTarget="([^"]*)"')
+_RELATIONSHIP_PATTERN_REVERSED = re.compile(r'<Relationship\b[^>]*?\bTarget="([^"]*)"[^>]*?\bId="([^"]*)"')
+
+# XMLに含められない制御文字
+_ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class AssessmentTemplate:
+    """メモリ上に保持したテンプレートと、セル単位の差し替え出力"""
+
+    def __init__(self, template_path, sheet_name):
+        self.template_path = str(template_path)
+        self.sheet_name = sheet_name
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """テンプレートを読み込み、ZIPの各ファイルとセルの位置を保持"""
+        stat = os.stat(self.template_path)
+        with open(self.template_path, 'rb') as f:
+            data = f.read()
+        self._parse(data)
+        self._stat_key = (stat.st_mtime_ns, stat.st_size)
+
+    def _parse(self, data):
+        self.data = data
+        self.digest = hashlib.sha1(data).hexdigest()
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.entries = [(info, archive.read(info.filename)) for info in archive.infolist()]
+        contents = {info.filename: content for info, content in self.entries}
+
+        self.sheet_path = self._find_sheet_path(contents)
+        self.sheet_xml = contents[self.sheet_path].decode('utf-8')
+
+        # セル参照 -> (開始位置, 終了位置, スタイル番号)
+        self.cells = {}
+        for match in _CELL_PATTERN.finditer(self.sheet_xml):
+            style = _STYLE_PATTERN.search(match.group(2))
+            self.cells[match.group(1)] = (match.start(), match.end(), style.group(1) if style else None)
+
+    def _find_sheet_path(self, contents):
+        """workbook.xmlとリレーションからシート名に対応するXMLのパスを求める"""
+        workbook_xml = contents['xl/workbook.xml'].decode('utf-8')
+        rels_xml = contents['xl/_rels/workbook.xml.rels'].decode('utf-8')
+
+        targets = dict(_RELATIONSHIP_PATTERN.findall(rels_xml))
+        targets.update({rel_id: target for target, rel_id in _RELATIONSHIP_PATTERN_REVERSED.findall(rels_xml)})
+
+        for name, rel_id in _SHEET_PATTERN.findall(workbook_xml):
+            if name == self.sheet_name and rel_id in targets:
+                target = targets[rel_id]
+                if target.startswith('/'):
+                    return target.lstrip('/')
+                return posixpath.normpath(posixpath.join('xl', target))
+        raise KeyError(f'シートが見つかりません: {self.sheet_name}')
+
+    def refresh(self):
+        """
+        テンプレートが更新されていれば読み込み直す
+
+        更新日時・サイズが変わっていても内容が同じなら解析し直さない。
+
+        Returns:
+            bool: 読み込み直した場合True
+        """
+        stat = os.stat(self.template_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if stat_key == self._stat_key:
+            return False
+
+        with self._lock:
+            with open(self.template_path, 'rb') as f:
+                data = f.read()
+            changed = hashlib.sha1(data).hexdigest() != self.digest
+            if changed:
+                self._parse(data)
+            self._stat_key = stat_key
+        return changed
+
+    def has_cells(self, cell_refs):
+        """すべてのセルがテンプレートのXMLに存在するか（差し替え出力できるか）"""
+        return all(ref in self.cells for ref in cell_refs)
+
+    @staticmethod
+    def _cell_xml(ref, style, value):
+        """セル1個分のXML（書式はテンプレートのスタイル番号をそのまま使う）"""
+        style_attr = f' s="{style}"' if style is not None else ''
+        if value == '':
+            return f'<c r="{ref}"{style_attr}/>'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f'<c r="{ref}"{style_attr}><v>{value}</v></c>'
+        text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+        return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def render(self, values):
+        """
+        セルの値を差し替えたxlsxを作成
+
+        Args:
+            values: セル参照 -> 値 の辞書（テンプレートに存在するセルのみ）
+
+        Returns:
+            bytes: xlsxファイルの内容
+        """
+        with self._lock:
+            sheet_xml = self.sheet_xml
+            cells = self.cells
+            entries = self.entries
+            sheet_path = self.sheet_path
+
+        # 値を書き込むセルの要素だけを差し替える
+        parts = []
+        position = 0
+        for ref in sorted(values, key=lambda r: cells[r][0]):
+            start, end, style = cells[ref]
+            parts.append(sheet_xml[position:start])
+            parts.append(self._cell_xml(ref, style, values[ref]))
+            position = end
+        parts.append(sheet_xml[position:])
+        new_sheet = ''.join(parts).encode('utf-8')
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for info, content in entries:
+                # テンプレートのZipInfoは共有しているため複製して使う
+                entry = zipfile.ZipInfo(info.filename, info.date_time)
+                entry.external_attr = info.external_attr
+                entry.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(entry, new_sheet if info.filename == sheet_path else content)
+        return buffer.getvalue()
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_template(template_path, sheet_name):
+    """
+    テンプレートのキャッシュを取得（初回のみ読み込み、更新されていれば読み込み直す）
+    """
+    key = (os.path.abspath(str(template_path)), sheet_name)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is None:
+            template = AssessmentTemplate(template_path, sheet_name)
+            _templates[key] = template
+            return template
+    template.refresh()
+    return template
+
+
+def clear_template_cache():
+    """テンプレートのキャッシュを破棄"""
+    with _templates_lock:
+        _templates.clear()
@@ -0,0 +1,88 @@
+"""
+一括割り当て案のダイアログ
+- StaffManager.propose_assignment_plan() の結果を一覧で表示する
+- 選択した行（初期状態はすべて）を1つのトランザクションでまとめて確定する
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+class AssignmentPlanDialog(tk.Toplevel):
+    """割り当て案の確認と確定"""
+
+    def __init__(self, parent, plan, on_accept):
+        """
+        Args:
+            parent: 親ウィンドウ
+            plan: 割り当て案の辞書のリスト
+            on_accept: 確定する案のリストを受け取る関数（DBへの書き込みは呼び出し側で行う）
+        """
+        super().__init__(parent)
+        self.title("一括割り当て案")
+        self.geometry("900x500")
+        self.transient(parent)
+        self.plan = plan
+        self.on_accept = on_accept
+        self.create_widgets()
+
+    def create_widgets(self):
+        tk.Label(
+            self,
+            text=f"{len(self.plan)}件の割り当て案（確定しない行は選択を外してください。Ctrl/Shift+クリックで複数選択）",
+            font=("游ゴシック", 10)
+        ).pack(fill="x", padx=10, pady=(10, 5))
+
+        tree_frame = tk.Frame(self)
+        tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        columns = ('case_number', 'district', 'preferred_day', 'preferred_time', 'staff_name', 'reasons')
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', selectmode='extended')
+        headings = {
+            'case_number': ('ケース番号', 90),
+            'district': ('区', 90),
+            'preferred_day': ('希望曜日', 70),
+            'preferred_time': ('希望時間', 100),
+            'staff_name': ('支援員', 110),
+            'reasons': ('理由', 380),
+        }
+        for column, (text, width) in headings.items():
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        for index, item in enumerate(self.plan):
+            self.tree.insert('', 'end', iid=str(index), values=tuple(item.get(column) or '' for column in columns))
+        self.tree.selection_set(self.tree.get_children())
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(fill="x", pady=10)
+        tk.Button(
+            button_frame,
+            text="選択した割り当てを確定",
+            font=("游ゴシック", 10, "bold"),
+            bg="#27ae60",
+            fg="white",
+            command=self.accept,
+            padx=20,
+            pady=5
+        ).pack(side="left", padx=(10, 5))
+        tk.Button(
+            button_frame,
+            text="閉じる",
+            font=("游ゴシック", 10),
+            command=self.destroy,
+            padx=20,
+            pady=5
+        ).pack(side="left", padx=5)
+
+    def accept(self):
+        selected = [self.plan[int(iid)] for iid in self.tree.selection()]
+        if not selected:
+            messagebox.showwarning("警告", "確定する割り当てを選択してください", parent=self)
+            return
+        if not messagebox.askyesno("確認", f"{len(selected)}件の割り当てを確定しますか？", parent=self):
+            return
+        self.on_accept(selected)
+        self.destroy()
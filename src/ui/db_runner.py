@@ -0,0 +1,160 @@
+"""
+DB処理をワーカースレッドで実行し、結果をTkのスレッドで受け取る
+- ワーカースレッドからはTkを操作せず、終わった処理をキューに入れるだけ
+- Tkのスレッドでafter()によりキューを確認してコールバックを呼ぶ（処理中の時だけ確認する）
+- 処理中はマウスカーソルを砂時計にし、on_busyで画面に表示できる
+- 同じkeyで投入すると前の処理はキャンセル（検索の連打などで古い結果を表示しない）
+- ウィンドウを閉じると読み込みをキャンセル（書き込みは最後まで実行する）
+"""
+import queue
+import traceback
+
+from src.database.executor import get_executor
+
+# キューを確認する間隔（ミリ秒）
+POLL_MS = 30
+
+
+class DbRunner:
+    """ウィンドウごとのDB処理の窓口"""
+
+    def __init__(self, widget, on_busy=None):
+        """
+        Args:
+            widget: コールバックを呼ぶウィンドウ（閉じると処理をキャンセル）
+            on_busy: 処理中かどうかが変わった時に on_busy(bool) で呼ばれる関数
+        """
+        self.widget = widget
+        self.on_busy = on_busy
+        self._executor = get_executor()
+        self._done = queue.SimpleQueue()
+        # 処理 → (key, on_done, on_error)
+        self._pending = {}
+        # key → 処理
+        self._keys = {}
+        self._busy = False
+        self._polling = False
+        self._closed = False
+        widget.bind('<Destroy>', self._on_destroy, add='+')
+
+    @property
+    def busy(self):
+        return self._busy
+
+    def read(self, fn, on_done=None, on_error=None, key=None):
+        """
+        読み込み処理を実行
+
+        Args:
+            fn: ワーカースレッドで実行する引数なしの関数
+            on_done: 成功時に on_done(戻り値) でTkのスレッドから呼ばれる
+            on_error: 失敗時に on_error(例外) で呼ばれる（省略時は表示のみ）
+            key: 同じkeyの処理が終わっていなければキャンセルする
+
+        Returns:
+            DbTask
+        """
+        return self._submit(self._executor.submit_read, fn, on_done, on_error, key)
+
+    def write(self, fn, on_done=None, on_error=None, key=None):
+        """書き込み処理を実行（書き込みスレッドで投入順に実行）"""
+        return self._submit(self._executor.submit_write, fn, on_done, on_error, key)
+
+    def cancel(self, key=None):
+        """
+        処理をキャンセル（keyを省略した場合はすべて）
+
+        キャンセルできた処理のコールバックは呼ばれない。
+        実行中の書き込みはキャンセルできず、終わればコールバックが呼ばれる。
+        """
+        self._cancel_tasks(key)
+        self._set_busy(bool(self._pending))
+
+    def _cancel_tasks(self, key):
+        if key is None:
+            tasks = list(self._pending)
+        else:
+            tasks = [self._keys[key]] if key in self._keys else []
+        for task in tasks:
+            if task.cancel():
+                self._forget(task)
+
+    def _submit(self, submit, fn, on_done, on_error, key):
+        if self._closed:
+            return None
+        if key is not None:
+            self._cancel_tasks(key)
+        task = submit(fn, description=key or '')
+        self._pending[task] = (key, on_done, on_error)
+        if key is not None:
+            self._keys[key] = task
+        task.future.add_done_callback(lambda future, task=task: self._done.put(task))
+        self._set_busy(True)
+        self._schedule_poll()
+        return task
+
+    def _forget(self, task):
+        key, _, _ = self._pending.pop(task, (None, None, None))
+        if key is not None and self._keys.get(key) is task:
+            del self._keys[key]
+
+    def _schedule_poll(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.widget.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        """終わった処理のコールバックを呼ぶ（Tkのスレッド）"""
+        self._polling = False
+        if self._closed:
+            return
+        while True:
+            try:
+                task = self._done.get_nowait()
+            except queue.Empty:
+                break
+            entry = self._pending.get(task)
+            if entry is None:
+                # キャンセル済み
+                continue
+            self._forget(task)
+            if task.cancelled or task.future.cancelled():
+                continue
+            _, on_done, on_error = entry
+            error = task.future.exception()
+            try:
+                if error is None:
+                    if on_done:
+                        on_done(task.future.result())
+                elif on_error:
+                    on_error(error)
+                else:
+                    print(f"⚠️ DB処理エラー（{task.description or '処理'}）: {error}")
+            except Exception:
+                traceback.print_exc()
+            if self._closed:
+                return
+        self._set_busy(bool(self._pending))
+        if self._pending:
+            self._schedule_poll()
+
+    def _set_busy(self, busy):
+        if busy == self._busy or self._closed:
+            return
+        self._busy = busy
+        try:
+            self.widget.winfo_toplevel().config(cursor='watch' if busy else '')
+        except Exception:
+            pass
+        if self.on_busy:
+            self.on_busy(busy)
+
+    def _on_destroy(self, event):
+        if event.widget is not self.widget:
+            return
+        self._closed = True
+        for task in list(self._pending):
+            if not task.write:
+                task.cancel()
+        self._pending.clear()
+        self._keys.clear()
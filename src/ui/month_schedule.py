@@ -0,0 +1,236 @@
+"""
+月間スケジュール（全支援員）
+- 行が支援員、列が日付。ケースの頻度（隔週・月１回…）を日付に展開した予定のビットマップで描画する
+- 全支援員・全日付分のビットマップを1回のクエリで読み込む（支援員ごとに問い合わせない）
+- 期間が同じなら項目を作り直さず、変わったセルだけ itemconfig で色・文字を変える
+- セルにマウスを乗せると、その日の予定と勤務時間内の空き時間を表示する
+"""
+import tkinter as tk
+from tkinter import ttk
+from datetime import date, timedelta
+
+from src.database import occupancy
+from src.database.timeslots import WEEKDAYS, format_time
+from src.ui.db_runner import DbRunner
+
+# レイアウト
+NAME_WIDTH = 110
+HEADER_HEIGHT = 36
+DAY_WIDTH = 38
+ROW_HEIGHT = 24
+
+# 表示する週数の選択肢
+WEEK_CHOICES = [1, 2, 4, 8]
+
+FONT_FAMILY = "游ゴシック"
+
+# 勤務時間に対する予定の割合ごとの色（0%, ～25%, ～50%, ～75%, それ以上）
+LOAD_COLORS = ["white", "#f3e5f5", "#e1bee7", "#ce93d8", "#ab47bc"]
+OFF_DAY_COLOR = "#e8e8e8"
+WEEKEND_HEADER_COLOR = "#7f8c8d"
+HEADER_COLOR = "#9b59b6"
+
+# 空き時間として表示する最短の長さ（分）
+MIN_FREE_MINUTES = 30
+
+
+def load_color(busy, available):
+    """勤務時間に対する予定の割合の色"""
+    if not busy:
+        return LOAD_COLORS[0]
+    ratio = busy / available if available else 1
+    return LOAD_COLORS[min(len(LOAD_COLORS) - 1, 1 + int(ratio * 4))]
+
+
+def format_ranges(ranges):
+    return '、'.join(f"{format_time(start)}-{format_time(end)}" for start, end in ranges) or 'なし'
+
+
+class MonthScheduleWindow(tk.Toplevel):
+    """全支援員の月間スケジュール"""
+
+    def __init__(self, parent, staff_manager):
+        super().__init__(parent)
+        self.title("月間スケジュール（全支援員）")
+        self.geometry("1000x600")
+        self.staff_manager = staff_manager
+        self.db_runner = DbRunner(self, on_busy=self.on_db_busy)
+
+        self.start = occupancy.week_start(date.today())
+        weeks = min(4, occupancy.horizon_weeks())
+        self.weeks_var = tk.StringVar(value=str(weeks))
+        self.period_var = tk.StringVar()
+        self.status_var = tk.StringVar(value="セルにマウスを乗せると予定と空き時間を表示します")
+
+        # (支援員IDのタプル, 日付のタプル) ― 同じなら項目を作り直さない
+        self._layout = None
+        self._staff = []
+        self._days = []
+        # (行, 列) → (枠の項目ID, 文字の項目ID, (色, 文字))
+        self._cells = {}
+        # 支援員ID → {日付: ビット}
+        self._occupancy = {}
+        # 支援員ID → {曜日: 勤務時間のビット}
+        self._work = {}
+
+        self.create_widgets()
+        self.refresh()
+
+    def create_widgets(self):
+        control_frame = tk.Frame(self)
+        control_frame.pack(fill="x", padx=10, pady=5)
+
+        tk.Button(control_frame, text="◀ 前へ", command=lambda: self.move(-1),
+                  font=(FONT_FAMILY, 10)).pack(side="left", padx=2)
+        tk.Label(control_frame, textvariable=self.period_var, font=(FONT_FAMILY, 11, "bold"),
+                 fg=HEADER_COLOR, width=28).pack(side="left", padx=5)
+        tk.Button(control_frame, text="次へ ▶", command=lambda: self.move(1),
+                  font=(FONT_FAMILY, 10)).pack(side="left", padx=2)
+
+        tk.Label(control_frame, text="表示週数:", font=(FONT_FAMILY, 10)).pack(side="left", padx=(20, 5))
+        choices = sorted(set(WEEK_CHOICES) | {occupancy.horizon_weeks()})
+        weeks_combo = ttk.Combobox(control_frame, textvariable=self.weeks_var, values=[str(weeks) for weeks in choices],
+                                   state="readonly", width=5)
+        weeks_combo.pack(side="left")
+        weeks_combo.bind('<<ComboboxSelected>>', lambda event: self.refresh())
+
+        tk.Button(control_frame, text="🔄 更新", command=self.refresh, font=(FONT_FAMILY, 10),
+                  bg="#3498db", fg="white", padx=10).pack(side="left", padx=10)
+
+        tk.Label(self, textvariable=self.status_var, font=(FONT_FAMILY, 9), anchor="w").pack(
+            side="bottom", fill="x", padx=10, pady=(0, 5))
+
+        canvas_frame = tk.Frame(self)
+        canvas_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.canvas = tk.Canvas(canvas_frame, bg="white", highlightthickness=1)
+        y_scrollbar = ttk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
+        x_scrollbar = ttk.Scrollbar(canvas_frame, orient="horizontal", command=self.canvas.xview)
+        self.canvas.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
+        y_scrollbar.pack(side="right", fill="y")
+        x_scrollbar.pack(side="bottom", fill="x")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.bind('<Motion>', self.on_motion)
+
+    def on_db_busy(self, busy):
+        if busy:
+            self.status_var.set("⏳ 読み込み中...")
+
+    @property
+    def weeks(self):
+        try:
+            return max(1, int(self.weeks_var.get()))
+        except ValueError:
+            return 1
+
+    def move(self, direction):
+        """表示週数ぶん前後に移動"""
+        self.start += timedelta(weeks=self.weeks * direction)
+        self.refresh()
+
+    def refresh(self):
+        """ビットマップをワーカースレッドで読み込んで表示（変更のあった支援員の分は作り直す）"""
+        start = self.start
+        end = start + timedelta(weeks=self.weeks)
+        last = end - timedelta(days=1)
+        self.period_var.set(f"{start.year}/{start.month}/{start.day} ～ {last.month}/{last.day}")
+
+        def load():
+            staff_list = self.staff_manager.get_all_staff()
+            return start, end, staff_list, self.staff_manager.get_occupancy(start, end)
+
+        # ビットマップの作り直しは書き込みなので書き込みスレッドで実行する
+        self.db_runner.write(
+            load,
+            on_done=self.display,
+            on_error=lambda e: self.status_var.set(f"❌ 月間スケジュールの取得に失敗しました: {e}"),
+            key='month_schedule'
+        )
+
+    def display(self, result):
+        start, end, staff_list, bitmaps = result
+        if start != self.start:
+            # 読み込み中に期間が変わった
+            return
+        days = occupancy.date_range(start, end)
+        self._staff = [(staff['id'], staff.get('name') or '') for staff in staff_list]
+        self._occupancy = bitmaps
+        self._work = {
+            staff['id']: occupancy.work_masks(staff.get('work_days') or '', staff.get('work_hours') or '')
+            for staff in staff_list
+        }
+
+        layout = (tuple(staff_id for staff_id, _ in self._staff), tuple(days))
+        if layout != self._layout:
+            self._create_layout(days)
+            self._layout = layout
+        self._days = days
+
+        for row, (staff_id, _) in enumerate(self._staff):
+            staff_bits = bitmaps.get(staff_id, {})
+            work = self._work[staff_id]
+            for col, day in enumerate(days):
+                available = work.get(WEEKDAYS[day.weekday()])
+                bits = staff_bits.get(day, 0)
+                if available is None:
+                    state = (OFF_DAY_COLOR, '')
+                else:
+                    busy = occupancy.busy_minutes(bits)
+                    hours = f"{busy / 60:g}h" if busy else ''
+                    state = (load_color(busy, occupancy.busy_minutes(available)), hours)
+                rect, text, previous = self._cells[(row, col)]
+                if state == previous:
+                    continue
+                if state[0] != previous[0]:
+                    self.canvas.itemconfigure(rect, fill=state[0])
+                if state[1] != previous[1]:
+                    self.canvas.itemconfigure(text, text=state[1])
+                self._cells[(row, col)] = (rect, text, state)
+        self.status_var.set(f"支援員 {len(self._staff)}人・{len(days)}日分を表示しました")
+
+    def _create_layout(self, days):
+        """見出し・支援員名・セルを作成（支援員・期間が変わった時だけ）"""
+        canvas = self.canvas
+        canvas.delete("all")
+        self._cells = {}
+
+        for col, day in enumerate(days):
+            x = NAME_WIDTH + col * DAY_WIDTH
+            weekday = WEEKDAYS[day.weekday()]
+            fill = WEEKEND_HEADER_COLOR if day.weekday() >= 5 else HEADER_COLOR
+            canvas.create_rectangle(x, 0, x + DAY_WIDTH, HEADER_HEIGHT, fill=fill, outline="black")
+            canvas.create_text(x + DAY_WIDTH // 2, HEADER_HEIGHT // 2, text=f"{day.month}/{day.day}\n{weekday}",
+                               font=(FONT_FAMILY, 8, "bold"), fill="white", justify="center")
+
+        for row, (_, name) in enumerate(self._staff):
+            y = HEADER_HEIGHT + row * ROW_HEIGHT
+            canvas.create_rectangle(0, y, NAME_WIDTH, y + ROW_HEIGHT, fill="#ecf0f1", outline="#bbb")
+            canvas.create_text(6, y + ROW_HEIGHT // 2, text=name, anchor="w", font=(FONT_FAMILY, 9))
+            for col in range(len(days)):
+                x = NAME_WIDTH + col * DAY_WIDTH
+                rect = canvas.create_rectangle(x, y, x + DAY_WIDTH, y + ROW_HEIGHT, fill="white", outline="#ddd")
+                text = canvas.create_text(x + DAY_WIDTH // 2, y + ROW_HEIGHT // 2, text='', font=(FONT_FAMILY, 8))
+                self._cells[(row, col)] = (rect, text, ("white", ''))
+
+        width = NAME_WIDTH + len(days) * DAY_WIDTH
+        height = HEADER_HEIGHT + len(self._staff) * ROW_HEIGHT
+        canvas.configure(scrollregion=(0, 0, width, height))
+
+    def on_motion(self, event):
+        """マウスの下のセルの予定と空き時間を表示"""
+        x = self.canvas.canvasx(event.x)
+        y = self.canvas.canvasy(event.y)
+        col = int((x - NAME_WIDTH) // DAY_WIDTH)
+        row = int((y - HEADER_HEIGHT) // ROW_HEIGHT)
+        if x < NAME_WIDTH or y < HEADER_HEIGHT or not (0 <= row < len(self._staff) and 0 <= col < len(self._days)):
+            return
+        staff_id, name = self._staff[row]
+        day = self._days[col]
+        weekday = WEEKDAYS[day.weekday()]
+        bits = self._occupancy.get(staff_id, {}).get(day, 0)
+        available = self._work.get(staff_id, {}).get(weekday)
+        busy_text = format_ranges(occupancy.mask_ranges(bits))
+        if available is None:
+            free_text = '勤務日ではありません'
+        else:
+            free_text = format_ranges(occupancy.free_ranges(bits, available, MIN_FREE_MINUTES))
+        self.status_var.set(f"{name}  {day.month}/{day.day}（{weekday}）  予定: {busy_text}  ／  空き: {free_text}")
@@ -0,0 +1,280 @@
+"""
+週間スケジュール表のキャンバス
+- 曜日・時間軸・セルの枠は最初に1回だけ作成し、勤務可能な時間帯の色はセルのitemconfigだけで変える
+- スケジュールのカードはスケジュールIDごとに保持し、更新時は変わった所だけを coords / itemconfig で直す
+  （追加されたものだけ作成し、なくなったものだけ削除する）
+- エリアの絞り込みはカードに付けたエリアのタグの表示・非表示を切り替えるだけ（再描画しない）
+"""
+import tkinter as tk
+
+from src.database.timeslots import parse_time, parse_time_range, format_time, contains_time
+
+# レイアウト
+CELL_WIDTH = 120
+CELL_HEIGHT = 30  # 30分単位
+TIME_AXIS_WIDTH = 80
+HEADER_HEIGHT = 40
+DAYS = ["月", "火", "水", "木", "金"]
+# 10:00～19:00の30分単位のタイムスロット（各スロットの開始時間。0時からの分）
+FIRST_SLOT_MINUTES = 10 * 60
+SLOT_MINUTES = [minutes for minutes in range(10 * 60, 19 * 60 + 1, 30)]
+
+# 絞り込みをしない時のエリア名
+ALL_AREAS = "全て"
+
+FONT_FAMILY = "游ゴシック"
+
+
+def frequency_color(frequency):
+    """頻度に応じたカードの色"""
+    if not frequency:
+        return "#9e9e9e"  # デフォルト（グレー）
+
+    frequency_str = str(frequency).strip()
+
+    # 毎週：黄色
+    if "毎週" in frequency_str:
+        return "#ffeb3b"
+    # 隔週：オレンジ
+    if "隔週" in frequency_str:
+        return "#ff9800"
+    # 月１回：緑
+    if "月１回" in frequency_str or "月1回" in frequency_str:
+        return "#4caf50"
+    # オンライン：紫
+    if "オンライン" in frequency_str:
+        return "#8e24aa"
+    # 不定期・休止中：グレー
+    if "不定期" in frequency_str or "休止中" in frequency_str:
+        return "#9e9e9e"
+
+    # その他（旧形式の互換性のため）
+    if "週" in frequency_str and ("1" in frequency_str or "２" in frequency_str or "2" in frequency_str):
+        return "#ffeb3b"  # 黄色（毎週として扱う）
+    if "隔" in frequency_str:
+        return "#ff9800"  # オレンジ（隔週として扱う）
+    if "月" in frequency_str:
+        return "#4caf50"  # 緑（月１回として扱う）
+
+    return "#9e9e9e"
+
+
+def area_tag(area_id):
+    """カードに付けるエリアのタグ（区が未設定のケースは area_none）"""
+    return f"area_{area_id}" if area_id is not None else "area_none"
+
+
+def card_layout(schedule):
+    """
+    カードの位置・色・文字
+
+    Returns:
+        tuple: (coords, 色, 文字, フォント, エリアのタグ)。表示できない場合はNone
+
+    Raises:
+        ValueError: 時間を解析できない場合
+    """
+    day = schedule.get('day_of_week', '')
+    if day not in DAYS:
+        return None
+    day_idx = DAYS.index(day)
+    start_time = schedule.get('start_time', '')
+    end_time = schedule.get('end_time', '')
+
+    # 保存時に分へ変換済みの列を使う（未変換の古いデータのみ文字列を解析）
+    start_minutes = schedule.get('start_min')
+    end_minutes = schedule.get('end_min')
+    if start_minutes is None:
+        start_minutes = parse_time(start_time)
+    if end_minutes is None:
+        end_minutes = parse_time(end_time)
+    if start_minutes is None:
+        raise ValueError(f"開始時間を解析できません: {start_time}")
+    if end_minutes is None:
+        end_minutes = start_minutes
+
+    # 10時を基準にしたスロットインデックス（30分単位）
+    start_slot = (start_minutes - FIRST_SLOT_MINUTES) // 30
+    end_slot = (end_minutes - FIRST_SLOT_MINUTES) // 30
+    # 最低1時間（2スロット分）の高さを確保
+    if end_slot <= start_slot:
+        end_slot = start_slot + 2
+
+    x = TIME_AXIS_WIDTH + day_idx * CELL_WIDTH + 2
+    y = HEADER_HEIGHT + start_slot * CELL_HEIGHT + 2
+    height = (end_slot - start_slot) * CELL_HEIGHT - 4
+    coords = (x, y, x + CELL_WIDTH - 4, y + height)
+
+    # 1行目: 区名と下の名前 / 2行目: 時間 / 3行目: 場所
+    text_lines = []
+    first_line = ' '.join(part for part in (schedule.get('district_name') or '',
+                                            schedule.get('child_first_name') or '') if part)
+    if first_line:
+        text_lines.append(first_line)
+    text_lines.append(f"{format_time(start_minutes)}-{format_time(end_minutes)}")
+    location = schedule.get('location') or ''
+    if location:
+        text_lines.append(location)
+    text = '\n'.join(text_lines)
+
+    # セルの高さと行数に応じてフォントサイズを決定（テキストが枠内に収まるように）
+    num_lines = len(text_lines)
+    if num_lines <= 2:
+        font_size = max(9, min(12, int(height * 0.25)))
+    elif num_lines == 3:
+        font_size = max(8, min(11, int(height * 0.2)))
+    else:
+        font_size = max(8, min(10, int(height * 0.18)))
+
+    color = frequency_color(schedule.get('frequency'))
+    return coords, color, text, (FONT_FAMILY, font_size, "bold"), area_tag(schedule.get('area_id'))
+
+
+class ScheduleCanvas(tk.Canvas):
+    """週間スケジュール表（キャンバスの項目を作り直さずに更新する）"""
+
+    def __init__(self, master, **kw):
+        kw.setdefault('bg', "white")
+        kw.setdefault('highlightthickness', 1)
+        super().__init__(master, **kw)
+        # (曜日, スロット) → (セルの項目ID, 勤務可能か)
+        self._cells = {}
+        # スケジュールID → (枠の項目ID, 文字の項目ID, card_layoutの結果)
+        self._cards = {}
+        # エリア名 → エリアのタグ（スケジュールの読み込み時に覚える）
+        self._area_tags = {}
+        self._area = ALL_AREAS
+        self._draw_grid()
+
+    def _draw_grid(self):
+        """曜日・時間軸・セルを作成（1回だけ）"""
+        for i, day in enumerate(DAYS):
+            x = TIME_AXIS_WIDTH + i * CELL_WIDTH
+            self.create_rectangle(x, 0, x + CELL_WIDTH, HEADER_HEIGHT, fill="#9b59b6", outline="black")
+            self.create_text(x + CELL_WIDTH // 2, HEADER_HEIGHT // 2, text=day,
+                             font=(FONT_FAMILY, 12, "bold"), fill="white")
+
+        for j, minutes in enumerate(SLOT_MINUTES):
+            y = HEADER_HEIGHT + j * CELL_HEIGHT
+            self.create_rectangle(0, y, TIME_AXIS_WIDTH, y + CELL_HEIGHT, fill="#ecf0f1", outline="black")
+            self.create_text(TIME_AXIS_WIDTH // 2, y + CELL_HEIGHT // 2, text=format_time(minutes),
+                             font=(FONT_FAMILY, 9))
+
+        for i in range(len(DAYS)):
+            for j in range(len(SLOT_MINUTES)):
+                x = TIME_AXIS_WIDTH + i * CELL_WIDTH
+                y = HEADER_HEIGHT + j * CELL_HEIGHT
+                cell = self.create_rectangle(x, y, x + CELL_WIDTH, y + CELL_HEIGHT,
+                                             fill="white", outline="#ddd", tags=("grid_cell",))
+                self._cells[(i, j)] = (cell, True)
+
+    def set_availability(self, work_days='', work_hours=''):
+        """
+        勤務不可能な時間帯をグレーで表示（変わったセルだけ色を変える）
+
+        Args:
+            work_days: 勤務可能な曜日（例: "月火水"。空の場合は全曜日）
+            work_hours: 勤務可能な時間帯（例: "10:00-17:00"。空・解析できない場合は全時間）
+        """
+        available_days = {day for day in DAYS if day in work_days} if work_days else set()
+        # 文字列の解析は1回だけ行い、セルごとには整数で比較する
+        work_ranges = parse_time_range(work_hours) if work_hours else ()
+
+        for (i, j), (cell, was_available) in self._cells.items():
+            is_day_available = DAYS[i] in available_days if available_days else True
+            is_time_available = contains_time(work_ranges, SLOT_MINUTES[j]) if work_ranges else True
+            is_available = is_day_available and is_time_available
+            if is_available == was_available:
+                continue
+            self.itemconfigure(
+                cell,
+                fill="white" if is_available else "#e8e8e8",
+                outline="#ddd" if is_available else "#ccc",
+            )
+            self._cells[(i, j)] = (cell, is_available)
+
+    def set_schedules(self, schedules):
+        """
+        スケジュールを表示（前回との差分だけカードを作成・移動・変更・削除）
+
+        Args:
+            schedules: StaffManager.get_weekly_schedule() の結果
+        """
+        seen = set()
+        for schedule in schedules:
+            schedule_id = schedule.get('id')
+            if schedule.get('area_name') and schedule.get('area_id') is not None:
+                self._area_tags[schedule['area_name']] = area_tag(schedule['area_id'])
+            try:
+                layout = card_layout(schedule)
+            except ValueError as e:
+                print(f"時間解析エラー: {e}")
+                layout = None
+            if layout is None:
+                continue
+            seen.add(schedule_id)
+            card = self._cards.get(schedule_id)
+            if card is None:
+                self._create_card(schedule_id, layout)
+            else:
+                self._update_card(schedule_id, card, layout)
+
+        for schedule_id in [schedule_id for schedule_id in self._cards if schedule_id not in seen]:
+            rect, text, _ = self._cards.pop(schedule_id)
+            self.delete(rect, text)
+
+    def _card_state(self, tag):
+        if self._area == ALL_AREAS:
+            return 'normal'
+        return 'normal' if tag == self._area_tags.get(self._area) else 'hidden'
+
+    def _create_card(self, schedule_id, layout):
+        coords, color, text, font, tag = layout
+        tags = ("schedule_item", f"schedule_{schedule_id}", tag)
+        state = self._card_state(tag)
+        rect = self.create_rectangle(*coords, fill=color, outline="#333", width=2, tags=tags, state=state)
+        x1, y1, x2, y2 = coords
+        label = self.create_text(
+            (x1 + x2) // 2, (y1 + y2) // 2,
+            text=text,
+            font=font,
+            fill="#000",
+            width=CELL_WIDTH - 8,  # テキストの幅を制限
+            justify="center",
+            anchor="center",
+            tags=tags,
+            state=state,
+        )
+        self._cards[schedule_id] = (rect, label, layout)
+
+    def _update_card(self, schedule_id, card, layout):
+        rect, label, previous = card
+        if layout == previous:
+            return
+        coords, color, text, font, tag = layout
+        old_coords, old_color, old_text, old_font, old_tag = previous
+        if coords != old_coords:
+            x1, y1, x2, y2 = coords
+            self.coords(rect, *coords)
+            self.coords(label, (x1 + x2) // 2, (y1 + y2) // 2)
+        if color != old_color:
+            self.itemconfigure(rect, fill=color)
+        if text != old_text or font != old_font:
+            self.itemconfigure(label, text=text, font=font)
+        if tag != old_tag:
+            for item in (rect, label):
+                self.dtag(item, old_tag)
+                self.addtag_withtag(tag, item)
+                self.itemconfigure(item, state=self._card_state(tag))
+        self._cards[schedule_id] = (rect, label, layout)
+
+    def set_area(self, area):
+        """エリアで絞り込み（タグの表示・非表示を切り替えるだけ）"""
+        self._area = area or ALL_AREAS
+        if self._area == ALL_AREAS:
+            self.itemconfigure("schedule_item", state='normal')
+            return
+        self.itemconfigure("schedule_item", state='hidden')
+        tag = self._area_tags.get(self._area)
+        if tag is not None:
+            self.itemconfigure(tag, state='normal')
@@ -1563,123 +1563,42 @@ class SmartInputForm(tk.Toplevel):
         return '・'.join(selected_days) if selected_days else ''
     
     def generate_assessment_data(self):
-        """アセスメントデータを生成"""
-        issues = {}
-        
-        # 不登校
-        issues["不登校"] = {
-            "該当": self.truancy_check.get(),
-            "詳細": f"{self.attendance_var.get()}。{self.truancy_detail.get()}"
-        }
-        
-        # 引きこもり
-        outing = self.outing_var.get()
-        issues["引きこもり"] = {
-            "該当": outing == "ほぼ外出しない",
-            "詳細": outing
-        }
-        
-        # 生活リズム
-        rhythm_items = [k for k, v in self.rhythm_checks.items() if v.get()]
-        rhythm_detail_text = self.rhythm_detail.get().strip()
-        issues["生活リズム"] = {
-            "該当": len(rhythm_items) > 0 and "特に問題なし" not in rhythm_items,
-            "詳細": f"、".join(rhythm_items) + (f"({rhythm_detail_text})" if rhythm_detail_text else "") if rhythm_items else "特に問題なし"
-        }
-        
-        # 生活習慣
-        habit_items = [k for k, v in self.habit_checks.items() if v.get()]
-        habit_detail_text = self.habit_detail.get().strip()
-        issues["生活習慣"] = {
-            "該当": len(habit_items) > 0 and "特に問題なし" not in habit_items,
-            "詳細": f"、".join(habit_items) + (f"({habit_detail_text})" if habit_detail_text else "") if habit_items else "特に問題なし"
-        }
-        
-        # 学習
-        study_items = [k for k, v in self.study_checks.items() if v.get()]
-        study_detail_text = self.study_detail.get().strip()
-        issues["学習の遅れ・低学力"] = {
-            "該当": any(item in study_items for item in ["学習の遅れ", "低学力"]),
-            "詳細": f"、".join(study_items) + (f"({study_detail_text})" if study_detail_text else "") if study_items else "特に問題なし"
-        }
-        
-        issues["学習習慣・環境"] = {
-            "該当": any(item in study_items for item in ["学習習慣なし", "学習環境なし"]),
-            "詳細": f"、".join(study_items) + (f"({study_detail_text})" if study_detail_text else "") if study_items else "特に問題なし"
-        }
-        
-        # 発達特性
-        issues["発達特性or発達課題"] = {
-            "該当": self.dev_check_var.get(),
-            "詳細": self.dev_detail.get() if self.dev_check_var.get() else "該当なし"
-        }
-        
-        # 対人関係
-        social_items = [k for k, v in self.social_checks.items() if v.get()]
-        social_detail_text = self.social_detail.get().strip()
-        issues["対人緊張の高さ"] = {
-            "該当": "対人緊張が高い" in social_items or "友達との関わりに不安" in social_items,
-            "詳細": f"、".join(social_items) + (f"({social_detail_text})" if social_detail_text else "") if social_items else "特に問題なし"
-        }
-        
-        issues["コミュニケーションに苦手意識"] = {
-            "該当": "コミュニケーション苦手" in social_items,
-            "詳細": f"、".join(social_items) + (f"({social_detail_text})" if social_detail_text else "") if social_items else "特に問題なし"
-        }
-        
-        # 家庭環境
-        family_items = [k for k, v in self.family_checks.items() if v.get()]
-        family_detail_text = self.family_detail.get().strip()
-        issues["家庭環境"] = {
-            "該当": len(family_items) > 0 and "特に問題なし" not in family_items,
-            "詳細": f"、".join(family_items) + (f"({family_detail_text})" if family_detail_text else "") if family_items else "特に問題なし"
-        }
-        
-        issues["虐待"] = {
-            "該当": "虐待" in family_items,
-            "詳細": f"虐待({family_detail_text})" if "虐待" in family_items and family_detail_text else "該当なし"
-        }
-        issues["他の世帯員の問題"] = {
-            "該当": "他の世帯員の問題" in family_items,
-            "詳細": f"他の世帯員の問題({family_detail_text})" if "他の世帯員の問題" in family_items and family_detail_text else "該当なし"
-        }
-        issues["その他"] = {
-            "該当": "その他" in family_items,
-            "詳細": f"その他({family_detail_text})" if "その他" in family_items and family_detail_text else ""
-        }
-        
-        # 短期・長期目標の構造化
-        short_term_plan = {
-            "課題": self.short_term_issue.get().strip(),
-            "現状": self.short_term_current.get().strip(),
-            "ニーズ_本人": self.child_needs.get().strip(),
-            "ニーズ_保護者": self.guardian_needs.get().strip(),
-            "目標": self.short_term_goal.get().strip(),
-            "方法": self.short_term_method.get().strip()
-        }
-        
-        long_term_plan = {
-            "課題": self.long_term_issue.get().strip(),
-            "現状": self.long_term_current.get().strip(),
-            "ニーズ_本人": self.child_needs_long.get().strip(),
-            "ニーズ_保護者": self.guardian_needs_long.get().strip(),
-            "目標": self.long_term_goal.get().strip(),
-            "方法": self.long_term_method.get().strip()
-        }
-        
-        # 希望する進路（現在は未実装のため空のデータを返す）
-        future_path = {
-            "type": "",
-            "detail": ""
-        }
-        
-        return {
-            "issues": issues,
-            "short_term_plan": short_term_plan,
-            "long_term_plan": long_term_plan,
-            "future_path": future_path,
-            "missing_info": []
-        }
+        """アセスメントデータを生成（判定は一括取り込みと共通: src/database/intake.py）"""
+        from src.database.intake import build_assessment_data
+
+        def checked(checks):
+            return [k for k, v in checks.items() if v.get()]
+
+        return build_assessment_data({
+            "不登校": self.truancy_check.get(),
+            "登校状況": self.attendance_var.get(),
+            "不登校詳細": self.truancy_detail.get(),
+            "外出状況": self.outing_var.get(),
+            "生活リズム": checked(self.rhythm_checks),
+            "生活リズム詳細": self.rhythm_detail.get(),
+            "生活習慣": checked(self.habit_checks),
+            "生活習慣詳細": self.habit_detail.get(),
+            "学習": checked(self.study_checks),
+            "学習詳細": self.study_detail.get(),
+            "発達特性": self.dev_check_var.get(),
+            "発達特性詳細": self.dev_detail.get(),
+            "対人関係": checked(self.social_checks),
+            "対人関係詳細": self.social_detail.get(),
+            "家庭環境": checked(self.family_checks),
+            "家庭環境詳細": self.family_detail.get(),
+            "短期_課題": self.short_term_issue.get(),
+            "短期_現状": self.short_term_current.get(),
+            "短期_ニーズ_本人": self.child_needs.get(),
+            "短期_ニーズ_保護者": self.guardian_needs.get(),
+            "短期_目標": self.short_term_goal.get(),
+            "短期_方法": self.short_term_method.get(),
+            "長期_課題": self.long_term_issue.get(),
+            "長期_現状": self.long_term_current.get(),
+            "長期_ニーズ_本人": self.child_needs_long.get(),
+            "長期_ニーズ_保護者": self.guardian_needs_long.get(),
+            "長期_目標": self.long_term_goal.get(),
+            "長期_方法": self.long_term_method.get(),
+        })
     
     def search_staff(self):
         """支援員検索ダイアログを開く"""
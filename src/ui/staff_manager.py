@@ -1,33 +1,56 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from pathlib import Path
 import time
 from src.database.staff import StaffManager
+from src.database.connection import default_db_path
+from src.database.changes import ChangeTracker
+from src.database.timeslots import parse_time_range, contains_time
+from src.ui.db_runner import DbRunner
+from src.ui.virtual_tree import VirtualTreeview, prepare_pager
+from src.ui.schedule_canvas import ScheduleCanvas
+
+# 画面の一覧ごとの元のテーブル（版数の変わったテーブルを含む一覧だけを更新）
+VIEW_TABLES = {
+    'staff_tree': {'staff'},
+    'assign_staff_tree': {'staff'},
+    'unassigned_tree': {'unassigned_cases'},
+    'case_list': {'cases', 'staff_cases', 'districts', 'areas'},
+    'schedule': {'schedules', 'staff', 'cases', 'districts', 'areas'},
+    'month_schedule': {'schedules', 'staff', 'cases'},
+}
 
 class StaffManagerDialog(tk.Toplevel):
     def __init__(self, parent):
         super().__init__(parent)
         
-        self.staff_manager = StaffManager()
+        # スキーマの確認・予定の同期は書き込みのため、書き込みスレッドで作成（on_staff_manager_ready）
+        self.staff_manager = None
         self.current_staff_id = None
         self.selected_staff_id = None
         self.selected_unassigned_case_id = None
         self.selected_unassigned_case_data = None
         self.schedule_window = None  # スケジュールウィンドウの参照を保持
+        self.month_schedule_window = None  # 月間スケジュールウィンドウの参照を保持
+        
+        # DB処理はワーカースレッドで実行し、結果をafter()で受け取る（ロック待ちで画面を止めない）
+        self.busy_var = tk.StringVar()
+        self.db_runner = DbRunner(self, on_busy=self.on_db_busy)
         
-        # 自動リフレッシュ用の変数
-        self.db_path = self.staff_manager.db_path
-        self.last_db_mtime = None
+        # 自動リフレッシュ用の変数（他のPC・他のウィンドウの変更を検出）
+        self.db_path = Path(default_db_path())
+        self.change_tracker = ChangeTracker(self.db_path)
         self.auto_refresh_enabled = True
-        self.refresh_interval = 5 * 60 * 1000  # 5分ごとにチェック（ミリ秒）
+        self.refresh_interval = 500  # 0.5秒ごとにチェック（ミリ秒）
         
         self.title("支援員管理")
         self.geometry("1200x700")
         self.transient(parent)
         self.grab_set()
         
-        self.create_widgets()
+        # 準備ができるまでの表示
+        self.loading_label = tk.Label(self, text="🔄 データベースを準備中…", font=("游ゴシック", 11), fg="#7f8c8d")
+        self.loading_label.pack(expand=True)
         
         # 中央に配置
         self.update_idletasks()
@@ -35,14 +58,31 @@ class StaffManagerDialog(tk.Toplevel):
         y = (self.winfo_screenheight() // 2) - (self.winfo_height() // 2)
         self.geometry(f'+{x}+{y}')
         
-        # 初期データベース更新日時を記録
-        self.update_db_mtime()
+        # ウィンドウが閉じられたときに自動リフレッシュを停止
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.db_runner.write(StaffManager, on_done=self.on_staff_manager_ready, on_error=self.on_staff_manager_error)
+    
+    def on_staff_manager_ready(self, staff_manager):
+        """StaffManagerを作成できた時（画面を作り、初期データを読み込む）"""
+        self.staff_manager = staff_manager
+        self.loading_label.destroy()
+        self.create_widgets()
+        
+        # 現在の版数を記録
+        self.change_tracker.check()
         
         # 自動リフレッシュを開始
         self.start_auto_refresh()
         
-        # ウィンドウが閉じられたときに自動リフレッシュを停止
-        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Escで読み込み中の処理をキャンセル（準備中の作成はキャンセルしない）
+        self.bind('<Escape>', self.cancel_db_tasks)
+    
+    def on_staff_manager_error(self, error):
+        """StaffManagerを作成できなかった時"""
+        print(f"支援員管理の準備エラー: {error}")
+        messagebox.showerror("エラー", f"データベースの準備中にエラーが発生しました: {error}")
+        self.on_close()
     
     def create_widgets(self):
         # ヘッダー
@@ -59,6 +99,10 @@ class StaffManagerDialog(tk.Toplevel):
         )
         title.pack(pady=15)
         
+        # DB処理中の表示
+        busy_label = tk.Label(self, textvariable=self.busy_var, font=("游ゴシック", 9), fg="#7f8c8d", anchor="w")
+        busy_label.pack(side="bottom", fill="x", padx=10)
+        
         # メインコンテンツ（タブ付き）
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
@@ -91,7 +135,10 @@ class StaffManagerDialog(tk.Toplevel):
         
         # 未割り当てケースのツリービュー
         columns = ('case_number', 'district', 'child_name', 'preferred_day', 'preferred_time', 'notes')
-        self.unassigned_tree = ttk.Treeview(left_frame, columns=columns, show='headings', height=15)
+        self.unassigned_tree = VirtualTreeview(
+            left_frame, columns=columns, show='headings', height=15,
+            format_row=self._format_unassigned_row, db_runner=self.db_runner
+        )
         
         self.unassigned_tree.heading('case_number', text='ケース番号')
         self.unassigned_tree.heading('district', text='区')
@@ -173,7 +220,10 @@ class StaffManagerDialog(tk.Toplevel):
         
         # 支援員のツリービュー
         staff_columns = ('name', 'current_cases')
-        self.assign_staff_tree = ttk.Treeview(right_frame, columns=staff_columns, show='headings', height=10)
+        self.assign_staff_tree = VirtualTreeview(
+            right_frame, columns=staff_columns, show='headings', height=10,
+            format_row=self._format_assign_staff_row, db_runner=self.db_runner
+        )
         
         self.assign_staff_tree.heading('name', text='名前')
         self.assign_staff_tree.heading('current_cases', text='現在のケース数')
@@ -203,10 +253,33 @@ class StaffManagerDialog(tk.Toplevel):
         )
         assign_btn.pack(pady=5)
         
+        # 一括割り当て（全未割り当てケース × 全支援員の最適な組み合わせ）
+        plan_btn = tk.Button(
+            button_frame,
+            text="🧮 一括割り当て案",
+            font=("游ゴシック", 10),
+            bg="#9b59b6",
+            fg="white",
+            command=self.propose_assignment_plan,
+            padx=20,
+            pady=5
+        )
+        plan_btn.pack(pady=5)
+        
         # 初期データ読み込み
         self.refresh_unassigned_tree()
         self.refresh_assign_staff_tree()
     
+    def on_db_busy(self, busy):
+        """DB処理中の表示を切り替え"""
+        self.busy_var.set("🔄 データベースを処理中…（Escで読み込みをキャンセル）" if busy else "")
+    
+    def cancel_db_tasks(self, event=None):
+        """処理中のDB処理をキャンセル（実行中の書き込みは最後まで実行）"""
+        if self.db_runner.busy:
+            self.db_runner.cancel()
+            print("⏹️ DB処理をキャンセルしました")
+    
     def on_unassigned_tree_selected(self, event):
         """未割り当てケースが選択された時"""
         selection = self.unassigned_tree.selection()
@@ -216,19 +289,20 @@ class StaffManagerDialog(tk.Toplevel):
             if values:
                 # ケースIDを取得（最初のカラムがcase_numberと想定）
                 case_number = values[0]
-                # データベースからケース詳細を取得
-                conn = sqlite3.connect(str(self.staff_manager.db_path), timeout=10.0)
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM unassigned_cases WHERE case_number = ? AND status = ?', (case_number, '未割り当て'))
-                columns = [desc[0] for desc in cursor.description]
-                row = cursor.fetchone()
-                if row:
-                    case_data = dict(zip(columns, row))
-                    self.selected_unassigned_case_id = case_data['id']
-                    self.selected_unassigned_case_data = case_data
-                    # 詳細情報を表示
-                    self.display_unassigned_case_details(case_data)
-                conn.close()
+                # データベースからケース詳細を取得（ワーカースレッド）
+                self.db_runner.read(
+                    lambda: self.staff_manager.get_unassigned_case_by_number(case_number),
+                    on_done=self.on_unassigned_case_loaded,
+                    key='unassigned_details'
+                )
+    
+    def on_unassigned_case_loaded(self, case_data):
+        """選択された未割り当てケースの詳細を読み込んだ時"""
+        if case_data:
+            self.selected_unassigned_case_id = case_data['id']
+            self.selected_unassigned_case_data = case_data
+            # 詳細情報を表示
+            self.display_unassigned_case_details(case_data)
     
     def display_unassigned_case_details(self, case_data):
         """未割り当てケースの詳細を表示"""
@@ -250,51 +324,43 @@ class StaffManagerDialog(tk.Toplevel):
         self.unassigned_detail_text.config(state="disabled")
     
     def refresh_unassigned_tree(self):
-        """未割り当てケース一覧を更新"""
-        try:
-            # 既存のアイテムをクリア
-            for item in self.unassigned_tree.get_children():
-                self.unassigned_tree.delete(item)
-            
-            # 未割り当てケースを取得
-            unassigned_cases = self.staff_manager.get_unassigned_cases()
-            
-            for case in unassigned_cases:
-                # status が '未割り当て' のケースのみを表示
-                if case.get('status') == '未割り当て':
-                    self.unassigned_tree.insert('', 'end', values=(
-                        case.get('case_number', ''),
-                        case.get('district', ''),
-                        case.get('child_name', ''),
-                        case.get('preferred_day', ''),
-                        case.get('preferred_time', ''),
-                        case.get('notes', '')
-                    ))
-        except Exception as e:
-            print(f"refresh_unassigned_tree エラー: {e}")
+        """未割り当てケース一覧を更新（見えている行だけをDBから読み込み、差分を反映）"""
+        self.load_tree_pager(self.unassigned_tree, self.staff_manager.unassigned_case_pager, 'refresh_unassigned_tree')
+    
+    def load_tree_pager(self, tree, make_pager, key):
+        """一覧の件数と表示位置の行をワーカースレッドで読み込んでから表示"""
+        first_row, visible_rows = tree.first_row, tree.visible_rows
+        self.db_runner.read(
+            lambda: prepare_pager(make_pager(), first_row=first_row, visible_rows=visible_rows),
+            on_done=tree.set_source,
+            on_error=lambda e: print(f"{key} エラー: {e}"),
+            key=key
+        )
+    
+    @staticmethod
+    def _format_unassigned_row(case):
+        """未割り当てケース一覧の1行"""
+        return (
+            case.get('case_number', ''),
+            case.get('district', ''),
+            case.get('child_name', ''),
+            case.get('preferred_day', ''),
+            case.get('preferred_time', ''),
+            case.get('notes', '')
+        ), ()
     
     def refresh_assign_staff_tree(self):
-        """割り当て用支援員一覧を更新"""
-        try:
-            # 既存のアイテムをクリア
-            for item in self.assign_staff_tree.get_children():
-                self.assign_staff_tree.delete(item)
-            
-            # 支援員一覧を取得
-            staff_list = self.staff_manager.get_all_staff()
-            
-            for staff in staff_list:
-                # 現在のケース数を計算
-                case_count = 0
-                if staff.get('case_number') and staff.get('case_number').strip() != '':
-                    case_count = 1
-                
-                self.assign_staff_tree.insert('', 'end', values=(
-                    staff['name'],
-                    case_count
-                ), tags=(staff['id'],))
-        except Exception as e:
-            print(f"refresh_assign_staff_tree エラー: {e}")
+        """割り当て用支援員一覧を更新（見えている行だけをDBから読み込み、差分を反映）"""
+        self.load_tree_pager(self.assign_staff_tree, self.staff_manager.staff_pager, 'refresh_assign_staff_tree')
+    
+    @staticmethod
+    def _format_assign_staff_row(staff):
+        """割り当て用支援員一覧の1行"""
+        # 現在のケース数を計算
+        case_count = 0
+        if staff.get('case_number') and staff.get('case_number').strip() != '':
+            case_count = 1
+        return (staff['name'], case_count), (staff['id'],)
     
     def assign_case_to_staff(self):
         """選択されたケースを選択された支援員に割り当て"""
@@ -316,20 +382,63 @@ class StaffManagerDialog(tk.Toplevel):
             return
         
         staff_id = tags[0]
+        case_id = self.selected_unassigned_case_id
         
-        try:
-            # ケースを割り当て
-            self.staff_manager.assign_unassigned_case_to_staff(self.selected_unassigned_case_id, staff_id)
-            
+        def on_done(_):
             # 一覧を更新
             self.refresh_unassigned_tree()
             self.refresh_assign_staff_tree()
             
             messagebox.showinfo("完了", "ケースを割り当てました")
-            
-        except Exception as e:
+        
+        def on_error(e):
             print(f"割り当てエラー: {e}")
             messagebox.showerror("エラー", f"ケースの割り当て中にエラーが発生しました: {e}")
+        
+        # ケースを割り当て（ロック中のリトライは書き込みスレッドで待つ）
+        self.db_runner.write(
+            lambda: self.staff_manager.assign_unassigned_case_to_staff(case_id, staff_id),
+            on_done=on_done,
+            on_error=on_error
+        )
+    
+    def propose_assignment_plan(self):
+        """全未割り当てケースの割り当て案を作成して表示"""
+        def on_done(plan):
+            if not plan:
+                messagebox.showinfo("一括割り当て", "割り当てできる未割り当てケースがありません（ケース欄の空いている支援員が対象です）")
+                return
+            from src.ui.assignment_plan import AssignmentPlanDialog
+            AssignmentPlanDialog(self, plan, on_accept=self.apply_assignment_plan)
+        
+        def on_error(e):
+            print(f"割り当て案の作成エラー: {e}")
+            messagebox.showerror("エラー", f"割り当て案の作成中にエラーが発生しました: {e}")
+        
+        # 予定のビットマップの作り直しを含むため書き込みスレッドで実行
+        self.db_runner.write(
+            self.staff_manager.propose_assignment_plan,
+            on_done=on_done,
+            on_error=on_error,
+            key='assignment_plan'
+        )
+    
+    def apply_assignment_plan(self, plan):
+        """割り当て案をまとめて確定（1件でも失敗した場合はすべて取り消す）"""
+        def on_done(count):
+            self.refresh_unassigned_tree()
+            self.refresh_assign_staff_tree()
+            messagebox.showinfo("完了", f"{count}件のケースを割り当てました")
+        
+        def on_error(e):
+            print(f"一括割り当てエラー: {e}")
+            messagebox.showerror("エラー", f"一括割り当て中にエラーが発生しました（割り当ては行われていません）: {e}")
+        
+        self.db_runner.write(
+            lambda: self.staff_manager.apply_assignment_plan(plan),
+            on_done=on_done,
+            on_error=on_error
+        )
     
     def edit_unassigned_case(self):
         """未割り当てケースを編集"""
@@ -337,7 +446,19 @@ class StaffManagerDialog(tk.Toplevel):
             messagebox.showwarning("警告", "編集するケースを選択してください")
             return
         
-        # 編集ダイアログを開く
+        # 区の一覧を読み込んでから編集ダイアログを開く
+        self.load_districts(self.show_unassigned_case_edit_dialog)
+    
+    def load_districts(self, on_loaded):
+        """区の一覧をワーカースレッドで読み込んでから on_loaded(区の一覧) を呼ぶ（失敗時はNone）"""
+        def on_error(e):
+            print(f"区取得エラー: {e}")
+            on_loaded(None)
+        
+        self.db_runner.read(self.staff_manager.get_all_districts, on_done=on_loaded, on_error=on_error, key='districts')
+    
+    def show_unassigned_case_edit_dialog(self, districts):
+        """未割り当てケースの編集ダイアログを表示"""
         edit_dialog = tk.Toplevel(self)
         edit_dialog.title("ケース編集")
         edit_dialog.geometry("500x600")
@@ -380,11 +501,9 @@ class StaffManagerDialog(tk.Toplevel):
         district_frame.pack(fill="x", pady=5)
         tk.Label(district_frame, text="区:", font=("游ゴシック", 10), width=15, anchor="w").pack(side="left")
         district_var = tk.StringVar(value=str(self.selected_unassigned_case_data.get('district', '')))
-        try:
-            districts = self.staff_manager.get_all_districts()
+        if districts is not None:
             district_names = [d['name'] for d in districts]
-        except Exception as e:
-            print(f"区取得エラー: {e}")
+        else:
             district_names = ["城東区", "鶴見区", "天王寺区", "中央区", "浪速区", "生野区", "東成区", "阿倍野区", "平野区", "住吉区", "東住吉区", "西成区"]
         
         district_combo = ttk.Combobox(district_frame, textvariable=district_var, values=district_names, width=27, state="readonly")
@@ -480,60 +599,43 @@ class StaffManagerDialog(tk.Toplevel):
         button_frame.pack(side="bottom", pady=20, fill="x")
         
         def save_changes():
-            try:
-                # チェックされた曜日を文字列として取得
-                selected_days = ''.join([day for day in days if day_vars[day].get()])
-                
-                conn = sqlite3.connect(str(self.staff_manager.db_path), timeout=10.0)
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    UPDATE unassigned_cases 
-                    SET district = ?,
-                        child_name = ?,
-                        preferred_day = ?,
-                        preferred_time = ?,
-                        frequency = ?,
-                        location = ?,
-                        notes = ?
-                    WHERE id = ?
-                ''', (
-                    district_var.get(),
-                    child_name_var.get(),
-                    selected_days,
-                    schedule_time_var.get(),
-                    frequency_var.get(),
-                    location_var.get(),
-                    notes_text.get(1.0, tk.END).strip(),
-                    self.selected_unassigned_case_id
-                ))
-                
-                conn.commit()
-                conn.close()
-                
+            # チェックされた曜日を文字列として取得
+            selected_days = ''.join([day for day in days if day_vars[day].get()])
+            
+            # 入力値はTkスレッドで読み取っておく
+            case_id = self.selected_unassigned_case_id
+            case_data = {
+                'district': district_var.get(),
+                'child_name': child_name_var.get(),
+                'preferred_day': selected_days,
+                'preferred_time': schedule_time_var.get(),
+                'frequency': frequency_var.get(),
+                'location': location_var.get(),
+                'notes': notes_text.get(1.0, tk.END).strip()
+            }
+            
+            def on_done(updated):
                 # 一覧を更新
                 self.refresh_unassigned_tree()
                 
                 # 詳細表示を更新
-                if hasattr(self, 'display_unassigned_case_details'):
-                    # データを再取得
-                    conn = sqlite3.connect(str(self.staff_manager.db_path), timeout=10.0)
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT * FROM unassigned_cases WHERE id = ?', (self.selected_unassigned_case_id,))
-                    columns = [desc[0] for desc in cursor.description]
-                    row = cursor.fetchone()
-                    if row:
-                        case_data = dict(zip(columns, row))
-                        self.selected_unassigned_case_data = case_data
-                        self.display_unassigned_case_details(case_data)
-                    conn.close()
+                if updated and hasattr(self, 'display_unassigned_case_details'):
+                    self.selected_unassigned_case_data = updated
+                    self.display_unassigned_case_details(updated)
                 
-                edit_dialog.destroy()
+                if edit_dialog.winfo_exists():
+                    edit_dialog.destroy()
                 messagebox.showinfo("完了", "ケース情報を更新しました")
-                
-            except Exception as e:
+            
+            def on_error(e):
                 print(f"編集エラー: {e}")
                 messagebox.showerror("エラー", f"ケースの編集中にエラーが発生しました: {e}")
+            
+            self.db_runner.write(
+                lambda: self.staff_manager.update_unassigned_case(case_id, case_data),
+                on_done=on_done,
+                on_error=on_error
+            )
         
         def cancel_changes():
             edit_dialog.destroy()
@@ -567,30 +669,34 @@ class StaffManagerDialog(tk.Toplevel):
             return
         
         result = messagebox.askyesno("確認", "このケースを削除しますか？")
-        if result:
-            try:
-                conn = sqlite3.connect(str(self.staff_manager.db_path), timeout=10.0)
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM unassigned_cases WHERE id = ?', (self.selected_unassigned_case_id,))
-                conn.commit()
-                conn.close()
-                
-                # 一覧を更新
-                self.refresh_unassigned_tree()
-                
-                # 詳細表示をクリア
-                self.unassigned_detail_text.config(state="normal")
-                self.unassigned_detail_text.delete(1.0, tk.END)
-                self.unassigned_detail_text.config(state="disabled")
-                
-                self.selected_unassigned_case_id = None
-                self.selected_unassigned_case_data = None
-                
-                messagebox.showinfo("完了", "ケースを削除しました")
-                
-            except Exception as e:
-                print(f"削除エラー: {e}")
-                messagebox.showerror("エラー", f"ケースの削除中にエラーが発生しました: {e}")
+        if not result:
+            return
+        
+        case_id = self.selected_unassigned_case_id
+        
+        def on_done(_):
+            # 一覧を更新
+            self.refresh_unassigned_tree()
+            
+            # 詳細表示をクリア
+            self.unassigned_detail_text.config(state="normal")
+            self.unassigned_detail_text.delete(1.0, tk.END)
+            self.unassigned_detail_text.config(state="disabled")
+            
+            self.selected_unassigned_case_id = None
+            self.selected_unassigned_case_data = None
+            
+            messagebox.showinfo("完了", "ケースを削除しました")
+        
+        def on_error(e):
+            print(f"削除エラー: {e}")
+            messagebox.showerror("エラー", f"ケースの削除中にエラーが発生しました: {e}")
+        
+        self.db_runner.write(
+            lambda: self.staff_manager.delete_unassigned_case(case_id),
+            on_done=on_done,
+            on_error=on_error
+        )
 
     def create_staff_management_view(self, parent):
         """支援員管理ビュー"""
@@ -604,7 +710,10 @@ class StaffManagerDialog(tk.Toplevel):
         
         # ツリービュー
         columns = ('name', 'age', 'gender', 'region', 'is_active')
-        self.staff_tree = ttk.Treeview(left_frame, columns=columns, show='headings', height=15)
+        self.staff_tree = VirtualTreeview(
+            left_frame, columns=columns, show='headings', height=15,
+            format_row=self._format_staff_row, db_runner=self.db_runner
+        )
         
         self.staff_tree.heading('name', text='名前')
         self.staff_tree.heading('age', text='年齢')
@@ -808,7 +917,10 @@ class StaffManagerDialog(tk.Toplevel):
         
         # ケース一覧テーブル（順序: 区 → ケース番号 → 曜日・時間 → 頻度 → 場所）
         case_columns = ('district', 'case_number', 'schedule', 'frequency', 'location')
-        self.case_tree = ttk.Treeview(case_frame, columns=case_columns, show='headings', height=6)
+        self.case_tree = VirtualTreeview(
+            case_frame, columns=case_columns, show='headings', height=6,
+            format_row=self._format_case_row, db_runner=self.db_runner
+        )
         
         # 列の設定
         self.case_tree.heading('district', text='区')
@@ -844,22 +956,19 @@ class StaffManagerDialog(tk.Toplevel):
         self.refresh_unassigned_tree()
 
     def refresh_staff_tree(self):
-        """支援員一覧を更新"""
-        try:
-            for item in self.staff_tree.get_children():
-                self.staff_tree.delete(item)
-            
-            staff_list = self.staff_manager.get_all_staff()
-            for staff in staff_list:
-                self.staff_tree.insert('', 'end', values=(
-                    staff['name'],
-                    staff['age'],
-                    staff['gender'],
-                    staff['region'],
-                    'アクティブ' if staff['is_active'] else '非アクティブ'
-                ), tags=(staff['id'],))
-        except Exception as e:
-            print(f"refresh_staff_tree エラー: {e}")
+        """支援員一覧を更新（見えている行だけをDBから読み込み、差分を反映）"""
+        self.load_tree_pager(self.staff_tree, self.staff_manager.staff_pager, 'refresh_staff_tree')
+    
+    @staticmethod
+    def _format_staff_row(staff):
+        """支援員一覧の1行"""
+        return (
+            staff['name'],
+            staff['age'],
+            staff['gender'],
+            staff['region'],
+            'アクティブ' if staff['is_active'] else '非アクティブ'
+        ), (staff['id'],)
     
     def on_staff_tree_selected(self, event):
         """支援員が選択された時"""
@@ -879,9 +988,17 @@ class StaffManagerDialog(tk.Toplevel):
             print(f"on_staff_tree_selected エラー: {e}")
 
     def load_staff_details(self, staff_id):
-        """支援員詳細を読み込み"""
+        """支援員詳細を読み込み（ワーカースレッドで読み込んでフォームに表示）"""
+        self.db_runner.read(
+            lambda: self.staff_manager.get_staff_by_id(staff_id),
+            on_done=lambda staff: self.display_staff_details(staff_id, staff),
+            on_error=lambda e: print(f"load_staff_details エラー: {e}"),
+            key='staff_details'
+        )
+    
+    def display_staff_details(self, staff_id, staff):
+        """支援員詳細をフォームに表示"""
         try:
-            staff = self.staff_manager.get_staff_by_id(staff_id)
             if not staff:
                 return
             
@@ -925,59 +1042,61 @@ class StaffManagerDialog(tk.Toplevel):
             self.staff_notes_text.insert(1.0, staff.get('notes', ''))
                 
         except Exception as e:
-            print(f"load_staff_details エラー: {e}")
+            print(f"display_staff_details エラー: {e}")
 
     def refresh_case_list(self, event=None):
-        """ケース一覧を更新"""
-        try:
-            # 既存のアイテムをクリア
-            for item in self.case_tree.get_children():
-                self.case_tree.delete(item)
-            
-            # 選択された支援員のケースのみを表示
-            if self.selected_staff_id:
-                # 支援員に割り当てられているケースを取得
-                cases = self.staff_manager.get_staff_with_cases(self.selected_staff_id)
-                
-                # エリアでフィルタリング
-                selected_area = getattr(self, 'case_area_var', tk.StringVar(value="全て")).get()
-                if selected_area and selected_area != "全て":
-                    # 選択されたエリアの区のIDを取得
-                    all_districts = self.staff_manager.get_all_districts()
-                    area_district_ids = set()
-                    for district in all_districts:
-                        if district.get('area_name') == selected_area:
-                            area_district_ids.add(district.get('id'))
-                    
-                    # エリアに属する区のケースのみをフィルタリング
-                    cases = [case for case in cases if case.get('district_id') in area_district_ids]
-                
-                # 各ケースを表示
-                for case in cases:
-                    case_id = case.get('id', '')
-                    case_number = case.get('case_number', '')
-                    district_name = case.get('district_name', '')
-                    schedule_day = case.get('schedule_day', '')
-                    schedule_time = case.get('schedule_time', '')
-                    frequency = case.get('frequency', '')
-                    location = case.get('location', '')
-                    
-                    # ケース番号が存在する場合のみ表示
-                    if case_number and case_number.strip() != '':
-                        # ケースIDをtagsに保存（編集時に使用）
-                        self.case_tree.insert('', 'end', values=(
-                            district_name or '',
-                            case_number,
-                            f"{schedule_day or ''} {schedule_time or ''}".strip(),
-                            frequency or '',
-                            location or ''
-                        ), tags=(str(case_id),))
-        except Exception as e:
+        """ケース一覧を更新（ワーカースレッドで読み込み、ケースIDごとに差分を反映）"""
+        staff_id = self.selected_staff_id
+        selected_area = getattr(self, 'case_area_var', tk.StringVar(value="全て")).get()
+        
+        def on_error(e):
             print(f"refresh_case_list エラー: {e}")
             import traceback
-            traceback.print_exc()
-            # エラーが発生した場合は空のリストを表示
-            pass
+            traceback.print_exception(type(e), e, e.__traceback__)
+        
+        self.db_runner.read(
+            lambda: self.load_case_list(staff_id, selected_area),
+            on_done=self.case_tree.set_rows,
+            on_error=on_error,
+            key='refresh_case_list'
+        )
+    
+    def load_case_list(self, staff_id, selected_area):
+        """ケース一覧に表示するケースを取得（ワーカースレッドで実行。Tkは使わない）"""
+        cases = []
+        # 選択された支援員のケースのみを表示
+        if staff_id:
+            # 支援員に割り当てられているケースを取得
+            cases = self.staff_manager.get_staff_with_cases(staff_id)
+            
+            # エリアでフィルタリング
+            if selected_area and selected_area != "全て":
+                # 選択されたエリアの区のIDを取得
+                all_districts = self.staff_manager.get_all_districts()
+                area_district_ids = set()
+                for district in all_districts:
+                    if district.get('area_name') == selected_area:
+                        area_district_ids.add(district.get('id'))
+                
+                # エリアに属する区のケースのみをフィルタリング
+                cases = [case for case in cases if case.get('district_id') in area_district_ids]
+            
+            # ケース番号が存在する場合のみ表示
+            cases = [case for case in cases if case.get('case_number') and case['case_number'].strip() != '']
+        
+        return cases
+
+    @staticmethod
+    def _format_case_row(case):
+        """ケース一覧の1行（ケースIDをtagsに保存。編集時に使用）"""
+        schedule = f"{case.get('schedule_day') or ''} {case.get('schedule_time') or ''}".strip()
+        return (
+            case.get('district_name') or '',
+            case['case_number'],
+            schedule,
+            case.get('frequency') or '',
+            case.get('location') or ''
+        ), (str(case.get('id', '')),)
 
     def show_case_context_menu(self, event):
         """右クリックメニューを表示"""
@@ -1024,77 +1143,34 @@ class StaffManagerDialog(tk.Toplevel):
             return
         
         result = messagebox.askyesno("確認", "このケースを未割り当てに戻しますか？")
-        if result:
-            try:
-                conn = sqlite3.connect(str(self.staff_manager.db_path), timeout=10.0)
-                cursor = conn.cursor()
-                
-                # 支援員情報を取得
-                cursor.execute('SELECT * FROM staff WHERE id = ?', (self.selected_staff_id,))
-                staff_columns = [desc[0] for desc in cursor.description]
-                staff_data = dict(zip(staff_columns, cursor.fetchone()))
-                
-                # ケース情報を取得
-                case_number = staff_data.get('case_number', '') or None
-                district = staff_data.get('case_district', '') or None
-                case_day = staff_data.get('case_day', '') or None
-                case_time = staff_data.get('case_time', '') or None
-                frequency = staff_data.get('case_frequency', '') or None
-                location = staff_data.get('case_location', '') or None
-                
-                # ケース情報が空の場合はスキップ
-                if not case_number or case_number == 'None' or case_number.strip() == '':
-                    messagebox.showwarning("警告", "削除するケース情報が見つかりません")
-                    return
-                
-                # 未割り当てケースとして登録（既に存在する場合は更新）
-                cursor.execute('''
-                    INSERT OR REPLACE INTO unassigned_cases 
-                    (case_number, district, preferred_day, preferred_time, frequency, location, status)
-                    VALUES (?, ?, ?, ?, ?, ?, '未割り当て')
-                ''', (
-                    case_number,
-                    district,
-                    case_day,
-                    case_time,
-                    frequency,
-                    location
-                ))
-                
-                # 既存のケースを未割り当てに戻す
-                cursor.execute('''
-                    UPDATE unassigned_cases 
-                    SET status = '未割り当て'
-                    WHERE case_number = ?
-                ''', (case_number,))
-                
-                # 支援員のケース情報をクリア
-                cursor.execute('''
-                    UPDATE staff 
-                    SET case_district = '',
-                        case_number = '',
-                        case_day = '',
-                        case_time = '',
-                        case_frequency = '',
-                        case_location = ''
-                    WHERE id = ?
-                ''', (self.selected_staff_id,))
-                
-                conn.commit()
-                conn.close()
-                
-                # 支援員を選択し直す（フォームを再読み込み）
-                self.on_staff_tree_selected(None)
-                
-                # ケース一覧タブを更新
-                if hasattr(self, 'refresh_unassigned_tree'):
-                    self.refresh_unassigned_tree()
-                
-                messagebox.showinfo("完了", "ケースを未割り当てに戻しました")
-                
-            except Exception as e:
-                print(f"ケース削除エラー: {e}")
-                messagebox.showerror("エラー", f"ケースの削除中にエラーが発生しました: {e}")
+        if not result:
+            return
+        
+        staff_id = self.selected_staff_id
+        
+        def on_done(case_number):
+            if not case_number:
+                messagebox.showwarning("警告", "削除するケース情報が見つかりません")
+                return
+            
+            # 支援員を選択し直す（フォームを再読み込み）
+            self.on_staff_tree_selected(None)
+            
+            # ケース一覧タブを更新
+            if hasattr(self, 'refresh_unassigned_tree'):
+                self.refresh_unassigned_tree()
+            
+            messagebox.showinfo("完了", "ケースを未割り当てに戻しました")
+        
+        def on_error(e):
+            print(f"ケース削除エラー: {e}")
+            messagebox.showerror("エラー", f"ケースの削除中にエラーが発生しました: {e}")
+        
+        self.db_runner.write(
+            lambda: self.staff_manager.return_staff_case_to_unassigned(staff_id),
+            on_done=on_done,
+            on_error=on_error
+        )
 
     def open_add_case_dialog(self):
         """ケース追加ダイアログを開く"""
@@ -1102,7 +1178,11 @@ class StaffManagerDialog(tk.Toplevel):
             messagebox.showwarning("警告", "支援員を選択してください")
             return
         
-        # ケース追加ダイアログを開く
+        # 区の一覧を読み込んでからケース追加ダイアログを開く
+        self.load_districts(self.show_add_case_dialog)
+    
+    def show_add_case_dialog(self, all_districts):
+        """ケース追加ダイアログを表示"""
         case_dialog = tk.Toplevel(self)
         case_dialog.title("ケース追加")
         case_dialog.geometry("500x600")
@@ -1147,14 +1227,12 @@ class StaffManagerDialog(tk.Toplevel):
         area_var = tk.StringVar()
         area_var.set("")
         
-        # エリア一覧を取得
-        try:
-            all_districts = self.staff_manager.get_all_districts()
+        # エリア一覧
+        if all_districts is not None:
             # エリア名の一意なリストを作成
             area_names = list(set([d['area_name'] for d in all_districts]))
             area_names.sort()  # ソート
-        except Exception as e:
-            print(f"エリア取得エラー: {e}")
+        else:
             area_names = ["東エリア", "南エリア"]
             all_districts = []
         
@@ -1362,87 +1440,6 @@ class StaffManagerDialog(tk.Toplevel):
                     messagebox.showwarning("警告", "曜日を選択してください")
                     return
                 
-                # 勤務可能性チェック
-                if self.selected_staff_id:
-                    staff = self.staff_manager.get_staff_by_id(self.selected_staff_id)
-                    if staff:
-                        work_days_str = staff.get('work_days', '') or ''
-                        work_hours_str = staff.get('work_hours', '') or ''
-                        schedule_time = schedule_time_var.get().strip()
-                        
-                        # 勤務曜日チェック
-                        if work_days_str:
-                            unavailable_days = []
-                            for day in selected_days:
-                                if day not in work_days_str:
-                                    unavailable_days.append(day)
-                            if unavailable_days:
-                                messagebox.showerror(
-                                    "エラー", 
-                                    f"選択された曜日（{''.join(unavailable_days)}）は\n"
-                                    f"この支援員の勤務可能日ではありません。\n"
-                                    f"勤務可能日: {work_days_str}"
-                                )
-                                return
-                        
-                        # 勤務時間チェック
-                        if work_hours_str and schedule_time:
-                            try:
-                                # 時間を解析（例: "14:00-15:00" または "14:00"）
-                                time_clean = schedule_time.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                                start_time_str = time_clean
-                                end_time_str = None
-                                
-                                if '-' in time_clean:
-                                    start_time_str, end_time_str = time_clean.split('-')
-                                else:
-                                    # 開始時間のみの場合は1時間後を終了時間とする
-                                    start_parts = start_time_str.split(':')
-                                    start_hour = int(start_parts[0].strip())
-                                    start_min = int(start_parts[1].strip()) if len(start_parts) > 1 and start_parts[1].strip() else 0
-                                    end_hour = start_hour + 1
-                                    end_min = start_min
-                                    if end_hour >= 24:
-                                        end_hour = 23
-                                        end_min = 59
-                                    end_time_str = f"{end_hour:02d}:{end_min:02d}"
-                                
-                                # 勤務時間を解析
-                                work_time_clean = work_hours_str.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                                if '-' in work_time_clean:
-                                    work_start_str, work_end_str = work_time_clean.split('-')
-                                    work_start_parts = work_start_str.strip().split(':')
-                                    work_end_parts = work_end_str.strip().split(':')
-                                    
-                                    work_start_hour = int(work_start_parts[0].strip()) if work_start_parts[0].strip() else 0
-                                    work_start_min = int(work_start_parts[1].strip()) if len(work_start_parts) > 1 and work_start_parts[1].strip() else 0
-                                    work_end_hour = int(work_end_parts[0].strip()) if work_end_parts[0].strip() else 0
-                                    work_end_min = int(work_end_parts[1].strip()) if len(work_end_parts) > 1 and work_end_parts[1].strip() else 0
-                                    
-                                    # ケースの開始時間を解析
-                                    case_start_parts = start_time_str.strip().split(':')
-                                    case_start_hour = int(case_start_parts[0].strip()) if case_start_parts[0].strip() else 0
-                                    case_start_min = int(case_start_parts[1].strip()) if len(case_start_parts) > 1 and case_start_parts[1].strip() else 0
-                                    
-                                    # 時間を分単位に変換
-                                    work_start_total = work_start_hour * 60 + work_start_min
-                                    work_end_total = work_end_hour * 60 + work_end_min
-                                    case_start_total = case_start_hour * 60 + case_start_min
-                                    
-                                    # ケースの開始時間が勤務時間外の場合はエラー
-                                    if case_start_total < work_start_total or case_start_total >= work_end_total:
-                                        messagebox.showerror(
-                                            "エラー",
-                                            f"選択された時間帯（{schedule_time}）は\n"
-                                            f"この支援員の勤務時間外です。\n"
-                                            f"勤務可能時間: {work_hours_str}"
-                                        )
-                                        return
-                            except Exception as e:
-                                print(f"勤務時間チェックエラー: {e}")
-                                # エラーが発生した場合は警告のみ（保存は可能）
-                                pass
-                
                 # 区のIDを取得（all_districtsは関数外の変数を参照）
                 district_id = None
                 for district in all_districts:
@@ -1468,10 +1465,14 @@ class StaffManagerDialog(tk.Toplevel):
                     'frequency': frequency_var.get(),
                     'notes': notes_text.get(1.0, tk.END).strip()
                 }
-                
-                # ケースを追加
-                case_id = self.staff_manager.add_case_to_staff(self.selected_staff_id, case_data)
-                
+            except Exception as e:
+                print(f"ケース追加エラー: {e}")
+                messagebox.showerror("エラー", f"ケースの追加中にエラーが発生しました: {e}")
+                return
+            
+            staff_id = self.selected_staff_id
+            
+            def on_done(_):
                 # ケース一覧を更新
                 self.refresh_case_list()
                 
@@ -1487,13 +1488,24 @@ class StaffManagerDialog(tk.Toplevel):
                         traceback.print_exc()
                 
                 # ダイアログを閉じる
-                case_dialog.destroy()
+                if case_dialog.winfo_exists():
+                    case_dialog.destroy()
                 
                 messagebox.showinfo("完了", "ケースを追加しました")
-                
-            except Exception as e:
+            
+            def on_error(e):
                 print(f"ケース追加エラー: {e}")
                 messagebox.showerror("エラー", f"ケースの追加中にエラーが発生しました: {e}")
+            
+            # 支援員の勤務日時・他のケースとの重なりを確認してから追加（書き込みスレッド）
+            self.check_case_schedule(
+                staff_id, case_data,
+                on_ok=lambda: self.db_runner.write(
+                    lambda: self.staff_manager.add_case_to_staff(staff_id, case_data),
+                    on_done=on_done,
+                    on_error=on_error
+                )
+            )
         
         def cancel_case():
             case_dialog.destroy()
@@ -1524,14 +1536,33 @@ class StaffManagerDialog(tk.Toplevel):
         button_frame.pack_configure(anchor="center")
     
     def open_edit_case_dialog(self, case_id):
-        """ケース編集ダイアログを開く"""
-        # ケース情報を取得
-        case = self.staff_manager.get_case_by_id(case_id)
+        """ケース編集ダイアログを開く（ケース情報と区の一覧をワーカースレッドで読み込む）"""
+        def load():
+            case = self.staff_manager.get_case_by_id(case_id)
+            try:
+                all_districts = self.staff_manager.get_all_districts()
+            except Exception as e:
+                print(f"エリア取得エラー: {e}")
+                all_districts = None
+            return case, all_districts
+        
+        def on_error(e):
+            print(f"ケース取得エラー: {e}")
+            messagebox.showerror("エラー", f"ケース情報の読み込み中にエラーが発生しました: {e}")
+        
+        self.db_runner.read(
+            load,
+            on_done=lambda result: self.show_edit_case_dialog(case_id, *result),
+            on_error=on_error,
+            key='edit_case'
+        )
+    
+    def show_edit_case_dialog(self, case_id, case, all_districts):
+        """ケース編集ダイアログを表示"""
         if not case:
             messagebox.showerror("エラー", "ケース情報が見つかりません")
             return
         
-        # ケース編集ダイアログを開く
         case_dialog = tk.Toplevel(self)
         case_dialog.title("ケース編集")
         case_dialog.geometry("500x600")
@@ -1576,13 +1607,11 @@ class StaffManagerDialog(tk.Toplevel):
         area_var = tk.StringVar()
         area_var.set(case.get('area_name', ''))
         
-        # エリア一覧を取得
-        try:
-            all_districts = self.staff_manager.get_all_districts()
+        # エリア一覧
+        if all_districts is not None:
             area_names = list(set([d['area_name'] for d in all_districts]))
             area_names.sort()
-        except Exception as e:
-            print(f"エリア取得エラー: {e}")
+        else:
             area_names = ["東エリア", "南エリア"]
             all_districts = []
         
@@ -1809,87 +1838,6 @@ class StaffManagerDialog(tk.Toplevel):
                     messagebox.showwarning("警告", "曜日を選択してください")
                     return
                 
-                # 勤務可能性チェック
-                if self.selected_staff_id:
-                    staff = self.staff_manager.get_staff_by_id(self.selected_staff_id)
-                    if staff:
-                        work_days_str = staff.get('work_days', '') or ''
-                        work_hours_str = staff.get('work_hours', '') or ''
-                        schedule_time = schedule_time_var.get().strip()
-                        
-                        # 勤務曜日チェック
-                        if work_days_str:
-                            unavailable_days = []
-                            for day in selected_days:
-                                if day not in work_days_str:
-                                    unavailable_days.append(day)
-                            if unavailable_days:
-                                messagebox.showerror(
-                                    "エラー", 
-                                    f"選択された曜日（{''.join(unavailable_days)}）は\n"
-                                    f"この支援員の勤務可能日ではありません。\n"
-                                    f"勤務可能日: {work_days_str}"
-                                )
-                                return
-                        
-                        # 勤務時間チェック
-                        if work_hours_str and schedule_time:
-                            try:
-                                # 時間を解析（例: "14:00-15:00" または "14:00"）
-                                time_clean = schedule_time.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                                start_time_str = time_clean
-                                end_time_str = None
-                                
-                                if '-' in time_clean:
-                                    start_time_str, end_time_str = time_clean.split('-')
-                                else:
-                                    # 開始時間のみの場合は1時間後を終了時間とする
-                                    start_parts = start_time_str.split(':')
-                                    start_hour = int(start_parts[0].strip())
-                                    start_min = int(start_parts[1].strip()) if len(start_parts) > 1 and start_parts[1].strip() else 0
-                                    end_hour = start_hour + 1
-                                    end_min = start_min
-                                    if end_hour >= 24:
-                                        end_hour = 23
-                                        end_min = 59
-                                    end_time_str = f"{end_hour:02d}:{end_min:02d}"
-                                
-                                # 勤務時間を解析
-                                work_time_clean = work_hours_str.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                                if '-' in work_time_clean:
-                                    work_start_str, work_end_str = work_time_clean.split('-')
-                                    work_start_parts = work_start_str.strip().split(':')
-                                    work_end_parts = work_end_str.strip().split(':')
-                                    
-                                    work_start_hour = int(work_start_parts[0].strip()) if work_start_parts[0].strip() else 0
-                                    work_start_min = int(work_start_parts[1].strip()) if len(work_start_parts) > 1 and work_start_parts[1].strip() else 0
-                                    work_end_hour = int(work_end_parts[0].strip()) if work_end_parts[0].strip() else 0
-                                    work_end_min = int(work_end_parts[1].strip()) if len(work_end_parts) > 1 and work_end_parts[1].strip() else 0
-                                    
-                                    # ケースの開始時間を解析
-                                    case_start_parts = start_time_str.strip().split(':')
-                                    case_start_hour = int(case_start_parts[0].strip()) if case_start_parts[0].strip() else 0
-                                    case_start_min = int(case_start_parts[1].strip()) if len(case_start_parts) > 1 and case_start_parts[1].strip() else 0
-                                    
-                                    # 時間を分単位に変換
-                                    work_start_total = work_start_hour * 60 + work_start_min
-                                    work_end_total = work_end_hour * 60 + work_end_min
-                                    case_start_total = case_start_hour * 60 + case_start_min
-                                    
-                                    # ケースの開始時間が勤務時間外の場合はエラー
-                                    if case_start_total < work_start_total or case_start_total >= work_end_total:
-                                        messagebox.showerror(
-                                            "エラー",
-                                            f"選択された時間帯（{schedule_time}）は\n"
-                                            f"この支援員の勤務時間外です。\n"
-                                            f"勤務可能時間: {work_hours_str}"
-                                        )
-                                        return
-                            except Exception as e:
-                                print(f"勤務時間チェックエラー: {e}")
-                                # エラーが発生した場合は警告のみ（保存は可能）
-                                pass
-                
                 district_id = None
                 for district in all_districts:
                     if district['name'] == district_var.get():
@@ -1913,10 +1861,12 @@ class StaffManagerDialog(tk.Toplevel):
                     'frequency': frequency_var.get(),
                     'notes': notes_text.get(1.0, tk.END).strip()
                 }
-                
-                # ケースを更新
-                self.staff_manager.update_case_to_staff(case_id, case_data)
-                
+            except Exception as e:
+                print(f"ケース更新エラー: {e}")
+                messagebox.showerror("エラー", f"ケースの更新中にエラーが発生しました: {e}")
+                return
+            
+            def on_done(_):
                 # ケース一覧を更新
                 self.refresh_case_list()
                 
@@ -1929,12 +1879,24 @@ class StaffManagerDialog(tk.Toplevel):
                     except Exception as e:
                         print(f"❌ スケジュール更新エラー: {e}")
                 
-                case_dialog.destroy()
+                if case_dialog.winfo_exists():
+                    case_dialog.destroy()
                 messagebox.showinfo("完了", "ケース情報を更新しました")
-                
-            except Exception as e:
+            
+            def on_error(e):
                 print(f"ケース更新エラー: {e}")
                 messagebox.showerror("エラー", f"ケースの更新中にエラーが発生しました: {e}")
+            
+            # 支援員の勤務日時・他のケースとの重なり（このケース自身の予定は除く）を確認してから更新（書き込みスレッド）
+            self.check_case_schedule(
+                self.selected_staff_id, case_data,
+                on_ok=lambda: self.db_runner.write(
+                    lambda: self.staff_manager.update_case_to_staff(case_id, case_data),
+                    on_done=on_done,
+                    on_error=on_error
+                ),
+                exclude_case_id=case_id
+            )
         
         def cancel_case():
             case_dialog.destroy()
@@ -1992,6 +1954,104 @@ class StaffManagerDialog(tk.Toplevel):
         # スケジュール表示
         self.create_schedule_view(self.schedule_window)
     
+    def check_case_schedule(self, staff_id, case_data, on_ok, exclude_case_id=None):
+        """
+        支援員の勤務日時と、担当中のケースとの重なりを確認してから on_ok() を呼ぶ
+        
+        支援員と予定はワーカースレッドで読み込む。勤務日・勤務時間外はエラーを表示して保存しない。
+        """
+        if not staff_id:
+            on_ok()
+            return
+        schedule_day = case_data['schedule_day']
+        schedule_time = case_data['schedule_time']
+        
+        def load():
+            staff = self.staff_manager.get_staff_by_id(staff_id)
+            conflict_days = []
+            if schedule_time:
+                # 頻度で日付に展開して判定（確認できなくても保存は続ける）
+                try:
+                    conflict_days = self.staff_manager.find_schedule_conflicts(
+                        staff_id, schedule_day, schedule_time, case_data['frequency'],
+                        case_data['first_meeting_date'], exclude_case_id=exclude_case_id
+                    )
+                except Exception as e:
+                    print(f"重複チェックエラー: {e}")
+            return staff, conflict_days
+        
+        def on_done(result):
+            staff, conflict_days = result
+            if staff and not self.check_staff_work_time(staff, schedule_day, schedule_time):
+                return
+            if conflict_days and not self.confirm_schedule_conflicts(conflict_days):
+                return
+            on_ok()
+        
+        def on_error(e):
+            print(f"勤務日時の確認エラー: {e}")
+            messagebox.showerror("エラー", f"支援員の勤務日時の確認中にエラーが発生しました: {e}")
+        
+        self.db_runner.read(load, on_done=on_done, on_error=on_error, key='check_case_schedule')
+    
+    @staticmethod
+    def check_staff_work_time(staff, selected_days, schedule_time):
+        """
+        ケースの曜日・開始時間が支援員の勤務日・勤務時間内か確認（外ならエラーを表示）
+        
+        Returns:
+            bool: 勤務日時内（または勤務日時の登録なし）の場合True
+        """
+        work_days_str = staff.get('work_days', '') or ''
+        work_hours_str = staff.get('work_hours', '') or ''
+        
+        # 勤務曜日チェック
+        if work_days_str:
+            unavailable_days = []
+            for day in selected_days:
+                if day not in work_days_str:
+                    unavailable_days.append(day)
+            if unavailable_days:
+                messagebox.showerror(
+                    "エラー", 
+                    f"選択された曜日（{''.join(unavailable_days)}）は\n"
+                    f"この支援員の勤務可能日ではありません。\n"
+                    f"勤務可能日: {work_days_str}"
+                )
+                return False
+        
+        # 勤務時間チェック（ケースの開始時間が勤務時間内か）
+        if work_hours_str and schedule_time:
+            case_ranges = parse_time_range(schedule_time)
+            work_ranges = parse_time_range(work_hours_str)
+            if case_ranges and work_ranges and not contains_time(work_ranges, case_ranges[0][0]):
+                messagebox.showerror(
+                    "エラー",
+                    f"選択された時間帯（{schedule_time}）は\n"
+                    f"この支援員の勤務時間外です。\n"
+                    f"勤務可能時間: {work_hours_str}"
+                )
+                return False
+        return True
+    
+    @staticmethod
+    def confirm_schedule_conflicts(conflict_days):
+        """
+        担当中のケースと日時が重なる日を示して確認する
+        
+        Returns:
+            bool: 保存を続ける場合True（確認で「はい」）
+        """
+        days_text = '、'.join(f"{day.month}/{day.day}" for day in conflict_days[:5])
+        if len(conflict_days) > 5:
+            days_text += f" ほか{len(conflict_days) - 5}日"
+        return messagebox.askyesno(
+            "確認",
+            f"この支援員の他のケースと時間が重なる日があります。\n"
+            f"重なる日: {days_text}\n\n"
+            f"このまま保存しますか？"
+        )
+    
     def close_schedule_window(self):
         """スケジュールウィンドウを閉じる"""
         if self.schedule_window:
@@ -2015,7 +2075,7 @@ class StaffManagerDialog(tk.Toplevel):
             width=15
         )
         area_combo.pack(side="left", padx=5)
-        area_combo.bind('<<ComboboxSelected>>', self.refresh_schedule)
+        area_combo.bind('<<ComboboxSelected>>', self.filter_schedule_area)
         
         # 選択された支援員表示
         self.selected_staff_label = tk.Label(
@@ -2039,311 +2099,69 @@ class StaffManagerDialog(tk.Toplevel):
         )
         refresh_btn.pack(side="left", padx=5)
         
+        # 月間表示（全支援員）
+        month_btn = tk.Button(
+            control_frame,
+            text="📅 月間表示",
+            command=self.open_month_schedule,
+            font=("游ゴシック", 10),
+            bg="#9b59b6",
+            fg="white",
+            padx=10,
+            pady=5
+        )
+        month_btn.pack(side="left", padx=5)
+        
         # スケジュール表本体
         canvas_frame = tk.Frame(parent)
         canvas_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
-        # キャンバス
-        self.schedule_canvas = tk.Canvas(canvas_frame, bg="white", highlightthickness=1, width=600, height=400)
+        # キャンバス（グリッドは作成時に1回だけ描画）
+        self.schedule_canvas = ScheduleCanvas(canvas_frame, width=600, height=400)
         self.schedule_canvas.pack(fill="both", expand=True)
         
-        # スケジュール表を描画
-        self.draw_schedule_grid()
-
-    def draw_schedule_grid(self):
-        """スケジュールグリッドを描画"""
-        canvas = self.schedule_canvas
-        canvas.delete("all")
-        
-        # 定数
-        CELL_WIDTH = 120  # セル幅を少し広げる
-        CELL_HEIGHT = 30  # 30分単位なので少し小さめの高さ
-        # 10:00～19:00の30分単位のタイムスロット
-        TIME_SLOTS = []
-        for h in range(10, 20):  # 10時～19時
-            TIME_SLOTS.append(f"{h:02d}:00")
-            if h < 19:  # 19:30は含めない（19:00まで）
-                TIME_SLOTS.append(f"{h:02d}:30")
-        DAYS = ["月", "火", "水", "木", "金"]
-        
-        # 支援員の勤務情報を取得
-        work_days_str = ""
-        work_hours_str = ""
-        if self.selected_staff_id:
-            staff = self.staff_manager.get_staff_by_id(self.selected_staff_id)
-            if staff:
-                work_days_str = staff.get('work_days', '') or ''
-                work_hours_str = staff.get('work_hours', '') or ''
-        
-        # 勤務可能な曜日のセットを作成
-        available_days = set()
-        if work_days_str:
-            for day in DAYS:
-                if day in work_days_str:
-                    available_days.add(day)
-        
-        # 勤務可能な時間帯を計算
-        def is_work_time(time_str):
-            """指定された時間が勤務時間内かどうかを判定"""
-            if not work_hours_str:
-                return True  # 勤務時間が設定されていない場合は全て可能とする
-            
-            try:
-                # 時間を解析（例: "10:00-18:00" または "10：00～18：00"）
-                time_clean = work_hours_str.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                if '-' in time_clean:
-                    start_str, end_str = time_clean.split('-')
-                    start_parts = start_str.strip().split(':')
-                    end_parts = end_str.strip().split(':')
-                    
-                    start_hour = int(start_parts[0].strip()) if start_parts[0].strip() else 0
-                    start_min = int(start_parts[1].strip()) if len(start_parts) > 1 and start_parts[1].strip() else 0
-                    end_hour = int(end_parts[0].strip()) if end_parts[0].strip() else 0
-                    end_min = int(end_parts[1].strip()) if len(end_parts) > 1 and end_parts[1].strip() else 0
-                    
-                    # チェック対象の時間を解析
-                    time_parts = time_str.split(':')
-                    check_hour = int(time_parts[0].strip())
-                    check_min = int(time_parts[1].strip()) if len(time_parts) > 1 and time_parts[1].strip() else 0
-                    
-                    # 時間を分単位に変換
-                    start_total = start_hour * 60 + start_min
-                    end_total = end_hour * 60 + end_min
-                    check_total = check_hour * 60 + check_min
-                    
-                    # 勤務時間内かチェック
-                    return start_total <= check_total < end_total
-            except:
-                pass
-            
-            return True  # 解析に失敗した場合は可能とする
-        
-        # ヘッダー（曜日）
-        for i, day in enumerate(DAYS):
-            x = 80 + i * CELL_WIDTH
-            canvas.create_rectangle(x, 0, x + CELL_WIDTH, 40, fill="#9b59b6", outline="black")
-            canvas.create_text(x + CELL_WIDTH // 2, 20, text=day, font=("游ゴシック", 12, "bold"), fill="white")
-        
-        # 時間軸（30分単位で全て表示）
-        for i, time in enumerate(TIME_SLOTS):
-            y = 40 + i * CELL_HEIGHT
-            canvas.create_rectangle(0, y, 80, y + CELL_HEIGHT, fill="#ecf0f1", outline="black")
-            # 全ての時間を表示（30分単位）
-            canvas.create_text(40, y + CELL_HEIGHT // 2, text=time, font=("游ゴシック", 9))
-        
-        # グリッド（勤務不可能な時間帯をグレーで表示）
-        for i in range(len(DAYS)):
-            day = DAYS[i]
-            for j in range(len(TIME_SLOTS)):
-                time = TIME_SLOTS[j]
-                x = 80 + i * CELL_WIDTH
-                y = 40 + j * CELL_HEIGHT
-                
-                # 勤務可能かどうかを判定
-                is_day_available = day in available_days if available_days else True
-                is_time_available = is_work_time(time)
-                is_available = is_day_available and is_time_available
-                
-                # 勤務不可能な場合はグレーで塗りつぶす
-                fill_color = "#e8e8e8" if not is_available else "white"
-                outline_color = "#ccc" if not is_available else "#ddd"
-                
-                canvas.create_rectangle(x, y, x + CELL_WIDTH, y + CELL_HEIGHT, fill=fill_color, outline=outline_color)
-        
-        # スケジュールデータを取得して描画
-        try:
-            schedules = self.staff_manager.get_weekly_schedule()
-            # エリアでフィルタリング
-            selected_area = self.area_var.get()
-            if selected_area and selected_area != "全て":
-                # 選択されたエリアの区名を取得
-                all_districts = self.staff_manager.get_all_districts()
-                area_district_names = set()
-                for district in all_districts:
-                    if district.get('area_name') == selected_area:
-                        area_district_names.add(district.get('name'))
-                
-                # エリアに属する区のスケジュールのみをフィルタリング
-                schedules = [s for s in schedules if s.get('district_name') in area_district_names]
-            
-            self.draw_schedule_items(schedules, CELL_WIDTH, CELL_HEIGHT, DAYS, TIME_SLOTS)
-        except Exception as e:
-            print(f"スケジュール取得エラー: {e}")
-            import traceback
-            traceback.print_exc()
-
-    def draw_schedule_items(self, schedules, cell_width, cell_height, days, time_slots):
-        """スケジュールアイテムを描画"""
-        canvas = self.schedule_canvas
-        
-        # 頻度ごとの色を定義
-        def get_frequency_color(frequency):
-            """頻度に応じた色を返す"""
-            if not frequency:
-                return "#9e9e9e"  # デフォルト（グレー）
-            
-            frequency_str = str(frequency).strip()
-            
-            # 毎週：黄色
-            if "毎週" in frequency_str:
-                return "#ffeb3b"  # 黄色
-            
-            # 隔週：オレンジ
-            if "隔週" in frequency_str:
-                return "#ff9800"  # オレンジ
-            
-            # 月１回：緑
-            if "月１回" in frequency_str or "月1回" in frequency_str:
-                return "#4caf50"  # 緑
-            
-            # オンライン：紫
-            if "オンライン" in frequency_str:
-                return "#8e24aa"  # 紫
-            
-            # 不定期：グレー
-            if "不定期" in frequency_str:
-                return "#9e9e9e"  # グレー
-            
-            # 休止中：グレー
-            if "休止中" in frequency_str:
-                return "#9e9e9e"  # グレー
-            
-            # その他（旧形式の互換性のため）
-            if "週" in frequency_str and ("1" in frequency_str or "２" in frequency_str or "2" in frequency_str):
-                return "#ffeb3b"  # 黄色（毎週として扱う）
-            if "隔週" in frequency_str or "隔" in frequency_str:
-                return "#ff9800"  # オレンジ（隔週として扱う）
-            if "月" in frequency_str:
-                return "#4caf50"  # 緑（月１回として扱う）
-            
-            # デフォルト
-            return "#9e9e9e"  # グレー
-        
-        for schedule in schedules:
-            day = schedule.get('day_of_week', '')
-            if day not in days:
-                continue
-            
-            # 位置計算
-            day_idx = days.index(day)
-            start_time = schedule.get('start_time', '')
-            end_time = schedule.get('end_time', '')
-            
-            try:
-                # 全角コロン（：）を半角コロン（:）に変換
-                start_time_normalized = start_time.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                end_time_normalized = end_time.replace('：', ':').replace('～', '-').replace('~', '-').strip()
-                
-                # '-'が含まれている場合は削除
-                start_time_clean = start_time_normalized.replace('-', '').strip()
-                end_time_clean = end_time_normalized.replace('-', '').strip()
-                
-                # 時間を解析
-                if ':' in start_time_clean:
-                    start_parts = start_time_clean.split(':')
-                    start_hour = int(start_parts[0].strip()) if start_parts[0].strip() else 0
-                    start_min = int(start_parts[1].strip()) if len(start_parts) > 1 and start_parts[1].strip() else 0
-                else:
-                    start_hour = int(start_time_clean) if start_time_clean else 0
-                    start_min = 0
-                
-                if ':' in end_time_clean:
-                    end_parts = end_time_clean.split(':')
-                    end_hour = int(end_parts[0].strip()) if end_parts[0].strip() else 0
-                    end_min = int(end_parts[1].strip()) if len(end_parts) > 1 and end_parts[1].strip() else 0
-                else:
-                    end_hour = int(end_time_clean) if end_time_clean else 0
-                    end_min = 0
-                
-                # 10時を基準にしたスロット計算（30分単位）
-                start_total_minutes = (start_hour - 10) * 60 + start_min
-                end_total_minutes = (end_hour - 10) * 60 + end_min
-                
-                # スロットインデックス（30分単位）
-                start_slot = start_total_minutes // 30
-                end_slot = end_total_minutes // 30
-                
-                # 最低1時間（2スロット分）の高さを確保
-                if end_slot <= start_slot:
-                    end_slot = start_slot + 2  # 1時間 = 2スロット（30分×2）
-                
-                # 座標計算
-                x = 80 + day_idx * cell_width + 2
-                y = 40 + start_slot * cell_height + 2
-                height = (end_slot - start_slot) * cell_height - 4
-                
-                # 表示する情報を取得
-                district_name = schedule.get('district_name', '') or ''
-                frequency = schedule.get('frequency', '') or ''
-                
-                # 頻度に応じた色を取得
-                card_color = get_frequency_color(frequency)
-                
-                # カードを描画
-                card = canvas.create_rectangle(
-                    x, y, x + cell_width - 4, y + height,
-                    fill=card_color,
-                    outline="#333",
-                    width=2,
-                    tags=("schedule_item", f"schedule_{schedule.get('id', '')}")
-                )
-                child_first_name = schedule.get('child_first_name', '') or ''
-                location = schedule.get('location', '') or ''
-                
-                # テキスト内容を構築
-                # 1行目: 区名 下の名前（改行なし）
-                # 2行目: 時間（改行）
-                # 3行目: 場所（改行）
-                text_lines = []
-                
-                # 1行目: 区名と下の名前
-                first_line_parts = []
-                if district_name:
-                    first_line_parts.append(district_name)
-                if child_first_name:
-                    first_line_parts.append(child_first_name)
-                if first_line_parts:
-                    text_lines.append(' '.join(first_line_parts))
-                
-                # 2行目: 時間
-                if start_time_normalized and end_time_normalized:
-                    text_lines.append(f"{start_time_normalized}-{end_time_normalized}")
-                
-                # 3行目: 場所
-                if location:
-                    text_lines.append(location)
-                
-                text_content = '\n'.join(text_lines) if text_lines else "情報なし"
-                
-                # セルの高さに応じてフォントサイズを決定（テキストが枠内に収まるように）
-                # 行数に応じて調整（最小8、最大12）
-                num_lines = len(text_lines)
-                if num_lines <= 2:
-                    base_font_size = max(9, min(12, int(height * 0.25)))
-                elif num_lines == 3:
-                    base_font_size = max(8, min(11, int(height * 0.2)))
-                else:
-                    base_font_size = max(8, min(10, int(height * 0.18)))
-                
-                text = canvas.create_text(
-                    x + (cell_width - 4) // 2,
-                    y + height // 2,
-                    text=text_content,
-                    font=("游ゴシック", base_font_size, "bold"),
-                    fill="#000",
-                    width=cell_width - 8,  # テキストの幅を制限
-                    justify="center",  # 中央揃え
-                    anchor="center",  # 中央アンカー
-                    tags=("schedule_item", f"schedule_{schedule.get('id', '')}")
-                )
-                
-            except (ValueError, IndexError) as e:
-                print(f"時間解析エラー: {e}")
-                continue
+        # スケジュールを読み込んで表示
+        self.refresh_schedule()
 
     def refresh_schedule(self, event=None):
-        """スケジュールを更新"""
-        self.draw_schedule_grid()
+        """スケジュールを読み込み直して更新（ワーカースレッドで読み込み、変わったカードだけ描き直す）"""
+        staff_id = self.selected_staff_id
+        
+        def load():
+            staff = self.staff_manager.get_staff_by_id(staff_id) if staff_id else None
+            return staff, self.staff_manager.get_weekly_schedule()
+        
+        self.db_runner.read(
+            load,
+            on_done=self.display_schedule,
+            on_error=lambda e: print(f"スケジュール取得エラー: {e}"),
+            key='schedule'
+        )
+    
+    def display_schedule(self, result):
+        """読み込んだスケジュールを表示"""
+        if not (self.schedule_window and self.schedule_window.winfo_exists()):
+            return
+        staff, schedules = result
+        canvas = self.schedule_canvas
+        # 支援員の勤務情報（勤務不可能な時間帯をグレーで表示）
+        canvas.set_availability(
+            (staff or {}).get('work_days', '') or '',
+            (staff or {}).get('work_hours', '') or ''
+        )
+        canvas.set_schedules(schedules)
+    
+    def filter_schedule_area(self, event=None):
+        """エリアで絞り込み（DBを読み直さず、表示・非表示を切り替えるだけ）"""
+        self.schedule_canvas.set_area(self.area_var.get())
+    
+    def open_month_schedule(self):
+        """全支援員の月間スケジュールを開く（開いている場合は前面に表示）"""
+        if self.month_schedule_window and self.month_schedule_window.winfo_exists():
+            self.month_schedule_window.lift()
+            return
+        from src.ui.month_schedule import MonthScheduleWindow
+        self.month_schedule_window = MonthScheduleWindow(self, self.staff_manager)
 
     def save_staff_new(self):
         """新規支援員を保存"""
@@ -2396,10 +2214,12 @@ class StaffManagerDialog(tk.Toplevel):
                 'notes': notes,
                 'is_active': True
             }
-            
-            # 支援員を追加
-            self.staff_manager.add_staff(staff_data)
-            
+        except Exception as e:
+            print(f"新規追加エラー: {e}")
+            messagebox.showerror("エラー", f"支援員の追加中にエラーが発生しました: {e}")
+            return
+        
+        def on_done(_):
             # フォームをクリア
             self.clear_form()
             
@@ -2407,10 +2227,13 @@ class StaffManagerDialog(tk.Toplevel):
             self.refresh_staff_tree()
             
             messagebox.showinfo("完了", "新しい支援員を追加しました")
-            
-        except Exception as e:
+        
+        def on_error(e):
             print(f"新規追加エラー: {e}")
             messagebox.showerror("エラー", f"支援員の追加中にエラーが発生しました: {e}")
+        
+        # 支援員を追加（書き込みスレッド）
+        self.db_runner.write(lambda: self.staff_manager.add_staff(staff_data), on_done=on_done, on_error=on_error)
     
     def clear_form(self):
         """フォームをクリア"""
@@ -2489,18 +2312,24 @@ class StaffManagerDialog(tk.Toplevel):
                 'notes': notes,
                 'is_active': True
             }
-            
-            # 支援員を更新
-            self.staff_manager.update_staff(self.current_staff_id, staff_data)
-            
+        except Exception as e:
+            print(f"更新エラー: {e}")
+            messagebox.showerror("エラー", f"支援員の更新中にエラーが発生しました: {e}")
+            return
+        
+        def on_done(_):
             # 一覧を更新
             self.refresh_staff_tree()
             
             messagebox.showinfo("完了", "支援員情報を更新しました")
-            
-        except Exception as e:
+        
+        def on_error(e):
             print(f"更新エラー: {e}")
             messagebox.showerror("エラー", f"支援員の更新中にエラーが発生しました: {e}")
+        
+        # 支援員を更新（書き込みスレッド）
+        staff_id = self.current_staff_id
+        self.db_runner.write(lambda: self.staff_manager.update_staff(staff_id, staff_data), on_done=on_done, on_error=on_error)
     
     def delete_staff_confirm(self):
         """支援員削除の確認"""
@@ -2510,65 +2339,61 @@ class StaffManagerDialog(tk.Toplevel):
         
         result = messagebox.askyesno("確認", "この支援員を削除しますか？")
         if result:
-            try:
-                self.staff_manager.delete_staff(self.current_staff_id)
+            def on_done(_):
                 messagebox.showinfo("完了", "支援員を削除しました")
                 self.refresh_staff_tree()
-            except Exception as e:
+            
+            def on_error(e):
                 print(f"削除エラー: {e}")
                 messagebox.showerror("エラー", f"削除中にエラーが発生しました: {e}")
-    
-    def update_db_mtime(self):
-        """データベースファイルの更新日時を記録"""
-        try:
-            if self.db_path.exists():
-                self.last_db_mtime = self.db_path.stat().st_mtime
-        except Exception as e:
-            print(f"データベース更新日時取得エラー: {e}")
+            
+            # 支援員を削除（書き込みスレッド）
+            staff_id = self.current_staff_id
+            self.db_runner.write(lambda: self.staff_manager.delete_staff(staff_id), on_done=on_done, on_error=on_error)
     
     def check_and_refresh(self):
-        """データベースの更新をチェックして、必要に応じてリフレッシュ"""
-        if not self.auto_refresh_enabled:
+        """データベースの変更をチェックして、変更されたテーブルを表示している一覧だけを更新"""
+        if not self.auto_refresh_enabled or not self.winfo_exists():
             return
         
         try:
-            if self.db_path.exists():
-                current_mtime = self.db_path.stat().st_mtime
-                
-                # データベースが更新されていた場合
-                if self.last_db_mtime is not None and current_mtime > self.last_db_mtime:
-                    # 現在選択されている支援員IDを保持
-                    selected_id = self.selected_staff_id
-                    
-                    # データをリフレッシュ
-                    self.refresh_staff_tree()
-                    self.refresh_unassigned_tree()
-                    
-                    # ケース一覧も更新（支援員が選択されている場合）
-                    if selected_id:
-                        self.refresh_case_list()
-                    
-                    # 更新日時を更新
-                    self.last_db_mtime = current_mtime
-                    
-                    print("✅ データベースの変更を検出し、画面を更新しました")
-                else:
-                    # 更新日時を更新（初回のみ）
-                    if self.last_db_mtime is None:
-                        self.last_db_mtime = current_mtime
+            changed = self.change_tracker.check()
+            if changed:
+                self.refresh_changed_views(changed)
         except Exception as e:
             print(f"自動リフレッシュチェックエラー: {e}")
         
-        # 次のチェックをスケジュール（5分後）
-        if self.auto_refresh_enabled:
-            self.after(self.refresh_interval, self.check_and_refresh)
+        # 次のチェックをスケジュール
+        self.after(self.refresh_interval, self.check_and_refresh)
+    
+    def refresh_changed_views(self, changed):
+        """変更されたテーブルを表示している一覧を更新"""
+        refreshers = {
+            'staff_tree': self.refresh_staff_tree,
+            'assign_staff_tree': self.refresh_assign_staff_tree,
+            'unassigned_tree': self.refresh_unassigned_tree,
+        }
+        # ケース一覧は支援員が選択されている場合のみ
+        if self.selected_staff_id:
+            refreshers['case_list'] = self.refresh_case_list
+        # スケジュールは開いている場合のみ
+        if self.schedule_window and self.schedule_window.winfo_exists():
+            refreshers['schedule'] = self.refresh_schedule
+        if self.month_schedule_window and self.month_schedule_window.winfo_exists():
+            refreshers['month_schedule'] = self.month_schedule_window.refresh
+        
+        refreshed = [name for name, refresh in refreshers.items() if VIEW_TABLES[name] & changed]
+        for name in refreshed:
+            refreshers[name]()
+        if refreshed:
+            print(f"✅ データベースの変更を検出し、画面を更新しました（{', '.join(sorted(changed))}）")
     
     def start_auto_refresh(self):
         """自動リフレッシュを開始"""
-        # 初回チェックは5分後
         self.after(self.refresh_interval, self.check_and_refresh)
     
     def on_close(self):
         """ウィンドウを閉じる際の処理"""
         self.auto_refresh_enabled = False
+        self.change_tracker.close()
         self.destroy()
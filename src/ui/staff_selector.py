@@ -1,22 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from src.database.staff import StaffManager
+from src.ui.db_runner import DbRunner
+from src.ui.virtual_tree import VirtualTreeview, prepare_pager
 
 class StaffSelectorDialog(tk.Toplevel):
     def __init__(self, parent, support_wishes=None):
         super().__init__(parent)
         
-        self.staff_manager = StaffManager()
+        # スキーマの確認・予定の同期は書き込みのため、書き込みスレッドで作成（on_staff_manager_ready）
+        self.staff_manager = None
         self.selected_staff = None
         self.support_wishes = support_wishes or {}
         
+        # 検索はワーカースレッドで実行し、結果をafter()で受け取る
+        self.busy_var = tk.StringVar()
+        self.db_runner = DbRunner(self, on_busy=self.on_db_busy)
+        
         self.title("支援員選択")
         self.geometry("1000x650")
         self.transient(parent)
         self.grab_set()
         
-        self.create_widgets()
-        self.search_staff()
+        # 準備ができるまでの表示
+        self.loading_label = tk.Label(self, text="🔄 データベースを準備中…", font=("游ゴシック", 11), fg="#7f8c8d")
+        self.loading_label.pack(expand=True)
+        
+        self.db_runner.write(StaffManager, on_done=self.on_staff_manager_ready, on_error=self.on_staff_manager_error)
         
         # 中央に配置
         self.update_idletasks()
@@ -24,6 +34,22 @@ class StaffSelectorDialog(tk.Toplevel):
         y = (self.winfo_screenheight() // 2) - (self.winfo_height() // 2)
         self.geometry(f'+{x}+{y}')
     
+    def on_staff_manager_ready(self, staff_manager):
+        """StaffManagerを作成できた時（画面を作り、全支援員を表示）"""
+        self.staff_manager = staff_manager
+        self.loading_label.destroy()
+        self.create_widgets()
+        self.search_staff()
+        
+        # Escで検索をキャンセル（準備中の作成はキャンセルしない）
+        self.bind('<Escape>', lambda e: self.db_runner.cancel())
+    
+    def on_staff_manager_error(self, error):
+        """StaffManagerを作成できなかった時"""
+        print(f"支援員選択の準備エラー: {error}")
+        messagebox.showerror("エラー", f"データベースの準備中にエラーが発生しました: {error}")
+        self.destroy()
+    
     def create_widgets(self):
         # ヘッダー
         header_frame = tk.Frame(self, bg="#3498db", height=60)
@@ -128,7 +154,10 @@ class StaffSelectorDialog(tk.Toplevel):
         
         # ツリービュー（表形式）
         columns = ('name', 'age', 'gender', 'region', 'work_days', 'work_hours', 'hobbies_skills', 'dropbox')
-        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=15)
+        self.tree = VirtualTreeview(
+            list_frame, columns=columns, show='headings', height=15,
+            format_row=self._format_staff_row, db_runner=self.db_runner
+        )
         
         # 列の設定
         self.tree.heading('name', text='名前')
@@ -176,6 +205,9 @@ class StaffSelectorDialog(tk.Toplevel):
         )
         cancel_btn.pack(side="left")
         
+        # 検索中の表示
+        tk.Label(button_frame, textvariable=self.busy_var, font=("游ゴシック", 9), fg="#7f8c8d").pack(side="left", padx=20)
+        
         select_btn = tk.Button(
             button_frame,
             text="✅ この支援員を選択",
@@ -195,13 +227,14 @@ class StaffSelectorDialog(tk.Toplevel):
     
     def init_region_list(self):
         """地域リストを初期化"""
-        regions = []
-        for staff in self.staff_manager.get_all_staff():
-            region = staff['region']
-            if region and region not in regions:
-                regions.append(region)
-        regions.sort()
-        self.region_combo['values'] = [''] + regions
+        def on_done(regions):
+            self.region_combo['values'] = [''] + regions
+        
+        self.db_runner.read(self.staff_manager.get_staff_regions, on_done=on_done, key='regions')
+    
+    def on_db_busy(self, busy):
+        """検索中の表示を切り替え"""
+        self.busy_var.set("🔄 検索中…（Escでキャンセル）" if busy else "")
     
     def search_staff(self):
         """支援員を検索"""
@@ -245,50 +278,67 @@ class StaffSelectorDialog(tk.Toplevel):
         print(f"  希望時間: {preferred_time or '指定なし'}")
         print(f"  趣味・特技: {interests or '指定なし'}")
         
-        # 検索実行
-        staff_list = self.staff_manager.search_matching_staff(
-            preferred_region=preferred_region,
-            age_range=age_range,
-            gender_preference=gender_preference,
-            preferred_day=preferred_day,
-            preferred_time=preferred_time,
-            interests=interests
-        )
-        
-        # 検索条件が何も設定されていない場合は全支援員を表示
+        # 検索条件が何も設定されていない場合は全支援員を表示（見えている行だけをDBから読み込む）
         if not any([preferred_region, age_range, gender_preference, preferred_day, preferred_time, interests]):
-            staff_list = self.staff_manager.get_all_staff()
             print("📋 検索条件なし: 全支援員を表示")
+            visible_rows = self.tree.visible_rows
+            self.db_runner.read(
+                lambda: prepare_pager(self.staff_manager.staff_pager(), visible_rows=visible_rows),
+                on_done=lambda source: self.display_staff_list(source=source),
+                on_error=self.on_search_error,
+                key='search'
+            )
+            return
         
-        # 結果を表示
-        self.display_staff_list(staff_list)
+        # 検索実行（ワーカースレッド。前の検索が終わっていなければキャンセル）
+        self.db_runner.read(
+            lambda: self.staff_manager.search_matching_staff(
+                preferred_region=preferred_region,
+                age_range=age_range,
+                gender_preference=gender_preference,
+                preferred_day=preferred_day,
+                preferred_time=preferred_time,
+                interests=interests
+            ),
+            on_done=self.display_staff_list,
+            on_error=self.on_search_error,
+            key='search'
+        )
+    
+    def on_search_error(self, error):
+        """検索に失敗した時"""
+        print(f"支援員検索エラー: {error}")
+        messagebox.showerror("エラー", f"支援員の検索中にエラーが発生しました: {error}")
     
-    def display_staff_list(self, staff_list):
-        """支援員リストを表示"""
-        # 既存のアイテムをクリア
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def display_staff_list(self, staff_list=None, source=None):
+        """支援員リスト（またはprepare_pagerで読み込んだ結果）を表示"""
+        # 見えている行だけを作り、支援員IDごとに差分を反映
+        if source is not None:
+            self.tree.set_source(source, top=True)
+        else:
+            self.tree.set_rows(staff_list or [], top=True)
         
         # 検索結果の件数を表示
-        result_count = len(staff_list)
+        result_count = self.tree.total
         print(f"🔍 検索結果: {result_count}名の支援員が見つかりました")
         
         if result_count == 0:
             # 検索結果が0件の場合、条件を緩和した検索を提案
             self.show_search_suggestions()
-        
-        # 新しいアイテムを追加
-        for staff in staff_list:
-            self.tree.insert('', 'end', values=(
-                staff['name'],
-                staff['age'],
-                staff['gender'],
-                staff['region'],
-                staff['work_days'] or '',
-                staff['work_hours'] or '',
-                staff['hobbies_skills'] or '',
-                staff['dropbox_number'] or ''
-            ), tags=(staff['id'],))
+    
+    @staticmethod
+    def _format_staff_row(staff):
+        """支援員一覧の1行"""
+        return (
+            staff['name'],
+            staff['age'],
+            staff['gender'],
+            staff['region'],
+            staff['work_days'] or '',
+            staff['work_hours'] or '',
+            staff['hobbies_skills'] or '',
+            staff['dropbox_number'] or ''
+        ), (staff['id'],)
     
     def show_search_suggestions(self):
         """検索結果が0件の場合の提案を表示"""
@@ -317,8 +367,20 @@ class StaffSelectorDialog(tk.Toplevel):
         item = self.tree.item(selection[0])
         staff_id = item['tags'][0]
         
-        self.selected_staff = self.staff_manager.get_staff_by_id(staff_id)
-        self.destroy()
+        def on_done(staff):
+            self.selected_staff = staff
+            self.destroy()
+        
+        def on_error(e):
+            print(f"支援員取得エラー: {e}")
+            messagebox.showerror("エラー", f"支援員の読み込み中にエラーが発生しました: {e}")
+        
+        self.db_runner.read(
+            lambda: self.staff_manager.get_staff_by_id(staff_id),
+            on_done=on_done,
+            on_error=on_error,
+            key='select'
+        )
     
     def get_selected_staff(self):
         """選択された支援員を取得"""
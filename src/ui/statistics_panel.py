@@ -0,0 +1,245 @@
+"""
+統計パネル
+- 支援員数・担当ケース数・面談記録の課題の件数・月別の受付件数を表示する
+- 集計テーブル（src/database/analytics.py）から読むため、データ量が増えても表示にかかる時間は変わらない
+- 他のウィンドウ・他のPCで集計の元のテーブルが変更されると自動で読み直す
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from src.database.analytics import GROUPINGS, StatisticsManager, parse_month
+from src.database.changes import ChangeTracker
+from src.ui.db_runner import DbRunner
+
+FONT_FAMILY = "游ゴシック"
+HEADER_COLOR = "#9b59b6"
+BAR_COLOR = "#ab47bc"
+
+# 変更を確認する間隔（ミリ秒）と、読み直す元のテーブル
+REFRESH_INTERVAL = 2000
+SOURCE_TABLES = {'staff', 'staff_cases', 'cases', 'interview_history'}
+
+# 月別の棒グラフ
+BAR_WIDTH = 36
+CHART_HEIGHT = 220
+CHART_MARGIN = 30
+
+
+def grade_label(grade):
+    """学年（1～12）の表示"""
+    if not grade:
+        return '不明'
+    if grade <= 6:
+        return f"小{grade}"
+    if grade <= 9:
+        return f"中{grade - 6}"
+    return f"高{grade - 9}"
+
+
+def group_label(grouping, value):
+    if grouping == '学年':
+        return grade_label(value)
+    return value or '不明'
+
+
+class StatisticsWindow(tk.Toplevel):
+    """統計"""
+
+    def __init__(self, parent, db_path=None):
+        super().__init__(parent)
+        self.title("統計")
+        self.geometry("1000x600")
+        self.statistics = StatisticsManager(db_path)
+        self.db_runner = DbRunner(self, on_busy=self.on_db_busy)
+        self.change_tracker = ChangeTracker(self.statistics.db_path)
+        self.change_tracker.check()
+        self._closed = False
+
+        self.grouping_var = tk.StringVar(value='学年')
+        self.since_var = tk.StringVar()
+        self.until_var = tk.StringVar()
+        self.status_var = tk.StringVar()
+
+        self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.refresh()
+        self.after(REFRESH_INTERVAL, self.check_changes)
+
+    def create_widgets(self):
+        control_frame = tk.Frame(self)
+        control_frame.pack(fill="x", padx=10, pady=5)
+        tk.Label(control_frame, text="期間（YYYY-MM）:", font=(FONT_FAMILY, 10)).pack(side="left")
+        tk.Entry(control_frame, textvariable=self.since_var, width=9).pack(side="left", padx=2)
+        tk.Label(control_frame, text="～", font=(FONT_FAMILY, 10)).pack(side="left")
+        tk.Entry(control_frame, textvariable=self.until_var, width=9).pack(side="left", padx=2)
+        tk.Button(control_frame, text="🔄 更新", command=self.refresh, font=(FONT_FAMILY, 10),
+                  bg="#3498db", fg="white", padx=10).pack(side="left", padx=10)
+
+        tk.Label(self, textvariable=self.status_var, font=(FONT_FAMILY, 9), anchor="w").pack(
+            side="bottom", fill="x", padx=10, pady=(0, 5))
+
+        notebook = ttk.Notebook(self)
+        notebook.pack(fill="both", expand=True, padx=10, pady=5)
+
+        # 支援員
+        staff_tab = tk.Frame(notebook)
+        notebook.add(staff_tab, text="支援員")
+        self.total_label = tk.Label(staff_tab, font=(FONT_FAMILY, 14, "bold"), fg=HEADER_COLOR)
+        self.total_label.pack(anchor="w", padx=10, pady=10)
+        tables_frame = tk.Frame(staff_tab)
+        tables_frame.pack(fill="both", expand=True, padx=10)
+        self.staff_trees = {}
+        for key, title in (('gender_stats', '性別'), ('age_stats', '年代'), ('region_stats', '地域')):
+            tree = self._create_tree(tables_frame, [(title, 160), ('人数', 60)])
+            tree.master.pack(side="left", fill="both", expand=True, padx=5)
+            self.staff_trees[key] = tree
+
+        # 担当ケース
+        caseload_tab = tk.Frame(notebook)
+        notebook.add(caseload_tab, text="担当ケース")
+        self.caseload_tree = self._create_tree(caseload_tab, [('支援員', 200), ('稼働中のケース', 110), ('担当したケース', 110)])
+        self.caseload_tree.master.pack(fill="both", expand=True, padx=10, pady=10)
+
+        # 課題
+        issue_tab = tk.Frame(notebook)
+        notebook.add(issue_tab, text="課題")
+        issue_control = tk.Frame(issue_tab)
+        issue_control.pack(fill="x", padx=10, pady=5)
+        tk.Label(issue_control, text="集計単位:", font=(FONT_FAMILY, 10)).pack(side="left")
+        grouping_combo = ttk.Combobox(issue_control, textvariable=self.grouping_var, values=list(GROUPINGS),
+                                      state="readonly", width=6)
+        grouping_combo.pack(side="left", padx=5)
+        grouping_combo.bind('<<ComboboxSelected>>', lambda event: self.refresh())
+        self.issue_frame = tk.Frame(issue_tab)
+        self.issue_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.issue_tree = None
+        self._issue_columns = None
+
+        # 月別の受付
+        intake_tab = tk.Frame(notebook)
+        notebook.add(intake_tab, text="月別の受付")
+        self.chart = tk.Canvas(intake_tab, bg="white", height=CHART_HEIGHT + 2 * CHART_MARGIN)
+        chart_scrollbar = ttk.Scrollbar(intake_tab, orient="horizontal", command=self.chart.xview)
+        self.chart.configure(xscrollcommand=chart_scrollbar.set)
+        chart_scrollbar.pack(side="bottom", fill="x")
+        self.chart.pack(fill="both", expand=True, padx=10, pady=10)
+
+    @staticmethod
+    def _create_tree(parent, columns):
+        """見出し付きの一覧（縦・横スクロール付き）"""
+        frame = tk.Frame(parent)
+        names = [f"c{i}" for i in range(len(columns))]
+        tree = ttk.Treeview(frame, columns=names, show='headings')
+        for name, (title, width) in zip(names, columns):
+            tree.heading(name, text=title)
+            tree.column(name, width=width, anchor="w" if name == 'c0' else "e", stretch=name == 'c0')
+        y_scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        x_scrollbar = ttk.Scrollbar(frame, orient="horizontal", command=tree.xview)
+        tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
+        y_scrollbar.pack(side="right", fill="y")
+        x_scrollbar.pack(side="bottom", fill="x")
+        tree.pack(side="left", fill="both", expand=True)
+        return tree
+
+    def on_db_busy(self, busy):
+        if busy:
+            self.status_var.set("⏳ 読み込み中...")
+
+    def refresh(self):
+        """集計テーブルをワーカースレッドで読み込んで表示"""
+        grouping = self.grouping_var.get()
+        since = parse_month(self.since_var.get())
+        until = parse_month(self.until_var.get())
+        statistics = self.statistics
+
+        def load():
+            return {
+                'grouping': grouping,
+                'staff': statistics.staff_summary(),
+                'caseloads': statistics.caseloads(),
+                'issues': statistics.issue_table(grouping, since, until),
+                'intake': statistics.monthly_intake(since, until),
+            }
+
+        self.db_runner.read(
+            load,
+            on_done=self.display,
+            on_error=lambda e: self.status_var.set(f"❌ 統計の取得に失敗しました: {e}"),
+            key='statistics'
+        )
+
+    def display(self, result):
+        if not self.winfo_exists():
+            return
+        staff = result['staff']
+        self.total_label.config(text=f"稼働中の支援員: {staff['total_count']}人")
+        for key, tree in self.staff_trees.items():
+            self._fill(tree, [(name or '不明', count) for name, count in staff[key].items()])
+
+        self._fill(self.caseload_tree, [
+            (row['name'], row['active_cases'], row['cases']) for row in result['caseloads']
+        ])
+
+        self._display_issues(result['grouping'], *result['issues'])
+        self._draw_intake(result['intake'])
+        total = sum(count for _, count in result['intake'])
+        self.status_var.set(f"面談記録 {total}件（{len(result['intake'])}か月）を集計しました")
+
+    @staticmethod
+    def _fill(tree, rows):
+        tree.delete(*tree.get_children())
+        for row in rows:
+            tree.insert('', 'end', values=row)
+
+    def _display_issues(self, grouping, issues, rows):
+        """課題の件数（行: 集計単位、列: 課題。件数と面談件数に対する割合）"""
+        columns = tuple(issues)
+        if columns != self._issue_columns:
+            # 課題の列が変わった時だけ一覧を作り直す
+            if self.issue_tree is not None:
+                self.issue_tree.master.destroy()
+            self.issue_tree = self._create_tree(
+                self.issue_frame, [('', 80), ('面談件数', 70)] + [(issue, 110) for issue in issues]
+            )
+            self.issue_tree.master.pack(fill="both", expand=True)
+            self._issue_columns = columns
+        self.issue_tree.heading('c0', text=grouping)
+
+        table = []
+        for group, total, counts in rows:
+            cells = [f"{counts.get(issue, 0)} ({counts.get(issue, 0) / total:.0%})" for issue in issues]
+            table.append((group_label(grouping, group), total, *cells))
+        self._fill(self.issue_tree, table)
+
+    def _draw_intake(self, intake):
+        """月別の受付件数の棒グラフ"""
+        canvas = self.chart
+        canvas.delete("all")
+        if not intake:
+            canvas.create_text(CHART_MARGIN, CHART_MARGIN, text="面談記録がありません", anchor="nw",
+                               font=(FONT_FAMILY, 10))
+            return
+        peak = max(count for _, count in intake)
+        bottom = CHART_MARGIN + CHART_HEIGHT
+        for i, (month, count) in enumerate(intake):
+            x = CHART_MARGIN + i * (BAR_WIDTH + 8)
+            height = CHART_HEIGHT * count / peak
+            canvas.create_rectangle(x, bottom - height, x + BAR_WIDTH, bottom, fill=BAR_COLOR, outline="")
+            canvas.create_text(x + BAR_WIDTH / 2, bottom - height - 8, text=str(count), font=(FONT_FAMILY, 8))
+            canvas.create_text(x + BAR_WIDTH / 2, bottom + 12, text=month[2:] if month else '不明',
+                               font=(FONT_FAMILY, 8))
+        width = CHART_MARGIN * 2 + len(intake) * (BAR_WIDTH + 8)
+        canvas.configure(scrollregion=(0, 0, width, bottom + CHART_MARGIN))
+
+    def check_changes(self):
+        """集計の元のテーブルが変更されていたら読み直す"""
+        if self._closed:
+            return
+        if self.change_tracker.check() & SOURCE_TABLES:
+            self.refresh()
+        self.after(REFRESH_INTERVAL, self.check_changes)
+
+    def on_close(self):
+        self._closed = True
+        self.change_tracker.close()
+        self.destroy()
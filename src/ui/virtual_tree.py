@@ -0,0 +1,470 @@
+"""
+仮想化したツリービュー（行数の多い一覧用）
+- 画面に見えている行だけをTreeviewの項目として作り、スクロールに合わせて入れ替える
+- データはリスト（set_rows）またはDBのキーセットページャー（set_pager）からページ単位で読み込む
+- db_runnerを指定すると、スクロールで必要になったページはワーカースレッドで読み込む
+  （読み込み中は今の項目のまま、読み込めたら表示を更新）
+- 更新時は全削除・全追加をせず、主キー（項目のiid）ごとに差分だけを反映する
+  （追加・値の変更・削除・並べ替え。選択中の行は画面外にスクロールしても保持）
+- 通常のttk.Treeviewと同じように Scrollbar の command と yscrollcommand で接続できる
+
+項目は直接 insert / delete せず、set_rows / set_pager / refresh で更新すること。
+"""
+from collections import OrderedDict
+from tkinter import ttk
+
+# 1回に読み込む行数
+PAGE_SIZE = 200
+
+# メモリに残しておくページ数
+CACHED_PAGES = 8
+
+# マウスホイール1目盛りでスクロールする行数
+WHEEL_ROWS = 3
+
+# 行の高さが測れない場合の既定値（ピクセル）
+DEFAULT_ROW_HEIGHT = 20
+
+
+class _ListSource:
+    """メモリ上の行のリスト"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def count(self):
+        return len(self.rows)
+
+    def page(self, index, page_size):
+        start = index * page_size
+        return self.rows[start:start + page_size]
+
+
+class _PagerSource:
+    """KeysetPager（件数と各ページの開始位置は読み込み時に1回だけ取得）"""
+
+    def __init__(self, pager, page_size, preload_row=None, preload_count=0):
+        self.pager = pager
+        self.total = pager.count()
+        self.anchors = pager.anchors(page_size) if self.total > page_size else []
+        # 読み込み時に先に取得しておくページ（ワーカースレッドで読み込む場合）
+        self.preloaded = {}
+        if preload_row is not None:
+            first = max(0, min(preload_row, self.total - preload_count)) // page_size
+            last = max(0, min(self.total, preload_row + preload_count) - 1) // page_size
+            for index in range(first, last + 1):
+                self.preloaded[index] = self.page(index, page_size)
+
+    def count(self):
+        return self.total
+
+    def page(self, index, page_size):
+        if index == 0:
+            return self.pager.fetch_after(None, page_size)
+        if index > len(self.anchors):
+            return []
+        return self.pager.fetch_after(self.anchors[index - 1], page_size)
+
+
+def prepare_pager(pager, page_size=PAGE_SIZE, first_row=0, visible_rows=0):
+    """
+    KeysetPagerの件数・ページの開始位置・表示位置のページを読み込む
+
+    Tkを使わないため、ワーカースレッドで実行して結果を VirtualTreeview.set_source に渡せる。
+
+    Args:
+        first_row: 表示位置（VirtualTreeview.first_row）
+        visible_rows: 表示する行数（VirtualTreeview.visible_rows）
+    """
+    return _PagerSource(pager, page_size, first_row, visible_rows)
+
+
+class VirtualTreeview(ttk.Treeview):
+    """見えている行だけを作る ttk.Treeview"""
+
+    def __init__(self, master=None, key='id', format_row=None, page_size=PAGE_SIZE, db_runner=None, **kw):
+        """
+        Args:
+            master: 親ウィジェット
+            key: 主キーの列名（行の辞書のキー。値が項目のiidになる）
+            format_row: 行の辞書から (values, tags) を作る関数
+            page_size: 1回に読み込む行数
+            db_runner: DbRunner（指定するとDBのページをワーカースレッドで読み込む。省略時はその場で読み込む）
+            **kw: ttk.Treeviewのオプション
+        """
+        super().__init__(master, **kw)
+        self.key = key
+        self.format_row = format_row or (lambda row: (tuple(row.values()), ()))
+        self.page_size = page_size
+        self.db_runner = db_runner
+
+        self._source = None
+        self._pages = OrderedDict()
+        # 読み込み中のページ番号（db_runnerを使う場合）
+        self._loading = set()
+        # ページの読み込み後に選択する表示中の位置（読み込み中のキー操作）
+        self._select_after_load = None
+        self._total = 0
+        # 先頭に表示している行の位置
+        self._offset = 0
+        self._visible_rows = int(kw.get('height', 10))
+        self._row_height = None
+        self._header_height = None
+        # 表示中の項目（iid → (values, tags)）
+        self._rendered = {}
+        # 選択中の行のiid（画面外の行を含む）
+        self._selected = set()
+        self._yscrollcommand = None
+
+        # Treeview標準のバインド・アプリのバインドより先に処理する
+        tag = f'VirtualTreeview{self}'
+        self.bindtags((tag,) + self.bindtags())
+        self.bind_class(tag, '<Configure>', self._on_configure)
+        self.bind_class(tag, '<<TreeviewSelect>>', self._on_select)
+        self.bind_class(tag, '<MouseWheel>', self._on_mousewheel)
+        self.bind_class(tag, '<Button-4>', lambda e: self._scroll_by(-WHEEL_ROWS))
+        self.bind_class(tag, '<Button-5>', lambda e: self._scroll_by(WHEEL_ROWS))
+        for keysym in ('Up', 'Down', 'Prior', 'Next', 'Home', 'End'):
+            self.bind_class(tag, f'<Key-{keysym}>', self._on_key)
+
+    # ---- データの設定 ----
+
+    @property
+    def total(self):
+        """全行数"""
+        return self._total
+
+    @property
+    def first_row(self):
+        """先頭に表示している行の位置"""
+        return self._offset
+
+    @property
+    def visible_rows(self):
+        """表示できる行数"""
+        return self._visible_rows
+
+    def set_rows(self, rows, top=False):
+        """
+        行の辞書のリストを表示
+
+        Args:
+            rows: 行の辞書のリスト
+            top: Trueの場合は先頭までスクロール（Falseの場合は今の位置のまま差分を反映）
+        """
+        self._load(_ListSource(rows), top)
+
+    def set_pager(self, pager, top=False):
+        """KeysetPagerの結果を表示（見えている部分のページだけをDBから読み込む）"""
+        if self.db_runner is not None:
+            self._load_pager_async(pager, top)
+        else:
+            self._load(_PagerSource(pager, self.page_size), top)
+
+    def set_source(self, source, top=False):
+        """prepare_pagerで読み込んだ結果を表示"""
+        self._load(source, top)
+
+    def refresh(self):
+        """データを読み込み直して差分を反映（スクロール位置と選択は保持）"""
+        if isinstance(self._source, _PagerSource):
+            self.set_pager(self._source.pager)
+        elif self._source is not None:
+            self._render()
+
+    def _load_pager_async(self, pager, top):
+        """件数・ページの開始位置・表示位置のページをワーカースレッドで読み込んでから表示"""
+        page_size = self.page_size
+        first_row = 0 if top else self._offset
+        visible_rows = self._visible_rows
+        self.db_runner.read(
+            lambda: prepare_pager(pager, page_size, first_row, visible_rows),
+            on_done=lambda source: self._load(source, top),
+            on_error=lambda e: print(f"一覧の読み込みエラー: {e}"),
+            key=f'virtual_tree_source_{self}'
+        )
+
+    def _load(self, source, top):
+        self._source = source
+        self._pages.clear()
+        self._pages.update(getattr(source, 'preloaded', {}))
+        self._loading.clear()
+        self._total = source.count()
+        if top:
+            self._offset = 0
+        self._render()
+
+    def _page(self, index):
+        """
+        ページを取得（最近使ったページはメモリから）
+
+        db_runnerを使う場合、DBのページがメモリになければ読み込みを依頼してNoneを返す。
+        """
+        page = self._pages.get(index)
+        if page is None:
+            if self.db_runner is not None and isinstance(self._source, _PagerSource):
+                return None
+            page = self._source.page(index, self.page_size)
+            self._store_page(index, page)
+        else:
+            self._pages.move_to_end(index)
+        return page
+
+    def _store_page(self, index, page):
+        self._pages[index] = page
+        while len(self._pages) > CACHED_PAGES:
+            self._pages.popitem(last=False)
+
+    def _request_pages(self, indexes):
+        """ページをワーカースレッドで読み込み、読み込めたら表示し直す"""
+        if set(indexes) <= self._loading:
+            # 読み込み中
+            return
+        source = self._source
+        page_size = self.page_size
+        self._loading = set(indexes)
+
+        def on_done(pages):
+            if self._source is not source:
+                # 読み込み中にデータを読み込み直した
+                return
+            self._loading.difference_update(pages)
+            for index, page in pages.items():
+                self._store_page(index, page)
+            self._render()
+
+        def on_error(e):
+            self._loading.difference_update(indexes)
+            print(f"一覧のページ読み込みエラー: {e}")
+
+        # スクロールを続けた場合は、まだ始まっていない前の読み込みをキャンセル（読み込み中のページは置き換え）
+        task = self.db_runner.read(
+            lambda: {index: source.page(index, page_size) for index in indexes},
+            on_done=on_done,
+            on_error=on_error,
+            key=f'virtual_tree_pages_{self}'
+        )
+        if task is None:
+            self._loading.difference_update(indexes)
+
+    def _window_rows(self):
+        """見えている範囲の行（読み込み中のページがある場合はNone）"""
+        rows = []
+        missing = []
+        position = self._offset
+        end = min(self._total, self._offset + self._visible_rows)
+        while position < end:
+            index, start = divmod(position, self.page_size)
+            page = self._page(index)
+            if page is None:
+                missing.append(index)
+                position = (index + 1) * self.page_size
+                continue
+            chunk = page[start:start + end - position]
+            if not chunk:
+                break
+            rows.extend(chunk)
+            position += len(chunk)
+        if missing:
+            self._request_pages(missing)
+            return None
+        self._loading.clear()
+        return rows
+
+    # ---- 表示 ----
+
+    def _render(self):
+        """見えている範囲の項目を差分で更新"""
+        self._offset = max(0, min(self._offset, self._total - self._visible_rows))
+
+        rows = self._window_rows() if self._source is not None else []
+        if rows is None:
+            # ページの読み込み中は今の項目のまま（スクロールバーの位置だけ更新）
+            self._update_scrollbar()
+            return
+
+        items = []
+        seen = set()
+        for row in rows:
+            iid = str(row[self.key])
+            if iid in seen:
+                continue
+            seen.add(iid)
+            values, tags = self.format_row(row)
+            items.append((iid, tuple(values), tuple(tags)))
+
+        stale = [iid for iid in self._rendered if iid not in seen]
+        if stale:
+            self.delete(*stale)
+            for iid in stale:
+                del self._rendered[iid]
+
+        for index, (iid, values, tags) in enumerate(items):
+            if iid not in self._rendered:
+                self.insert('', index, iid=iid, values=values, tags=tags)
+            else:
+                if self._rendered[iid] != (values, tags):
+                    self.item(iid, values=values, tags=tags)
+                if self.index(iid) != index:
+                    self.move(iid, '', index)
+            self._rendered[iid] = (values, tags)
+
+        visible_selected = [iid for iid, _, _ in items if iid in self._selected]
+        if set(self.selection()) != set(visible_selected):
+            self.selection_set(visible_selected)
+
+        # Treeview自体はスクロールさせない（常に先頭の項目から表示）
+        self.tk.call(self._w, 'yview', 'moveto', 0)
+        self._update_scrollbar()
+        if self._select_after_load is not None:
+            position, self._select_after_load = self._select_after_load, None
+            self._select_at(position)
+        self._measure_rows()
+
+    def _measure_rows(self):
+        """表示中の項目から行の高さを測り、表示できる行数が変わったら表示し直す"""
+        if self._row_height or not self._rendered or self.winfo_height() <= 1:
+            return
+        bbox = self.bbox(self.get_children('')[0])
+        if not bbox:
+            # まだ画面に表示されていない
+            return
+        self._header_height = bbox[1]
+        self._row_height = bbox[3]
+        rows = self._rows_for_height(self.winfo_height())
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._render()
+
+    def _rows_for_height(self, height):
+        """ウィジェットの高さに収まる行数"""
+        row_height = self._row_height or DEFAULT_ROW_HEIGHT
+        header_height = self._header_height if self._header_height is not None else row_height + 4
+        return max(1, (height - header_height - 2) // row_height)
+
+    def _on_configure(self, event):
+        if event.height <= 1:
+            return
+        rows = self._rows_for_height(event.height)
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._render()
+
+    # ---- スクロール（ttk.Scrollbarから呼ばれる） ----
+
+    def configure(self, cnf=None, **kw):
+        # yscrollcommandは全行に対する位置で呼ぶため、Treeview本体には渡さない
+        if 'yscrollcommand' in kw:
+            self._yscrollcommand = kw.pop('yscrollcommand')
+            self._update_scrollbar()
+            if cnf is None and not kw:
+                return None
+        return super().configure(cnf, **kw)
+
+    config = configure
+
+    def __setitem__(self, key, value):
+        if key == 'yscrollcommand':
+            self.configure(yscrollcommand=value)
+        else:
+            super().__setitem__(key, value)
+
+    def yview(self, *args):
+        """全行に対するスクロール位置の取得・移動（'moveto' / 'scroll'）"""
+        if not args:
+            return self._fractions()
+        if args[0] == 'moveto':
+            self.scroll_to(round(float(args[1]) * self._total))
+        elif args[0] == 'scroll':
+            step = self._visible_rows if args[2] == 'pages' else 1
+            self._scroll_by(int(args[1]) * step)
+        return None
+
+    def yview_moveto(self, fraction):
+        self.yview('moveto', fraction)
+
+    def yview_scroll(self, number, what):
+        self.yview('scroll', number, what)
+
+    def scroll_to(self, offset):
+        """offset行目が先頭になるようにスクロール"""
+        offset = max(0, min(int(offset), self._total - self._visible_rows))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _scroll_by(self, rows):
+        self.scroll_to(self._offset + rows)
+        return 'break'
+
+    def _fractions(self):
+        if not self._total:
+            return 0.0, 1.0
+        first = self._offset / self._total
+        last = min(1.0, (self._offset + self._visible_rows) / self._total)
+        return first, last
+
+    def _update_scrollbar(self):
+        if self._yscrollcommand:
+            self._yscrollcommand(*self._fractions())
+
+    def _on_mousewheel(self, event):
+        if event.delta:
+            return self._scroll_by(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+        return 'break'
+
+    def _on_key(self, event):
+        """表示範囲の端でのキー操作は、範囲を動かしてから選択を移す"""
+        children = self.get_children('')
+        if not children:
+            return None
+        focus = self.focus()
+        keysym = event.keysym
+        if keysym == 'Down' and focus == children[-1] and self._offset + len(children) < self._total:
+            self._scroll_by(1)
+            self._select_at(-1)
+        elif keysym == 'Up' and focus == children[0] and self._offset > 0:
+            self._scroll_by(-1)
+            self._select_at(0)
+        elif keysym == 'Next':
+            self._scroll_by(self._visible_rows)
+            self._select_at(-1)
+        elif keysym == 'Prior':
+            self._scroll_by(-self._visible_rows)
+            self._select_at(0)
+        elif keysym == 'End':
+            self.scroll_to(self._total)
+            self._select_at(-1)
+        elif keysym == 'Home':
+            self.scroll_to(0)
+            self._select_at(0)
+        else:
+            # 表示範囲の中の移動はTreeview標準の処理
+            return None
+        return 'break'
+
+    def _select_at(self, position):
+        if self._loading:
+            # 表示範囲のページを読み込み中（読み込んで表示し直した後に選択）
+            self._select_after_load = position
+            return
+        children = self.get_children('')
+        if children:
+            iid = children[position]
+            self.focus(iid)
+            self.selection_set(iid)
+
+    # ---- 選択 ----
+
+    def _on_select(self, event):
+        """
+        選択の変更を記録
+
+        表示範囲の入れ替えで項目が消えた・作り直した時の選択の変化はアプリに通知しない。
+        """
+        current = set(self.selection())
+        expected = {iid for iid in self._rendered if iid in self._selected}
+        if current == expected:
+            return 'break'
+        self._selected = current
+        return None
@@ -0,0 +1,177 @@
+"""
+起動時間の計測（起動トレースモード）
+- python main.py --trace-startup で有効（通常の起動では何もしない）
+- アプリを -X importtime 付きで起動し直し、モジュールごとのimport時間を集計
+- 初期化の段階ごとの時間と、最初のウィンドウが表示されるまでの時間を記録
+- 最初のウィンドウが表示されたらアプリを終了し、結果を表示する
+"""
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+# 起動トレースモードを指定するコマンドライン引数
+TRACE_FLAG = '--trace-startup'
+
+# 子プロセスに渡す環境変数（結果を書き出すJSONのパス・親プロセスが起動した時刻）
+REPORT_ENV = 'ASSESSMENT_TOOL_TRACE_REPORT'
+LAUNCHED_AT_ENV = 'ASSESSMENT_TOOL_TRACE_LAUNCHED_AT'
+
+# 表示するimportの件数
+TOP_IMPORTS = 15
+
+# 「import time:      self [us] |  cumulative | imported package」の行
+_IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$')
+
+
+class StartupTrace:
+    """起動処理の段階ごとの時間を記録"""
+
+    def __init__(self, enabled=False, report_path=None, origin=None):
+        self.enabled = enabled
+        self.report_path = report_path
+        # 計測の起点（main.pyの先頭で取得したperf_counterの値）
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.steps = []
+        self.marks = {}
+
+    @contextmanager
+    def step(self, name):
+        """with文の中の処理時間を記録"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append({
+                'name': name,
+                'start_ms': round((start - self.origin) * 1000, 1),
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+            })
+
+    def mark(self, name):
+        """起点からの経過時間を記録"""
+        if self.enabled:
+            self.marks[name] = round((time.perf_counter() - self.origin) * 1000, 1)
+
+    def save(self):
+        """結果をJSONに書き出す（親プロセスが読み込んで表示する）"""
+        if not self.enabled or not self.report_path:
+            return
+        report = {'steps': self.steps, 'marks': self.marks}
+        launched_at = os.environ.get(LAUNCHED_AT_ENV)
+        if launched_at:
+            # プロセスの起動（インタプリタの初期化を含む）からの時間
+            report['since_launch_ms'] = round((time.time() - float(launched_at)) * 1000, 1)
+        with open(self.report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False)
+
+
+_trace = None
+
+
+def get_trace(origin=None):
+    """このプロセスの起動トレース（起動トレースモードでなければ記録しない）"""
+    global _trace
+    if _trace is None:
+        report_path = os.environ.get(REPORT_ENV)
+        _trace = StartupTrace(enabled=bool(report_path), report_path=report_path, origin=origin)
+    return _trace
+
+
+def parse_importtime(lines):
+    """
+    -X importtime の出力を解析
+
+    Returns:
+        list: {'name', 'self_us', 'cumulative_us', 'depth'} のリスト（出力順）
+    """
+    entries = []
+    for line in lines:
+        match = _IMPORTTIME_PATTERN.match(line.rstrip('\n'))
+        if not match:
+            continue
+        entries.append({
+            'name': match.group(4),
+            'self_us': int(match.group(1)),
+            'cumulative_us': int(match.group(2)),
+            # 「|」の後の空白は1個＋深さごとに2個
+            'depth': (len(match.group(3)) - 1) // 2,
+        })
+    return entries
+
+
+def print_report(report, imports, top=TOP_IMPORTS):
+    """計測結果を表示"""
+    print('=' * 70)
+    print('起動時間の計測結果')
+    print('=' * 70)
+
+    # トップレベルのimport（それ以下のimportを含む時間）
+    top_level = sorted((e for e in imports if e['depth'] == 0), key=lambda e: e['cumulative_us'], reverse=True)
+    total_us = sum(e['cumulative_us'] for e in top_level)
+    print(f"\n📦 import（合計 {total_us / 1000:.1f}ms、上位{top}件）")
+    print(f"{'累積ms':>10}{'自身ms':>10}  モジュール")
+    for entry in top_level[:top]:
+        print(f"{entry['cumulative_us'] / 1000:>10.1f}{entry['self_us'] / 1000:>10.1f}  {entry['name']}")
+
+    print('\n⏱️ 初期化の段階')
+    print(f"{'開始ms':>10}{'所要ms':>10}  段階")
+    for step in report.get('steps', []):
+        print(f"{step['start_ms']:>10.1f}{step['elapsed_ms']:>10.1f}  {step['name']}")
+
+    print('\n🏁 経過時間（main.pyの開始から）')
+    for name, ms in report.get('marks', {}).items():
+        print(f"{ms:>10.1f}ms  {name}")
+    if 'since_launch_ms' in report:
+        print(f"{report['since_launch_ms']:>10.1f}ms  最初のウィンドウ（Pythonの起動から）")
+    print('=' * 70)
+
+
+def run_traced(script_path, args):
+    """
+    -X importtime を付けてアプリを起動し直し、終了後に計測結果を表示
+
+    Returns:
+        int: 子プロセスの終了コード
+    """
+    # 通常の起動では使わないためここでimport
+    import subprocess
+    import tempfile
+
+    fd, report_path = tempfile.mkstemp(prefix='startup_trace_', suffix='.json')
+    os.close(fd)
+    env = dict(os.environ)
+    env[REPORT_ENV] = report_path
+    env[LAUNCHED_AT_ENV] = repr(time.time())
+
+    try:
+        process = subprocess.Popen(
+            [sys.executable, '-X', 'importtime', str(script_path), *args],
+            env=env, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace',
+        )
+        # importtime以外の標準エラー出力（エラーメッセージなど）はそのまま表示
+        import_lines = []
+        for line in process.stderr:
+            if line.startswith('import time:'):
+                import_lines.append(line)
+            else:
+                sys.stderr.write(line)
+        returncode = process.wait()
+
+        try:
+            with open(report_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+        print_report(report, parse_importtime(import_lines))
+        return returncode
+    finally:
+        try:
+            os.remove(report_path)
+        except OSError:
+            pass
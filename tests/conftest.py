@@ -0,0 +1,7 @@
+"""テストの共通設定（リポジトリのルートから src を読み込めるようにする）"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
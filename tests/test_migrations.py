@@ -0,0 +1,309 @@
+"""
+マイグレーションのテスト
+- マイグレーション導入前のアプリが作ったDB（user_version 0）と、途中まで適用したDBを用意して migrate() を実行
+- 最新のバージョンになること、2回目は何もしないこと（初期データが重複しないこと）、
+  既存のデータから作るテーブル（集計・課題・目標など）が埋まることを確認する
+"""
+import json
+import sqlite3
+
+import pytest
+
+from src.database.connection import close_all_pools, get_pool
+from src.database.migrations import MIGRATIONS, SCHEMA_VERSION, get_schema_version, migrate
+
+# マイグレーション導入前のアプリ（HistoryManager / StaffManager）が作っていたテーブル
+BASELINE_SCHEMA = '''
+    CREATE TABLE interview_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        child_initials TEXT NOT NULL,
+        grade INTEGER,
+        gender TEXT,
+        school_name TEXT,
+        memo TEXT,
+        issues_json TEXT,
+        short_term_plan_json TEXT,
+        long_term_plan_json TEXT,
+        future_path_json TEXT,
+        medical_info_json TEXT,
+        keywords TEXT,
+        interview_date DATE,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_keywords ON interview_history(keywords);
+    CREATE INDEX idx_grade ON interview_history(grade);
+    CREATE TABLE staff (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        gender TEXT NOT NULL,
+        region TEXT NOT NULL,
+        hobbies_skills TEXT,
+        previous_job TEXT,
+        dropbox_number TEXT,
+        work_days TEXT,
+        work_hours TEXT,
+        case_district TEXT,
+        case_number TEXT,
+        case_day TEXT,
+        case_time TEXT,
+        case_frequency TEXT,
+        case_location TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT
+    );
+    CREATE TABLE unassigned_cases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_number TEXT NOT NULL UNIQUE,
+        district TEXT,
+        child_name TEXT,
+        child_age INTEGER,
+        child_gender TEXT,
+        preferred_day TEXT,
+        preferred_time TEXT,
+        frequency TEXT,
+        location TEXT,
+        notes TEXT,
+        status TEXT DEFAULT '未割り当て',
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE areas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        display_order INTEGER
+    );
+    CREATE TABLE districts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        area_id INTEGER NOT NULL,
+        display_order INTEGER,
+        FOREIGN KEY (area_id) REFERENCES areas(id)
+    );
+    CREATE TABLE cases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_number TEXT NOT NULL,
+        district_id INTEGER NOT NULL,
+        phone_number TEXT,
+        child_name TEXT,
+        child_last_name TEXT,
+        child_first_name TEXT,
+        schedule_day TEXT,
+        schedule_time TEXT,
+        location TEXT,
+        first_meeting_date DATE,
+        frequency TEXT,
+        notes TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (district_id) REFERENCES districts(id)
+    );
+    CREATE TABLE staff_cases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        staff_id INTEGER NOT NULL,
+        case_id INTEGER NOT NULL,
+        assigned_date DATE DEFAULT CURRENT_DATE,
+        is_primary BOOLEAN DEFAULT 1,
+        FOREIGN KEY (staff_id) REFERENCES staff(id),
+        FOREIGN KEY (case_id) REFERENCES cases(id),
+        UNIQUE(staff_id, case_id)
+    );
+    CREATE TABLE schedules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        staff_id INTEGER NOT NULL,
+        case_id INTEGER,
+        day_of_week TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        location TEXT,
+        schedule_type TEXT,
+        color_code TEXT,
+        notes TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        FOREIGN KEY (staff_id) REFERENCES staff(id),
+        FOREIGN KEY (case_id) REFERENCES cases(id)
+    );
+'''
+
+AREAS = [('東エリア', 1), ('南エリア', 2)]
+DISTRICTS = [('城東区', 1, 1), ('鶴見区', 1, 2), ('阿倍野区', 2, 3)]
+STAFF = [
+    ('巽', 35, '男性', '大阪府大阪市', 1),
+    ('岡本', 28, '女性', '大阪府大阪市', 1),
+    ('松内', 42, '男性', '大阪府堺市', 0),
+]
+INTERVIEWS = [
+    # (イニシャル, 学年, 性別, 課題, 短期目標, 長期目標, 面談実施日)
+    ('AB', 8, '女性', {'生活リズム': {'該当': True, '詳細': '昼夜逆転'}, '対人緊張の高さ': {'該当': True, '詳細': ''}},
+     {'課題': '生活リズム', '目標': '朝起きる'}, {'目標': '登校'}, '2025-04-10'),
+    ('CD', 5, '男性', {'不登校': {'該当': False, '詳細': ''}},
+     {'目標': '外出する'}, {}, '2025-05-01'),
+    # 不正なJSON（課題・目標は展開されない）
+    ('EF', 11, '女性', 'not json', '[1, 2]', None, None),
+]
+
+
+def create_baseline_db(path):
+    """マイグレーション導入前のアプリが作ったDB（初期データと業務データ入り）"""
+    conn = sqlite3.connect(str(path))
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany('INSERT INTO areas (name, display_order) VALUES (?, ?)', AREAS)
+    conn.executemany('INSERT INTO districts (name, area_id, display_order) VALUES (?, ?, ?)', DISTRICTS)
+    conn.executemany(
+        'INSERT INTO staff (name, age, gender, region, is_active, case_day, case_time, case_frequency) '
+        "VALUES (?, ?, ?, ?, ?, '火', '14:00-16:00', '週1回')",
+        STAFF
+    )
+    conn.execute(
+        "INSERT INTO cases (case_number, district_id, schedule_day, schedule_time, frequency, first_meeting_date) "
+        "VALUES ('C001', 1, '火', '14:00-16:00', '週1回', '2025-04-01')"
+    )
+    conn.execute("INSERT INTO cases (case_number, district_id, is_active) VALUES ('C002', 3, 0)")
+    conn.executemany('INSERT INTO staff_cases (staff_id, case_id) VALUES (?, ?)', [(1, 1), (1, 2), (2, 1)])
+    conn.execute(
+        "INSERT INTO schedules (staff_id, case_id, day_of_week, start_time, end_time) "
+        "VALUES (1, 1, '火', '14:00', '16:00')"
+    )
+    conn.execute("INSERT INTO unassigned_cases (case_number, district) VALUES ('U001', '城東区')")
+    for initials, grade, gender, issues, short_plan, long_plan, interview_date in INTERVIEWS:
+        insert_interview(conn, initials, grade, gender, issues, short_plan, long_plan, interview_date)
+    conn.commit()
+    conn.close()
+
+
+def insert_interview(conn, initials, grade, gender, issues, short_plan, long_plan, interview_date):
+    """古いバージョンのアプリと同じ列だけを指定して面談記録を追加"""
+    def dump(value):
+        return value if isinstance(value, str) or value is None else json.dumps(value, ensure_ascii=False)
+    conn.execute(
+        'INSERT INTO interview_history (child_initials, grade, gender, memo, issues_json, '
+        'short_term_plan_json, long_term_plan_json, interview_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (initials, grade, gender, '昼夜逆転が続いている', dump(issues), dump(short_plan), dump(long_plan),
+         interview_date)
+    )
+
+
+def counts(conn, *tables):
+    return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in tables}
+
+
+@pytest.fixture
+def baseline_pool(tmp_path):
+    path = tmp_path / 'records.db'
+    create_baseline_db(path)
+    yield get_pool(path, journal_mode='delete')
+    close_all_pools()
+
+
+def test_latest_version_is_10():
+    assert SCHEMA_VERSION == 10
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, SCHEMA_VERSION + 1))
+
+
+def test_baseline_db_is_migrated_in_place(baseline_pool):
+    assert get_schema_version(baseline_pool.connect()) == 0
+
+    assert migrate(baseline_pool) == list(range(1, 11))
+
+    conn = baseline_pool.connect()
+    assert get_schema_version(conn) == 10
+    # 既存の初期データ・業務データはそのまま（初期データを重ねて投入しない）
+    assert counts(conn, 'areas', 'districts', 'staff', 'cases', 'staff_cases', 'schedules',
+                  'unassigned_cases', 'interview_history') == {
+        'areas': len(AREAS), 'districts': len(DISTRICTS), 'staff': len(STAFF), 'cases': 2,
+        'staff_cases': 3, 'schedules': 1, 'unassigned_cases': 1, 'interview_history': len(INTERVIEWS),
+    }
+
+
+def test_second_run_does_nothing(baseline_pool):
+    migrate(baseline_pool)
+    conn = baseline_pool.connect()
+    tables = ('areas', 'districts', 'staff', 'interview_issues', 'interview_plans', 'stat_staff', 'stat_issues')
+    before = counts(conn, *tables)
+
+    assert migrate(baseline_pool) == []
+    assert get_schema_version(conn) == 10
+    assert counts(conn, *tables) == before
+
+
+def test_fresh_db_is_seeded_once(tmp_path):
+    pool = get_pool(tmp_path / 'fresh.db', journal_mode='delete')
+    try:
+        migrate(pool)
+        conn = pool.connect()
+        seeded = counts(conn, 'areas', 'districts', 'staff')
+        assert all(seeded.values())
+        migrate(pool)
+        assert counts(conn, 'areas', 'districts', 'staff') == seeded
+    finally:
+        close_all_pools()
+
+
+def test_backfills_are_populated(baseline_pool):
+    migrate(baseline_pool)
+    conn = baseline_pool.connect()
+
+    # v5: 週間スケジュールの分の列（値は StaffManager.sync_all_cases_to_schedule が埋める）
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(schedules)')}
+    assert {'start_min', 'end_min'} <= columns
+
+    # v9: 集計テーブル（稼働中の支援員・担当ケース・面談記録と課題）
+    staff_counts = dict(conn.execute("SELECT key, count FROM stat_staff WHERE dimension = 'gender' AND count > 0"))
+    assert staff_counts == {'男性': 1, '女性': 1}
+    caseloads = {row[0]: (row[1], row[2]) for row in conn.execute(
+        'SELECT staff_id, cases, active_cases FROM stat_caseload')}
+    assert caseloads == {1: (2, 1), 2: (1, 1)}
+    assert conn.execute('SELECT SUM(count) FROM stat_interviews').fetchone()[0] == len(INTERVIEWS)
+    assert dict(conn.execute('SELECT issue, SUM(count) FROM stat_issues GROUP BY issue')) == {
+        '生活リズム': 1, '対人緊張の高さ': 1,
+    }
+
+    # v10: 課題・目標のテーブル（不正なJSONの記録は展開しない）
+    issues = {(row[0], row[1]): (row[2], row[3]) for row in conn.execute(
+        'SELECT interview_id, issue_code, checked, detail FROM interview_issues')}
+    assert issues == {
+        (1, '生活リズム'): (1, '昼夜逆転'),
+        (1, '対人緊張の高さ'): (1, ''),
+        (2, '不登校'): (0, ''),
+    }
+    plans = {tuple(row[:3]): row[3] for row in conn.execute(
+        'SELECT interview_id, term, field, value FROM interview_plans')}
+    assert plans == {
+        (1, 'short', '課題'): '生活リズム',
+        (1, 'short', '目標'): '朝起きる',
+        (1, 'long', '目標'): '登校',
+        (2, 'short', '目標'): '外出する',
+    }
+
+
+def test_partially_migrated_db_catches_up(baseline_pool):
+    # v6まで適用した古いバージョンのアプリが、その後も記録を追加していたDB
+    assert migrate(baseline_pool, target=6) == list(range(1, 7))
+    with baseline_pool.transaction() as conn:
+        insert_interview(conn, 'GH', 8, '男性', {'生活リズム': {'該当': True, '詳細': ''}}, {'目標': '通所'}, {},
+                         '2025-06-01')
+
+    assert migrate(baseline_pool) == list(range(7, 11))
+    conn = baseline_pool.connect()
+    assert get_schema_version(conn) == 10
+    new_id = conn.execute('SELECT MAX(id) FROM interview_history').fetchone()[0]
+    assert conn.execute(
+        "SELECT checked FROM interview_issues WHERE interview_id = ? AND issue_code = '生活リズム'", (new_id,)
+    ).fetchone()[0] == 1
+    assert conn.execute('SELECT SUM(count) FROM stat_interviews').fetchone()[0] == len(INTERVIEWS) + 1
+    assert counts(conn, 'areas', 'districts') == {'areas': len(AREAS), 'districts': len(DISTRICTS)}
+
+
+def test_triggers_keep_issue_tables_in_sync(baseline_pool):
+    migrate(baseline_pool)
+    with baseline_pool.transaction() as conn:
+        conn.execute('UPDATE interview_history SET issues_json = ? WHERE id = 2',
+                     (json.dumps({'不登校': {'該当': True, '詳細': '週1回登校'}}, ensure_ascii=False),))
+        conn.execute('DELETE FROM interview_history WHERE id = 1')
+    conn = baseline_pool.connect()
+    assert [tuple(row) for row in conn.execute('SELECT interview_id, issue_code, checked, detail FROM interview_issues')] == [
+        (2, '不登校', 1, '週1回登校'),
+    ]
+    assert conn.execute('SELECT COUNT(*) FROM interview_plans WHERE interview_id = 1').fetchone()[0] == 0
@@ -0,0 +1,75 @@
+"""
+類似ケース検索のテスト
+- numpyがある場合は類似検索エンジンで並べること
+- numpyがない場合はFTS5のbm25の関連度順に並ぶこと（代わりの検索）
+"""
+import pytest
+
+from src.database import similarity
+from src.database.connection import close_all_pools
+from src.database.history import HistoryManager
+
+ISSUES = {'生活リズム': {'該当': True}}
+
+# キーワード・課題・学年・性別は同じで、メモの「昼夜逆転」の出現回数だけが違う2件
+FREQUENT_MEMO = '昼夜逆転が続いている。昼夜逆転のため朝起きられない。昼夜逆転を直したい。'
+SINGLE_MEMO = '昼夜逆転がある。部活の話をした。家族と買い物に出かけた。'
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """一時フォルダのDBに、メモだけが違う面談記録を2件保存したHistoryManager"""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    manager = HistoryManager(tmp_path / 'records.db')
+    for memo in (FREQUENT_MEMO, SINGLE_MEMO):
+        manager.save_interview(
+            {'児童イニシャル': 'A.B', '学年': 8, '性別': '男性', 'メモ': memo},
+            {'issues': ISSUES}
+        )
+    yield manager
+    close_all_pools()
+
+
+def search(manager):
+    return manager.search_similar_cases(
+        {'学年': 8, '性別': '男性', 'メモ': '昼夜逆転'}, limit=2, issues=ISSUES
+    )
+
+
+@pytest.mark.skipif(not similarity.is_available(), reason='numpyが必要')
+def test_vector_search_is_used_with_numpy(history, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('numpyがある場合はFTS5で検索しない')
+    monkeypatch.setattr(history, '_search_fts', fail)
+
+    results = search(history)
+
+    # 課題・キーワード・学年・性別が同じため同点で、新しいケースが先
+    assert [case['memo'] for case in results] == [SINGLE_MEMO, FREQUENT_MEMO]
+    assert results[0]['score'] == pytest.approx(results[1]['score'])
+
+
+def test_fts_is_the_fallback_without_numpy(history, monkeypatch):
+    if not history.fts_enabled:
+        pytest.skip('FTS5が使えないSQLite')
+    monkeypatch.setattr(similarity, 'is_available', lambda: False)
+    history._similarity_index = None
+    assert history.similarity_index is None
+
+    results = search(history)
+
+    # bm25の関連度順（メモに「昼夜逆転」が多い方が先。LIKE検索ならキーワードの一致数が同じため同点）
+    assert [case['memo'] for case in results] == [FREQUENT_MEMO, SINGLE_MEMO]
+    assert results[0]['score'] > results[1]['score']
+
+
+def test_fts_fallback_accepts_quotes_in_keywords(history):
+    if not history.fts_enabled:
+        pytest.skip('FTS5が使えないSQLite')
+
+    results = history._search_fts(
+        history.pool.connect().cursor(), ['昼夜"逆転'], '1=1', [], 2
+    )
+
+    # 検索式に埋め込まず、フレーズとしてエスケープされるためエラーにならない（一致なしは新しい順で補完）
+    assert len(results) == 2